@@ -34,6 +34,16 @@ rfi_manager = RFIManager()
 design_manager = DesignExecutionManager()
 
 
+def init_advanced_apis(store=None):
+    """
+    ربط مديري RFI والتصميم بمخزن السجلات الدائم
+    Rebind the RFI and design managers to the app's RecordStore
+    """
+    global rfi_manager, design_manager
+    rfi_manager = RFIManager(store)
+    design_manager = DesignExecutionManager(store)
+
+
 # ==================== Dashboard APIs ====================
 
 @advanced_api.route('/api/dashboards/<role>', methods=['GET'])
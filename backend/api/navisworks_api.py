@@ -2,12 +2,14 @@
 Navisworks API Endpoints
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from datetime import datetime
 import traceback
 import time
 import json
 
+from services.navisworks_element_store import ModelElementStore
+
 # سيتم استيراد NavisworksService عند التشغيل
 # from services.navisworks_service import NavisworksService
 
@@ -16,7 +18,10 @@ navisworks_bp = Blueprint('navisworks', __name__, url_prefix='/api/projects')
 
 # In-memory storage (replace with MongoDB in production)
 MODELS_STORE = {}
-ELEMENTS_STORE = {}
+# modelId -> ModelElementStore (indexed elements of each model)
+ELEMENT_STORES = {}
+# importId -> chunked import in progress
+IMPORT_SESSIONS = {}
 
 
 def generate_id():
@@ -25,6 +30,61 @@ def generate_id():
     return str(uuid.uuid4())
 
 
+def _model_header(model_data):
+    """Model data without the elements array (elements live in the store)"""
+    return {key: value for key, value in model_data.items() if key != 'elements'}
+
+
+def _store_model(project_id, model_id, header, store):
+    """Register an imported model and its element store"""
+    imported_at = datetime.utcnow().isoformat()
+    MODELS_STORE[model_id] = {
+        'modelId': model_id,
+        'projectId': project_id,
+        'fileName': header['fileName'],
+        'modelData': header,
+        'importedAt': imported_at,
+        'viewerUrl': f'/projects/{project_id}/navisworks/{model_id}'
+    }
+    ELEMENT_STORES[model_id] = store
+    # Build the spatial index once, at import time
+    store.spatial_index()
+    
+    return {
+        'modelId': model_id,
+        'projectId': project_id,
+        'fileName': header['fileName'],
+        'elementsImported': len(store),
+        'importedAt': imported_at,
+        'statistics': store.statistics(),
+        'viewerUrl': f'/projects/{project_id}/navisworks/{model_id}',
+        'warnings': []
+    }
+
+
+def _quantize_requested():
+    """?quantize=true stores vertices as uint16 relative to each element's box"""
+    return request.args.get('quantize', 'false').lower() in ('1', 'true', 'yes')
+
+
+def _geometry_mode():
+    """?geometry=json (default) | summary | none for JSON element responses"""
+    mode = request.args.get('geometry', 'json')
+    return mode if mode in ('json', 'summary', 'none') else 'json'
+
+
+def _iter_ndjson(stream):
+    """Yield one element per non-empty NDJSON line without buffering the body"""
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            raise ValueError(f'Invalid NDJSON at line {line_number}: {e}')
+
+
 @navisworks_bp.route('/<project_id>/navisworks/import', methods=['POST'])
 def import_model(project_id):
     """
@@ -58,69 +118,222 @@ def import_model(project_id):
         # Generate model ID
         model_id = generate_id()
         
-        # Calculate statistics
-        elements = model_data.get('elements', [])
-        elements_with_geometry = sum(1 for el in elements if el.get('geometry'))
-        elements_with_properties = sum(1 for el in elements if el.get('properties'))
+        # Index elements and calculate statistics in one pass;
+        # elements are kept once, in the store
+        store = ModelElementStore(model_id, project_id, quantize=_quantize_requested())
+        store.add_elements(model_data['elements'])
         
-        elements_by_category = {}
-        for el in elements:
-            cat = el.get('category', 'Unknown')
-            elements_by_category[cat] = elements_by_category.get(cat, 0) + 1
+        return jsonify({
+            'success': True,
+            'data': _store_model(project_id, model_id, _model_header(model_data), store)
+        }), 201
         
-        # Store model
-        model_doc = {
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        print(f"Error importing model: {str(e)}")
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@navisworks_bp.route('/<project_id>/navisworks/imports', methods=['POST'])
+def begin_import(project_id):
+    """
+    Begin a chunked import
+    POST /api/projects/:projectId/navisworks/imports
+    
+    Body: model header (fileName, title, units, boundingBox, ...) without elements
+    """
+    try:
+        header = request.get_json(silent=True)
+        
+        if not header or not header.get('fileName'):
+            return jsonify({
+                'success': False,
+                'error': 'fileName is required'
+            }), 400
+        
+        import_id = generate_id()
+        model_id = generate_id()
+        IMPORT_SESSIONS[import_id] = {
+            'importId': import_id,
             'modelId': model_id,
             'projectId': project_id,
-            'fileName': model_data['fileName'],
-            'modelData': model_data,
-            'importedAt': datetime.utcnow().isoformat(),
-            'viewerUrl': f'/projects/{project_id}/navisworks/{model_id}'
+            'header': _model_header(header),
+            'store': ModelElementStore(model_id, project_id, quantize=_quantize_requested()),
+            'nextSequence': 0,
+            'startedAt': datetime.utcnow().isoformat()
         }
         
-        MODELS_STORE[model_id] = model_doc
-        
-        # Store elements separately
-        for el in elements:
-            element_key = f"{model_id}_{el['id']}"
-            ELEMENTS_STORE[element_key] = {
-                'modelId': model_id,
-                'projectId': project_id,
-                'elementId': el['id'],
-                'elementData': el
-            }
-        
-        # Response
-        response = {
+        return jsonify({
             'success': True,
             'data': {
+                'importId': import_id,
                 'modelId': model_id,
-                'projectId': project_id,
-                'fileName': model_data['fileName'],
-                'elementsImported': len(elements),
-                'importedAt': datetime.utcnow().isoformat(),
-                'statistics': {
-                    'totalElements': len(elements),
-                    'elementsWithGeometry': elements_with_geometry,
-                    'elementsWithProperties': elements_with_properties,
-                    'elementsByCategory': elements_by_category
-                },
-                'viewerUrl': f'/projects/{project_id}/navisworks/{model_id}',
-                'warnings': []
+                'nextSequence': 0
             }
-        }
+        }), 201
+        
+    except Exception as e:
+        print(f"Error starting import: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+def _get_session(project_id, import_id):
+    session = IMPORT_SESSIONS.get(import_id)
+    if not session or session['projectId'] != project_id:
+        return None
+    return session
+
+
+def _session_status(session):
+    return {
+        'importId': session['importId'],
+        'modelId': session['modelId'],
+        'nextSequence': session['nextSequence'],
+        'elementsReceived': len(session['store'])
+    }
+
+
+@navisworks_bp.route('/<project_id>/navisworks/imports/<import_id>', methods=['GET'])
+def get_import(project_id, import_id):
+    """
+    Chunked import status (used to resume after a failure)
+    GET /api/projects/:projectId/navisworks/imports/:importId
+    """
+    session = _get_session(project_id, import_id)
+    if not session:
+        return jsonify({
+            'success': False,
+            'error': 'Import not found'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'data': _session_status(session)
+    })
+
+
+@navisworks_bp.route('/<project_id>/navisworks/imports/<import_id>/elements', methods=['POST'])
+def append_import_elements(project_id, import_id):
+    """
+    Append one batch of elements as NDJSON (one element per line)
+    POST /api/projects/:projectId/navisworks/imports/:importId/elements?sequence=N
+    
+    Batches are numbered from 0.  A batch that was already applied is
+    acknowledged without being applied again, so a client can safely
+    retry the last batch after a dropped connection.
+    """
+    try:
+        session = _get_session(project_id, import_id)
+        if not session:
+            return jsonify({
+                'success': False,
+                'error': 'Import not found'
+            }), 404
         
-        return jsonify(response), 201
+        sequence = request.args.get('sequence', type=int)
+        if sequence is None:
+            sequence = session['nextSequence']
         
+        if sequence < session['nextSequence']:
+            return jsonify({
+                'success': True,
+                'data': {**_session_status(session), 'duplicate': True}
+            })
+        
+        if sequence > session['nextSequence']:
+            return jsonify({
+                'success': False,
+                'error': 'Batch out of order',
+                'data': _session_status(session)
+            }), 409
+        
+        # Parse the whole batch before applying it so a bad line leaves
+        # the import at the previous batch and the batch can be re-sent
+        batch = list(_iter_ndjson(request.stream))
+        if any('id' not in element for element in batch):
+            return jsonify({
+                'success': False,
+                'error': 'Every element requires an id'
+            }), 400
+        
+        added = session['store'].add_elements(batch)
+        session['nextSequence'] += 1
+        
+        return jsonify({
+            'success': True,
+            'data': {**_session_status(session), 'elementsAdded': added}
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
-        print(f"Error importing model: {str(e)}")
-        traceback.print_exc()
+        print(f"Error appending elements: {str(e)}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 
+@navisworks_bp.route('/<project_id>/navisworks/imports/<import_id>/commit', methods=['POST'])
+def commit_import(project_id, import_id):
+    """
+    Commit a chunked import and publish the model
+    POST /api/projects/:projectId/navisworks/imports/:importId/commit
+    """
+    session = _get_session(project_id, import_id)
+    if not session:
+        return jsonify({
+            'success': False,
+            'error': 'Import not found'
+        }), 404
+    
+    if not len(session['store']):
+        return jsonify({
+            'success': False,
+            'error': 'elements array is required'
+        }), 400
+    
+    del IMPORT_SESSIONS[import_id]
+    
+    return jsonify({
+        'success': True,
+        'data': _store_model(project_id, session['modelId'], session['header'], session['store'])
+    }), 201
+
+
+@navisworks_bp.route('/<project_id>/navisworks/imports/<import_id>', methods=['DELETE'])
+def abort_import(project_id, import_id):
+    """
+    Abort a chunked import
+    DELETE /api/projects/:projectId/navisworks/imports/:importId
+    """
+    if not _get_session(project_id, import_id):
+        return jsonify({
+            'success': False,
+            'error': 'Import not found'
+        }), 404
+    
+    del IMPORT_SESSIONS[import_id]
+    return jsonify({
+        'success': True,
+        'message': 'Import aborted'
+    })
+
+
 @navisworks_bp.route('/<project_id>/navisworks/models', methods=['GET'])
 def get_models(project_id):
     """
@@ -152,7 +365,7 @@ def get_models(project_id):
             'fileName': m['fileName'],
             'importedAt': m['importedAt'],
             'viewerUrl': m.get('viewerUrl'),
-            'elementsCount': len(m['modelData'].get('elements', []))
+            'elementsCount': len(ELEMENT_STORES[m['modelId']])
         } for m in paginated]
         
         return jsonify({
@@ -194,9 +407,15 @@ def get_model(project_id, model_id):
                 'error': 'Model does not belong to this project'
             }), 403
         
+        store = ELEMENT_STORES[model_id]
+        geometry = _geometry_mode()
+        
         return jsonify({
             'success': True,
-            'data': model['modelData']
+            'data': {
+                **model['modelData'],
+                'elements': [store.to_json(element, geometry) for element in store.elements]
+            }
         })
         
     except Exception as e:
@@ -228,34 +447,20 @@ def get_elements(project_id, model_id):
         page = int(request.args.get('page', 1))
         page_size = int(request.args.get('pageSize', 100))
         
-        # Get all elements for this model
-        elements = [
-            e['elementData'] for key, e in ELEMENTS_STORE.items()
-            if e['modelId'] == model_id
-        ]
-        
-        # Apply filters
-        if category:
-            elements = [e for e in elements if e.get('category') == category]
-        
-        if search:
-            search_lower = search.lower()
-            elements = [
-                e for e in elements
-                if search_lower in e.get('name', '').lower() or
-                   search_lower in e.get('path', '').lower()
-            ]
-        
-        # Pagination
-        total = len(elements)
-        start = (page - 1) * page_size
-        end = start + page_size
-        paginated = elements[start:end]
+        # Filter and paginate through the model's category/trigram indexes
+        store = ELEMENT_STORES[model_id]
+        paginated, total = store.query(
+            category=category,
+            search=search,
+            page=page,
+            page_size=page_size
+        )
+        geometry = _geometry_mode()
         
         return jsonify({
             'success': True,
             'data': {
-                'elements': paginated,
+                'elements': [store.to_json(element, geometry) for element in paginated],
                 'totalCount': total,
                 'page': page,
                 'pageSize': page_size
@@ -277,8 +482,8 @@ def get_element(project_id, model_id, element_id):
     GET /api/projects/:projectId/navisworks/models/:modelId/elements/:elementId
     """
     try:
-        element_key = f"{model_id}_{element_id}"
-        element = ELEMENTS_STORE.get(element_key)
+        store = ELEMENT_STORES.get(model_id)
+        element = store.get(element_id) if store else None
         
         if not element:
             return jsonify({
@@ -288,7 +493,7 @@ def get_element(project_id, model_id, element_id):
         
         return jsonify({
             'success': True,
-            'data': element['elementData']
+            'data': store.to_json(element, _geometry_mode())
         })
         
     except Exception as e:
@@ -299,6 +504,168 @@ def get_element(project_id, model_id, element_id):
         }), 500
 
 
+def _geometry_response(geometry, element_id=None):
+    """Stream packed geometry buffers without copying them into JSON"""
+    return Response(
+        geometry.iter_blob(element_id),
+        mimetype='application/octet-stream',
+        headers={
+            'Content-Length': str(geometry.blob_size(element_id)),
+            'X-Geometry-Encoding': 'uint16-quantized' if geometry.quantize else 'float32'
+        }
+    )
+
+
+@navisworks_bp.route('/<project_id>/navisworks/models/<model_id>/geometry', methods=['GET'])
+def get_model_geometry(project_id, model_id):
+    """
+    Get the geometry of all elements as one binary blob
+    GET /api/projects/:projectId/navisworks/models/:modelId/geometry
+    
+    Layout: b'NWGB', uint32 version, uint32 header length, JSON header
+    (element ids, encoding and sections), then little-endian typed arrays
+    that map straight onto Float32Array / Uint32Array / Uint16Array.
+    """
+    model = MODELS_STORE.get(model_id)
+    if not model:
+        return jsonify({
+            'success': False,
+            'error': 'Model not found'
+        }), 404
+    
+    if model['projectId'] != project_id:
+        return jsonify({
+            'success': False,
+            'error': 'Model does not belong to this project'
+        }), 403
+    
+    return _geometry_response(ELEMENT_STORES[model_id].geometry)
+
+
+@navisworks_bp.route('/<project_id>/navisworks/models/<model_id>/elements/<element_id>/geometry', methods=['GET'])
+def get_element_geometry(project_id, model_id, element_id):
+    """
+    Get the geometry of one element as a binary blob
+    GET /api/projects/:projectId/navisworks/models/:modelId/elements/:elementId/geometry
+    """
+    store = ELEMENT_STORES.get(model_id)
+    if not store or element_id not in store.geometry:
+        return jsonify({
+            'success': False,
+            'error': 'Element geometry not found'
+        }), 404
+    
+    return _geometry_response(store.geometry, element_id)
+
+
+def _get_project_store(project_id, model_id):
+    """Element store of a model owned by the project, or an error response"""
+    model = MODELS_STORE.get(model_id)
+    if not model:
+        return None, (jsonify({
+            'success': False,
+            'error': 'Model not found'
+        }), 404)
+    
+    if model['projectId'] != project_id:
+        return None, (jsonify({
+            'success': False,
+            'error': 'Model does not belong to this project'
+        }), 403)
+    
+    return ELEMENT_STORES[model_id], None
+
+
+@navisworks_bp.route('/<project_id>/navisworks/models/<model_id>/spatial/range', methods=['GET'])
+def query_zone(project_id, model_id):
+    """
+    Elements whose bounding box intersects a zone
+    GET /api/projects/:projectId/navisworks/models/:modelId/spatial/range
+        ?minX=&minY=&minZ=&maxX=&maxY=&maxZ=[&category=&page=&pageSize=&geometry=]
+    """
+    try:
+        store, error = _get_project_store(project_id, model_id)
+        if error:
+            return error
+        
+        box = {}
+        for field in ('minX', 'minY', 'minZ', 'maxX', 'maxY', 'maxZ'):
+            value = request.args.get(field, type=float)
+            if value is None:
+                return jsonify({
+                    'success': False,
+                    'error': f'{field} is required'
+                }), 400
+            box[field] = value
+        
+        page = int(request.args.get('page', 1))
+        page_size = int(request.args.get('pageSize', 100))
+        start = max(page - 1, 0) * page_size
+        
+        rows = store.query_box(box, category=request.args.get('category'))
+        geometry = _geometry_mode()
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'elements': [
+                    store.to_json(store.elements[row], geometry) for row in rows[start:start + page_size]
+                ],
+                'totalCount': len(rows),
+                'page': page,
+                'pageSize': page_size
+            }
+        })
+        
+    except Exception as e:
+        print(f"Error querying zone: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@navisworks_bp.route('/<project_id>/navisworks/models/<model_id>/spatial/clashes', methods=['GET'])
+def get_clash_candidates(project_id, model_id):
+    """
+    Broad-phase clash candidates (pairs of elements with overlapping boxes)
+    GET /api/projects/:projectId/navisworks/models/:modelId/spatial/clashes
+        [?tolerance=0.01&categoryA=Duct&categoryB=Beam&limit=1000]
+    """
+    try:
+        store, error = _get_project_store(project_id, model_id)
+        if error:
+            return error
+        
+        tolerance = request.args.get('tolerance', 0.0, type=float)
+        limit = request.args.get('limit', 1000, type=int)
+        
+        pairs = store.clash_candidates(
+            tolerance=tolerance,
+            category_a=request.args.get('categoryA'),
+            category_b=request.args.get('categoryB')
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'pairs': [
+                    {'elementA': store.elements[a]['id'], 'elementB': store.elements[b]['id']}
+                    for a, b in pairs[:limit]
+                ],
+                'totalCount': len(pairs),
+                'tolerance': tolerance
+            }
+        })
+        
+    except Exception as e:
+        print(f"Error finding clash candidates: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @navisworks_bp.route('/<project_id>/navisworks/models/<model_id>/categories', methods=['GET'])
 def get_categories(project_id, model_id):
     """
@@ -313,15 +680,9 @@ def get_categories(project_id, model_id):
                 'error': 'Model not found'
             }), 404
         
-        # Get unique categories
-        elements = model['modelData'].get('elements', [])
-        categories = sorted(set(el.get('category', 'Unknown') for el in elements))
-        
-        # Count elements per category
-        category_counts = {}
-        for el in elements:
-            cat = el.get('category', 'Unknown')
-            category_counts[cat] = category_counts.get(cat, 0) + 1
+        # Counts are kept by the category index since import
+        category_counts = ELEMENT_STORES[model_id].category_counts()
+        categories = sorted(category_counts)
         
         return jsonify({
             'success': True,
@@ -389,9 +750,7 @@ def delete_model(project_id, model_id):
             }), 403
         
         # Delete elements
-        keys_to_delete = [k for k in ELEMENTS_STORE.keys() if k.startswith(f"{model_id}_")]
-        for key in keys_to_delete:
-            del ELEMENTS_STORE[key]
+        ELEMENT_STORES.pop(model_id, None)
         
         # Delete model
         del MODELS_STORE[model_id]
@@ -417,5 +776,5 @@ def health_check():
         'success': True,
         'message': 'Navisworks API is running',
         'modelsCount': len(MODELS_STORE),
-        'elementsCount': len(ELEMENTS_STORE)
+        'elementsCount': sum(len(store) for store in ELEMENT_STORES.values())
     })
@@ -4,23 +4,31 @@ Noufal Engineering System - Backend API
 Flask Server
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, Response, stream_with_context
 from flask_cors import CORS
 from pathlib import Path
-from datetime import datetime
+import os
 import sys
 
-# إضافة المسار
+# إضافة المسار (backend/ للأنظمة، والجذر لحزمة backend.scheduling)
 sys.path.append(str(Path(__file__).parent))
+sys.path.append(str(Path(__file__).parent.parent))
 
 # استيراد الأنظمة
 from core.ExcelIntelligence import ExcelIntelligence
+from core.WorkbookCache import WorkbookCache
 from core.ItemClassifier import ItemClassifier
 from core.ProductivityDatabase import ProductivityDatabase
 from core.ItemAnalyzer import ItemAnalyzer
 from core.RelationshipEngine import RelationshipEngine
-from core.ComprehensiveScheduler import ComprehensiveScheduler
+from core.ComprehensiveScheduler import ComprehensiveScheduler, CircularDependencyError
 from core.SBCComplianceChecker import SBCComplianceChecker
+from core.BOQAnalysisPipeline import BOQAnalysisPipeline
+from core.JobQueue import JobQueue, TERMINAL_STATUSES
+from core.AnalysisJobs import (
+    AnalysisSystems, JOB_HANDLERS, init_worker,
+    analyze_upload, generate_schedule as run_generate_schedule, generate_s_curve as run_generate_s_curve
+)
 from core.SCurveGenerator import SCurveGenerator
 from core.RequestParser import RequestParser
 from core.RequestExecutor import RequestExecutor
@@ -63,22 +71,29 @@ CORS(app)  # السماح بطلبات من Frontend
 
 # التكوين
 BASE_DIR = Path(__file__).parent
-app.config['UPLOAD_FOLDER'] = BASE_DIR.parent / 'uploads'
-app.config['DATABASE'] = BASE_DIR / 'database' / 'noufal.db'
+app.config['UPLOAD_FOLDER'] = Path(os.getenv('UPLOAD_FOLDER', str(BASE_DIR.parent / 'uploads')))
+app.config['DATABASE'] = Path(os.getenv('DATABASE_PATH', str(BASE_DIR / 'database' / 'noufal.db')))
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50 MB
+app.config['CACHE_DIR'] = Path(os.getenv('CACHE_DIR', str(BASE_DIR.parent / 'cache')))
+app.config['WORKBOOK_CACHE_DIR'] = app.config['CACHE_DIR'] / 'workbooks'
+app.config['WORKBOOK_CACHE_MAX_BYTES'] = 512 * 1024 * 1024  # 512 MB
+app.config['JOBS_DATABASE'] = app.config['CACHE_DIR'] / 'jobs.db'
+app.config['JOB_WORKERS'] = None  # الافتراضي: عدد المعالجات
 
 # تهيئة الأنظمة
 db_path = str(app.config['DATABASE'])
-excel_intel = ExcelIntelligence()
+workbook_cache = WorkbookCache(app.config['WORKBOOK_CACHE_DIR'], app.config['WORKBOOK_CACHE_MAX_BYTES'])
+excel_intel = ExcelIntelligence(workbook_cache)
 classifier = ItemClassifier(db_path)
 productivity_db = ProductivityDatabase(db_path)
 item_analyzer = ItemAnalyzer(db_path)
 relationship_engine = RelationshipEngine(db_path)
 scheduler = ComprehensiveScheduler(db_path)
 compliance_checker = SBCComplianceChecker(db_path)
+boq_analysis_pipeline = BOQAnalysisPipeline(classifier, item_analyzer, productivity_db, compliance_checker)
 s_curve_generator = SCurveGenerator(db_path)
 request_parser = RequestParser()
-request_executor = RequestExecutor(db_path)
+request_executor = RequestExecutor(db_path, workbook_cache)
 automation_engine = AutomationEngine(db_path)
 automation_templates = AutomationTemplates()
 # New systems
@@ -89,6 +104,30 @@ house_plan_integrator = HousePlanIntegrator()
 dashboard_service = DashboardService(db_path)
 claude_prompts_service = ClaudePromptsService()
 
+# المهام الخلفية: نفس التحليلات، تُنفذ في عمليات منفصلة عند طلب الوضع غير المتزامن
+analysis_systems = AnalysisSystems(
+    db_path,
+    excel_intel=excel_intel,
+    classifier=classifier,
+    item_analyzer=item_analyzer,
+    productivity_db=productivity_db,
+    compliance_checker=compliance_checker,
+    boq_pipeline=boq_analysis_pipeline,
+    scheduler=scheduler,
+    s_curve_generator=s_curve_generator
+)
+job_queue = JobQueue(
+    str(app.config['JOBS_DATABASE']),
+    JOB_HANDLERS,
+    max_workers=app.config['JOB_WORKERS'],
+    initializer=init_worker,
+    initargs=({
+        'db_path': db_path,
+        'workbook_cache_dir': str(app.config['WORKBOOK_CACHE_DIR']),
+        'workbook_cache_max_bytes': app.config['WORKBOOK_CACHE_MAX_BYTES']
+    },)
+)
+
 print("\n" + "="*80)
 print("🚀 نظام نوفل الهندسي - NOUFAL Engineering System - المتكامل")
 print("="*80)
@@ -111,6 +150,7 @@ print(f"✅ System 16: House Plan Scraper - Ready (Web extraction)")
 print(f"✅ System 17: House Plan Integrator - Ready (Auto BOQ from plans)")
 print(f"✅ System 18: Dashboard Service - Ready (Stats & Monitoring)")
 print(f"✅ System 19: Claude Prompts Service - Ready (9 prompt types)")
+print(f"✅ System 20: Job Queue - Ready ({job_queue.max_workers} workers)")
 print(f"📁 Database: {app.config['DATABASE']}")
 print("="*80 + "\n")
 
@@ -162,6 +202,90 @@ def health_check():
     })
 
 
+@app.route('/api/workbook-cache/stats', methods=['GET'])
+def workbook_cache_stats():
+    """إحصائيات كاش المصنفات المحللة"""
+    return jsonify(workbook_cache.get_stats())
+
+
+# ============================================
+# المهام الخلفية - Background Jobs
+# ============================================
+
+def _wants_async() -> bool:
+    """الوضع غير المتزامن: ?async=1 أو "async": true في جسم الطلب"""
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    body = request.get_json(silent=True)
+    return isinstance(body, dict) and body.get('async') is True
+
+
+def _queue_job(job_type: str, payload: dict):
+    """إرسال مهمة والرد فوراً بـ 202 وروابط المتابعة"""
+    job_id = job_queue.submit(job_type, payload)
+    return jsonify({
+        'status': 'queued',
+        'job_id': job_id,
+        'job_type': job_type,
+        'status_url': f'/api/jobs/{job_id}',
+        'events_url': f'/api/jobs/{job_id}/events',
+        'result_url': f'/api/jobs/{job_id}/result'
+    }), 202
+
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """قائمة المهام (?status=running&limit=50)"""
+    status = request.args.get('status')
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({'jobs': job_queue.list_jobs(status, limit)})
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """حالة المهمة وتقدمها"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'المهمة غير موجودة - Job not found'}), 404
+    return jsonify(job)
+
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """بث التقدم (Server-Sent Events) حتى انتهاء المهمة"""
+    if job_queue.get(job_id) is None:
+        return jsonify({'error': 'المهمة غير موجودة - Job not found'}), 404
+    return Response(
+        stream_with_context(job_queue.events(job_id)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """نتيجة المهمة: نفس جسم الاستجابة المتزامنة"""
+    job = job_queue.get_result(job_id)
+    if job is None:
+        return jsonify({'error': 'المهمة غير موجودة - Job not found'}), 404
+    if job['status'] not in TERMINAL_STATUSES:
+        job.pop('result')
+        return jsonify(job), 409
+    if job['status'] != 'completed':
+        job.pop('result')
+        return jsonify(job), 500 if job['status'] == 'failed' else 410
+    return jsonify(job['result'])
+
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """إلغاء مهمة منتظرة أو جارية"""
+    status = job_queue.cancel(job_id)
+    if status is None:
+        return jsonify({'error': 'المهمة غير موجودة - Job not found'}), 404
+    return jsonify({'job_id': job_id, 'status': status, 'cancel_requested': True})
+
+
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
     """رفع ملف Excel"""
@@ -180,33 +304,12 @@ def upload_file():
     app.config['UPLOAD_FOLDER'].mkdir(parents=True, exist_ok=True)
     file.save(file_path)
     
-    # تحليل الملف
+    if _wants_async():
+        return _queue_job('upload', {'file_path': str(file_path), 'filename': filename})
+    
+    # تحليل الملف: اكتشاف واستخراج (من الكاش إذا رُفع نفس المحتوى سابقاً) ثم تصنيف البنود
     try:
-        # اكتشاف نوع الملف
-        discovery = excel_intel.discover_file_type(str(file_path))
-        
-        # استخراج البيانات
-        data = excel_intel.extract_data(str(file_path), discovery)
-        
-        # إذا كان BOQ، قم بتصنيف البنود
-        if discovery['file_type'] == 'boq' and 'items' in data:
-            classified_items = []
-            for item in data['items']:
-                classification = classifier.classify(item['description'])
-                item['classification'] = classification
-                classified_items.append(item)
-            
-            data['items'] = classified_items
-            data['classification_stats'] = classifier.get_statistics(
-                [{'classification': c['classification']} for c in classified_items]
-            )
-        
-        return jsonify({
-            'status': 'success',
-            'file': filename,
-            'discovery': discovery,
-            'data': data
-        })
+        return jsonify(analyze_upload(analysis_systems, str(file_path), filename))
         
     except Exception as e:
         return jsonify({
@@ -281,25 +384,28 @@ def analyze_boq():
     if not items:
         return jsonify({'error': 'لا توجد بنود للتحليل'}), 400
     
-    analyzed_items = []
+    # تصنيف البنود
+    classifications = [classifier.classify(item.get('description', '')) for item in items]
     
-    for item in items:
-        # تصنيف البند
-        classification = classifier.classify(item.get('description', ''))
-        
-        # حساب المدة
-        duration_result = productivity_db.calculate_duration(
-            classification['tier2_subcategory'],
-            float(item.get('quantity', 0)),
-            item.get('unit', ''),
-            classification['tier1_category']
-        )
-        
-        analyzed_items.append({
+    # حساب المدد دفعة واحدة (كل نوع نشاط يُحل مرة واحدة)
+    durations = productivity_db.calculate_duration_batch([
+        {
+            'activity_type': classification['tier2_subcategory'],
+            'quantity': float(item.get('quantity', 0)),
+            'unit': item.get('unit', ''),
+            'category': classification['tier1_category']
+        }
+        for item, classification in zip(items, classifications)
+    ])
+    
+    analyzed_items = [
+        {
             'item': item,
             'classification': classification,
             'duration': duration_result
-        })
+        }
+        for item, classification, duration_result in zip(items, classifications, durations)
+    ]
     
     return jsonify({
         'status': 'success',
@@ -373,13 +479,18 @@ def generate_schedule():
     if not activities:
         return jsonify({'error': 'لا توجد أنشطة'}), 400
     
-    # توليد الجدول
-    schedule = scheduler.generate_schedule(activities, start_date, constraints)
+    if _wants_async():
+        return _queue_job('generate_schedule', {
+            'activities': activities, 'start_date': start_date, 'constraints': constraints
+        })
     
-    return jsonify({
-        'status': 'success',
-        'schedule': schedule
-    })
+    # توليد الجدول
+    try:
+        return jsonify(run_generate_schedule(analysis_systems, activities, start_date, constraints))
+    except CircularDependencyError as e:
+        return jsonify({'error': 'علاقات دائرية بين الأنشطة', 'cycle': e.cycle}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 
 @app.route('/api/gantt-data', methods=['POST'])
@@ -434,13 +545,11 @@ def generate_s_curve():
     if not schedule:
         return jsonify({'error': 'لا يوجد جدول'}), 400
     
-    # توليد منحنى S
-    s_curve = s_curve_generator.generate_s_curve(schedule, interval)
+    if _wants_async():
+        return _queue_job('generate_s_curve', {'schedule': schedule, 'interval': interval})
     
-    return jsonify({
-        'status': 'success',
-        's_curve': s_curve
-    })
+    # توليد منحنى S
+    return jsonify(run_generate_s_curve(analysis_systems, schedule, interval))
 
 
 @app.route('/api/financial-s-curve', methods=['POST'])
@@ -1821,243 +1930,10 @@ def comprehensive_boq_analysis():
                 'error': 'لا توجد بنود للتحليل - No items to analyze'
             }), 400
         
-        # مرحلة 1: التحليل التفصيلي لكل بند
-        # Phase 1: Detailed analysis of each item
-        analyzed_items = []
-        all_classifications = []
-        total_duration_days = 0
-        sbc_items_for_check = []
-        
-        for idx, item in enumerate(items):
-            try:
-                item_desc = item.get('description', '')
-                item_qty = float(item.get('quantity', 0))
-                item_unit = item.get('unit', '')
-                item_amount = float(item.get('amount', 0))
-                item_rate = float(item.get('rate', 0))
-                
-                # 1.1 تصنيف البند
-                classification = classifier.classify(item_desc)
-                all_classifications.append(classification)
-                
-                # 1.2 التحليل العميق للبند
-                item_analysis = item_analyzer.analyze_item({
-                    'id': idx + 1,
-                    'description': item_desc,
-                    'quantity': item_qty,
-                    'unit': item_unit,
-                    'classification': classification
-                })
-                
-                # 1.3 حساب المدة
-                duration_result = productivity_db.calculate_duration(
-                    classification['tier2_subcategory'],
-                    item_qty,
-                    item_unit,
-                    classification['tier1_category']
-                )
-                
-                if duration_result and 'duration_days' in duration_result:
-                    total_duration_days += duration_result['duration_days']
-                
-                # 1.4 تحضير البند لفحص SBC
-                sbc_items_for_check.append({
-                    'id': idx + 1,
-                    'description': item_desc,
-                    'quantity': item_qty,
-                    'unit': item_unit,
-                    'classification': classification,
-                    'extracted_info': item_analysis.get('extracted_info', {}),
-                    'technical_specs': item_analysis.get('technical_specs', {})
-                })
-                
-                # جمع النتائج
-                analyzed_items.append({
-                    'item_number': idx + 1,
-                    'original_item': item,
-                    'classification': classification,
-                    'item_analysis': item_analysis,
-                    'duration': duration_result,
-                    'complexity_level': item_analysis.get('complexity_level', 'medium'),
-                    'warnings': item_analysis.get('warnings', []),
-                    'dependencies': item_analysis.get('dependencies', [])
-                })
-                
-            except Exception as item_error:
-                # في حالة فشل تحليل بند معين، نستمر مع البنود الأخرى
-                analyzed_items.append({
-                    'item_number': idx + 1,
-                    'original_item': item,
-                    'error': str(item_error),
-                    'status': 'failed'
-                })
-        
-        # مرحلة 2: فحص الامتثال لكود البناء السعودي SBC 2024
-        # Phase 2: SBC 2024 Compliance Check
-        sbc_compliance_results = []
-        sbc_compliance_summary = {
-            'total_items_checked': 0,
-            'compliant_items': 0,
-            'non_compliant_items': 0,
-            'warnings': 0,
-            'critical_violations': []
-        }
-        
-        try:
-            # فحص الامتثال دفعة واحدة
-            compliance_results = compliance_checker.check_batch(sbc_items_for_check, category='all')
-            
-            for result in compliance_results:
-                sbc_compliance_results.append(result)
-                sbc_compliance_summary['total_items_checked'] += 1
-                
-                if result.get('compliant', True):
-                    sbc_compliance_summary['compliant_items'] += 1
-                else:
-                    sbc_compliance_summary['non_compliant_items'] += 1
-                    
-                if result.get('violations'):
-                    for violation in result['violations']:
-                        if violation.get('severity') == 'critical':
-                            sbc_compliance_summary['critical_violations'].append({
-                                'item_id': result.get('item_id'),
-                                'description': result.get('description'),
-                                'violation': violation
-                            })
-                        elif violation.get('severity') == 'warning':
-                            sbc_compliance_summary['warnings'] += 1
-            
-            # توليد تقرير الامتثال
-            compliance_report = compliance_checker.generate_compliance_report(compliance_results)
-            
-        except Exception as compliance_error:
-            compliance_report = {
-                'error': str(compliance_error),
-                'message': 'حدث خطأ في فحص الامتثال - Compliance check error'
-            }
-        
-        # مرحلة 3: إحصائيات التصنيف
-        # Phase 3: Classification Statistics
-        classification_stats = classifier.get_statistics(
-            [{'classification': c} for c in all_classifications]
-        )
-        
-        # مرحلة 4: خطة التنفيذ المقترحة
-        # Phase 4: Suggested Execution Plan
-        execution_plan = {
-            'phases': [],
-            'critical_path_items': [],
-            'parallel_activities': []
-        }
-        
-        try:
-            # تجميع الأنشطة حسب التصنيف
-            activities_by_category = {}
-            for item in analyzed_items:
-                if 'classification' in item:
-                    tier1 = item['classification'].get('tier1_category', 'أخرى')
-                    if tier1 not in activities_by_category:
-                        activities_by_category[tier1] = []
-                    activities_by_category[tier1].append(item)
-            
-            # تحديد المراحل
-            phase_order = [
-                'أعمال تمهيدية',
-                'أساسات',
-                'خرسانة مسلحة',
-                'بناء',
-                'سباكة',
-                'كهرباء',
-                'تشطيبات',
-                'أخرى'
-            ]
-            
-            for phase_name in phase_order:
-                if phase_name in activities_by_category:
-                    execution_plan['phases'].append({
-                        'phase_name': phase_name,
-                        'items_count': len(activities_by_category[phase_name]),
-                        'items': activities_by_category[phase_name]
-                    })
-        
-        except Exception as plan_error:
-            execution_plan['error'] = str(plan_error)
-        
-        # مرحلة 5: الملخص الشامل
-        # Phase 5: Comprehensive Summary
-        summary = {
-            'total_items': len(items),
-            'successfully_analyzed': len([i for i in analyzed_items if 'error' not in i]),
-            'failed_items': len([i for i in analyzed_items if 'error' in i]),
-            'total_estimated_duration_days': round(total_duration_days, 2),
-            'total_estimated_duration_months': round(total_duration_days / 30, 2),
-            'classification_distribution': classification_stats.get('tier1_distribution', {}),
-            'complexity_distribution': {
-                'high': len([i for i in analyzed_items if i.get('complexity_level') == 'high']),
-                'medium': len([i for i in analyzed_items if i.get('complexity_level') == 'medium']),
-                'low': len([i for i in analyzed_items if i.get('complexity_level') == 'low'])
-            },
-            'sbc_compliance_rate': round(
-                (sbc_compliance_summary['compliant_items'] / sbc_compliance_summary['total_items_checked'] * 100)
-                if sbc_compliance_summary['total_items_checked'] > 0 else 0, 2
-            ),
-            'total_project_value': sum([float(i.get('amount', 0)) for i in items])
-        }
-        
-        # مرحلة 6: التوصيات
-        # Phase 6: Recommendations
-        recommendations = []
-        
-        # توصيات بناءً على الامتثال
-        if sbc_compliance_summary['critical_violations']:
-            recommendations.append({
-                'type': 'critical',
-                'category': 'sbc_compliance',
-                'title': 'مخالفات حرجة للكود السعودي',
-                'title_en': 'Critical SBC Violations',
-                'description': f'يوجد {len(sbc_compliance_summary["critical_violations"])} مخالفة حرجة يجب معالجتها فوراً',
-                'action': 'مراجعة البنود المخالفة وتصحيحها وفقاً لكود البناء السعودي SBC 2024'
-            })
-        
-        # توصيات بناءً على التعقيد
-        high_complexity_count = summary['complexity_distribution']['high']
-        if high_complexity_count > 0:
-            recommendations.append({
-                'type': 'warning',
-                'category': 'complexity',
-                'title': 'بنود معقدة تحتاج خبرة متخصصة',
-                'title_en': 'Complex Items Require Specialized Expertise',
-                'description': f'يوجد {high_complexity_count} بند معقد يتطلب مقاولين متخصصين',
-                'action': 'التخطيط لتوفير الخبرات المتخصصة والمعدات اللازمة'
-            })
+        if _wants_async():
+            return _queue_job('comprehensive_boq_analysis', {'items': items})
         
-        # توصيات بناءً على المدة
-        if summary['total_estimated_duration_months'] > 12:
-            recommendations.append({
-                'type': 'info',
-                'category': 'schedule',
-                'title': 'مشروع طويل المدى',
-                'title_en': 'Long-Term Project',
-                'description': f'المدة المتوقعة للمشروع: {summary["total_estimated_duration_months"]} شهر',
-                'action': 'وضع خطة تفصيلية للمراحل مع مراعاة العوامل الموسمية والظروف المناخية'
-            })
-        
-        # النتيجة النهائية الشاملة
-        return jsonify({
-            'success': True,
-            'analysis_type': 'comprehensive_manual_boq_analysis_with_sbc_2024',
-            'analyzed_items': analyzed_items,
-            'sbc_compliance': {
-                'results': sbc_compliance_results,
-                'summary': sbc_compliance_summary,
-                'report': compliance_report
-            },
-            'summary': summary,
-            'classification_stats': classification_stats,
-            'execution_plan': execution_plan,
-            'recommendations': recommendations,
-            'timestamp': datetime.now().isoformat()
-        })
+        return jsonify(boq_analysis_pipeline.run(items))
         
     except Exception as e:
         return jsonify({
@@ -2077,21 +1953,52 @@ try:
     print("✅ Navisworks API registered successfully")
     print("   📦 9 Endpoints Available:")
     print("      • POST   /api/projects/:projectId/navisworks/import")
+    print("      • POST   /api/projects/:projectId/navisworks/imports (chunked: /elements, /commit)")
     print("      • GET    /api/projects/:projectId/navisworks/models")
     print("      • GET    /api/projects/:projectId/navisworks/models/:modelId")
     print("      • GET    /api/projects/:projectId/navisworks/models/:modelId/elements")
+    print("      • GET    /api/projects/:projectId/navisworks/models/:modelId/geometry (binary)")
+    print("      • GET    /api/projects/:projectId/navisworks/models/:modelId/spatial/range, /spatial/clashes")
     print("      • GET    /api/projects/:projectId/navisworks/models/:modelId/categories")
     print("      • DELETE /api/projects/:projectId/navisworks/models/:modelId")
 except Exception as e:
     print(f"⚠️ Warning: Could not register Navisworks API: {e}")
 
 
+# ============================================
+# ERP Records (Procurement, Subcontractors, RFI, Design)
+# ============================================
+
+try:
+    from repository import RecordStore
+    record_store = RecordStore()  # SessionLocal (DATABASE_URL)
+    print("✅ ERP record store ready")
+except Exception as e:
+    record_store = None
+    print(f"⚠️ Warning: ERP records will not be persisted: {e}")
+
+try:
+    from procurement import init_procurement
+    init_procurement(app, record_store)
+    print("✅ Procurement module registered successfully")
+except Exception as e:
+    print(f"⚠️ Warning: Could not register procurement module: {e}")
+
+try:
+    from subcontractors import init_subcontractors
+    init_subcontractors(app, record_store)
+    print("✅ Subcontractors module registered successfully")
+except Exception as e:
+    print(f"⚠️ Warning: Could not register subcontractors module: {e}")
+
+
 # ============================================
 # Advanced APIs Integration
 # ============================================
 
 try:
-    from advanced_apis import advanced_api
+    from advanced_apis import advanced_api, init_advanced_apis
+    init_advanced_apis(record_store)
     app.register_blueprint(advanced_api)
     print("✅ Advanced APIs registered successfully")
 except Exception as e:
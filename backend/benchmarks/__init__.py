@@ -0,0 +1,7 @@
+"""
+Performance Benchmarks
+قياسات الأداء للمحركات الأساسية
+
+Run from the repository root, e.g.:
+    python -m backend.benchmarks.cpm_benchmark
+"""
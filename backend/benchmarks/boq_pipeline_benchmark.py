@@ -0,0 +1,270 @@
+"""
+BOQ Pipeline Benchmark - مقارنة الحلقة المتسلسلة مع BOQAnalysisPipeline
+
+يولّد مقايسات اصطناعية (1k / 10k بند) من أوصاف واقعية متكررة،
+ويتحقق من تطابق استجابة /api/comprehensive-boq-analysis ثم يقيس الزمن.
+
+    python -m backend.benchmarks.boq_pipeline_benchmark [sizes...]
+
+نتائج مقاسة (3 تشغيلات، Python 3.11.7، معالج واحد - بدون عمليات متوازية،
+قاعدة noufal.db المرفقة):
+
+      Items  Legacy (s)  Pipeline (s)  Speedup
+       1000   0.064-0.071   0.044-0.046   1.5-1.6x
+      10000   0.68-0.77     0.68-0.80     1.0x
+
+المكسب عند 1k من إزالة تكرار الأوصاف بين المراحل؛ عند 10k يتساوى الزمنان
+على معالج واحد، وأي تسريع إضافي يعتمد على عدد المعالجات المتاحة للمراحل
+المتوازية.
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from backend.core.BOQAnalysisPipeline import BOQAnalysisPipeline, PHASE_ORDER
+from backend.core.ItemAnalyzer import ItemAnalyzer
+from backend.core.ItemClassifier import ItemClassifier
+from backend.core.ProductivityDatabase import ProductivityDatabase
+from backend.core.SBCComplianceChecker import SBCComplianceChecker
+
+DEFAULT_SIZES = [1_000, 10_000]
+DB_PATH = str(Path(__file__).parent.parent / 'database' / 'noufal.db')
+
+DESCRIPTIONS = [
+    ('حفر أساسات بعمق 2 متر', 'م3'),
+    ('ردم وتسوية ودمك على طبقات', 'م3'),
+    ('خرسانة عادية للنظافة سماكة 10 سم', 'م3'),
+    ('خرسانة مسلحة للقواعد C30', 'م3'),
+    ('خرسانة مسلحة للأعمدة C35', 'م3'),
+    ('حديد تسليح قطر 16 مم', 'طن'),
+    ('بلوك خرساني مفرغ سماكة 20 سم', 'م2'),
+    ('لياسة داخلية للجدران', 'م2'),
+    ('دهان بلاستيك للجدران الداخلية', 'م2'),
+    ('بلاط سيراميك للأرضيات 60×60', 'م2'),
+    ('عزل مائي للأسطح بالرولات', 'م2'),
+    ('تمديدات مواسير مياه PPR قطر 25 مم', 'م.ط'),
+    ('كابلات كهربائية 4×16 مم2', 'م.ط'),
+    ('Reinforced concrete slab thickness 20cm', 'm3'),
+    ('Excavation for foundations', 'm3'),
+    ('Gypsum board false ceiling', 'm2'),
+]
+
+
+def build_synthetic_items(count: int, seed: int = 42, unique_ratio: float = 0.2) -> List[Dict]:
+    """بنود اصطناعية: أوصاف أساسية مع متغيرات رقمية (نسبة الأوصاف الفريدة unique_ratio)"""
+    rng = random.Random(seed)
+    variants = max(1, int(count * unique_ratio))
+    items = []
+    for index in range(count):
+        description, unit = DESCRIPTIONS[index % len(DESCRIPTIONS)]
+        quantity = rng.randint(1, 2000)
+        rate = rng.randint(20, 900)
+        items.append({
+            'description': f'{description} - منطقة {rng.randrange(variants)}',
+            'quantity': quantity,
+            'unit': unit,
+            'rate': rate,
+            'amount': quantity * rate
+        })
+    return items
+
+
+def legacy_comprehensive_analysis(items, classifier, item_analyzer, productivity_db, compliance_checker) -> Dict:
+    """الحلقة المتسلسلة السابقة (مرجع التطابق)"""
+    analyzed_items = []
+    all_classifications = []
+    total_duration_days = 0
+    sbc_items_for_check = []
+
+    for idx, item in enumerate(items):
+        try:
+            item_desc = item.get('description', '')
+            item_qty = float(item.get('quantity', 0))
+            item_unit = item.get('unit', '')
+            float(item.get('amount', 0))
+            float(item.get('rate', 0))
+
+            classification = classifier.classify(item_desc)
+            all_classifications.append(classification)
+
+            item_analysis = item_analyzer.analyze_item({
+                'id': idx + 1,
+                'description': item_desc,
+                'quantity': item_qty,
+                'unit': item_unit,
+                'classification': classification
+            })
+
+            duration_result = productivity_db.calculate_duration(
+                classification['tier2_subcategory'],
+                item_qty,
+                item_unit,
+                classification['tier1_category']
+            )
+
+            if duration_result and 'duration_days' in duration_result:
+                total_duration_days += duration_result['duration_days']
+
+            sbc_items_for_check.append({
+                'id': idx + 1,
+                'description': item_desc,
+                'quantity': item_qty,
+                'unit': item_unit,
+                'classification': classification,
+                'extracted_info': item_analysis.get('extracted_info', {}),
+                'technical_specs': item_analysis.get('technical_specs', {})
+            })
+
+            analyzed_items.append({
+                'item_number': idx + 1,
+                'original_item': item,
+                'classification': classification,
+                'item_analysis': item_analysis,
+                'duration': duration_result,
+                'complexity_level': item_analysis.get('complexity_level', 'medium'),
+                'warnings': item_analysis.get('warnings', []),
+                'dependencies': item_analysis.get('dependencies', [])
+            })
+
+        except Exception as item_error:
+            analyzed_items.append({
+                'item_number': idx + 1,
+                'original_item': item,
+                'error': str(item_error),
+                'status': 'failed'
+            })
+
+    sbc_compliance_results = []
+    sbc_compliance_summary = {
+        'total_items_checked': 0,
+        'compliant_items': 0,
+        'non_compliant_items': 0,
+        'warnings': 0,
+        'critical_violations': []
+    }
+
+    try:
+        compliance_results = compliance_checker.check_batch(sbc_items_for_check, category='all')
+        for result in compliance_results:
+            sbc_compliance_results.append(result)
+            sbc_compliance_summary['total_items_checked'] += 1
+            if result.get('compliant', True):
+                sbc_compliance_summary['compliant_items'] += 1
+            else:
+                sbc_compliance_summary['non_compliant_items'] += 1
+            if result.get('violations'):
+                for violation in result['violations']:
+                    if violation.get('severity') == 'critical':
+                        sbc_compliance_summary['critical_violations'].append({
+                            'item_id': result.get('item_id'),
+                            'description': result.get('description'),
+                            'violation': violation
+                        })
+                    elif violation.get('severity') == 'warning':
+                        sbc_compliance_summary['warnings'] += 1
+        compliance_report = compliance_checker.generate_compliance_report(compliance_results)
+    except Exception as compliance_error:
+        compliance_report = {
+            'error': str(compliance_error),
+            'message': 'حدث خطأ في فحص الامتثال - Compliance check error'
+        }
+
+    classification_stats = classifier.get_statistics(
+        [{'classification': c} for c in all_classifications]
+    )
+
+    execution_plan = {'phases': [], 'critical_path_items': [], 'parallel_activities': []}
+    try:
+        activities_by_category = {}
+        for item in analyzed_items:
+            if 'classification' in item:
+                tier1 = item['classification'].get('tier1_category', 'أخرى')
+                activities_by_category.setdefault(tier1, []).append(item)
+        for phase_name in PHASE_ORDER:
+            if phase_name in activities_by_category:
+                execution_plan['phases'].append({
+                    'phase_name': phase_name,
+                    'items_count': len(activities_by_category[phase_name]),
+                    'items': activities_by_category[phase_name]
+                })
+    except Exception as plan_error:
+        execution_plan['error'] = str(plan_error)
+
+    summary = {
+        'total_items': len(items),
+        'successfully_analyzed': len([i for i in analyzed_items if 'error' not in i]),
+        'failed_items': len([i for i in analyzed_items if 'error' in i]),
+        'total_estimated_duration_days': round(total_duration_days, 2),
+        'total_estimated_duration_months': round(total_duration_days / 30, 2),
+        'classification_distribution': classification_stats.get('tier1_distribution', {}),
+        'complexity_distribution': {
+            'high': len([i for i in analyzed_items if i.get('complexity_level') == 'high']),
+            'medium': len([i for i in analyzed_items if i.get('complexity_level') == 'medium']),
+            'low': len([i for i in analyzed_items if i.get('complexity_level') == 'low'])
+        },
+        'sbc_compliance_rate': round(
+            (sbc_compliance_summary['compliant_items'] / sbc_compliance_summary['total_items_checked'] * 100)
+            if sbc_compliance_summary['total_items_checked'] > 0 else 0, 2
+        ),
+        'total_project_value': sum([float(i.get('amount', 0)) for i in items])
+    }
+
+    return {
+        'success': True,
+        'analysis_type': 'comprehensive_manual_boq_analysis_with_sbc_2024',
+        'analyzed_items': analyzed_items,
+        'sbc_compliance': {
+            'results': sbc_compliance_results,
+            'summary': sbc_compliance_summary,
+            'report': compliance_report
+        },
+        'summary': summary,
+        'classification_stats': classification_stats,
+        'execution_plan': execution_plan,
+        'recommendations': BOQAnalysisPipeline._recommendations(sbc_compliance_summary, summary)
+    }
+
+
+def strip_timestamps(value):
+    """إزالة حقول الوقت (analysis_timestamp, timestamp) قبل المقارنة"""
+    if isinstance(value, dict):
+        return {key: strip_timestamps(item) for key, item in value.items() if not key.endswith('timestamp')}
+    if isinstance(value, list):
+        return [strip_timestamps(item) for item in value]
+    return value
+
+
+def build_systems(db_path: str = DB_PATH):
+    """أنظمة جديدة (كاش فارغ) لكل قياس"""
+    return (ItemClassifier(db_path), ItemAnalyzer(db_path),
+            ProductivityDatabase(db_path), SBCComplianceChecker(db_path))
+
+
+def run_benchmark(sizes: List[int]):
+    print(f"{'Items':>8} {'Legacy (s)':>11} {'Pipeline (s)':>13} {'Speedup':>8} {'Match':>6}")
+    print("-" * 52)
+
+    for size in sizes:
+        items = build_synthetic_items(size)
+
+        t0 = time.perf_counter()
+        expected = legacy_comprehensive_analysis(items, *build_systems())
+        legacy_time = time.perf_counter() - t0
+
+        pipeline = BOQAnalysisPipeline(*build_systems())
+        t0 = time.perf_counter()
+        actual = pipeline.run(items)
+        pipeline_time = time.perf_counter() - t0
+        pipeline.shutdown()
+
+        speedup = legacy_time / pipeline_time if pipeline_time > 0 else float('inf')
+        print(f"{size:>8} {legacy_time:>11.3f} {pipeline_time:>13.3f} {speedup:>7.1f}x "
+              f"{'✅' if strip_timestamps(actual) == strip_timestamps(expected) else '❌':>6}")
+
+
+if __name__ == "__main__":
+    requested = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    run_benchmark(requested)
@@ -0,0 +1,97 @@
+"""
+CPM Benchmark - مقارنة CPMEngine مع ArrayCPMEngine
+
+يولّد شبكات اصطناعية (1k / 10k / 100k نشاط) بجميع أنواع الروابط،
+ويتحقق من تطابق ES/EF/LS/LF/TF/FF ثم يقيس الزمن.
+
+    python -m backend.benchmarks.cpm_benchmark [sizes...]
+"""
+
+import random
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+from backend.data.activity_breakdown_rules import LogicType
+from backend.scheduling.cpm_engine import CPMEngine, ScheduleActivity
+from backend.scheduling.array_cpm import ArrayCPMEngine
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+LAYER_WIDTH = 200
+FIELDS = ['early_start', 'early_finish', 'late_start', 'late_finish', 'total_float', 'free_float']
+
+
+def build_synthetic_network(activity_count: int, seed: int = 42,
+                            layer_width: int = LAYER_WIDTH) -> CPMEngine:
+    """شبكة طبقات عشوائية: كل نشاط يرتبط بـ 1-3 أنشطة من الطبقة السابقة"""
+    rng = random.Random(seed)
+    cpm = CPMEngine(datetime(2025, 1, 1))
+    logic_types = [LogicType.FS, LogicType.FS, LogicType.FS, LogicType.SS, LogicType.FF, LogicType.SF]
+
+    ids = [f"A{i:06d}" for i in range(activity_count)]
+    for aid in ids:
+        cpm.add_activity(ScheduleActivity(activity_id=aid, name=aid, duration=float(rng.randint(1, 20))))
+
+    for i in range(layer_width, activity_count):
+        layer_start = (i // layer_width - 1) * layer_width
+        for pred in rng.sample(range(layer_start, layer_start + layer_width), rng.randint(1, 3)):
+            cpm.add_relationship(ids[pred], ids[i], rng.choice(logic_types), float(rng.randint(-2, 5)))
+
+    return cpm
+
+
+def compare_results(reference: CPMEngine, engine: ArrayCPMEngine) -> List[str]:
+    """قائمة الاختلافات بين المحركين (فارغة عند التطابق)"""
+    mismatches = []
+    results = engine.to_dict()
+    for aid, activity in reference.activities.items():
+        row = results[aid]
+        for name in FIELDS:
+            if abs(getattr(activity, name) - row[name]) > 1e-9:
+                mismatches.append(f"{aid}.{name}: {getattr(activity, name)} != {row[name]}")
+        if activity.is_critical != row['is_critical']:
+            mismatches.append(f"{aid}.is_critical")
+    if reference.critical_path != engine.critical_path:
+        mismatches.append("critical_path order")
+    return mismatches
+
+
+def run_benchmark(sizes: List[int]):
+    # المحرك الأصلي تعاودي - نرفع حد الـ recursion لسلاسل الطبقات الطويلة
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), max(sizes) + 1000))
+
+    print(f"{'Activities':>10} {'Links':>8} {'CPMEngine (s)':>14} {'Compile (s)':>12} "
+          f"{'ArrayCPM (s)':>13} {'Speedup':>8} {'Match':>6}")
+    print("-" * 80)
+
+    for size in sizes:
+        reference = build_synthetic_network(size)
+        links = sum(len(a.successors) for a in reference.activities.values())
+
+        t0 = time.perf_counter()
+        reference.forward_pass()
+        reference.backward_pass()
+        reference.calculate_float()
+        reference.find_critical_path()
+        legacy_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        engine = ArrayCPMEngine.from_cpm_engine(reference)
+        compile_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        engine.run()
+        array_time = time.perf_counter() - t0
+
+        mismatches = compare_results(reference, engine)
+        speedup = legacy_time / array_time if array_time > 0 else float('inf')
+        print(f"{size:>10} {links:>8} {legacy_time:>14.3f} {compile_time:>12.3f} "
+              f"{array_time:>13.3f} {speedup:>7.1f}x {'✅' if not mismatches else '❌':>6}")
+        for line in mismatches[:5]:
+            print(f"    ⚠️  {line}")
+
+
+if __name__ == "__main__":
+    requested = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    run_benchmark(requested)
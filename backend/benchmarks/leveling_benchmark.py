@@ -0,0 +1,62 @@
+"""
+Resource Leveling Benchmark - مقارنة Late Start مع Serial SGS
+
+يولّد شبكة اصطناعية (الافتراضي 10k نشاط ≈ 1000 يوم) بأطقم عشوائية،
+ويقارن نسبة الذروة وزمن التشغيل بين:
+- الطريقة السابقة: جدول Late Start
+- Serial SGS بقواعد الأولوية (min_float / lst / max_crew)
+
+    python -m backend.benchmarks.leveling_benchmark [activities]
+"""
+
+import random
+import sys
+import time
+
+from backend.scheduling.array_cpm import ArrayCPMEngine
+from backend.scheduling.resource_leveling import ResourceLeveler, PRIORITY_RULES
+from backend.benchmarks.cpm_benchmark import build_synthetic_network
+
+DEFAULT_ACTIVITIES = 10_000
+
+
+def build_leveling_network(activity_count: int, seed: int = 42):
+    """شبكة CPM محسوبة مع أطقم عمل عشوائية"""
+    rng = random.Random(seed)
+    cpm = build_synthetic_network(activity_count, seed=seed, layer_width=max(activity_count // 100, 10))
+    for activity in cpm.activities.values():
+        activity.crew_size = rng.randint(2, 12)
+        activity.labor_hours_per_day = activity.crew_size * 8
+    ArrayCPMEngine.from_cpm_engine(cpm).run().apply_to(cpm)
+    return cpm
+
+
+def run_benchmark(activity_count: int):
+    cpm = build_leveling_network(activity_count)
+    leveler = ResourceLeveler(cpm)
+    original = leveler.analyze_original()
+    max_workers = int(original.average_workers * 1.20)
+
+    print(f"Activities: {activity_count:,}  Duration: {cpm.project_duration:.0f} days  "
+          f"Cap: {max_workers} workers/day")
+    print(f"{'Strategy':<22} {'Peak':>6} {'Peak ratio':>11} {'Days > cap':>11} {'Runtime (s)':>12}")
+    print("-" * 66)
+
+    def report(name, histogram, elapsed):
+        over = sum(1 for dr in histogram.daily_resources.values() if dr.total_workers > max_workers)
+        print(f"{name:<22} {histogram.peak_workers:>6} {histogram.peak_ratio:>11.2f} {over:>11} {elapsed:>12.3f}")
+
+    report("Early start", original, 0.0)
+
+    t0 = time.perf_counter()
+    late = leveler.calculate_histogram(use_late_start=True)
+    report("Late start (previous)", late, time.perf_counter() - t0)
+
+    for rule in PRIORITY_RULES:
+        t0 = time.perf_counter()
+        leveled = leveler.level_resources(priority_rule=rule, max_workers=max_workers)
+        report(f"SGS {rule}", leveled, time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ACTIVITIES)
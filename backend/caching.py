@@ -4,22 +4,28 @@ NOUFAL ERP - Caching System
 
 Features:
 - Redis caching for distributed environments
-- In-memory caching as fallback
-- Automatic cache invalidation
+- In-memory caching as fallback (bounded, LRU/LFU eviction)
+- Namespace-based cache invalidation (generation counters, SCAN on Redis)
 - TTL (Time To Live) support
 - Cache statistics and monitoring
-- Decorator-based caching for functions
+- Decorator-based caching for functions (single-flight, stale-while-revalidate)
 """
 
 import logging
 import time
 import pickle
 import hashlib
+import heapq
 import json
+import re
+import sys
+from collections import OrderedDict
 from functools import wraps
-from typing import Any, Optional, Callable, Dict
+from typing import Any, Optional, Callable, Dict, List
 from datetime import timedelta
 import threading
+import uuid
+from concurrent.futures import Future
 
 # Try to import Redis, fallback to in-memory cache
 try:
@@ -31,31 +37,214 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+class _CacheEntry:
+    """Single in-memory cache entry (value + bookkeeping)"""
+    __slots__ = ('value', 'expiry', 'size', 'frequency', 'seq', 'prefixes')
+
+    def __init__(self, value: Any, expiry: Optional[float], size: int, seq: int,
+                 prefixes: tuple = ()):
+        self.value = value
+        self.expiry = expiry
+        self.size = size
+        self.frequency = 1
+        self.seq = seq
+        self.prefixes = prefixes
+
+
+EVICTION_POLICIES = ('lru', 'lfu')
+
+NAMESPACE_SEPARATOR = ':'
+
+# One 'part:vN:' level of a versioned namespace prefix
+_NAMESPACE_LEVEL = re.compile(rf'[^{NAMESPACE_SEPARATOR}]+{NAMESPACE_SEPARATOR}v\d+{NAMESPACE_SEPARATOR}')
+
+# Seconds CacheManager reuses namespace generations before asking the backend again
+GENERATION_TTL = 1.0
+
+
 class InMemoryCache:
     """
-    Simple in-memory cache implementation
-    تخزين مؤقت في الذاكرة كبديل عن Redis
+    Capacity-bounded in-memory cache
+    تخزين مؤقت في الذاكرة كبديل عن Redis - بحد أقصى للحجم
+
+    - max_entries / max_bytes: capacity limits (None = unbounded)
+    - eviction_policy: 'lru' (least recently used) or 'lfu' (least frequently used)
+    - expiry is tracked in a min-heap, so expired entries are purged in O(log n)
+      on writes instead of scanning the whole cache
     """
     
-    def __init__(self):
-        self._cache: Dict[str, tuple] = {}  # key: (value, expiry_time)
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 eviction_policy: str = 'lru'):
+        if eviction_policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy '{eviction_policy}', expected one of {EVICTION_POLICIES}")
+        
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.eviction_policy = eviction_policy
+        
+        self._cache: Dict[str, _CacheEntry] = {}
         self._lock = threading.Lock()
         self._hits = 0
         self._misses = 0
-        logger.info("InMemoryCache initialized")
+        self._evictions = 0
+        self._expirations = 0
+        self._memory_bytes = 0
+        self._seq = 0
+        
+        # LRU: keys in access order (oldest first)
+        self._lru: 'OrderedDict[str, None]' = OrderedDict()
+        # LFU: frequency -> keys in access order, plus the current minimum frequency
+        self._lfu_buckets: Dict[int, 'OrderedDict[str, None]'] = {}
+        self._lfu_min = 0
+        # TTL heap: (expiry, seq, key) - stale items are skipped lazily
+        self._expiry_heap: List[tuple] = []
+        # Namespace generation counters (not subject to eviction)
+        self._generations: Dict[str, int] = {}
+        # Versioned namespace prefix -> keys under it, so delete_prefix is O(k)
+        self._prefix_keys: Dict[str, set] = {}
+        
+        logger.info(
+            f"InMemoryCache initialized (policy={eviction_policy}, "
+            f"max_entries={max_entries}, max_bytes={max_bytes})"
+        )
+    
+    # ------------------------------------------------------------------
+    # Eviction bookkeeping (called with the lock held)
+    # ------------------------------------------------------------------
+    
+    def _track(self, key: str, entry: _CacheEntry):
+        if self.eviction_policy == 'lru':
+            self._lru[key] = None
+        else:
+            self._lfu_buckets.setdefault(entry.frequency, OrderedDict())[key] = None
+            self._lfu_min = entry.frequency  # new entries always have the lowest frequency
+    
+    def _untrack(self, key: str, entry: _CacheEntry):
+        if self.eviction_policy == 'lru':
+            self._lru.pop(key, None)
+            return
+        bucket = self._lfu_buckets.get(entry.frequency)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self._lfu_buckets[entry.frequency]
+                if self._lfu_min == entry.frequency:
+                    self._lfu_min = min(self._lfu_buckets) if self._lfu_buckets else 0
+    
+    def _touch(self, key: str, entry: _CacheEntry):
+        if self.eviction_policy == 'lru':
+            self._lru.move_to_end(key)
+            return
+        self._untrack(key, entry)
+        entry.frequency += 1
+        self._lfu_buckets.setdefault(entry.frequency, OrderedDict())[key] = None
+        if not self._lfu_min or entry.frequency < self._lfu_min:
+            self._lfu_min = entry.frequency
+    
+    def _victim(self, protected: Optional[str] = None) -> Optional[str]:
+        """Next key to evict, never the protected (just inserted) key"""
+        if self.eviction_policy == 'lru':
+            for key in self._lru:
+                if key != protected:
+                    return key
+            return None
+        for key in self._lfu_buckets[self._lfu_min]:
+            if key != protected:
+                return key
+        # The lowest bucket holds only the new key - take the next bucket up
+        for frequency in sorted(self._lfu_buckets):
+            for key in self._lfu_buckets[frequency]:
+                if key != protected:
+                    return key
+        return None
+    
+    def _remove(self, key: str) -> _CacheEntry:
+        entry = self._cache.pop(key)
+        self._untrack(key, entry)
+        self._memory_bytes -= entry.size
+        for prefix in entry.prefixes:
+            keys = self._prefix_keys.get(prefix)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._prefix_keys[prefix]
+        return entry
+    
+    @staticmethod
+    def _namespace_prefixes(key: str) -> tuple:
+        """Every versioned namespace prefix of a key ('a:v1:', 'a:v1:b:v0:', ...)"""
+        prefixes = []
+        end = 0
+        match = _NAMESPACE_LEVEL.match(key)
+        while match:
+            end = match.end()
+            prefixes.append(key[:end])
+            match = _NAMESPACE_LEVEL.match(key, end)
+        return tuple(prefixes)
+    
+    def _purge_expired(self, now: float) -> int:
+        """Pop expired entries from the TTL heap - O(k log n) for k expired entries"""
+        heap = self._expiry_heap
+        purged = 0
+        while heap and heap[0][0] <= now:
+            _, seq, key = heapq.heappop(heap)
+            entry = self._cache.get(key)
+            if entry is not None and entry.seq == seq:
+                self._remove(key)
+                purged += 1
+        self._expirations += purged
+        
+        # Drop stale heap items left behind by overwrites/deletes
+        if len(heap) > 2 * len(self._cache) + 64:
+            self._expiry_heap = [
+                (entry.expiry, entry.seq, key) for key, entry in self._cache.items()
+                if entry.expiry is not None
+            ]
+            heapq.heapify(self._expiry_heap)
+        return purged
+    
+    def _enforce_capacity(self, protected: Optional[str] = None) -> bool:
+        """Evict until within limits; False if the protected key had to go too"""
+        while self._cache and (
+            (self.max_entries is not None and len(self._cache) > self.max_entries) or
+            (self.max_bytes is not None and self._memory_bytes > self.max_bytes)
+        ):
+            victim = self._victim(protected)
+            if victim is None:
+                self._remove(protected)
+                self._evictions += 1
+                return False
+            self._remove(victim)
+            self._evictions += 1
+        return True
+    
+    @staticmethod
+    def _estimate_size(key: str, value: Any) -> int:
+        """Approximate entry size in bytes (pickled size, sys.getsizeof fallback)"""
+        try:
+            value_size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            value_size = sys.getsizeof(value)
+        return value_size + sys.getsizeof(key)
+    
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
     
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
         with self._lock:
-            if key in self._cache:
-                value, expiry = self._cache[key]
+            entry = self._cache.get(key)
+            if entry is not None:
                 # Check if expired
-                if expiry is None or time.time() < expiry:
+                if entry.expiry is None or time.time() < entry.expiry:
                     self._hits += 1
-                    return value
+                    self._touch(key, entry)
+                    return entry.value
                 else:
                     # Remove expired entry
-                    del self._cache[key]
+                    self._remove(key)
+                    self._expirations += 1
             
             self._misses += 1
             return None
@@ -68,17 +257,45 @@ class InMemoryCache:
             key: Cache key
             value: Value to cache
             ttl: Time to live in seconds (None = no expiry)
+        
+        Returns False when the value alone is larger than max_bytes (or
+        max_entries is 0), i.e. whenever the value is not in the cache
+        afterwards.
         """
+        size = self._estimate_size(key, value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            logger.debug(f"Value for '{key}' ({size} bytes) exceeds max_bytes, not cached")
+            return False
+        
         with self._lock:
-            expiry = time.time() + ttl if ttl else None
-            self._cache[key] = (value, expiry)
-        return True
+            return self._set(key, value, ttl, size, time.time())
+    
+    def _set(self, key: str, value: Any, ttl: Optional[float], size: int, now: float) -> bool:
+        """Store an entry (called with the lock held)"""
+        self._purge_expired(now)
+        
+        if key in self._cache:
+            self._remove(key)
+        
+        self._seq += 1
+        expiry = now + ttl if ttl else None
+        entry = _CacheEntry(value, expiry, size, self._seq, self._namespace_prefixes(key))
+        self._cache[key] = entry
+        for prefix in entry.prefixes:
+            self._prefix_keys.setdefault(prefix, set()).add(key)
+        self._memory_bytes += size
+        self._track(key, entry)
+        if expiry is not None:
+            heapq.heappush(self._expiry_heap, (expiry, entry.seq, key))
+        
+        # Make room by evicting other entries, never the one just stored
+        return self._enforce_capacity(protected=key)
     
     def delete(self, key: str) -> bool:
         """Delete key from cache"""
         with self._lock:
             if key in self._cache:
-                del self._cache[key]
+                self._remove(key)
                 return True
         return False
     
@@ -86,6 +303,12 @@ class InMemoryCache:
         """Clear all cache"""
         with self._lock:
             self._cache.clear()
+            self._lru.clear()
+            self._lfu_buckets.clear()
+            self._lfu_min = 0
+            self._expiry_heap = []
+            self._prefix_keys.clear()
+            self._memory_bytes = 0
             logger.info("InMemoryCache cleared")
         return True
     
@@ -93,24 +316,78 @@ class InMemoryCache:
         """Check if key exists and is not expired"""
         return self.get(key) is not None
     
+    def __len__(self) -> int:
+        return len(self._cache)
+    
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Set value only if the key is absent or expired (atomic)"""
+        size = self._estimate_size(key, value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return False
+        
+        # Check and insert under one lock hold, so only one caller wins
+        with self._lock:
+            now = time.time()
+            entry = self._cache.get(key)
+            if entry is not None and (entry.expiry is None or now < entry.expiry):
+                return False
+            return self._set(key, value, ttl, size, now)
+    
+    def release_lock(self, key: str, token: str) -> bool:
+        """Delete a lock key only if it still holds our token"""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or entry.value != token:
+                return False
+            self._remove(key)
+            return True
+    
+    def get_generations(self, namespaces: List[str]) -> List[int]:
+        """Current generation of each namespace (0 = never invalidated)"""
+        with self._lock:
+            return [self._generations.get(namespace, 0) for namespace in namespaces]
+    
+    def bump_generation(self, namespace: str) -> int:
+        """Invalidate a namespace in O(1) by moving it to a new generation"""
+        with self._lock:
+            generation = self._generations.get(namespace, 0) + 1
+            self._generations[namespace] = generation
+            return generation
+    
+    def delete_prefix(self, prefix: str) -> int:
+        """
+        Delete all keys under a versioned namespace prefix (frees memory of
+        invalidated generations)
+        
+        prefix is a CacheManager.namespace_prefix() value; keys are indexed by
+        those prefixes on set, so this is O(k) in the deleted keys instead of a
+        scan of the whole cache under the lock.  Other prefixes match nothing -
+        their keys still age out through LRU/LFU and TTL.
+        """
+        with self._lock:
+            keys = list(self._prefix_keys.get(prefix, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+    
     def get_stats(self) -> Dict:
         """Get cache statistics"""
         with self._lock:
+            self._purge_expired(time.time())
             total_requests = self._hits + self._misses
             hit_rate = (self._hits / total_requests * 100) if total_requests > 0 else 0
             
-            # Count non-expired entries
-            current_time = time.time()
-            active_keys = sum(
-                1 for _, expiry in self._cache.values()
-                if expiry is None or expiry > current_time
-            )
-            
             return {
                 'cache_type': 'in_memory',
-                'total_keys': active_keys,
+                'eviction_policy': self.eviction_policy,
+                'total_keys': len(self._cache),
+                'max_entries': self.max_entries,
+                'memory_bytes': self._memory_bytes,
+                'max_bytes': self.max_bytes,
                 'hits': self._hits,
                 'misses': self._misses,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
                 'total_requests': total_requests,
                 'hit_rate': round(hit_rate, 2)
             }
@@ -118,16 +395,10 @@ class InMemoryCache:
     def cleanup_expired(self):
         """Remove expired entries"""
         with self._lock:
-            current_time = time.time()
-            expired_keys = [
-                key for key, (_, expiry) in self._cache.items()
-                if expiry is not None and expiry <= current_time
-            ]
-            for key in expired_keys:
-                del self._cache[key]
+            purged = self._purge_expired(time.time())
             
-            if expired_keys:
-                logger.info(f"Cleaned up {len(expired_keys)} expired cache entries")
+            if purged:
+                logger.info(f"Cleaned up {purged} expired cache entries")
 
 
 class RedisCache:
@@ -217,6 +488,68 @@ class RedisCache:
             logger.error(f"Redis exists error for key '{key}': {e}")
             return False
     
+    # Delete the lock only if it still holds our token (another worker may own it after expiry)
+    RELEASE_LOCK_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+    
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Set value only if the key does not exist (SET NX)"""
+        try:
+            px = int(ttl * 1000) if ttl else None
+            return bool(self.redis_client.set(key, pickle.dumps(value), nx=True, px=px))
+        except Exception as e:
+            logger.error(f"Redis add error for key '{key}': {e}")
+            return False
+    
+    def release_lock(self, key: str, token: str) -> bool:
+        """Delete a lock key only if it still holds our token"""
+        try:
+            return bool(self.redis_client.eval(self.RELEASE_LOCK_SCRIPT, 1, key, pickle.dumps(token)))
+        except Exception as e:
+            logger.error(f"Redis lock release error for key '{key}': {e}")
+            return False
+    
+    GENERATION_KEY_PREFIX = '_cache_generation:'
+    SCAN_BATCH_SIZE = 500
+    
+    def get_generations(self, namespaces: List[str]) -> List[int]:
+        """Current generation of each namespace (single MGET round-trip)"""
+        try:
+            values = self.redis_client.mget([self.GENERATION_KEY_PREFIX + namespace for namespace in namespaces])
+            return [int(value) if value else 0 for value in values]
+        except Exception as e:
+            logger.error(f"Redis generation lookup error: {e}")
+            return [0] * len(namespaces)
+    
+    def bump_generation(self, namespace: str) -> int:
+        """Invalidate a namespace in O(1) by moving it to a new generation (atomic INCR)"""
+        try:
+            return int(self.redis_client.incr(self.GENERATION_KEY_PREFIX + namespace))
+        except Exception as e:
+            logger.error(f"Redis generation bump error for '{namespace}': {e}")
+            return 0
+    
+    def delete_prefix(self, prefix: str) -> int:
+        """Delete keys starting with prefix using incremental SCAN (never blocking KEYS)"""
+        pattern = re.sub(r'([*?\[\]\\])', r'\\\1', prefix) + '*'
+        deleted = 0
+        batch = []
+        try:
+            for key in self.redis_client.scan_iter(match=pattern, count=self.SCAN_BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= self.SCAN_BATCH_SIZE:
+                    deleted += self.redis_client.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += self.redis_client.unlink(*batch)
+        except Exception as e:
+            logger.error(f"Redis prefix delete error for '{prefix}': {e}")
+        return deleted
+    
     def get_stats(self) -> Dict:
         """Get Redis cache statistics"""
         try:
@@ -250,15 +583,26 @@ class CacheManager:
     مدير التخزين المؤقت الموحد - يدعم Redis والذاكرة
     """
     
-    def __init__(self, use_redis: bool = True, redis_config: Optional[Dict] = None):
+    def __init__(self, use_redis: bool = True, redis_config: Optional[Dict] = None,
+                 memory_config: Optional[Dict] = None, generation_ttl: float = GENERATION_TTL):
         """
         Initialize cache manager
         
         Args:
             use_redis: Try to use Redis if available
             redis_config: Redis configuration dict (host, port, db, password)
+            memory_config: InMemoryCache configuration dict
+                           (max_entries, max_bytes, eviction_policy)
+            generation_ttl: Seconds a namespace prefix is reused locally before
+                            its generations are fetched again (0 = every call).
+                            Invalidations from this process apply at once;
+                            other workers see them within generation_ttl.
         """
         self.cache = None
+        self.generation_ttl = generation_ttl
+        # namespace -> (versioned prefix, expires at)
+        self._prefixes: Dict[str, tuple] = {}
+        memory_config = memory_config or {}
         
         if use_redis and REDIS_AVAILABLE:
             try:
@@ -272,9 +616,9 @@ class CacheManager:
                 logger.info("CacheManager initialized with Redis")
             except Exception as e:
                 logger.warning(f"Failed to initialize Redis, falling back to InMemoryCache: {e}")
-                self.cache = InMemoryCache()
+                self.cache = InMemoryCache(**memory_config)
         else:
-            self.cache = InMemoryCache()
+            self.cache = InMemoryCache(**memory_config)
             if not REDIS_AVAILABLE:
                 logger.info("Redis not available, using InMemoryCache")
             else:
@@ -304,6 +648,82 @@ class CacheManager:
         """Get cache statistics"""
         return self.cache.get_stats()
     
+    LOCK_KEY_PREFIX = '_cache_lock:'
+    
+    def acquire_lock(self, key: str, timeout: float = 10.0) -> Optional[str]:
+        """
+        Short-lived lock on a cache key (SET NX on Redis), so only one worker
+        recomputes it. Returns a token for release_lock, or None if held elsewhere.
+        """
+        token = uuid.uuid4().hex
+        if self.cache.add(self.LOCK_KEY_PREFIX + key, token, timeout):
+            return token
+        return None
+    
+    def release_lock(self, key: str, token: str) -> bool:
+        """Release a lock taken with acquire_lock"""
+        return self.cache.release_lock(self.LOCK_KEY_PREFIX + key, token)
+    
+    @staticmethod
+    def _namespace_parts(namespace: str) -> List[str]:
+        return [part for part in str(namespace).split(NAMESPACE_SEPARATOR) if part]
+    
+    def namespace_prefix(self, namespace: str) -> str:
+        """
+        Versioned key prefix of a namespace, e.g. 'boq_analysis:project-42' ->
+        'boq_analysis:v3:project-42:v1:' (each level carries its own generation,
+        so invalidating a parent also invalidates all of its children)
+        
+        Reused for generation_ttl seconds, so @cached does not pay a
+        generation lookup (an MGET round-trip on Redis) on every call.
+        """
+        now = time.monotonic()
+        known = self._prefixes.get(namespace)
+        if known is not None and now < known[1]:
+            return known[0]
+        
+        parts = self._namespace_parts(namespace)
+        if not parts:
+            return ''
+        levels = [NAMESPACE_SEPARATOR.join(parts[:depth + 1]) for depth in range(len(parts))]
+        generations = self.cache.get_generations(levels)
+        prefix = ''.join(
+            f"{part}{NAMESPACE_SEPARATOR}v{generation}{NAMESPACE_SEPARATOR}"
+            for part, generation in zip(parts, generations)
+        )
+        if self.generation_ttl > 0:
+            if len(self._prefixes) >= 4096:
+                self._prefixes = {}
+            self._prefixes[namespace] = (prefix, now + self.generation_ttl)
+        return prefix
+    
+    def namespaced_key(self, namespace: str, key: str) -> str:
+        """Readable cache key inside a namespace"""
+        return f"{self.namespace_prefix(namespace)}{key}"
+    
+    def invalidate_namespace(self, namespace: str, purge: bool = True) -> int:
+        """
+        Invalidate every entry in a namespace (and its sub-namespaces)
+        إبطال كل الإدخالات في نطاق محدد فقط (مثل مشروع واحد)
+        
+        The generation bump makes old keys unreachable in O(1); with purge=True
+        the old keys are also deleted (SCAN on Redis) to free memory right away.
+        
+        Returns:
+            Number of keys physically deleted
+        """
+        parts = self._namespace_parts(namespace)
+        if not parts:
+            return 0
+        self._prefixes = {}
+        old_prefix = self.namespace_prefix(namespace)
+        self.cache.bump_generation(NAMESPACE_SEPARATOR.join(parts))
+        # Sub-namespaces are memoized separately - drop them all
+        self._prefixes = {}
+        deleted = self.cache.delete_prefix(old_prefix) if purge else 0
+        logger.info(f"Invalidated cache namespace '{namespace}' ({deleted} keys deleted)")
+        return deleted
+    
     def generate_key(self, *args, **kwargs) -> str:
         """
         Generate cache key from arguments
@@ -313,6 +733,58 @@ class CacheManager:
         return hashlib.md5(key_data.encode()).hexdigest()
 
 
+class SingleFlight:
+    """
+    Request coalescing - only one caller computes a key, concurrent callers
+    wait on the same Future and receive the same result (or exception)
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+    
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        
+        if not leader:
+            return future.result()
+        
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+    
+    def in_flight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._calls
+
+
+class _StaleWhileRevalidate:
+    """Cached value with a soft expiry (served stale until the hard TTL)"""
+    __slots__ = ('value', 'fresh_until')
+    
+    def __init__(self, value: Any, fresh_until: float):
+        self.value = value
+        self.fresh_until = fresh_until
+    
+    def is_fresh(self) -> bool:
+        return time.time() < self.fresh_until
+
+
+_single_flight = SingleFlight()
+
+
 # Global cache manager instance
 _cache_manager: Optional[CacheManager] = None
 
@@ -325,7 +797,9 @@ def get_cache_manager() -> CacheManager:
     return _cache_manager
 
 
-def cached(ttl: Optional[int] = 300, key_prefix: str = ""):
+def cached(ttl: Optional[int] = 300, key_prefix: str = "", cache_manager: Optional[CacheManager] = None,
+           namespace: Optional[Callable[..., Any]] = None, single_flight: bool = True,
+           stale_ttl: Optional[int] = None, lock_timeout: float = 10.0):
     """
     Decorator for caching function results
     ديكوريتر للتخزين المؤقت لنتائج الدوال
@@ -333,70 +807,158 @@ def cached(ttl: Optional[int] = 300, key_prefix: str = ""):
     Args:
         ttl: Time to live in seconds (default: 300 = 5 minutes)
         key_prefix: Prefix for cache key
+        cache_manager: Dedicated cache (e.g. a small LFU cache for hot results);
+                       defaults to the global cache manager
+        namespace: Callable receiving the function arguments and returning a
+                   sub-namespace under key_prefix (e.g. the project id), so
+                   invalidate_cache(f"{key_prefix}:{project_id}") drops only
+                   that project's entries
+        single_flight: Coalesce concurrent misses - one caller computes, the others
+                       wait for its result (plus a short SET NX lock on Redis so only
+                       one worker process recomputes)
+        stale_ttl: Stale-while-revalidate window in seconds - after ttl the old value
+                   is still served for up to stale_ttl while one background thread
+                   refreshes it
+        lock_timeout: Max seconds a Redis recompute lock is held / waited for
     
     Example:
         @cached(ttl=600, key_prefix="user")
         def get_user(user_id):
             return db.query(User).get(user_id)
+        
+        hot_cache = CacheManager(use_redis=False, memory_config={'max_entries': 1000, 'eviction_policy': 'lfu'})
+        
+        @cached(ttl=60, key_prefix="dashboard", cache_manager=hot_cache)
+        def get_dashboard_stats(project_id):
+            ...
+        
+        @cached(ttl=600, key_prefix="boq_analysis", namespace=lambda project_id, *a, **k: f"project-{project_id}")
+        def analyze_boq(project_id, items):
+            ...
+        
+        invalidate_cache("boq_analysis:project-42")   # only project 42
+        invalidate_cache("boq_analysis")              # every project
+        
+        @cached(ttl=30, key_prefix="dashboard_stats", stale_ttl=300)
+        def get_dashboard_stats():
+            ...   # expensive; refreshed in the background once per 30 s
     """
+    def get_cache() -> CacheManager:
+        return cache_manager if cache_manager is not None else get_cache_manager()
+    
     def decorator(func: Callable) -> Callable:
+        func_name = f"{func.__module__}.{func.__name__}"
+        
+        def entry_namespace(args, kwargs) -> str:
+            base = key_prefix or func_name
+            if namespace is None:
+                return base
+            return f"{base}{NAMESPACE_SEPARATOR}{namespace(*args, **kwargs)}"
+        
+        def make_key(cache: CacheManager, args, kwargs) -> str:
+            key_data = f"{func_name}:{args}:{sorted(kwargs.items())}"
+            return cache.namespaced_key(entry_namespace(args, kwargs), hashlib.md5(key_data.encode()).hexdigest())
+        
+        def store(cache: CacheManager, cache_key: str, result: Any):
+            if stale_ttl and ttl:
+                cache.set(cache_key, _StaleWhileRevalidate(result, time.time() + ttl), ttl + stale_ttl)
+            else:
+                cache.set(cache_key, result, ttl)
+        
+        def fresh(value: Any) -> bool:
+            return value is not None and (not isinstance(value, _StaleWhileRevalidate) or value.is_fresh())
+        
+        def unwrap(value: Any) -> Any:
+            return value.value if isinstance(value, _StaleWhileRevalidate) else value
+        
+        def load(cache: CacheManager, cache_key: str, args, kwargs) -> Any:
+            """Compute and store (leader only); re-checks the cache and honours the Redis lock"""
+            cached_value = cache.get(cache_key)
+            if fresh(cached_value):
+                return unwrap(cached_value)
+            
+            token = None
+            if isinstance(cache.cache, RedisCache):
+                token = cache.acquire_lock(cache_key, lock_timeout)
+                if token is None:
+                    # Another worker is computing - wait for its result
+                    deadline = time.time() + lock_timeout
+                    while time.time() < deadline:
+                        time.sleep(0.05)
+                        cached_value = cache.get(cache_key)
+                        if fresh(cached_value):
+                            return unwrap(cached_value)
+            
+            try:
+                result = func(*args, **kwargs)
+                store(cache, cache_key, result)
+                return result
+            finally:
+                if token is not None:
+                    cache.release_lock(cache_key, token)
+        
+        def refresh_in_background(cache: CacheManager, cache_key: str, args, kwargs):
+            if _single_flight.in_flight(cache_key):
+                return
+            
+            def refresh():
+                try:
+                    _single_flight.do(cache_key, lambda: load(cache, cache_key, args, kwargs))
+                except Exception as e:
+                    logger.error(f"Background refresh failed for {func_name}: {e}")
+            
+            threading.Thread(target=refresh, name=f"cache-refresh-{func.__name__}", daemon=True).start()
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
-            cache = get_cache_manager()
+            cache = get_cache()
             
-            # Generate cache key
-            func_name = f"{func.__module__}.{func.__name__}"
-            key_data = f"{key_prefix}:{func_name}:{args}:{sorted(kwargs.items())}"
-            cache_key = hashlib.md5(key_data.encode()).hexdigest()
+            # Generate cache key (readable namespace + hashed arguments)
+            cache_key = make_key(cache, args, kwargs)
             
             # Try to get from cache
             cached_value = cache.get(cache_key)
             if cached_value is not None:
-                logger.debug(f"Cache HIT for {func_name}")
-                return cached_value
+                if not fresh(cached_value):
+                    logger.debug(f"Cache STALE for {func_name} - refreshing in background")
+                    refresh_in_background(cache, cache_key, args, kwargs)
+                else:
+                    logger.debug(f"Cache HIT for {func_name}")
+                return unwrap(cached_value)
             
-            # Cache miss - execute function
+            # Cache miss - execute function (once per key across concurrent callers)
             logger.debug(f"Cache MISS for {func_name}")
-            result = func(*args, **kwargs)
-            
-            # Store in cache
-            cache.set(cache_key, result, ttl)
+            if single_flight:
+                return _single_flight.do(cache_key, lambda: load(cache, cache_key, args, kwargs))
             
+            result = func(*args, **kwargs)
+            store(cache, cache_key, result)
             return result
         
         # Add cache control methods
-        wrapper.clear_cache = lambda: get_cache_manager().clear()
-        wrapper.cache_key = lambda *args, **kwargs: hashlib.md5(
-            f"{key_prefix}:{func.__module__}.{func.__name__}:{args}:{sorted(kwargs.items())}".encode()
-        ).hexdigest()
+        wrapper.clear_cache = lambda: get_cache().invalidate_namespace(key_prefix or func_name)
+        wrapper.cache_key = lambda *args, **kwargs: make_key(get_cache(), args, kwargs)
+        wrapper.invalidate = lambda *args, **kwargs: get_cache().invalidate_namespace(
+            entry_namespace(args, kwargs)
+        )
         
         return wrapper
     return decorator
 
 
-def invalidate_cache(key_prefix: str):
+def invalidate_cache(key_prefix: str, purge: bool = True) -> int:
     """
-    Invalidate all cache entries with given prefix
-    إبطال جميع إدخالات التخزين المؤقت بالبادئة المعطاة
+    Invalidate all cache entries in a namespace
+    إبطال جميع إدخالات التخزين المؤقت في النطاق المعطى فقط
     
-    Note: This only works with patterns for Redis. For InMemoryCache, it clears all.
-    """
-    cache = get_cache_manager()
+    key_prefix is the namespace used by @cached (optionally with a
+    sub-namespace, e.g. "boq_analysis:project-42"). Other namespaces keep
+    their entries - no full clear and no blocking KEYS on Redis.
     
-    # For Redis, we can use pattern matching
-    if isinstance(cache.cache, RedisCache):
-        try:
-            pattern = f"{key_prefix}:*"
-            keys = cache.cache.redis_client.keys(pattern)
-            if keys:
-                cache.cache.redis_client.delete(*keys)
-                logger.info(f"Invalidated {len(keys)} cache entries with prefix '{key_prefix}'")
-        except Exception as e:
-            logger.error(f"Failed to invalidate cache with prefix '{key_prefix}': {e}")
-    else:
-        # For InMemoryCache, we need to clear all (no pattern support)
-        logger.warning(f"InMemoryCache doesn't support prefix invalidation, clearing all cache")
-        cache.clear()
+    Returns:
+        Number of keys physically deleted
+    """
+    return get_cache_manager().invalidate_namespace(key_prefix, purge=purge)
 
 
 # Flask integration
@@ -413,9 +975,14 @@ def init_cache(app):
         'db': app.config.get('REDIS_DB', 0),
         'password': app.config.get('REDIS_PASSWORD')
     }
+    memory_config = {
+        'max_entries': app.config.get('CACHE_MAX_ENTRIES', 10000),
+        'max_bytes': app.config.get('CACHE_MAX_BYTES', 256 * 1024 * 1024),
+        'eviction_policy': app.config.get('CACHE_EVICTION_POLICY', 'lru')
+    }
     
     # Initialize cache manager
-    cache_manager = CacheManager(use_redis=use_redis, redis_config=redis_config)
+    cache_manager = CacheManager(use_redis=use_redis, redis_config=redis_config, memory_config=memory_config)
     
     # Store in app config
     app.config['CACHE_MANAGER'] = cache_manager
@@ -0,0 +1,209 @@
+"""
+AnalysisJobs - التحليلات الطويلة كمهام قابلة للتنفيذ في الخلفية
+Long-running analyses shared by the Flask endpoints and JobQueue workers
+
+كل تحليل دالة واحدة تأخذ الأنظمة + المدخلات + دالة تقدم اختيارية،
+وتعيد نفس جسم الاستجابة المتزامنة. العمليات المنفذة تبني أنظمتها
+مرة واحدة عبر init_worker.
+"""
+
+from functools import cached_property
+from typing import Callable, Dict, List, Optional
+
+from .BOQAnalysisPipeline import BOQAnalysisPipeline
+from .ComprehensiveScheduler import ComprehensiveScheduler
+from .ExcelIntelligence import ExcelIntelligence
+from .ItemAnalyzer import ItemAnalyzer
+from .ItemClassifier import ItemClassifier
+from .ProductivityDatabase import ProductivityDatabase
+from .SBCComplianceChecker import SBCComplianceChecker
+from .SCurveGenerator import SCurveGenerator
+from .WorkbookCache import WorkbookCache
+
+# كل كم بند يُحدَّث التقدم أثناء تصنيف بنود الملف المرفوع
+CLASSIFY_PROGRESS_EVERY = 1000
+
+Progress = Optional[Callable[..., None]]
+
+
+class AnalysisSystems:
+    """الأنظمة المطلوبة للتحليلات - تُبنى عند أول استخدام"""
+
+    def __init__(
+        self,
+        db_path: str,
+        workbook_cache_dir: Optional[str] = None,
+        workbook_cache_max_bytes: int = 512 * 1024 * 1024,
+        pipeline_workers: Optional[int] = None,
+        **instances
+    ):
+        """
+        Args:
+            db_path: قاعدة البيانات
+            workbook_cache_dir: مجلد كاش المصنفات (بدون كاش إذا None)
+            workbook_cache_max_bytes: الحد الأقصى لكاش المصنفات
+            pipeline_workers: عدد عمليات BOQAnalysisPipeline
+            **instances: أنظمة جاهزة (مثل classifier=...) بدلاً من إنشائها
+        """
+        self.db_path = db_path
+        self.workbook_cache_dir = workbook_cache_dir
+        self.workbook_cache_max_bytes = workbook_cache_max_bytes
+        self.pipeline_workers = pipeline_workers
+        self.__dict__.update(instances)
+
+    @cached_property
+    def workbook_cache(self) -> Optional[WorkbookCache]:
+        if self.workbook_cache_dir is None:
+            return None
+        return WorkbookCache(self.workbook_cache_dir, self.workbook_cache_max_bytes)
+
+    @cached_property
+    def excel_intel(self) -> ExcelIntelligence:
+        return ExcelIntelligence(self.workbook_cache)
+
+    @cached_property
+    def classifier(self) -> ItemClassifier:
+        return ItemClassifier(self.db_path)
+
+    @cached_property
+    def item_analyzer(self) -> ItemAnalyzer:
+        return ItemAnalyzer(self.db_path)
+
+    @cached_property
+    def productivity_db(self) -> ProductivityDatabase:
+        return ProductivityDatabase(self.db_path)
+
+    @cached_property
+    def compliance_checker(self) -> SBCComplianceChecker:
+        return SBCComplianceChecker(self.db_path)
+
+    @cached_property
+    def boq_pipeline(self) -> BOQAnalysisPipeline:
+        return BOQAnalysisPipeline(
+            self.classifier, self.item_analyzer, self.productivity_db, self.compliance_checker,
+            max_workers=self.pipeline_workers
+        )
+
+    @cached_property
+    def scheduler(self) -> ComprehensiveScheduler:
+        return ComprehensiveScheduler(self.db_path)
+
+    @cached_property
+    def s_curve_generator(self) -> SCurveGenerator:
+        return SCurveGenerator(self.db_path)
+
+
+def _report(progress: Progress, fraction: Optional[float], message: str, force: bool = False):
+    if progress:
+        progress(fraction, message, force=force)
+
+
+# ═══════════════════════════════════════════════════════════════
+# التحليلات (مشتركة بين الوضع المتزامن والمهام)
+# ═══════════════════════════════════════════════════════════════
+
+def analyze_upload(systems: AnalysisSystems, file_path: str, filename: str, progress: Progress = None) -> Dict:
+    """اكتشاف + استخراج + تصنيف ملف Excel مرفوع (جسم استجابة /api/upload)"""
+
+    def on_rows(state: Dict):
+        _report(progress, None, f"قراءة {state['rows_read']} صف - {state['items']} بند ({state['sheet']})")
+
+    _report(progress, 0.05, 'تحليل الملف - Reading workbook', force=True)
+    discovery, data = systems.excel_intel.ingest(file_path, on_rows)
+    if discovery['file_type'] == 'error':
+        raise ValueError(discovery.get('error'))
+
+    # إذا كان BOQ، قم بتصنيف البنود
+    if discovery['file_type'] == 'boq' and 'items' in data:
+        items = data['items']
+        _report(progress, 0.6, f'تصنيف {len(items)} بند - Classifying', force=True)
+        # التصنيف في مكانه - بدون نسخ القائمة
+        for index, item in enumerate(items, 1):
+            item['classification'] = systems.classifier.classify(item['description'])
+            if index % CLASSIFY_PROGRESS_EVERY == 0:
+                _report(progress, 0.6 + 0.4 * index / len(items), f'تصنيف {index}/{len(items)}')
+
+        data['classification_stats'] = systems.classifier.get_statistics(items)
+
+    return {
+        'status': 'success',
+        'file': filename,
+        'discovery': discovery,
+        'data': data
+    }
+
+
+def comprehensive_analysis(systems: AnalysisSystems, items: List[Dict], progress: Progress = None) -> Dict:
+    """التحليل الشامل مع SBC 2024 (جسم استجابة /api/comprehensive-boq-analysis)"""
+
+    def on_stage(state: Dict):
+        _report(progress, state['completed'] / state['total'], f"المرحلة: {state['stage']}", force=True)
+
+    return systems.boq_pipeline.run(items, on_stage)
+
+
+def generate_schedule(
+    systems: AnalysisSystems,
+    activities: List[Dict],
+    start_date: str = '2025-01-01',
+    constraints: Optional[Dict] = None,
+    progress: Progress = None
+) -> Dict:
+    """توليد جدول زمني (جسم استجابة /api/generate-schedule)"""
+    _report(progress, 0.1, f'جدولة {len(activities)} نشاط - Scheduling', force=True)
+    schedule = systems.scheduler.generate_schedule(activities, start_date, constraints)
+    return {
+        'status': 'success',
+        'schedule': schedule
+    }
+
+
+def generate_s_curve(
+    systems: AnalysisSystems,
+    schedule: Dict,
+    interval: str = 'weekly',
+    progress: Progress = None
+) -> Dict:
+    """توليد منحنى S (جسم استجابة /api/generate-s-curve)"""
+    _report(progress, 0.1, 'توليد منحنى S - Generating S-curve', force=True)
+    return {
+        'status': 'success',
+        's_curve': systems.s_curve_generator.generate_s_curve(schedule, interval)
+    }
+
+
+# ═══════════════════════════════════════════════════════════════
+# العمليات المنفذة (JobQueue workers)
+# ═══════════════════════════════════════════════════════════════
+
+_worker_systems: Optional[AnalysisSystems] = None
+
+
+def init_worker(config: Dict):
+    """تهيئة العملية المنفذة - الطابور يوزع المهام، فلا توازي داخلي للخط"""
+    global _worker_systems
+    _worker_systems = AnalysisSystems(pipeline_workers=1, **config)
+
+
+def run_upload_job(payload: Dict, progress: Callable) -> Dict:
+    return analyze_upload(_worker_systems, progress=progress, **payload)
+
+
+def run_comprehensive_analysis_job(payload: Dict, progress: Callable) -> Dict:
+    return comprehensive_analysis(_worker_systems, progress=progress, **payload)
+
+
+def run_schedule_job(payload: Dict, progress: Callable) -> Dict:
+    return generate_schedule(_worker_systems, progress=progress, **payload)
+
+
+def run_s_curve_job(payload: Dict, progress: Callable) -> Dict:
+    return generate_s_curve(_worker_systems, progress=progress, **payload)
+
+
+JOB_HANDLERS = {
+    'upload': run_upload_job,
+    'comprehensive_boq_analysis': run_comprehensive_analysis_job,
+    'generate_schedule': run_schedule_job,
+    'generate_s_curve': run_s_curve_job,
+}
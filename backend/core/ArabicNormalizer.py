@@ -0,0 +1,91 @@
+"""
+ArabicNormalizer - طبقة توحيد النصوص العربية/الإنجليزية
+تُستخدم من كل أنظمة مطابقة الكلمات المفتاحية (ItemClassifier، RelationshipEngine،
+SBCComplianceChecker، ItemAnalyzer، RequestParser) بحيث يُوحَّد وصف البند
+مرة واحدة فقط ويُعاد استخدامه من الكاش المشترك.
+
+التوحيد:
+- حروف صغيرة للإنجليزية
+- حذف التشكيل (الفتحة، الضمة، الكسرة، الشدة، السكون، التنوين) والتطويل (ـ)
+- أ/إ/آ/ٱ → ا ، ى → ي ، ة → ه ، ؤ → و ، ئ → ي
+- الأرقام الهندية (٠-٩) → 0-9
+- توحيد المسافات
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import FrozenSet, Iterable, Union
+
+_FOLD_TABLE = str.maketrans({
+    **{chr(code): None for code in range(0x064B, 0x0660)},  # التشكيل
+    'ٰ': None,   # ألف خنجرية
+    'ـ': None,   # تطويل
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ة': 'ه', 'ؤ': 'و', 'ئ': 'ي',
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},
+})
+
+_WHITESPACE = re.compile(r'\s+')
+_TOKEN = re.compile(r'\w+')
+
+CACHE_SIZE = 65536
+
+
+def fold_arabic(text: str) -> str:
+    """توحيد الحروف العربية فقط (بدون تغيير حالة الأحرف أو المسافات) - مناسب لأنماط Regex"""
+    return text.translate(_FOLD_TABLE)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize(text: str) -> str:
+    """توحيد نص للمطابقة (مع كاش LRU مشترك)"""
+    if not text:
+        return ''
+    return _WHITESPACE.sub(' ', fold_arabic(text.lower())).strip()
+
+
+@dataclass(frozen=True)
+class NormalizedText:
+    """الصيغة الموحدة لوصف بند: النص الموحد + فهرس الكلمات"""
+    raw: str
+    text: str
+    tokens: FrozenSet[str]
+
+    def contains(self, keyword: str) -> bool:
+        """هل يحتوي النص على الكلمة المفتاحية (بعد توحيدها)؟"""
+        return normalize(keyword) in self.text
+
+    def contains_any(self, keywords: Iterable[str]) -> bool:
+        return any(normalize(keyword) in self.text for keyword in keywords)
+
+    def __str__(self) -> str:
+        return self.text
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _prepare(text: str) -> NormalizedText:
+    normalized = normalize(text)
+    return NormalizedText(raw=text, text=normalized, tokens=frozenset(_TOKEN.findall(normalized)))
+
+
+def prepare(text: Union[str, NormalizedText, None]) -> NormalizedText:
+    """
+    الصيغة الموحدة لنص (تُحسب مرة واحدة لكل وصف فريد)
+
+    يقبل نصاً خاماً أو NormalizedText محسوباً مسبقاً
+    """
+    if isinstance(text, NormalizedText):
+        return text
+    return _prepare(text or '')
+
+
+def cache_info() -> dict:
+    """إحصائيات الكاش المشترك"""
+    info = _prepare.cache_info()
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'max_size': info.maxsize,
+    }
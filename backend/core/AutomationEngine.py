@@ -15,6 +15,8 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+from .ConnectionPool import get_pool
+
 
 class TriggerType(Enum):
     """Available trigger types"""
@@ -80,75 +82,72 @@ class AutomationEngine:
     
     def _init_database(self):
         """Initialize automation tables in database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Automations table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS automations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                description TEXT,
-                trigger_type TEXT NOT NULL,
-                trigger_config TEXT,
-                conditions TEXT,
-                actions TEXT NOT NULL,
-                is_active BOOLEAN DEFAULT 1,
-                board_id TEXT,
-                created_by TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                execution_count INTEGER DEFAULT 0,
-                last_executed TIMESTAMP
-            )
-        ''')
-        
-        # Automation execution history
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS automation_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                automation_id INTEGER,
-                triggered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                trigger_data TEXT,
-                conditions_met BOOLEAN,
-                actions_executed TEXT,
-                success BOOLEAN,
-                error_message TEXT,
-                execution_time_ms INTEGER,
-                FOREIGN KEY (automation_id) REFERENCES automations(id)
-            )
-        ''')
-        
-        # Scheduled automations (for recurring tasks)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS scheduled_automations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                automation_id INTEGER,
-                schedule_type TEXT,
-                schedule_config TEXT,
-                next_run TIMESTAMP,
-                last_run TIMESTAMP,
-                is_active BOOLEAN DEFAULT 1,
-                FOREIGN KEY (automation_id) REFERENCES automations(id)
-            )
-        ''')
-        
-        # Webhook configurations
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS webhooks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                url TEXT NOT NULL,
-                secret TEXT,
-                events TEXT,
-                headers TEXT,
-                is_active BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        with get_pool(self.db_path).write() as conn:
+            cursor = conn.cursor()
+        
+            # Automations table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS automations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    description TEXT,
+                    trigger_type TEXT NOT NULL,
+                    trigger_config TEXT,
+                    conditions TEXT,
+                    actions TEXT NOT NULL,
+                    is_active BOOLEAN DEFAULT 1,
+                    board_id TEXT,
+                    created_by TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    execution_count INTEGER DEFAULT 0,
+                    last_executed TIMESTAMP
+                )
+            ''')
+        
+            # Automation execution history
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS automation_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    automation_id INTEGER,
+                    triggered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    trigger_data TEXT,
+                    conditions_met BOOLEAN,
+                    actions_executed TEXT,
+                    success BOOLEAN,
+                    error_message TEXT,
+                    execution_time_ms INTEGER,
+                    FOREIGN KEY (automation_id) REFERENCES automations(id)
+                )
+            ''')
+        
+            # Scheduled automations (for recurring tasks)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS scheduled_automations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    automation_id INTEGER,
+                    schedule_type TEXT,
+                    schedule_config TEXT,
+                    next_run TIMESTAMP,
+                    last_run TIMESTAMP,
+                    is_active BOOLEAN DEFAULT 1,
+                    FOREIGN KEY (automation_id) REFERENCES automations(id)
+                )
+            ''')
+        
+            # Webhook configurations
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS webhooks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    secret TEXT,
+                    events TEXT,
+                    headers TEXT,
+                    is_active BOOLEAN DEFAULT 1,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
     
     def create_automation(self, automation_data: Dict) -> Dict:
         """
@@ -182,27 +181,25 @@ class AutomationEngine:
         Returns:
             dict: Created automation with ID
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO automations 
-            (name, description, trigger_type, trigger_config, conditions, actions, board_id, created_by)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            automation_data['name'],
-            automation_data.get('description', ''),
-            automation_data['trigger']['type'],
-            json.dumps(automation_data['trigger'].get('config', {})),
-            json.dumps(automation_data.get('conditions', [])),
-            json.dumps(automation_data['actions']),
-            automation_data.get('board_id'),
-            automation_data.get('created_by')
-        ))
-        
-        automation_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with get_pool(self.db_path).write() as conn:
+            cursor = conn.cursor()
+        
+            cursor.execute('''
+                INSERT INTO automations 
+                (name, description, trigger_type, trigger_config, conditions, actions, board_id, created_by)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                automation_data['name'],
+                automation_data.get('description', ''),
+                automation_data['trigger']['type'],
+                json.dumps(automation_data['trigger'].get('config', {})),
+                json.dumps(automation_data.get('conditions', [])),
+                json.dumps(automation_data['actions']),
+                automation_data.get('board_id'),
+                automation_data.get('created_by')
+            ))
+        
+            automation_id = cursor.lastrowid
         
         # Reload active automations
         self._load_active_automations()
@@ -597,136 +594,123 @@ class AutomationEngine:
     
     def _load_active_automations(self):
         """Load all active automations from database"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM automations WHERE is_active = 1
-        ''')
-        
-        rows = cursor.fetchall()
-        self.active_automations = [
-            {
-                'id': row['id'],
-                'name': row['name'],
-                'description': row['description'],
-                'trigger_type': row['trigger_type'],
-                'trigger_config': json.loads(row['trigger_config'] or '{}'),
-                'conditions': json.loads(row['conditions'] or '[]'),
-                'actions': json.loads(row['actions']),
-                'board_id': row['board_id']
-            }
-            for row in rows
-        ]
+        with get_pool(self.db_path).read() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
         
-        conn.close()
+            cursor.execute('''
+                SELECT * FROM automations WHERE is_active = 1
+            ''')
+        
+            rows = cursor.fetchall()
+            self.active_automations = [
+                {
+                    'id': row['id'],
+                    'name': row['name'],
+                    'description': row['description'],
+                    'trigger_type': row['trigger_type'],
+                    'trigger_config': json.loads(row['trigger_config'] or '{}'),
+                    'conditions': json.loads(row['conditions'] or '[]'),
+                    'actions': json.loads(row['actions']),
+                    'board_id': row['board_id']
+                }
+                for row in rows
+            ]
     
     def _log_execution(self, automation_id: int, trigger_data: Dict, 
                        conditions_met: bool, actions_executed: List, 
                        success: bool, execution_time_ms: int = 0,
                        error_message: str = ''):
         """Log automation execution to history"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO automation_history 
-            (automation_id, trigger_data, conditions_met, actions_executed, 
-             success, error_message, execution_time_ms)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            automation_id,
-            json.dumps(trigger_data),
-            conditions_met,
-            json.dumps(actions_executed),
-            success,
-            error_message,
-            execution_time_ms
-        ))
-        
-        conn.commit()
-        conn.close()
+        with get_pool(self.db_path).write() as conn:
+            cursor = conn.cursor()
+        
+            cursor.execute('''
+                INSERT INTO automation_history 
+                (automation_id, trigger_data, conditions_met, actions_executed, 
+                 success, error_message, execution_time_ms)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                automation_id,
+                json.dumps(trigger_data),
+                conditions_met,
+                json.dumps(actions_executed),
+                success,
+                error_message,
+                execution_time_ms
+            ))
     
     def _update_execution_count(self, automation_id: int):
         """Update automation execution count"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE automations 
-            SET execution_count = execution_count + 1,
-                last_executed = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (automation_id,))
-        
-        conn.commit()
-        conn.close()
-    
-    def get_automation_stats(self, automation_id: Optional[int] = None) -> Dict:
-        """Get automation statistics"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with get_pool(self.db_path).write() as conn:
+            cursor = conn.cursor()
         
-        if automation_id:
             cursor.execute('''
-                SELECT 
-                    COUNT(*) as total_executions,
-                    SUM(CASE WHEN success = 1 THEN 1 ELSE 0 END) as successful,
-                    SUM(CASE WHEN success = 0 THEN 1 ELSE 0 END) as failed,
-                    AVG(execution_time_ms) as avg_execution_time,
-                    MAX(triggered_at) as last_execution
-                FROM automation_history
-                WHERE automation_id = ?
+                UPDATE automations 
+                SET execution_count = execution_count + 1,
+                    last_executed = CURRENT_TIMESTAMP
+                WHERE id = ?
             ''', (automation_id,))
-        else:
-            cursor.execute('''
-                SELECT 
-                    COUNT(*) as total_executions,
-                    SUM(CASE WHEN success = 1 THEN 1 ELSE 0 END) as successful,
-                    SUM(CASE WHEN success = 0 THEN 1 ELSE 0 END) as failed,
-                    AVG(execution_time_ms) as avg_execution_time
-                FROM automation_history
-            ''')
-        
-        row = cursor.fetchone()
-        conn.close()
+    
+    def get_automation_stats(self, automation_id: Optional[int] = None) -> Dict:
+        """Get automation statistics"""
+        with get_pool(self.db_path).read() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+        
+            if automation_id:
+                cursor.execute('''
+                    SELECT 
+                        COUNT(*) as total_executions,
+                        SUM(CASE WHEN success = 1 THEN 1 ELSE 0 END) as successful,
+                        SUM(CASE WHEN success = 0 THEN 1 ELSE 0 END) as failed,
+                        AVG(execution_time_ms) as avg_execution_time,
+                        MAX(triggered_at) as last_execution
+                    FROM automation_history
+                    WHERE automation_id = ?
+                ''', (automation_id,))
+            else:
+                cursor.execute('''
+                    SELECT 
+                        COUNT(*) as total_executions,
+                        SUM(CASE WHEN success = 1 THEN 1 ELSE 0 END) as successful,
+                        SUM(CASE WHEN success = 0 THEN 1 ELSE 0 END) as failed,
+                        AVG(execution_time_ms) as avg_execution_time
+                    FROM automation_history
+                ''')
+        
+            row = cursor.fetchone()
         
         return dict(row) if row else {}
     
     def get_all_automations(self, board_id: Optional[str] = None) -> List[Dict]:
         """Get all automations, optionally filtered by board"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with get_pool(self.db_path).read() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
         
-        if board_id:
-            cursor.execute('''
-                SELECT * FROM automations WHERE board_id = ? ORDER BY created_at DESC
-            ''', (board_id,))
-        else:
-            cursor.execute('''
-                SELECT * FROM automations ORDER BY created_at DESC
-            ''')
+            if board_id:
+                cursor.execute('''
+                    SELECT * FROM automations WHERE board_id = ? ORDER BY created_at DESC
+                ''', (board_id,))
+            else:
+                cursor.execute('''
+                    SELECT * FROM automations ORDER BY created_at DESC
+                ''')
         
-        rows = cursor.fetchall()
-        conn.close()
+            rows = cursor.fetchall()
         
         return [dict(row) for row in rows]
     
     def toggle_automation(self, automation_id: int, is_active: bool) -> Dict:
         """Enable or disable automation"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE automations SET is_active = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (is_active, automation_id))
+        with get_pool(self.db_path).write() as conn:
+            cursor = conn.cursor()
         
-        conn.commit()
-        conn.close()
+            cursor.execute('''
+                UPDATE automations SET is_active = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (is_active, automation_id))
         
         # Reload active automations
         self._load_active_automations()
@@ -739,15 +723,12 @@ class AutomationEngine:
     
     def delete_automation(self, automation_id: int) -> Dict:
         """Delete automation"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM automations WHERE id = ?', (automation_id,))
-        cursor.execute('DELETE FROM automation_history WHERE automation_id = ?', (automation_id,))
-        cursor.execute('DELETE FROM scheduled_automations WHERE automation_id = ?', (automation_id,))
+        with get_pool(self.db_path).write() as conn:
+            cursor = conn.cursor()
         
-        conn.commit()
-        conn.close()
+            cursor.execute('DELETE FROM automations WHERE id = ?', (automation_id,))
+            cursor.execute('DELETE FROM automation_history WHERE automation_id = ?', (automation_id,))
+            cursor.execute('DELETE FROM scheduled_automations WHERE automation_id = ?', (automation_id,))
         
         # Reload active automations
         self._load_active_automations()
@@ -0,0 +1,505 @@
+"""
+BOQAnalysisPipeline - خط معالجة دفعي للتحليل الشامل للمقايسة
+Staged batch pipeline for /api/comprehensive-boq-analysis
+
+بدلاً من تمرير كل بند على كل الأنظمة واحداً تلو الآخر، تعمل كل مرحلة
+على الدفعة كاملة:
+1. التحويل: قراءة الأرقام وقيمة المشروع
+2. التصنيف: مرة واحدة لكل وصف فريد (آلة Aho–Corasick + كاش)
+3. التحليل العميق: مرة واحدة لكل وصف فريد، على دفعات موزعة على
+   ProcessPoolExecutor عندما يكون حجم العمل كبيراً
+4. المدة: معدل الإنتاجية يُحمّل مرة واحدة لكل (نوع نشاط، فئة)
+5. فحص SBC: على دفعات بالتوازي ثم دمج الملخص
+6. الإحصائيات: مرور واحد على البنود المحللة
+
+المخرجات مطابقة للحلقة السابقة (بما في ذلك مشاركة نتائج كاش
+ItemAnalyzer بين البنود المتكررة).
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import multiprocessing
+import threading
+
+from .ItemAnalyzer import ItemAnalyzer
+from .SBCComplianceChecker import SBCComplianceChecker
+
+# حجم الدفعة المرسلة لكل عملية
+CHUNK_SIZE = 500
+
+# أقل عدد من البنود (الفريدة) لاستخدام العمليات المتوازية - أقل من ذلك أسرع محلياً
+PARALLEL_THRESHOLD = 2000
+
+PIPELINE_STAGES = ('parse', 'classify', 'analyze', 'duration', 'compliance', 'aggregate')
+
+PHASE_ORDER = [
+    'أعمال تمهيدية',
+    'أساسات',
+    'خرسانة مسلحة',
+    'بناء',
+    'سباكة',
+    'كهرباء',
+    'تشطيبات',
+    'أخرى'
+]
+
+
+# ═══════════════════════════════════════════════════════════════
+# دوال العمليات الفرعية (Worker processes)
+# ═══════════════════════════════════════════════════════════════
+
+_worker_analyzer: Optional[ItemAnalyzer] = None
+_worker_checker: Optional[SBCComplianceChecker] = None
+
+
+def _init_worker(db_path: str):
+    global _worker_analyzer, _worker_checker
+    _worker_analyzer = ItemAnalyzer(db_path)
+    _worker_checker = SBCComplianceChecker(db_path)
+
+
+def _analyze_chunk(item_datas: List[Dict]) -> List[Tuple[bool, object]]:
+    """تحليل دفعة - (True, النتيجة) أو (False, رسالة الخطأ) لكل بند"""
+    results = []
+    for item_data in item_datas:
+        try:
+            results.append((True, _worker_analyzer.analyze_item(item_data)))
+        except Exception as e:
+            results.append((False, str(e)))
+    return results
+
+
+def _check_chunk(items: List[Dict]) -> List[Dict]:
+    """فحص SBC لدفعة (الأخطاء تنتشر مثل check_batch)"""
+    return [_worker_checker.check_compliance(item, 'all') for item in items]
+
+
+def _chunks(values: List, size: int) -> List[List]:
+    return [values[start:start + size] for start in range(0, len(values), size)]
+
+
+class BOQAnalysisPipeline:
+    """خط المعالجة الدفعي للتحليل الشامل"""
+
+    def __init__(
+        self,
+        classifier,
+        item_analyzer: ItemAnalyzer,
+        productivity_db,
+        compliance_checker: SBCComplianceChecker,
+        max_workers: Optional[int] = None,
+        chunk_size: int = CHUNK_SIZE,
+        parallel_threshold: int = PARALLEL_THRESHOLD
+    ):
+        """
+        Args:
+            classifier / item_analyzer / productivity_db / compliance_checker: الأنظمة المشتركة
+            max_workers: عدد العمليات (الافتراضي عدد المعالجات)
+            chunk_size: حجم الدفعة لكل عملية
+            parallel_threshold: أقل حجم عمل لاستخدام العمليات المتوازية
+        """
+        self.classifier = classifier
+        self.item_analyzer = item_analyzer
+        self.productivity_db = productivity_db
+        self.compliance_checker = compliance_checker
+
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.parallel_threshold = parallel_threshold
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    # ═══════════════════════════════════════════════════════════════
+    # إدارة العمليات
+    # ═══════════════════════════════════════════════════════════════
+
+    def _use_pool(self, work_size: int) -> bool:
+        return self.max_workers > 1 and work_size >= self.parallel_threshold
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """مجمع عمليات دائم (يُنشأ عند أول حاجة ويُعاد استخدامه بين الطلبات)"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.item_analyzer.db_path,)
+                )
+            return self._executor
+
+    def shutdown(self):
+        """إيقاف مجمع العمليات"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    # ═══════════════════════════════════════════════════════════════
+    # المراحل
+    # ═══════════════════════════════════════════════════════════════
+
+    @staticmethod
+    def _parse_stage(items: List[Dict]) -> Tuple[List, float, Optional[Exception]]:
+        """تحويل الحقول الرقمية + قيمة المشروع في نفس المرور"""
+        parsed = []
+        project_value = 0
+        value_error = None
+        for item in items:
+            try:
+                parsed.append((
+                    item.get('description', ''),
+                    float(item.get('quantity', 0)),
+                    item.get('unit', ''),
+                    float(item.get('amount', 0)),
+                    float(item.get('rate', 0))
+                ))
+            except Exception as e:
+                parsed.append(e)
+
+            if value_error is None:
+                try:
+                    project_value += float(item.get('amount', 0))
+                except Exception as e:
+                    value_error = e
+        return parsed, project_value, value_error
+
+    def _classify_stage(self, parsed: List) -> List:
+        """التصنيف - مرة واحدة لكل وصف (الكاش في ItemClassifier)"""
+        classifications = []
+        for record in parsed:
+            if isinstance(record, Exception):
+                classifications.append(record)
+                continue
+            try:
+                classifications.append(self.classifier.classify(record[0]))
+            except Exception as e:
+                classifications.append(e)
+        return classifications
+
+    def _analyze_stage(self, parsed: List, classifications: List) -> List:
+        """
+        التحليل العميق - مرة واحدة لكل مفتاح كاش في ItemAnalyzer
+        (أول بند بالوصف يحدد النتيجة، تماماً مثل الحلقة المتسلسلة)
+        """
+        cache = self.item_analyzer.analysis_cache
+        first_occurrence: Dict[str, Dict] = {}
+        keys: List = []  # مفتاح الكاش، None (لا تحليل) أو خطأ هذا البند وحده
+        for index, (record, classification) in enumerate(zip(parsed, classifications)):
+            if isinstance(classification, Exception):
+                keys.append(None)
+                continue
+            description, quantity, unit = record[0], record[1], record[2]
+            try:
+                key = description.lower().strip()
+            except Exception as e:
+                keys.append(e)
+                continue
+            keys.append(key)
+            if key not in cache and key not in first_occurrence:
+                first_occurrence[key] = {
+                    'id': index + 1,
+                    'description': description,
+                    'quantity': quantity,
+                    'unit': unit,
+                    'classification': classification
+                }
+
+        pending = list(first_occurrence.items())
+        failures: Dict[str, str] = {}
+        if self._use_pool(len(pending)):
+            item_datas = [item_data for _, item_data in pending]
+            outcomes = []
+            for chunk_result in self._pool().map(_analyze_chunk, _chunks(item_datas, self.chunk_size)):
+                outcomes.extend(chunk_result)
+            for (key, _), (ok, value) in zip(pending, outcomes):
+                if ok:
+                    cache[key] = value
+                else:
+                    failures[key] = value
+        else:
+            for key, item_data in pending:
+                try:
+                    self.item_analyzer.analyze_item(item_data)
+                except Exception as e:
+                    failures[key] = str(e)
+
+        analyses = []
+        for key in keys:
+            if key is None or isinstance(key, Exception):
+                analyses.append(key)
+            elif key in failures:
+                analyses.append(Exception(failures[key]))
+            else:
+                analyses.append(cache[key])
+        return analyses
+
+    def _duration_stage(self, parsed: List, classifications: List, analyses: List) -> List:
+        """المدة - معدل الإنتاجية يُحمّل مرة واحدة لكل (نوع نشاط، فئة)"""
+        rates: Dict[Tuple[str, str], Optional[Dict]] = {}
+        durations = []
+        for record, classification, analysis in zip(parsed, classifications, analyses):
+            if analysis is None or isinstance(analysis, Exception):
+                durations.append(None)
+                continue
+            try:
+                rate_key = (classification['tier2_subcategory'], classification['tier1_category'])
+                if rate_key not in rates:
+                    rates[rate_key] = self.productivity_db.get_rate(*rate_key)
+                durations.append(self.productivity_db.duration_from_rate(rates[rate_key], record[1]))
+            except Exception as e:
+                durations.append(e)
+        return durations
+
+    def _compliance_stage(self, sbc_items: List[Dict]) -> Dict:
+        """فحص SBC على دفعات متوازية ثم دمج الملخص (نفس مخرجات check_batch)"""
+        if not self._use_pool(len(sbc_items)):
+            return self.compliance_checker.check_batch(sbc_items, category='all')
+
+        results = []
+        for chunk_result in self._pool().map(_check_chunk, _chunks(sbc_items, self.chunk_size)):
+            results.extend(chunk_result)
+        return self.compliance_checker.summarize_batch(results)
+
+    # ═══════════════════════════════════════════════════════════════
+    # التشغيل
+    # ═══════════════════════════════════════════════════════════════
+
+    def run(self, items: List[Dict], progress_callback: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        التحليل الشامل لدفعة بنود
+
+        Args:
+            items: بنود المقايسة
+            progress_callback: يُستدعى بعد كل مرحلة بـ {'stage', 'completed', 'total'}
+
+        Returns:
+            جسم استجابة /api/comprehensive-boq-analysis
+        """
+
+        # المراحل 1-4: تحويل، تصنيف، تحليل، مدة
+        def report(stage: str, completed: int):
+            if progress_callback:
+                progress_callback({'stage': stage, 'completed': completed, 'total': len(PIPELINE_STAGES)})
+
+        parsed, project_value, value_error = self._parse_stage(items)
+        report('parse', 1)
+        classifications = self._classify_stage(parsed)
+        report('classify', 2)
+        analyses = self._analyze_stage(parsed, classifications)
+        report('analyze', 3)
+        durations = self._duration_stage(parsed, classifications, analyses)
+        report('duration', 4)
+
+        analyzed_items = []
+        all_classifications = []
+        total_duration_days = 0
+        sbc_items_for_check = []
+
+        for idx, item in enumerate(items):
+            record, classification = parsed[idx], classifications[idx]
+            item_analysis, duration_result = analyses[idx], durations[idx]
+
+            if not isinstance(classification, Exception):
+                all_classifications.append(classification)
+
+            error = next((stage for stage in (record, classification, item_analysis, duration_result)
+                          if isinstance(stage, Exception)), None)
+            if error is not None:
+                # في حالة فشل تحليل بند معين، نستمر مع البنود الأخرى
+                analyzed_items.append({
+                    'item_number': idx + 1,
+                    'original_item': item,
+                    'error': str(error),
+                    'status': 'failed'
+                })
+                continue
+
+            if duration_result and 'duration_days' in duration_result:
+                total_duration_days += duration_result['duration_days']
+
+            item_desc, item_qty, item_unit = record[0], record[1], record[2]
+            sbc_items_for_check.append({
+                'id': idx + 1,
+                'description': item_desc,
+                'quantity': item_qty,
+                'unit': item_unit,
+                'classification': classification,
+                'extracted_info': item_analysis.get('extracted_info', {}),
+                'technical_specs': item_analysis.get('technical_specs', {})
+            })
+
+            analyzed_items.append({
+                'item_number': idx + 1,
+                'original_item': item,
+                'classification': classification,
+                'item_analysis': item_analysis,
+                'duration': duration_result,
+                'complexity_level': item_analysis.get('complexity_level', 'medium'),
+                'warnings': item_analysis.get('warnings', []),
+                'dependencies': item_analysis.get('dependencies', [])
+            })
+
+        # المرحلة 5: فحص الامتثال لكود البناء السعودي SBC 2024
+        sbc_compliance_results = []
+        sbc_compliance_summary = {
+            'total_items_checked': 0,
+            'compliant_items': 0,
+            'non_compliant_items': 0,
+            'warnings': 0,
+            'critical_violations': []
+        }
+
+        try:
+            compliance_results = self._compliance_stage(sbc_items_for_check)
+
+            # نفس منطق التجميع السابق (يمر على مفاتيح ملخص check_batch)
+            for result in compliance_results:
+                sbc_compliance_results.append(result)
+                sbc_compliance_summary['total_items_checked'] += 1
+
+                if result.get('compliant', True):
+                    sbc_compliance_summary['compliant_items'] += 1
+                else:
+                    sbc_compliance_summary['non_compliant_items'] += 1
+
+                if result.get('violations'):
+                    for violation in result['violations']:
+                        if violation.get('severity') == 'critical':
+                            sbc_compliance_summary['critical_violations'].append({
+                                'item_id': result.get('item_id'),
+                                'description': result.get('description'),
+                                'violation': violation
+                            })
+                        elif violation.get('severity') == 'warning':
+                            sbc_compliance_summary['warnings'] += 1
+
+            compliance_report = self.compliance_checker.generate_compliance_report(compliance_results)
+
+        except Exception as compliance_error:
+            compliance_report = {
+                'error': str(compliance_error),
+                'message': 'حدث خطأ في فحص الامتثال - Compliance check error'
+            }
+
+        report('compliance', 5)
+
+        # المرحلة 6: الإحصائيات وخطة التنفيذ - مرور واحد على البنود المحللة
+        classification_stats = self.classifier.get_statistics(
+            [{'classification': c} for c in all_classifications]
+        )
+
+        execution_plan = {
+            'phases': [],
+            'critical_path_items': [],
+            'parallel_activities': []
+        }
+
+        successfully_analyzed = 0
+        complexity_counts = {'high': 0, 'medium': 0, 'low': 0}
+        activities_by_category: Dict[str, List[Dict]] = {}
+        plan_error = None
+        for item in analyzed_items:
+            if 'error' not in item:
+                successfully_analyzed += 1
+            level = item.get('complexity_level')
+            if isinstance(level, str) and level in complexity_counts:
+                complexity_counts[level] += 1
+            if plan_error is None and 'classification' in item:
+                try:
+                    tier1 = item['classification'].get('tier1_category', 'أخرى')
+                    activities_by_category.setdefault(tier1, []).append(item)
+                except Exception as e:
+                    plan_error = e
+
+        if plan_error is not None:
+            execution_plan['error'] = str(plan_error)
+        else:
+            for phase_name in PHASE_ORDER:
+                if phase_name in activities_by_category:
+                    execution_plan['phases'].append({
+                        'phase_name': phase_name,
+                        'items_count': len(activities_by_category[phase_name]),
+                        'items': activities_by_category[phase_name]
+                    })
+
+        if value_error is not None:
+            raise value_error
+
+        summary = {
+            'total_items': len(items),
+            'successfully_analyzed': successfully_analyzed,
+            'failed_items': len(analyzed_items) - successfully_analyzed,
+            'total_estimated_duration_days': round(total_duration_days, 2),
+            'total_estimated_duration_months': round(total_duration_days / 30, 2),
+            'classification_distribution': classification_stats.get('tier1_distribution', {}),
+            'complexity_distribution': complexity_counts,
+            'sbc_compliance_rate': round(
+                (sbc_compliance_summary['compliant_items'] / sbc_compliance_summary['total_items_checked'] * 100)
+                if sbc_compliance_summary['total_items_checked'] > 0 else 0, 2
+            ),
+            'total_project_value': project_value
+        }
+
+        recommendations = self._recommendations(sbc_compliance_summary, summary)
+        report('aggregate', 6)
+
+        return {
+            'success': True,
+            'analysis_type': 'comprehensive_manual_boq_analysis_with_sbc_2024',
+            'analyzed_items': analyzed_items,
+            'sbc_compliance': {
+                'results': sbc_compliance_results,
+                'summary': sbc_compliance_summary,
+                'report': compliance_report
+            },
+            'summary': summary,
+            'classification_stats': classification_stats,
+            'execution_plan': execution_plan,
+            'recommendations': recommendations,
+            'timestamp': datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def _recommendations(sbc_compliance_summary: Dict, summary: Dict) -> List[Dict]:
+        """التوصيات بناءً على الامتثال والتعقيد والمدة"""
+        recommendations = []
+
+        # توصيات بناءً على الامتثال
+        if sbc_compliance_summary['critical_violations']:
+            recommendations.append({
+                'type': 'critical',
+                'category': 'sbc_compliance',
+                'title': 'مخالفات حرجة للكود السعودي',
+                'title_en': 'Critical SBC Violations',
+                'description': f'يوجد {len(sbc_compliance_summary["critical_violations"])} مخالفة حرجة يجب معالجتها فوراً',
+                'action': 'مراجعة البنود المخالفة وتصحيحها وفقاً لكود البناء السعودي SBC 2024'
+            })
+
+        # توصيات بناءً على التعقيد
+        high_complexity_count = summary['complexity_distribution']['high']
+        if high_complexity_count > 0:
+            recommendations.append({
+                'type': 'warning',
+                'category': 'complexity',
+                'title': 'بنود معقدة تحتاج خبرة متخصصة',
+                'title_en': 'Complex Items Require Specialized Expertise',
+                'description': f'يوجد {high_complexity_count} بند معقد يتطلب مقاولين متخصصين',
+                'action': 'التخطيط لتوفير الخبرات المتخصصة والمعدات اللازمة'
+            })
+
+        # توصيات بناءً على المدة
+        if summary['total_estimated_duration_months'] > 12:
+            recommendations.append({
+                'type': 'info',
+                'category': 'schedule',
+                'title': 'مشروع طويل المدى',
+                'title_en': 'Long-Term Project',
+                'description': f'المدة المتوقعة للمشروع: {summary["total_estimated_duration_months"]} شهر',
+                'action': 'وضع خطة تفصيلية للمراحل مع مراعاة العوامل الموسمية والظروف المناخية'
+            })
+
+        return recommendations
@@ -0,0 +1,195 @@
+"""
+BulkLoader - محرك الاستيراد المجمّع لجداول SQLite
+Bulk import engine for the Primavera magic tools
+
+- تحويل وتحقق الأعمدة دفعة واحدة عبر pandas (بدلاً من float() لكل صف)
+- أخطاء كل صف تُجمع على حدة دون إيقاف الاستيراد
+- الكتابة عبر executemany في معاملات محدودة الحجم (batch_size)، فيُحرَّر
+  قفل الكتابة بين الدفعات بدلاً من حجزه طوال الاستيراد
+- الفهارس الثانوية تُحذف قبل الاستيرادات الكبيرة وتُعاد بناؤها مرة واحدة بعدها
+- تقرير بعدد الصفوف في الثانية
+
+الاستخدام:
+    report = bulk_load(db_path, 'primavera_wbs', [
+        Column('wbs_id', required=True),
+        Column('seq_num', kind='int', default=1),
+    ], rows, indexes=WBS_INDEXES)
+"""
+
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .ConnectionPool import get_pool
+
+# عدد الصفوف في كل معاملة كتابة
+BATCH_SIZE = 5000
+
+# الاستيرادات الأكبر من هذا العدد تعيد بناء الفهارس الثانوية بعد التحميل
+INDEX_REBUILD_THRESHOLD = 10000
+
+
+@dataclass
+class Column:
+    """عمود في الجدول الهدف وكيفية قراءته من صفوف الإدخال"""
+    name: str
+    source: Optional[str] = None      # مفتاح الإدخال (افتراضياً نفس الاسم)
+    kind: str = 'text'                # text | real | int
+    default: Any = None               # للقيم المفقودة أو None
+    required: bool = False
+
+    @property
+    def key(self) -> str:
+        return self.source or self.name
+
+
+@dataclass
+class LoadReport:
+    """نتيجة الاستيراد المجمّع"""
+    total: int
+    loaded: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    batches: int = 0
+    seconds: float = 0.0
+    indexes_rebuilt: bool = False
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.loaded / self.seconds if self.seconds else 0.0
+
+
+def coerce_rows(
+    rows: Sequence[Dict[str, Any]],
+    columns: Sequence[Column]
+) -> Tuple[pd.DataFrame, Dict[int, str]]:
+    """
+    تحويل الصفوف إلى أعمدة بالأنواع المطلوبة دفعة واحدة
+
+    Returns:
+        (DataFrame بالصفوف الصالحة فقط وبترتيبها الأصلي, {رقم الصف: الخطأ})
+    """
+    # dtype=object يحفظ القيم كما هي (المعرّف 7 لا يصبح 7.0 بسبب القيم المفقودة)
+    frame = pd.DataFrame(list(rows), columns=sorted({column.key for column in columns}), dtype=object)
+    frame.index = range(len(rows))
+    errors: Dict[int, str] = {}
+    coerced = {}
+
+    for column in columns:
+        values = frame[column.key]
+        missing = values.isna()
+
+        if column.required:
+            blank = values.map(lambda value: isinstance(value, str) and not value.strip()).astype(bool)
+            for row in values.index[missing | blank]:
+                errors.setdefault(int(row), f"{column.key} is required")
+
+        if column.kind in ('real', 'int'):
+            numbers = pd.to_numeric(values, errors='coerce')
+            invalid = numbers.isna() & ~missing
+            if column.kind == 'int':
+                invalid |= numbers.notna() & (numbers != numbers.round())
+            for row in values.index[invalid]:
+                errors.setdefault(int(row), f"{column.key} must be a number: {values[row]!r}")
+            if column.default is not None:
+                numbers = numbers.fillna(column.default)
+            values = numbers
+        elif column.default is not None:
+            values = values.where(~missing, column.default)
+
+        coerced[column.name] = values
+
+    valid = frame.index.difference(list(errors))
+    result = pd.DataFrame(coerced, index=frame.index).loc[valid]
+    for column in columns:
+        if column.kind == 'int':
+            result[column.name] = result[column.name].astype('Int64')
+    return result, errors
+
+
+def _records(frame: pd.DataFrame) -> List[tuple]:
+    """صفوف Python جاهزة لـ executemany (NaN → NULL)"""
+    columns = []
+    for name in frame.columns:
+        values = frame[name]
+        if values.dtype == object or str(values.dtype) == 'Int64':
+            values = values.astype(object).where(values.notna(), None)
+        # SQLite يخزن NaN في الأعمدة الرقمية كـ NULL
+        columns.append(values.tolist())
+    return list(zip(*columns))
+
+
+def bulk_load(
+    db_path: str,
+    table: str,
+    columns: Sequence[Column],
+    rows: Sequence[Dict[str, Any]],
+    indexes: Sequence[Tuple[str, str]] = (),
+    batch_size: int = BATCH_SIZE,
+    frame: Optional[pd.DataFrame] = None,
+    errors: Optional[Dict[int, str]] = None
+) -> LoadReport:
+    """
+    استيراد مجمّع بـ INSERT OR REPLACE
+
+    Args:
+        db_path: قاعدة البيانات
+        table: الجدول الهدف
+        columns: أعمدة الجدول بترتيب الإدراج
+        rows: صفوف الإدخال (قواميس)
+        indexes: [(اسم الفهرس, جملة CREATE INDEX IF NOT EXISTS)] لإعادة بنائها
+        batch_size: عدد الصفوف في كل معاملة
+        frame, errors: نتيجة coerce_rows إذا عدّلها المستدعي (أعمدة محسوبة)
+    """
+    started = time.perf_counter()
+    if frame is None:
+        frame, errors = coerce_rows(rows, columns)
+    report = LoadReport(total=len(rows))
+    row_errors = dict(errors or {})
+
+    names = [column.name for column in columns]
+    sql = (
+        f"INSERT OR REPLACE INTO {table} ({', '.join(names)}) "
+        f"VALUES ({', '.join('?' for _ in names)})"
+    )
+    records = _records(frame[names])
+    positions = frame.index.tolist()
+
+    pool = get_pool(db_path)
+    rebuild = bool(indexes) and len(records) >= INDEX_REBUILD_THRESHOLD
+    if rebuild:
+        with pool.write() as conn:
+            for name, _ in indexes:
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+    try:
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            try:
+                with pool.write() as conn:
+                    conn.executemany(sql, batch)
+                report.loaded += len(batch)
+            except sqlite3.Error:
+                # الدفعة أُلغيت - إعادة إدراجها صفاً صفاً لتحديد الصفوف الخاطئة
+                with pool.write() as conn:
+                    for position, record in zip(positions[start:start + batch_size], batch):
+                        try:
+                            conn.execute(sql, record)
+                            report.loaded += 1
+                        except sqlite3.Error as e:
+                            row_errors[position] = str(e)
+            report.batches += 1
+    finally:
+        if rebuild:
+            with pool.write() as conn:
+                for _, create_sql in indexes:
+                    conn.execute(create_sql)
+            report.indexes_rebuilt = True
+
+    report.errors = [{'row': row, 'error': row_errors[row]} for row in sorted(row_errors)]
+    report.seconds = time.perf_counter() - started
+    print(f"⚡ Bulk load {table}: {report.loaded}/{report.total} rows in {report.seconds:.2f}s "
+          f"({report.rows_per_second:,.0f} rows/s, {report.batches} batches)")
+    return report
@@ -8,10 +8,23 @@ ComprehensiveScheduler System - المجدول الشامل
 - التقويم (أيام العمل، العطلات)
 """
 
-import sqlite3
 from typing import Dict, List, Tuple, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 import json
+import math
+
+import numpy as np
+
+from backend.scheduling.array_cpm import (
+    ArrayCPMEngine, CircularDependencyError, CompiledNetwork, build_network, topological_levels,
+    LINK_FS, LINK_SS, LINK_FF, LINK_SF
+)
+
+from .WorkingCalendar import WorkingCalendar
+from .ProductivityIndex import ProductivityIndex
+
+# أنواع العلاقات المقبولة في predecessors
+LINK_TYPES = {'FS': LINK_FS, 'SS': LINK_SS, 'FF': LINK_FF, 'SF': LINK_SF}
 
 
 class ComprehensiveScheduler:
@@ -19,7 +32,9 @@ class ComprehensiveScheduler:
     
     def __init__(self, db_path: str):
         self.db_path = db_path
+        self.productivity_index = ProductivityIndex.shared(db_path)
         self.calendar = self._initialize_calendar()
+        self.working_calendar = self._build_working_calendar()
         self.resource_pool = {}
         
         print("✅ ComprehensiveScheduler System Initialized")
@@ -31,6 +46,7 @@ class ComprehensiveScheduler:
             'work_days': [0, 1, 2, 3, 4, 5],  # السبت-الخميس (0=السبت, 6=الجمعة)
             'work_hours_per_day': 8,
             'holidays': [],  # سيتم إضافة العطلات الرسمية
+            'exceptions': [],  # فترات رمضان والأعياد (CalendarException)
             'shifts': {
                 'single': {'start': '07:00', 'end': '15:00'},
                 'double': [
@@ -64,14 +80,16 @@ class ComprehensiveScheduler:
         # 1. إضافة المدد للأنشطة (من ProductivityDatabase)
         activities_with_durations = self._add_durations(activities)
         
-        # 2. ترتيب الأنشطة حسب التبعيات
-        sorted_activities = self._topological_sort(activities_with_durations)
+        # 2. بناء الشبكة (قائمة تجاور CSR) وترتيب الأنشطة حسب التبعيات
+        network, missing_predecessors = self._build_network(activities_with_durations)
+        sorted_activities = self._topological_sort(activities_with_durations, network)
         
-        # 3. حساب التواريخ (Early Dates)
+        # 3. حساب التواريخ (Early Dates) مع FS/SS/FF/SF والتأخير
         scheduled_activities = self._calculate_dates(
             sorted_activities, 
             start_date_obj,
-            constraints
+            constraints,
+            network
         )
         
         # 4. تخصيص الموارد
@@ -93,6 +111,7 @@ class ComprehensiveScheduler:
             'activities': activities_with_resources,
             'milestones': milestones,
             'statistics': statistics,
+            'missing_predecessors': missing_predecessors,
             'generated_at': datetime.now().isoformat()
         }
     
@@ -100,31 +119,21 @@ class ComprehensiveScheduler:
         """إضافة المدد للأنشطة من قاعدة البيانات"""
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             for activity in activities:
                 # إذا كانت المدة موجودة بالفعل، تخطي
                 if 'duration' in activity and activity['duration'] > 0:
                     continue
                 
-                # البحث عن معدل الإنتاجية
+                # البحث عن معدل الإنتاجية (من الفهرس في الذاكرة)
                 activity_type = activity.get('type', 'general')
                 quantity = activity.get('quantity', 1)
                 
-                cursor.execute("""
-                    SELECT rate_per_unit, crew_size, complexity_factor
-                    FROM productivity_rates
-                    WHERE activity_type = ?
-                    LIMIT 1
-                """, (activity_type,))
-                
-                row = cursor.fetchone()
+                rate = self.productivity_index.get_exact(activity_type)
                 
-                if row:
-                    rate_per_unit = row[0]
-                    crew_size = row[1]
-                    complexity_factor = row[2]
+                if rate:
+                    rate_per_unit = rate['rate_per_unit']
+                    crew_size = rate['crew_size']
+                    complexity_factor = rate['complexity_factor']
                     
                     # حساب المدة
                     base_duration = quantity * rate_per_unit
@@ -140,117 +149,139 @@ class ComprehensiveScheduler:
                     activity['crew_size'] = 1
                     activity['man_days'] = 1
             
-            conn.close()
-            
         except Exception as e:
             print(f"❌ خطأ في إضافة المدد: {e}")
         
         return activities
     
-    def _topological_sort(self, activities: List[Dict]) -> List[Dict]:
-        """ترتيب الأنشطة طوبولوجياً (حسب التبعيات)"""
+    @staticmethod
+    def _parse_predecessor(predecessor) -> Tuple[str, int, float]:
+        """
+        تحويل سابق إلى (المعرف، نوع العلاقة، التأخير بأيام العمل)
         
-        # بناء قاموس التبعيات
-        dependencies = {}
-        all_activity_ids = set()
+        يقبل 'A' (FS بدون تأخير) أو {'id': 'A', 'type': 'SS', 'lag': 2}
+        """
         
-        for activity in activities:
-            activity_id = activity['id']
-            all_activity_ids.add(activity_id)
-            dependencies[activity_id] = activity.get('predecessors', [])
+        if not isinstance(predecessor, dict):
+            return predecessor, LINK_FS, 0.0
         
-        # Kahn's Algorithm للترتيب الطوبولوجي
-        in_degree = {activity_id: 0 for activity_id in all_activity_ids}
+        predecessor_id = predecessor.get('id', predecessor.get('activity_id'))
+        link_type = str(predecessor.get('type', 'FS')).upper()
+        if link_type not in LINK_TYPES:
+            raise ValueError(f"نوع علاقة غير معروف: {link_type} (FS/SS/FF/SF)")
+        return predecessor_id, LINK_TYPES[link_type], float(predecessor.get('lag', 0) or 0)
+    
+    def _build_network(self, activities: List[Dict]) -> Tuple[CompiledNetwork, List[Dict]]:
+        """
+        بناء شبكة الأنشطة (قائمة تجاور CSR) مرة واحدة - O(V+E)
         
-        for activity_id, predecessors in dependencies.items():
-            in_degree[activity_id] = len(predecessors)
+        Returns:
+            (الشبكة، السوابق غير الموجودة [{activity_id, predecessor_id}])
+            السوابق غير الموجودة تُتجاهل بدلاً من إسقاط النشاط من الجدول
+        """
         
-        queue = [activity_id for activity_id, degree in in_degree.items() if degree == 0]
-        sorted_ids = []
+        activity_ids = list(dict.fromkeys(activity['id'] for activity in activities))
+        known = set(activity_ids)
+        # أيام كاملة: كل نشاط يشغل أياماً كاملة (1.5 ← 2، والقيم السالبة ← 0)
+        durations = {activity['id']: max(0, math.ceil(activity.get('duration', 1))) for activity in activities}
+        predecessors = {activity['id']: activity.get('predecessors', []) for activity in activities}
+        
+        links = []
+        missing = []
+        for activity_id in activity_ids:
+            for predecessor in predecessors[activity_id]:
+                predecessor_id, link_type, lag = self._parse_predecessor(predecessor)
+                if predecessor_id in known:
+                    links.append((predecessor_id, activity_id, link_type, lag))
+                else:
+                    missing.append({'activity_id': activity_id, 'predecessor_id': predecessor_id})
         
-        while queue:
-            current_id = queue.pop(0)
-            sorted_ids.append(current_id)
-            
-            # تقليل درجة الأنشطة التي تعتمد على النشاط الحالي
-            for activity in activities:
-                if current_id in activity.get('predecessors', []):
-                    in_degree[activity['id']] -= 1
-                    if in_degree[activity['id']] == 0:
-                        queue.append(activity['id'])
+        network = build_network(activity_ids, [durations[aid] for aid in activity_ids], links)
+        return network, missing
+    
+    def _topological_sort(self, activities: List[Dict], network: CompiledNetwork = None) -> List[Dict]:
+        """
+        ترتيب الأنشطة طوبولوجياً (Kahn حسب المستويات، ثم ترتيب الإدخال)
         
-        # إعادة ترتيب الأنشطة
-        activity_dict = {activity['id']: activity for activity in activities}
-        sorted_activities = [activity_dict[activity_id] for activity_id in sorted_ids]
+        Raises:
+            CircularDependencyError: مع مسار الحلقة الدائرية
+        """
         
-        return sorted_activities
+        if network is None:
+            network, _ = self._build_network(activities)
+        
+        levels = topological_levels(network)
+        activity_dict = {activity['id']: activity for activity in activities}
+        return [activity_dict[network.activity_ids[i]] for i in np.argsort(levels, kind='stable')]
     
     def _calculate_dates(
         self,
         activities: List[Dict],
         start_date: datetime,
-        constraints: Dict
+        constraints: Dict,
+        network: CompiledNetwork = None
     ) -> List[Dict]:
-        """حساب تواريخ البداية والنهاية لكل نشاط"""
+        """
+        حساب تواريخ البداية والنهاية لكل نشاط
+        
+        المسار الأمامي بإزاحات أيام العمل (FS/SS/FF/SF + التأخير) على محرك CPM المُصفوفي،
+        ثم تحويل الإزاحات إلى تواريخ بالتقويم المفهرس
+        
+        إذا لم يكن تاريخ البدء يوم عمل، فالنشاط الذي له سوابق يبدأ من يوم العمل
+        التالي (الإزاحة 1)، والأنشطة بدون سوابق تبقى على تاريخ البدء
+        """
         
-        activity_dates = {}
+        if network is None:
+            network, _ = self._build_network(activities)
+        
+        min_early_start = 0.0
+        if not self.working_calendar.is_working_day(start_date):
+            min_early_start = np.zeros(network.activity_count)
+            for activity in activities:
+                if activity.get('predecessors'):
+                    min_early_start[network.index[activity['id']]] = 1.0
+        
+        engine = ArrayCPMEngine(network, min_early_start=min_early_start).run()
+        early_start = engine.early_start.tolist()
+        early_finish = engine.early_finish.tolist()
+        total_float = engine.total_float.tolist()
+        is_critical = engine.is_critical.tolist()
         
         for activity in activities:
-            activity_id = activity['id']
-            duration = activity.get('duration', 1)
-            predecessors = activity.get('predecessors', [])
-            
-            # حساب تاريخ البداية المبكر
-            if not predecessors:
-                early_start = start_date
-            else:
-                # البحث عن أقصى تاريخ انتهاء للأنشطة السابقة
-                max_finish = start_date
-                for pred_id in predecessors:
-                    if pred_id in activity_dates:
-                        pred_finish = activity_dates[pred_id]['early_finish']
-                        if pred_finish > max_finish:
-                            max_finish = pred_finish
-                
-                early_start = self._get_next_work_day(max_finish)
-            
-            # حساب تاريخ الانتهاء المبكر
-            early_finish = self._add_work_days(early_start, duration)
-            
-            activity_dates[activity_id] = {
-                'early_start': early_start,
-                'early_finish': early_finish
-            }
+            i = network.index[activity['id']]
+            early_start_date = self._add_work_days(start_date, early_start[i])
+            early_finish_date = self._add_work_days(start_date, early_finish[i])
             
             # إضافة التواريخ للنشاط
-            activity['early_start'] = early_start.strftime('%Y-%m-%d')
-            activity['early_finish'] = early_finish.strftime('%Y-%m-%d')
+            activity['early_start'] = early_start_date.strftime('%Y-%m-%d')
+            activity['early_finish'] = early_finish_date.strftime('%Y-%m-%d')
             activity['start_date'] = activity['early_start']
             activity['finish_date'] = activity['early_finish']
+            activity['total_float'] = total_float[i]
+            activity['is_critical'] = is_critical[i]
         
         return activities
     
+    def _build_working_calendar(self) -> WorkingCalendar:
+        """بناء فهرس أيام العمل من إعدادات التقويم"""
+        
+        weekend_days = set(range(7)) - set(self.calendar['work_days'])
+        return WorkingCalendar(
+            weekend_days=weekend_days,
+            holidays=self.calendar['holidays'],
+            exceptions=self.calendar.get('exceptions', []),
+            work_hours_per_day=self.calendar['work_hours_per_day']
+        )
+    
     def _get_next_work_day(self, date: datetime) -> datetime:
         """الحصول على يوم العمل التالي"""
         
-        next_day = date
-        while next_day.weekday() not in self.calendar['work_days']:
-            next_day += timedelta(days=1)
-        
-        return next_day
+        return self.working_calendar.next_working_day(date)
     
     def _add_work_days(self, start_date: datetime, work_days: int) -> datetime:
         """إضافة أيام عمل إلى تاريخ"""
         
-        current_date = start_date
-        days_added = 0
-        
-        while days_added < work_days:
-            current_date += timedelta(days=1)
-            if current_date.weekday() in self.calendar['work_days']:
-                days_added += 1
-        
-        return current_date
+        return self.working_calendar.add_working_days(start_date, work_days)
     
     def _assign_resources(
         self,
@@ -302,10 +333,7 @@ class ComprehensiveScheduler:
             
             if matching_activities:
                 # آخر نشاط في هذه المجموعة هو المعلم
-                last_activity = max(
-                    matching_activities,
-                    key=lambda a: datetime.strptime(a['finish_date'], '%Y-%m-%d')
-                )
+                last_activity = max(matching_activities, key=lambda a: a['finish_date'])
                 
                 milestones.append({
                     'name': f"إنجاز {milestone_type}",
@@ -321,19 +349,9 @@ class ComprehensiveScheduler:
         if not activities:
             return {}
         
-        # تاريخ الانتهاء
-        finish_dates = [
-            datetime.strptime(a['finish_date'], '%Y-%m-%d')
-            for a in activities
-        ]
-        project_finish = max(finish_dates)
-        
-        # تاريخ البداية
-        start_dates = [
-            datetime.strptime(a['start_date'], '%Y-%m-%d')
-            for a in activities
-        ]
-        project_start = min(start_dates)
+        # تاريخ الانتهاء والبداية (صيغة YYYY-MM-DD تُرتب نصياً - تحويل واحد فقط)
+        project_finish = datetime.strptime(max(a['finish_date'] for a in activities), '%Y-%m-%d')
+        project_start = datetime.strptime(min(a['start_date'] for a in activities), '%Y-%m-%d')
         
         # المدة الإجمالية
         total_duration = (project_finish - project_start).days
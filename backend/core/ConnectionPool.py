@@ -0,0 +1,233 @@
+"""
+ConnectionPool - مجمع اتصالات SQLite مشترك
+Shared SQLite connection pool for the core engines
+
+- اتصال كتابة واحد لكل قاعدة بيانات (قفل قابل لإعادة الدخول)
+- مجمع اتصالات قراءة فقط (query_only) يُعاد استخدامها بين الطلبات؛
+  الخيط يحتفظ باتصاله طوال الاستدعاءات المتداخلة
+- وضع WAL (القراءة لا تنتظر الكتابة) حسب SQLITE_WAL:
+  1 = لكل قواعد البيانات بما فيها الموجودة مثل noufal.db (للنشر)،
+  0 = مطلقاً، غير محدد = فقط لقواعد البيانات التي ينشئها المجمع
+  (النسخة المحفوظة في المستودع تبقى على وضع journal الخاص بها)
+- إعدادات synchronous / cache_size / mmap_size مضبوطة مرة واحدة لكل اتصال
+- الاتصالات الدائمة تحتفظ بالجمل المُحضّرة (cached_statements)
+
+الاستخدام:
+    pool = get_pool(db_path)
+    with pool.read() as conn:
+        conn.execute('SELECT ...')
+    with pool.write() as conn:       # commit عند النجاح / rollback عند الخطأ
+        conn.execute('INSERT ...')
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+PRAGMAS = {
+    'synchronous': 'NORMAL',     # آمن مع WAL، بدون fsync لكل معاملة
+    'cache_size': -16384,        # 16 MB لكل اتصال
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+
+# وضع WAL: '1' لكل الملفات، '0' معطل، فارغ = الملفات الجديدة فقط
+SQLITE_WAL = os.getenv('SQLITE_WAL', '')
+
+# عدد اتصالات القراءة الخاملة المحتفظ بها لكل قاعدة بيانات
+MAX_IDLE_READERS = 8
+
+# عدد الجمل المُحضّرة المحفوظة لكل اتصال
+CACHED_STATEMENTS = 256
+
+
+def _wal_setting(db_path: str) -> bool:
+    """
+    قيمة SQLITE_WAL لملف معين
+    
+    WAL يُكتب في ترويسة الملف ويبقى بعد الإغلاق، لذا بدون إعداد صريح لا
+    يُفعّل إلا للملفات الجديدة
+    """
+    setting = SQLITE_WAL.strip().lower()
+    if setting in ('1', 'true', 'yes', 'on'):
+        return True
+    if setting in ('0', 'false', 'no', 'off'):
+        return False
+    return not os.path.exists(db_path)
+
+
+class SQLitePool:
+    """مجمع اتصالات لقاعدة بيانات واحدة"""
+
+    def __init__(self, db_path: str, max_idle_readers: int = MAX_IDLE_READERS,
+                 wal: Optional[bool] = None):
+        """
+        Args:
+            db_path: ملف قاعدة البيانات أو ':memory:'
+            max_idle_readers: اتصالات القراءة الخاملة المحتفظ بها
+            wal: تفعيل WAL (None = حسب SQLITE_WAL)
+        """
+        self.db_path = str(db_path)
+        self.max_idle_readers = max_idle_readers
+        self.in_memory = self.db_path == ':memory:'
+        if wal is None:
+            wal = _wal_setting(self.db_path)
+        self.wal = wal and not self.in_memory
+
+        self._stats_lock = threading.Lock()
+        self._opened = 0
+        self._reads = 0
+        self._writes = 0
+        self._reset()
+
+    def _reset(self):
+        """حالة جديدة بدون اتصالات (أيضاً بعد fork - الاتصالات لا تُشارك بين العمليات)"""
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self._idle: 'queue.LifoQueue[sqlite3.Connection]' = queue.LifoQueue()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._write_lock = threading.RLock()
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            self._reset()
+
+    # ═══════════════════════════════════════════════════════════════
+    # إنشاء الاتصالات
+    # ═══════════════════════════════════════════════════════════════
+
+    def _open(self, read_only: bool) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=PRAGMAS['busy_timeout'] / 1000,
+            check_same_thread=False,
+            cached_statements=CACHED_STATEMENTS
+        )
+        if not read_only and self.wal:
+            conn.execute('PRAGMA journal_mode=WAL')
+        for name, value in PRAGMAS.items():
+            conn.execute(f'PRAGMA {name}={value}')
+        if read_only:
+            conn.execute('PRAGMA query_only=ON')
+        with self._stats_lock:
+            self._opened += 1
+        return conn
+
+    def _get_writer(self) -> sqlite3.Connection:
+        if self._writer is None:
+            self._writer = self._open(read_only=False)
+        return self._writer
+
+    # ═══════════════════════════════════════════════════════════════
+    # الواجهة
+    # ═══════════════════════════════════════════════════════════════
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """اتصال الكتابة الوحيد - معاملة واحدة للاستدعاء الخارجي"""
+        self._check_fork()
+        with self._write_lock:
+            depth = getattr(self._local, 'write_depth', 0)
+            conn = self._get_writer()
+            self._local.write_depth = depth + 1
+            try:
+                yield conn
+                if depth == 0:
+                    conn.commit()
+            except BaseException:
+                if depth == 0:
+                    conn.rollback()
+                raise
+            finally:
+                self._local.write_depth = depth
+                if depth == 0:
+                    conn.row_factory = None
+                    with self._stats_lock:
+                        self._writes += 1
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """اتصال قراءة من المجمع (أو اتصال الكتابة إذا كان الخيط داخل معاملة كتابة)"""
+        self._check_fork()
+        if getattr(self._local, 'write_depth', 0) or self.in_memory:
+            with self.write() as conn:
+                yield conn
+            return
+
+        depth = getattr(self._local, 'read_depth', 0)
+        if depth == 0:
+            try:
+                self._local.reader = self._idle.get_nowait()
+            except queue.Empty:
+                self._local.reader = self._open(read_only=True)
+        conn = self._local.reader
+        self._local.read_depth = depth + 1
+        try:
+            yield conn
+        finally:
+            self._local.read_depth = depth
+            if depth == 0:
+                self._local.reader = None
+                self._release_reader(conn)
+                with self._stats_lock:
+                    self._reads += 1
+
+    def _release_reader(self, conn: sqlite3.Connection):
+        conn.row_factory = None
+        if conn.in_transaction:
+            conn.rollback()
+        if self._idle.qsize() < self.max_idle_readers:
+            self._idle.put(conn)
+        else:
+            conn.close()
+
+    def close(self):
+        """إغلاق كل الاتصالات الخاملة واتصال الكتابة"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    def get_stats(self) -> Dict:
+        """إحصائيات المجمع"""
+        with self._stats_lock:
+            return {
+                'db_path': self.db_path,
+                'wal': self.wal,
+                'connections_opened': self._opened,
+                'idle_readers': self._idle.qsize(),
+                'reads': self._reads,
+                'writes': self._writes
+            }
+
+
+_pools: Dict[str, SQLitePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str) -> SQLitePool:
+    """المجمع المشترك لمسار قاعدة البيانات (واحد لكل عملية)"""
+    key = str(db_path) if str(db_path) == ':memory:' else os.path.abspath(str(db_path))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = SQLitePool(db_path)
+        return pool
+
+
+def close_all_pools():
+    """إغلاق كل المجمعات (عند الإيقاف أو في الاختبارات)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -5,15 +5,55 @@ Rule-Based System - لا يعتمد على AI/ML
 """
 
 import pandas as pd
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, Iterator, List, Tuple, Optional
+from itertools import islice
 import re
 from pathlib import Path
 
+import openpyxl
+
+# صيغ يمكن قراءتها بـ openpyxl في وضع القراءة فقط (Streaming)
+STREAMING_SUFFIXES = {'.xlsx', '.xlsm', '.xltx', '.xltm'}
+
+# عدد الصفوف المفحوصة لاكتشاف صف العناوين، وعدد صفوف العينة للاكتشاف
+HEADER_WINDOW = 20
+DISCOVERY_ROWS = 10
+
+# كل كم صف يُستدعى progress_callback
+PROGRESS_EVERY = 1000
+
+# كلمات تدل على صف عناوين مكرر داخل البيانات
+HEADER_LIKE_KEYWORDS = ['quantity', 'الكمية', 'rate', 'سعر', 'unit', 'وحدة']
+
+
+def _is_missing(value) -> bool:
+    """None أو NaN (مثل pd.isna لقيمة واحدة)"""
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def _trim_row(row: tuple) -> tuple:
+    """حذف الخلايا الفارغة في نهاية الصف"""
+    end = len(row)
+    while end and row[end - 1] is None:
+        end -= 1
+    return tuple(row[:end])
+
+
+def _chain(first: List, rest: Iterator) -> Iterator:
+    yield from first
+    yield from rest
+
 
 class ExcelIntelligence:
     """نظام ذكي لاكتشاف وتحليل ملفات Excel"""
     
-    def __init__(self):
+    def __init__(self, workbook_cache=None):
+        """
+        Args:
+            workbook_cache: WorkbookCache اختياري - يتخطى تحليل الملفات المرفوعة سابقاً
+        """
+        self.workbook_cache = workbook_cache
+        
         # أنواع الملفات المدعومة
         self.file_types = {
             'boq': 'جدول الكميات - Bill of Quantities',
@@ -57,6 +97,13 @@ class ExcelIntelligence:
             - columns_found: الأعمدة المكتشفة
         """
         
+        if self._supports_streaming(file_path):
+            return self.scan_workbook(file_path)
+        return self._discover_with_pandas(file_path)
+    
+    def _discover_with_pandas(self, file_path: str) -> Dict:
+        """الاكتشاف عبر pandas (للصيغ التي لا يدعمها openpyxl مثل .xls)"""
+        
         try:
             # قراءة أسماء الأوراق
             excel_file = pd.ExcelFile(file_path)
@@ -65,79 +112,319 @@ class ExcelIntelligence:
             # تحليل كل ورقة
             results = []
             for sheet_name in sheet_names:
-                df = pd.read_excel(file_path, sheet_name=sheet_name, nrows=10)
+                df = pd.read_excel(excel_file, sheet_name=sheet_name, nrows=DISCOVERY_ROWS)
+                results.append(self._score_sheet(sheet_name, list(df.columns), len(df)))
+            
+            return self._discovery_result(file_path, results, len(sheet_names))
+            
+        except Exception as e:
+            return self._discovery_error(file_path, e)
+    
+    def scan_workbook(self, file_path: str) -> Dict:
+        """
+        اكتشاف نوع الملف بفتح المصنف مرة واحدة (openpyxl read-only)
+        
+        تُقرأ نافذة العناوين (أول HEADER_WINDOW صف) لكل ورقة من نفس المقبض،
+        ويُحفظ صف العناوين المكتشف (header_row) لاستخدامه عند استخراج البيانات
+        
+        Returns:
+            نفس مخرجات discover_file_type
+        """
+        
+        try:
+            workbook = self._open_workbook(file_path)
+        except Exception as e:
+            return self._discovery_error(file_path, e)
+        
+        try:
+            results = []
+            for worksheet in workbook.worksheets:
+                window = self._trim_rows(list(islice(worksheet.iter_rows(values_only=True), HEADER_WINDOW)))
+                
+                # العينة = الصف الأول كعناوين + DISCOVERY_ROWS صف (نفس pd.read_excel(nrows=10))
+                sample = self._trim_rows(window[:DISCOVERY_ROWS + 1])
+                columns = self._header_columns(sample[0], sample) if sample else []
                 
-                # استخراج أسماء الأعمدة
-                columns = [str(col).lower() for col in df.columns]
+                sheet_info = self._score_sheet(worksheet.title, columns, max(len(sample) - 1, 0))
+                sheet_info['header_row'] = self._detect_header_row(window)
+                results.append(sheet_info)
+            
+            return self._discovery_result(file_path, results, len(workbook.sheetnames))
+            
+        except Exception as e:
+            return self._discovery_error(file_path, e)
+        finally:
+            workbook.close()
+    
+    def _score_sheet(self, sheet_name: str, columns: List, rows_count: int) -> Dict:
+        """حساب نقاط كل نوع ملف لورقة واحدة من أسماء أعمدتها"""
+        
+        # استخراج أسماء الأعمدة
+        columns_lower = [str(col).lower() for col in columns]
+        
+        # حساب النقاط لكل نوع ملف
+        scores = {}
+        for file_type, keywords in self.keywords.items():
+            score = 0
+            matched_keywords = []
+            
+            for keyword in keywords:
+                # البحث في أسماء الأعمدة
+                for col in columns_lower:
+                    if keyword in col:
+                        score += 1
+                        matched_keywords.append(keyword)
                 
-                # حساب النقاط لكل نوع ملف
-                scores = {}
-                for file_type, keywords in self.keywords.items():
-                    score = 0
-                    matched_keywords = []
+                # البحث في اسم الورقة
+                if keyword in sheet_name.lower():
+                    score += 2
+                    matched_keywords.append(keyword)
+            
+            scores[file_type] = {
+                'score': score,
+                'matched_keywords': list(set(matched_keywords))
+            }
+        
+        # اختيار النوع الأعلى نقاطاً
+        best_type = max(scores.items(), key=lambda x: x[1]['score'])
+        
+        return {
+            'sheet_name': sheet_name,
+            'file_type': best_type[0],
+            'score': best_type[1]['score'],
+            'matched_keywords': best_type[1]['matched_keywords'],
+            'columns': list(columns),
+            'rows_count': rows_count
+        }
+    
+    def _discovery_result(self, file_path: str, results: List[Dict], total_sheets: int) -> Dict:
+        # النوع الإجمالي للملف
+        if results:
+            overall_type = max(results, key=lambda x: x['score'])
+            confidence = min(100, (overall_type['score'] / len(self.keywords[overall_type['file_type']])) * 100)
+        else:
+            overall_type = {'file_type': 'unknown'}
+            confidence = 0
+        
+        return {
+            'file_type': overall_type['file_type'],
+            'file_type_ar': self.file_types[overall_type['file_type']],
+            'confidence': round(confidence, 2),
+            'detected_sheets': results,
+            'total_sheets': total_sheets,
+            'file_path': str(file_path)
+        }
+    
+    @staticmethod
+    def _discovery_error(file_path: str, error: Exception) -> Dict:
+        return {
+            'file_type': 'error',
+            'file_type_ar': 'خطأ',
+            'confidence': 0,
+            'error': str(error),
+            'file_path': str(file_path)
+        }
+    
+    # ═══════════════════════════════════════════════════════════════
+    # القراءة المتدفقة (openpyxl read-only)
+    # ═══════════════════════════════════════════════════════════════
+    
+    @staticmethod
+    def _supports_streaming(file_path: str) -> bool:
+        return Path(file_path).suffix.lower() in STREAMING_SUFFIXES
+    
+    @staticmethod
+    def _open_workbook(file_path: str):
+        """فتح المصنف مرة واحدة في وضع القراءة فقط (ذاكرة محدودة)"""
+        return openpyxl.load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    
+    @staticmethod
+    def _trim_rows(rows: List[tuple]) -> List[tuple]:
+        """حذف الخلايا الفارغة في نهاية كل صف والصفوف الفارغة في النهاية (مثل pandas)"""
+        trimmed = []
+        last_with_data = -1
+        for index, row in enumerate(rows):
+            row = _trim_row(row)
+            trimmed.append(row)
+            if row:
+                last_with_data = index
+        return trimmed[:last_with_data + 1]
+    
+    @staticmethod
+    def _header_columns(header: tuple, rows: List[tuple]) -> List:
+        """أسماء الأعمدة من صف العناوين (Unnamed: i للفارغة، name.1 للمكررة - مثل pandas)"""
+        width = max((len(row) for row in rows), default=len(header))
+        header = tuple(header) + (None,) * (width - len(header))
+        
+        columns = []
+        seen: Dict[str, int] = {}
+        for index, value in enumerate(header):
+            name = f"Unnamed: {index}" if value is None else value
+            key = str(name)
+            if key in seen:
+                seen[key] += 1
+                name = f"{key}.{seen[key]}"
+            else:
+                seen[key] = 0
+            columns.append(name)
+        return columns
+    
+    @staticmethod
+    def _detect_header_row(window: List[tuple]) -> int:
+        """صف العناوين = الصف الأكثر خلايا غير فارغة (5 على الأقل) في نافذة العناوين"""
+        header_row = 0
+        max_non_null = 0
+        for index, row in enumerate(window):
+            non_null_count = sum(1 for value in row if value is not None)
+            if non_null_count > max_non_null and non_null_count >= 5:  # At least 5 columns
+                max_non_null = non_null_count
+                header_row = index
+        return header_row
+    
+    @staticmethod
+    def _find_index(columns: List, keywords: List[str]) -> Optional[int]:
+        """مثل _find_column لكن يعيد رقم العمود"""
+        columns_lower = [str(col).lower() for col in columns]
+        for keyword in keywords:
+            for index, col in enumerate(columns_lower):
+                if keyword in col:
+                    return index
+        return None
+    
+    def iter_boq_items(
+        self,
+        file_path: str,
+        discovery_result: Optional[Dict] = None,
+        progress_callback: Optional[Callable[[Dict], None]] = None
+    ) -> Iterator[Dict]:
+        """
+        قراءة بنود جدول الكميات كتدفق (Generator) بمرور واحد على كل ورقة
+        
+        الذاكرة محدودة بصف واحد في كل لحظة، لذا يمكن معالجة جداول بـ 100k+ صف.
+        البنود بنفس صيغة _extract_boq_data:
+        row_number, description, quantity, unit, rate, sheet, amount
+        
+        Args:
+            file_path: مسار الملف
+            discovery_result: نتيجة الاكتشاف (تُحسب إن لم تُمرر)
+            progress_callback: دالة تستقبل {'sheet', 'rows_read', 'items'} كل PROGRESS_EVERY صف
+        """
+        
+        if discovery_result is None:
+            discovery_result = self.discover_file_type(file_path)
+        boq_sheets = [info for info in discovery_result.get('detected_sheets', []) if info['file_type'] == 'boq']
+        if not boq_sheets:
+            return
+        
+        workbook = self._open_workbook(file_path)
+        rows_read = 0
+        items_count = 0
+        
+        def report(sheet_name: str):
+            if progress_callback is not None:
+                progress_callback({'sheet': sheet_name, 'rows_read': rows_read, 'items': items_count})
+        
+        try:
+            for sheet_info in boq_sheets:
+                sheet_name = sheet_info['sheet_name']
+                worksheet = workbook[sheet_name]
+                
+                header_row = sheet_info.get('header_row')
+                if header_row is None:
+                    window = self._trim_rows(list(islice(worksheet.iter_rows(values_only=True), HEADER_WINDOW)))
+                    header_row = self._detect_header_row(window)
+                
+                rows = worksheet.iter_rows(min_row=header_row + 1, values_only=True)
+                header = next(rows, None)
+                if header is None:
+                    continue
+                
+                # عرض الجدول يُحدد من صف العناوين ونافذة البيانات الأولى
+                head = list(islice(rows, HEADER_WINDOW))
+                columns = self._header_columns(_trim_row(header), self._trim_rows([header] + head))
+                
+                # البحث عن أعمدة: الوصف، الكمية، الوحدة، السعر
+                desc_idx = self._find_index(columns, ['وصف', 'بند', 'description', 'item'])
+                qty_idx = self._find_index(columns, ['كمية', 'quantity', 'qty'])
+                unit_idx = self._find_index(columns, ['وحدة', 'unit'])
+                rate_idx = self._find_index(columns, ['سعر', 'rate', 'price'])
+                
+                def cell(row, index, default=None):
+                    if index is None or index >= len(row):
+                        return default
+                    return row[index]
+                
+                for position, row in enumerate(_chain(head, rows)):
+                    rows_read += 1
+                    if rows_read % PROGRESS_EVERY == 0:
+                        report(sheet_name)
                     
-                    for keyword in keywords:
-                        # البحث في أسماء الأعمدة
-                        for col in columns:
-                            if keyword in col:
-                                score += 1
-                                matched_keywords.append(keyword)
+                    desc_value = cell(row, desc_idx)
+                    if _is_missing(desc_value):
+                        continue
+                    
+                    # Skip header-like rows (containing keywords like 'الكمية', 'quantity', etc.)
+                    desc_str = str(desc_value).lower()
+                    if any(kw in desc_str for kw in HEADER_LIKE_KEYWORDS):
+                        continue
+                    
+                    try:
+                        qty_value = cell(row, qty_idx, 0)
+                        rate_value = cell(row, rate_idx, 0)
                         
-                        # البحث في اسم الورقة
-                        if keyword in sheet_name.lower():
-                            score += 2
-                            matched_keywords.append(keyword)
+                        # Try to convert to float, skip if fails
+                        quantity = float(qty_value) if not _is_missing(qty_value) and qty_value != '' else 0
+                        rate = float(rate_value) if not _is_missing(rate_value) and rate_value != '' else 0
+                    except (ValueError, TypeError):
+                        # Skip rows that can't be converted to numbers
+                        continue
                     
-                    scores[file_type] = {
-                        'score': score,
-                        'matched_keywords': list(set(matched_keywords))
+                    unit_value = cell(row, unit_idx)
+                    item = {
+                        'row_number': position + 1,
+                        'description': str(desc_value),
+                        'quantity': quantity,
+                        'unit': '' if _is_missing(unit_value) else str(unit_value),
+                        'rate': rate,
+                        'sheet': sheet_name
                     }
+                    
+                    # حساب الإجمالي
+                    item['amount'] = item['quantity'] * item['rate']
+                    
+                    items_count += 1
+                    yield item
                 
-                # اختيار النوع الأعلى نقاطاً
-                best_type = max(scores.items(), key=lambda x: x[1]['score'])
-                
-                results.append({
-                    'sheet_name': sheet_name,
-                    'file_type': best_type[0],
-                    'score': best_type[1]['score'],
-                    'matched_keywords': best_type[1]['matched_keywords'],
-                    'columns': list(df.columns),
-                    'rows_count': len(df)
-                })
-            
-            # النوع الإجمالي للملف
-            if results:
-                overall_type = max(results, key=lambda x: x['score'])
-                confidence = min(100, (overall_type['score'] / len(self.keywords[overall_type['file_type']])) * 100)
-            else:
-                overall_type = {'file_type': 'unknown'}
-                confidence = 0
-            
-            return {
-                'file_type': overall_type['file_type'],
-                'file_type_ar': self.file_types[overall_type['file_type']],
-                'confidence': round(confidence, 2),
-                'detected_sheets': results,
-                'total_sheets': len(sheet_names),
-                'file_path': str(file_path)
-            }
-            
-        except Exception as e:
-            return {
-                'file_type': 'error',
-                'file_type_ar': 'خطأ',
-                'confidence': 0,
-                'error': str(e),
-                'file_path': str(file_path)
-            }
+                report(sheet_name)
+        finally:
+            workbook.close()
     
-    def extract_data(self, file_path: str, discovery_result: Dict) -> Dict:
+    def ingest(self, file_path: str,
+               progress_callback: Optional[Callable[[Dict], None]] = None) -> Tuple[Dict, Dict]:
+        """
+        اكتشاف نوع الملف واستخراج بياناته (مع كاش المصنفات إن وُجد)
+        
+        Returns:
+            (discovery, data) - data فارغ إذا فشل الاكتشاف
+        """
+        
+        if self.workbook_cache is not None:
+            return self.workbook_cache.load(file_path, self, progress_callback)
+        
+        discovery = self.discover_file_type(file_path)
+        if discovery['file_type'] == 'error':
+            return discovery, {}
+        return discovery, self.extract_data(file_path, discovery, progress_callback)
+    
+    def extract_data(self, file_path: str, discovery_result: Dict,
+                     progress_callback: Optional[Callable[[Dict], None]] = None) -> Dict:
         """
         استخراج البيانات من الملف حسب نوعه
         
         Args:
             file_path: مسار الملف
             discovery_result: نتيجة الاكتشاف
+            progress_callback: دالة تقدم لقراءة بنود BOQ المتدفقة
             
         Returns:
             البيانات المستخرجة
@@ -146,7 +433,7 @@ class ExcelIntelligence:
         file_type = discovery_result['file_type']
         
         if file_type == 'boq':
-            return self._extract_boq_data(file_path, discovery_result)
+            return self._extract_boq_data(file_path, discovery_result, progress_callback)
         elif file_type == 'schedule':
             return self._extract_schedule_data(file_path, discovery_result)
         elif file_type == 'resources':
@@ -154,8 +441,32 @@ class ExcelIntelligence:
         else:
             return self._extract_generic_data(file_path, discovery_result)
     
-    def _extract_boq_data(self, file_path: str, discovery_result: Dict) -> Dict:
-        """استخراج بيانات جدول الكميات"""
+    def _extract_boq_data(self, file_path: str, discovery_result: Dict,
+                          progress_callback: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        استخراج بيانات جدول الكميات
+        
+        الصفوف تُقرأ تدفقياً من المصنف (بدون DataFrame للورقة كاملة)، لكن قائمة
+        البنود نفسها تُبنى كاملة لأن استجابة الرفع وكاش المصنفات وخط التحليل
+        تحتاجها؛ الإجمالي يُحسب أثناء نفس المرور.
+        """
+        
+        if self._supports_streaming(file_path):
+            items = []
+            total_amount = 0.0
+            for item in self.iter_boq_items(file_path, discovery_result, progress_callback):
+                items.append(item)
+                total_amount += item['amount']
+            return {
+                'type': 'boq',
+                'items': items,
+                'total_items': len(items),
+                'total_amount': total_amount
+            }
+        return self._extract_boq_data_pandas(file_path, discovery_result)
+    
+    def _extract_boq_data_pandas(self, file_path: str, discovery_result: Dict) -> Dict:
+        """استخراج بيانات جدول الكميات عبر pandas (للصيغ غير المدعومة بالقراءة المتدفقة)"""
         
         items = []
         
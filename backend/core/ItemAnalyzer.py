@@ -13,6 +13,8 @@ import sqlite3
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 
+from .ArabicNormalizer import prepare
+
 
 class ItemAnalyzer:
     """نظام التحليل العميق للبنود"""
@@ -162,14 +164,14 @@ class ItemAnalyzer:
     def _determine_complexity(self, text: str, item_data: Dict) -> Dict:
         """تحديد مستوى التعقيد"""
         
-        text_lower = text.lower()
+        normalized = prepare(text)
         complexity_score = 0
         indicators_found = []
         
         # فحص مؤشرات التعقيد
         for level, keywords in self.complexity_indicators.items():
             for keyword in keywords:
-                if keyword in text_lower:
+                if normalized.contains(keyword):
                     if level == 'high':
                         complexity_score += 3
                     elif level == 'medium':
@@ -182,7 +184,7 @@ class ItemAnalyzer:
         if item_data.get('quantity', 0) > 1000:
             complexity_score += 1
         
-        if 'خاص' in text_lower or 'مخصص' in text_lower:
+        if normalized.contains('خاص') or normalized.contains('مخصص'):
             complexity_score += 2
         
         if len(text.split()) > 20:
@@ -221,11 +223,13 @@ class ItemAnalyzer:
         if concrete_match:
             specs['concrete_grade'] = f"{concrete_match.group(1)} نيوتن/مم²"
         
+        normalized = prepare(text)
+        
         # نوع الحديد
-        if 'حديد' in text.lower():
-            if 'عالي' in text.lower():
+        if normalized.contains('حديد'):
+            if normalized.contains('عالي'):
                 specs['steel_grade'] = 'عالي المقاومة'
-            elif 'عادي' in text.lower():
+            elif normalized.contains('عادي'):
                 specs['steel_grade'] = 'عادي'
             else:
                 specs['steel_grade'] = 'قياسي'
@@ -240,7 +244,7 @@ class ItemAnalyzer:
         }
         
         for keyword, finish_type in finish_keywords.items():
-            if keyword in text.lower():
+            if normalized.contains(keyword):
                 specs['finish_type'] = finish_type
                 break
         
@@ -250,7 +254,7 @@ class ItemAnalyzer:
             'خشب', 'بلاط', 'رخام', 'سيراميك', 'جرانيت'
         ]
         
-        found_materials = [m for m in material_keywords if m in text.lower()]
+        found_materials = [m for m in material_keywords if normalized.contains(m)]
         if found_materials:
             specs['material_type'] = found_materials[0]
         
@@ -272,10 +276,10 @@ class ItemAnalyzer:
             'كهرباء': ['حفر', 'تمديد']
         }
         
-        text_lower = text.lower()
+        normalized = prepare(text)
         
         for main_keyword, prereq_keywords in dependency_rules.items():
-            if main_keyword in text_lower:
+            if normalized.contains(main_keyword):
                 for prereq in prereq_keywords:
                     dependencies.append({
                         'depends_on': prereq,
@@ -301,7 +305,7 @@ class ItemAnalyzer:
             warnings.append("⚠️ الوحدة غير محددة")
         
         # تحذير: لا توجد مواصفات تقنية
-        if not extracted_info.get('strength') and 'خرسانة' in item_data.get('description', '').lower():
+        if not extracted_info.get('strength') and prepare(item_data.get('description', '')).contains('خرسانة'):
             warnings.append("⚠️ مقاومة الخرسانة غير محددة")
         
         # تحذير: بند معقد بدون تفاصيل كافية
@@ -411,7 +415,7 @@ class ItemAnalyzer:
             dep_keyword = dep['depends_on']
             for other_item in all_items:
                 if other_item.get('id') != item_id:
-                    if dep_keyword in other_item.get('description', '').lower():
+                    if prepare(other_item.get('description', '')).contains(dep_keyword):
                         related_items.append({
                             'item_id': other_item.get('id'),
                             'description': other_item.get('description'),
@@ -4,10 +4,14 @@ ItemClassifier System - نظام تصنيف البنود (3 طبقات)
 Rule-Based + Database-Driven
 """
 
-import sqlite3
+import time
 from typing import Dict, List, Tuple, Optional
 import re
 
+from .KeywordAutomaton import KeywordAutomaton
+from .ArabicNormalizer import normalize, prepare
+from .ConnectionPool import get_pool
+
 
 class ItemClassifier:
     """نظام تصنيف البنود في 3 طبقات"""
@@ -21,18 +25,13 @@ class ItemClassifier:
         """تحميل قاموس التصنيف من قاعدة البيانات"""
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT keyword, tier1_category, tier2_subcategory, tier3_specification, 
-                       priority, confidence_score, alternative_keywords
-                FROM classification_dictionary
-                ORDER BY priority DESC
-            """)
-            
-            rows = cursor.fetchall()
-            conn.close()
+            with get_pool(self.db_path).read() as conn:
+                rows = conn.execute("""
+                    SELECT keyword, tier1_category, tier2_subcategory, tier3_specification, 
+                           priority, confidence_score, alternative_keywords
+                    FROM classification_dictionary
+                    ORDER BY priority DESC
+                """).fetchall()
             
             self.dictionary = []
             for row in rows:
@@ -43,7 +42,7 @@ class ItemClassifier:
                     'tier3': row[3],
                     'priority': row[4],
                     'confidence': row[5],
-                    'alternatives': row[6].split(',') if row[6] else []
+                    'alternatives': re.split('[,،]', row[6]) if row[6] else []
                 }
                 self.dictionary.append(entry)
             
@@ -52,6 +51,31 @@ class ItemClassifier:
         except Exception as e:
             print(f"❌ خطأ في تحميل قاموس التصنيف: {e}")
             self.dictionary = []
+        
+        self._build_automaton()
+    
+    def _build_automaton(self):
+        """
+        بناء آلة Aho–Corasick من القاموس (مرة واحدة عند التحميل)
+        
+        الدرجة = priority × confidence (× 0.9 للبدائل)، والترتيب يطابق
+        ترتيب الفحص السابق: البند حسب الأولوية، الكلمة الرئيسية ثم بدائلها.
+        الكلمات تُوحَّد (ArabicNormalizer) لتطابق أوصافاً بتشكيل أو همزات مختلفة
+        """
+        
+        self.automaton = KeywordAutomaton()
+        rank = 0
+        for entry in self.dictionary:
+            score = entry['priority'] * entry['confidence']
+            self.automaton.add(normalize(entry['keyword']), entry, score, rank)
+            rank += 1
+            for alt in entry['alternatives']:
+                alt = normalize(alt)
+                if not alt:
+                    continue
+                self.automaton.add(alt, entry, score * 0.9, rank)  # تقليل قليل للبدائل
+                rank += 1
+        self.automaton.build()
     
     def classify(self, item_description: str) -> Dict:
         """
@@ -69,36 +93,17 @@ class ItemClassifier:
             - matched_keywords: الكلمات المطابقة
         """
         
-        # التحقق من الكاش
-        cache_key = item_description.lower().strip()
+        # توحيد النص (مرة واحدة لكل وصف فريد) ثم التحقق من الكاش
+        text = prepare(item_description).text
+        cache_key = text
         if cache_key in self.classification_cache:
             return self.classification_cache[cache_key]
         
-        # تنظيف النص
-        text = item_description.lower().strip()
+        # البحث عن أفضل تطابق بمرور واحد على النص
+        best_match = self.automaton.best_match(text)
         
-        # البحث عن التطابقات
-        matches = []
-        for entry in self.dictionary:
-            # البحث عن الكلمة المفتاحية الرئيسية
-            if entry['keyword'] in text:
-                matches.append({
-                    'entry': entry,
-                    'score': entry['priority'] * entry['confidence']
-                })
-            
-            # البحث عن الكلمات البديلة
-            for alt in entry['alternatives']:
-                if alt.strip().lower() in text:
-                    matches.append({
-                        'entry': entry,
-                        'score': entry['priority'] * entry['confidence'] * 0.9  # تقليل قليل للبدائل
-                    })
-        
-        # اختيار أفضل تطابق
-        if matches:
-            best_match = max(matches, key=lambda x: x['score'])
-            entry = best_match['entry']
+        if best_match is not None:
+            entry = self.automaton.payloads[best_match]
             
             result = {
                 'tier1_category': entry['tier1'],
@@ -135,15 +140,47 @@ class ItemClassifier:
             قائمة نتائج التصنيف
         """
         
+        return self.classify_bulk(items)['results']
+    
+    def classify_bulk(self, items: List[str]) -> Dict:
+        """
+        تصنيف عدد كبير من البنود (100k+) مع إحصائيات الأداء
+        البنود المكررة تُصنف مرة واحدة فقط
+        
+        Args:
+            items: قائمة أوصاف البنود
+            
+        Returns:
+            results: نفس مخرجات classify_batch
+            stats: عدد البنود، البنود الفريدة، إصابات الكاش، الزمن، البنود/ثانية
+        """
+        
+        started = time.perf_counter()
+        cache_hits = 0
+        unique = set()
+        
         results = []
         for item in items:
-            result = self.classify(item)
+            cache_key = prepare(item).text
+            unique.add(cache_key)
+            if cache_key in self.classification_cache:
+                cache_hits += 1
             results.append({
                 'item': item,
-                'classification': result
+                'classification': self.classify(item)
             })
         
-        return results
+        elapsed = time.perf_counter() - started
+        return {
+            'results': results,
+            'stats': {
+                'total_items': len(items),
+                'unique_items': len(unique),
+                'cache_hits': cache_hits,
+                'elapsed_seconds': round(elapsed, 4),
+                'items_per_second': round(len(items) / elapsed, 1) if elapsed > 0 else None
+            }
+        }
     
     def get_statistics(self, classifications: List[Dict]) -> Dict:
         """حساب إحصائيات التصنيف"""
@@ -0,0 +1,505 @@
+"""
+JobQueue - طابور مهام خلفية مع متابعة التقدم
+Background job queue backed by SQLite + a local process pool
+
+- الطابور ومخزن النتائج في ملف SQLite واحد (بدون وسيط خارجي)
+  ويمكن لعدة عمليات خادم (gunicorn workers) مشاركته بأمان
+- كل عملية خادم تسحب المهام بشكل ذري وتنفذها في ProcessPoolExecutor
+- العملية المنفذة تكتب التقدم والنتيجة مباشرة في SQLite، لذلك يمكن
+  لأي عملية خادم الرد على الاستعلام أو بث التقدم (SSE)
+- الإلغاء تعاوني: يُفحص عند كل تحديث للتقدم
+"""
+
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional
+
+JOB_STATUSES = ('queued', 'running', 'completed', 'failed', 'cancelled')
+TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
+
+# أقل فاصل زمني بين كتابتين للتقدم من نفس المهمة
+PROGRESS_WRITE_INTERVAL = 0.25
+
+# مدة الاحتفاظ بالمهام المنتهية ونتائجها
+DEFAULT_RESULT_TTL = 24 * 3600
+
+ProgressCallback = Callable[..., None]
+
+
+class JobCancelled(Exception):
+    """تُرفع داخل المهمة عند طلب الإلغاء"""
+
+
+class JobStore:
+    """تخزين المهام في SQLite (الطابور + التقدم + النتائج)"""
+
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_database(self):
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                job_type TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                payload TEXT,
+                progress REAL DEFAULT 0,
+                message TEXT,
+                result TEXT,
+                error TEXT,
+                owner TEXT,
+                cancel_requested INTEGER DEFAULT 0,
+                created_at TEXT NOT NULL,
+                started_at TEXT,
+                finished_at TEXT,
+                updated_at TEXT
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)')
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row, include_result: bool = False) -> Dict:
+        job = {
+            'job_id': row['id'],
+            'job_type': row['job_type'],
+            'status': row['status'],
+            'progress': round(row['progress'] or 0, 4),
+            'message': row['message'],
+            'error': row['error'],
+            'cancel_requested': bool(row['cancel_requested']),
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at'],
+            'updated_at': row['updated_at']
+        }
+        if include_result:
+            job['result'] = json.loads(row['result']) if row['result'] is not None else None
+        return job
+
+    # ═══════════════════════════════════════════════════════════════
+    # الطابور
+    # ═══════════════════════════════════════════════════════════════
+
+    def enqueue(self, job_type: str, payload: Dict) -> str:
+        """إضافة مهمة - يعيد job_id"""
+        job_id = uuid.uuid4().hex
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        conn.execute(
+            'INSERT INTO jobs (id, job_type, status, payload, message, created_at, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (job_id, job_type, 'queued', json.dumps(payload, ensure_ascii=False, default=str),
+             'في الانتظار - Queued', now, now)
+        )
+        conn.commit()
+        conn.close()
+        return job_id
+
+    def claim_next(self, owner: str, job_types: Optional[List[str]] = None) -> Optional[Dict]:
+        """سحب أقدم مهمة منتظرة بشكل ذري (آمن بين العمليات)"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            query = "SELECT id, job_type, payload FROM jobs WHERE status = 'queued'"
+            params: List = []
+            if job_types:
+                query += f" AND job_type IN ({','.join('?' * len(job_types))})"
+                params.extend(job_types)
+            row = conn.execute(query + ' ORDER BY created_at, rowid LIMIT 1', params).fetchone()
+            if row is None:
+                conn.rollback()
+                return None
+            now = datetime.now().isoformat()
+            conn.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, started_at = ?, updated_at = ?, "
+                "message = ? WHERE id = ?",
+                (owner, now, now, 'قيد التنفيذ - Running', row['id'])
+            )
+            conn.commit()
+            return {'job_id': row['id'], 'job_type': row['job_type'], 'payload': json.loads(row['payload'])}
+        finally:
+            conn.close()
+
+    def recover_interrupted(self, host: str) -> int:
+        """إعادة المهام العالقة لعمليات توقفت على نفس الجهاز إلى الطابور"""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT id, owner FROM jobs WHERE status = 'running' AND owner LIKE ?", (f'{host}:%',)
+        ).fetchall()
+        requeued = 0
+        for row in rows:
+            pid = int(row['owner'].rsplit(':', 1)[1])
+            if _pid_alive(pid):
+                continue
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL, progress = 0, updated_at = ?, "
+                "message = ? WHERE id = ? AND status = 'running'",
+                (datetime.now().isoformat(), 'أعيدت للطابور - Requeued', row['id'])
+            )
+            requeued += 1
+        conn.commit()
+        conn.close()
+        return requeued
+
+    def requeue(self, job_id: str) -> bool:
+        """إعادة مهمة مسحوبة لم تبدأ بعد إلى الطابور"""
+        conn = self._connect()
+        cursor = conn.execute(
+            "UPDATE jobs SET status = 'queued', owner = NULL, progress = 0, updated_at = ?, "
+            "message = ? WHERE id = ? AND status = 'running'",
+            (datetime.now().isoformat(), 'أعيدت للطابور - Requeued', job_id)
+        )
+        conn.commit()
+        conn.close()
+        return cursor.rowcount > 0
+
+    # ═══════════════════════════════════════════════════════════════
+    # التقدم والنتائج
+    # ═══════════════════════════════════════════════════════════════
+
+    def update_progress(self, job_id: str, progress: Optional[float], message: Optional[str] = None) -> bool:
+        """تحديث التقدم - يعيد True إذا طُلب إلغاء المهمة"""
+        conn = self._connect()
+        row = conn.execute(
+            'UPDATE jobs SET progress = COALESCE(?, progress), message = COALESCE(?, message), '
+            "updated_at = ? WHERE id = ? AND status = 'running' RETURNING cancel_requested",
+            (progress, message, datetime.now().isoformat(), job_id)
+        ).fetchone()
+        conn.commit()
+        conn.close()
+        return bool(row and row['cancel_requested'])
+
+    def _finish(self, job_id: str, status: str, result=None, error: Optional[str] = None, message: str = ''):
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        conn.execute(
+            'UPDATE jobs SET status = ?, result = ?, error = ?, message = ?, finished_at = ?, updated_at = ?, '
+            "progress = CASE WHEN ? = 'completed' THEN 1 ELSE progress END "
+            "WHERE id = ? AND status = 'running'",
+            (status,
+             json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+             error, message, now, now, status, job_id)
+        )
+        conn.commit()
+        conn.close()
+
+    def complete(self, job_id: str, result: Dict):
+        self._finish(job_id, 'completed', result=result, message='اكتملت - Completed')
+
+    def fail(self, job_id: str, error: str):
+        self._finish(job_id, 'failed', error=error, message='فشلت - Failed')
+
+    def mark_cancelled(self, job_id: str):
+        self._finish(job_id, 'cancelled', message='أُلغيت - Cancelled')
+
+    def request_cancel(self, job_id: str) -> Optional[str]:
+        """
+        طلب إلغاء: المهمة المنتظرة تُلغى فوراً، والجارية عند أول تحديث للتقدم
+
+        Returns:
+            الحالة بعد الطلب، أو None إذا لم توجد المهمة
+        """
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        conn.execute(
+            "UPDATE jobs SET status = 'cancelled', cancel_requested = 1, finished_at = ?, updated_at = ?, "
+            "message = ? WHERE id = ? AND status = 'queued'",
+            (now, now, 'أُلغيت - Cancelled', job_id)
+        )
+        conn.execute(
+            "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ? AND status = 'running'",
+            (now, job_id)
+        )
+        row = conn.execute('SELECT status FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        conn.commit()
+        conn.close()
+        return row['status'] if row else None
+
+    def get(self, job_id: str, include_result: bool = False) -> Optional[Dict]:
+        conn = self._connect()
+        row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        conn.close()
+        return self._to_dict(row, include_result) if row else None
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        conn = self._connect()
+        if status:
+            rows = conn.execute(
+                'SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?', (status, limit)
+            ).fetchall()
+        else:
+            rows = conn.execute('SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?', (limit,)).fetchall()
+        conn.close()
+        return [self._to_dict(row) for row in rows]
+
+    def purge_finished(self, max_age_seconds: float) -> int:
+        """حذف المهام المنتهية الأقدم من المدة المحددة"""
+        cutoff = (datetime.now() - timedelta(seconds=max_age_seconds)).isoformat()
+        conn = self._connect()
+        cursor = conn.execute(
+            f"DELETE FROM jobs WHERE status IN ({','.join('?' * len(TERMINAL_STATUSES))}) AND finished_at < ?",
+            (*TERMINAL_STATUSES, cutoff)
+        )
+        conn.commit()
+        conn.close()
+        return cursor.rowcount
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class _ProgressReporter:
+    """دالة التقدم المُمررة للمهمة: progress(fraction, message) مع فحص الإلغاء"""
+
+    def __init__(self, store: JobStore, job_id: str):
+        self.store = store
+        self.job_id = job_id
+        self._last_write = 0.0
+
+    def __call__(self, fraction: Optional[float] = None, message: Optional[str] = None, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_write < PROGRESS_WRITE_INTERVAL:
+            return
+        self._last_write = now
+        if fraction is not None:
+            fraction = min(max(float(fraction), 0.0), 1.0)
+        if self.store.update_progress(self.job_id, fraction, message):
+            raise JobCancelled(self.job_id)
+
+
+def _execute_job(store_path: str, job_id: str, handler: Callable, payload: Dict):
+    """تنفيذ مهمة داخل العملية الفرعية - النتيجة تُكتب مباشرة في SQLite"""
+    store = JobStore(store_path)
+    progress = _ProgressReporter(store, job_id)
+    try:
+        progress(0.0, 'بدأ التنفيذ - Started', force=True)
+        result = handler(payload, progress)
+    except JobCancelled:
+        store.mark_cancelled(job_id)
+        return
+    except Exception as e:
+        store.fail(job_id, f'{type(e).__name__}: {e}\n{traceback.format_exc()}')
+        return
+    store.complete(job_id, result)
+
+
+class JobQueue:
+    """طابور المهام: تسجيل الأنواع، الإرسال، التوزيع على العمليات، المتابعة"""
+
+    def __init__(
+        self,
+        db_path: str,
+        handlers: Dict[str, Callable[[Dict, ProgressCallback], Dict]],
+        max_workers: Optional[int] = None,
+        initializer: Optional[Callable] = None,
+        initargs: tuple = (),
+        poll_interval: float = 0.5,
+        result_ttl: float = DEFAULT_RESULT_TTL
+    ):
+        """
+        Args:
+            db_path: ملف SQLite للطابور والنتائج
+            handlers: نوع المهمة -> دالة على مستوى الوحدة (payload, progress) -> نتيجة JSON
+            max_workers: عدد العمليات المنفذة
+            initializer / initargs: تهيئة كل عملية منفذة (تحميل الأنظمة مرة واحدة)
+            poll_interval: فاصل فحص الطابور
+            result_ttl: مدة الاحتفاظ بالمهام المنتهية (ثوانٍ)
+        """
+        self.store = JobStore(db_path)
+        self.handlers = dict(handlers)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.initializer = initializer
+        self.initargs = initargs
+        self.poll_interval = poll_interval
+        self.result_ttl = result_ttl
+
+        self.owner = f'{socket.gethostname()}:{os.getpid()}'
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._active = 0
+
+    # ═══════════════════════════════════════════════════════════════
+    # دورة الحياة
+    # ═══════════════════════════════════════════════════════════════
+
+    def start(self):
+        """تشغيل الموزع (يحدث تلقائياً عند أول submit)"""
+        with self._lock:
+            if self._dispatcher is not None and self._dispatcher.is_alive():
+                return
+            self._stopping.clear()
+            self.store.recover_interrupted(socket.gethostname())
+            self.store.purge_finished(self.result_ttl)
+            self._executor = self._new_executor()
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name='job-dispatcher', daemon=True)
+            self._dispatcher.start()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=self.initializer,
+            initargs=self.initargs
+        )
+
+    def _restart_executor(self):
+        with self._lock:
+            broken, self._executor = self._executor, self._new_executor()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self, wait: bool = True):
+        """إيقاف الموزع والعمليات"""
+        self._stopping.set()
+        self._wakeup.set()
+        with self._lock:
+            dispatcher, executor = self._dispatcher, self._executor
+            self._dispatcher = self._executor = None
+        if dispatcher is not None:
+            dispatcher.join()
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _dispatch_loop(self):
+        last_purge = time.monotonic()
+        while not self._stopping.is_set():
+            try:
+                self._dispatch_pending()
+                if time.monotonic() - last_purge > 3600:
+                    self.store.purge_finished(self.result_ttl)
+                    last_purge = time.monotonic()
+            except Exception as e:
+                # خطأ في الطابور نفسه (مثل قاعدة بيانات مقفلة) - المحاولة في الدورة التالية
+                print(f"⚠️ Job dispatcher error: {type(e).__name__}: {e}")
+
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _dispatch_pending(self):
+        """إرسال المهام المنتظرة حتى امتلاء العمليات المنفذة"""
+        while self._active < self.max_workers and not self._stopping.is_set():
+            job = self.store.claim_next(self.owner, list(self.handlers))
+            if job is None:
+                return
+            try:
+                future = self._executor.submit(
+                    _execute_job, self.store.db_path, job['job_id'], self.handlers[job['job_type']], job['payload']
+                )
+            except BrokenProcessPool as e:
+                # عملية منفذة انهارت - مجمع جديد للمهام التالية
+                self.store.fail(job['job_id'], f'{type(e).__name__}: {e}')
+                self._restart_executor()
+                continue
+            except Exception as e:
+                if self._stopping.is_set():
+                    # الإيقاف جارٍ - تعود المهمة للطابور لعملية خادم أخرى
+                    self.store.requeue(job['job_id'])
+                    return
+                # فشل الإرسال لهذه المهمة فقط - لا تبقى عالقة في running والموزع يستمر
+                self.store.fail(job['job_id'], f'{type(e).__name__}: {e}')
+                continue
+            with self._lock:
+                self._active += 1
+            future.add_done_callback(lambda f, job_id=job['job_id']: self._on_done(job_id, f))
+
+    def _on_done(self, job_id: str, future):
+        with self._lock:
+            self._active -= 1
+        # أخطاء المهمة تُسجل داخل العملية - هنا فقط انهيار العملية نفسها
+        if not future.cancelled() and future.exception() is not None:
+            self.store.fail(job_id, f'{type(future.exception()).__name__}: {future.exception()}')
+        self._wakeup.set()
+
+    # ═══════════════════════════════════════════════════════════════
+    # الواجهة
+    # ═══════════════════════════════════════════════════════════════
+
+    def submit(self, job_type: str, payload: Dict) -> str:
+        """إرسال مهمة - يعيد job_id فوراً"""
+        if job_type not in self.handlers:
+            raise ValueError(f'نوع مهمة غير معروف: {job_type}')
+        job_id = self.store.enqueue(job_type, payload)
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.store.get(job_id)
+
+    def get_result(self, job_id: str) -> Optional[Dict]:
+        return self.store.get(job_id, include_result=True)
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        return self.store.request_cancel(job_id)
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        return self.store.list_jobs(status, limit)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        """انتظار انتهاء مهمة (للاختبارات والسكربتات)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.store.get(job_id)
+            if job is None or job['status'] in TERMINAL_STATUSES:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(min(self.poll_interval, 0.1))
+
+    def events(self, job_id: str, interval: float = 0.5, heartbeat: float = 15.0) -> Iterator[str]:
+        """
+        بث التقدم بصيغة Server-Sent Events حتى انتهاء المهمة
+
+        يرسل حدث 'progress' عند كل تغيير، وتعليق keep-alive عند السكون
+        """
+        last_state = None
+        last_sent = time.monotonic()
+        while True:
+            job = self.store.get(job_id)
+            if job is None:
+                yield f"event: error\ndata: {json.dumps({'error': 'job not found'})}\n\n"
+                return
+
+            state = (job['status'], job['progress'], job['message'])
+            if state != last_state:
+                event = 'done' if job['status'] in TERMINAL_STATUSES else 'progress'
+                yield f"event: {event}\ndata: {json.dumps(job, ensure_ascii=False)}\n\n"
+                last_state = state
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= heartbeat:
+                yield ': keep-alive\n\n'
+                last_sent = time.monotonic()
+
+            if job['status'] in TERMINAL_STATUSES:
+                return
+            time.sleep(interval)
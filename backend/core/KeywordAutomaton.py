@@ -0,0 +1,137 @@
+"""
+KeywordAutomaton - آلة مطابقة متعددة الأنماط (Aho–Corasick)
+تبني الآلة مرة واحدة من قائمة الكلمات المفتاحية، ثم تجد كل التطابقات
+في النص بمرور واحد بزمن O(طول النص + عدد التطابقات) بدلاً من
+فحص كل كلمة مفتاحية بـ `in` على حدة.
+
+كل نمط يحمل قيمة (payload) ودرجة (score) وترتيباً (rank)؛
+best_match يعيد النمط الأعلى درجة، وعند التساوي الأقل ترتيباً
+(نفس نتيجة max() على قائمة مرتبة).
+"""
+
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+# (score, -rank) يسمح بمقارنة واحدة: الأعلى درجة ثم الأقل ترتيباً
+_NO_MATCH: Tuple[float, int] = (float('-inf'), 0)
+
+
+class KeywordAutomaton:
+    """آلة Aho–Corasick للكلمات المفتاحية"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[int]] = [[]]
+        self._best: List[Tuple[float, int]] = [_NO_MATCH]
+        self._best_pattern: List[int] = [-1]
+
+        self.patterns: List[str] = []
+        self.payloads: List[Any] = []
+        self.scores: List[float] = []
+        self.ranks: List[int] = []
+
+        # الأنماط الفارغة تطابق أي نص (نفس سلوك '' in text)
+        self._empty_patterns: List[int] = []
+        self._built = False
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def add(self, pattern: str, payload: Any = None, score: float = 0.0, rank: Optional[int] = None):
+        """إضافة نمط (قبل build)"""
+        index = len(self.patterns)
+        self.patterns.append(pattern)
+        self.payloads.append(payload)
+        self.scores.append(score)
+        self.ranks.append(index if rank is None else rank)
+        self._built = False
+
+        if not pattern:
+            self._empty_patterns.append(index)
+            return
+
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+                self._best.append(_NO_MATCH)
+                self._best_pattern.append(-1)
+                self._goto[node][char] = next_node
+            node = next_node
+        self._outputs[node].append(index)
+
+    def _key(self, index: int) -> Tuple[float, int]:
+        return (self.scores[index], -self.ranks[index])
+
+    def build(self) -> "KeywordAutomaton":
+        """حساب روابط الفشل وأفضل تطابق لكل حالة (BFS)"""
+        queue = deque()
+        for node in self._goto[0].values():
+            self._fail[node] = 0
+            queue.append(node)
+
+        order = []
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                queue.append(child)
+
+        # أفضل تطابق في كل حالة = أفضل مخرجاتها أو أفضل حالة الفشل (بترتيب BFS)
+        for node in order:
+            best_key, best_pattern = self._best[self._fail[node]], self._best_pattern[self._fail[node]]
+            for index in self._outputs[node]:
+                key = self._key(index)
+                if key > best_key:
+                    best_key, best_pattern = key, index
+            self._best[node] = best_key
+            self._best_pattern[node] = best_pattern
+
+        self._built = True
+        return self
+
+    def _states(self, text: str):
+        if not self._built:
+            self.build()
+        goto, fail = self._goto, self._fail
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            yield node
+
+    def find_all(self, text: str) -> List[int]:
+        """فهارس كل الأنماط الموجودة في النص (بدون تكرار، مرتبة حسب الترتيب)"""
+        found = set(self._empty_patterns)
+        outputs, fail = self._outputs, self._fail
+        for node in self._states(text):
+            state = node
+            while state:
+                found.update(outputs[state])
+                state = fail[state]
+        return sorted(found, key=lambda index: self.ranks[index])
+
+    def best_match(self, text: str) -> Optional[int]:
+        """فهرس النمط الأعلى درجة في النص (أو None)"""
+        best_key, best_pattern = _NO_MATCH, -1
+        for index in self._empty_patterns:
+            key = self._key(index)
+            if key > best_key:
+                best_key, best_pattern = key, index
+
+        best, best_patterns = self._best, self._best_pattern
+        for node in self._states(text):
+            if best_patterns[node] >= 0 and best[node] > best_key:
+                best_key, best_pattern = best[node], best_patterns[node]
+
+        return best_pattern if best_pattern >= 0 else None
@@ -2,17 +2,23 @@
 ProductivityDatabase System - قاعدة معدلات الإنتاجية
 يوفر معدلات إنتاجية موثوقة لحساب المدد والموارد
 Database-Driven System
+
+المعدلات تُقرأ من فهرس في الذاكرة (ProductivityIndex) يُحدَّث تلقائياً
+عند تغيّر الجدول، بدلاً من استعلام SQLite لكل بند.
 """
 
-import sqlite3
 from typing import Dict, List, Optional
 
+from .ConnectionPool import get_pool
+from .ProductivityIndex import ProductivityIndex
+
 
 class ProductivityDatabase:
     """قاعدة بيانات معدلات الإنتاجية"""
     
     def __init__(self, db_path: str):
         self.db_path = db_path
+        self.index = ProductivityIndex.shared(db_path)
     
     def get_rate(self, activity_type: str, category: str = None) -> Optional[Dict]:
         """
@@ -27,44 +33,7 @@ class ProductivityDatabase:
         """
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            if category:
-                cursor.execute("""
-                    SELECT activity_type, category, unit, rate_per_unit, crew_size, 
-                           equipment_needed, complexity_factor, weather_factor
-                    FROM productivity_rates
-                    WHERE LOWER(activity_type) LIKE ? AND LOWER(category) LIKE ?
-                    ORDER BY priority DESC
-                    LIMIT 1
-                """, (f'%{activity_type.lower()}%', f'%{category.lower()}%'))
-            else:
-                cursor.execute("""
-                    SELECT activity_type, category, unit, rate_per_unit, crew_size, 
-                           equipment_needed, complexity_factor, weather_factor
-                    FROM productivity_rates
-                    WHERE LOWER(activity_type) LIKE ?
-                    ORDER BY priority DESC
-                    LIMIT 1
-                """, (f'%{activity_type.lower()}%',))
-            
-            row = cursor.fetchone()
-            conn.close()
-            
-            if row:
-                return {
-                    'activity_type': row[0],
-                    'category': row[1],
-                    'unit': row[2],
-                    'rate_per_unit': row[3],  # أيام/وحدة
-                    'crew_size': row[4],
-                    'equipment_needed': row[5],
-                    'complexity_factor': row[6],
-                    'weather_factor': row[7]
-                }
-            
-            return None
+            return self.index.find(activity_type, category)
             
         except Exception as e:
             print(f"❌ خطأ في الحصول على معدل الإنتاجية: {e}")
@@ -89,7 +58,35 @@ class ProductivityDatabase:
             - rate_used: المعدل المستخدم
         """
         
-        rate_info = self.get_rate(activity_type, category)
+        return self.duration_from_rate(self.get_rate(activity_type, category), quantity)
+    
+    def calculate_duration_batch(self, activities: List[Dict]) -> List[Dict]:
+        """
+        حساب المدد لدفعة من الأنشطة - كل (نوع نشاط، فئة) يُحل مرة واحدة
+        
+        Args:
+            activities: قواميس بالمفاتيح activity_type, quantity, unit, category
+            
+        Returns:
+            نتائج calculate_duration بنفس الترتيب
+        """
+        
+        rates: Dict[tuple, Optional[Dict]] = {}
+        results = []
+        for activity in activities:
+            key = (activity['activity_type'], activity.get('category'))
+            if key not in rates:
+                rates[key] = self.get_rate(*key)
+            results.append(self.duration_from_rate(rates[key], activity['quantity']))
+        return results
+    
+    @staticmethod
+    def duration_from_rate(rate_info: Optional[Dict], quantity: float) -> Dict:
+        """
+        حساب المدة من معدل إنتاجية محمّل مسبقاً (نفس مخرجات calculate_duration)
+        
+        يسمح بتحميل المعدل مرة واحدة لكل نوع نشاط عند حساب دفعة من البنود
+        """
         
         if not rate_info:
             # معدل افتراضي
@@ -126,17 +123,12 @@ class ProductivityDatabase:
         """الحصول على جميع معدلات الإنتاجية"""
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT activity_type, category, unit, rate_per_unit, crew_size
-                FROM productivity_rates
-                ORDER BY category, activity_type
-            """)
-            
-            rows = cursor.fetchall()
-            conn.close()
+            with get_pool(self.db_path).read() as conn:
+                rows = conn.execute("""
+                    SELECT activity_type, category, unit, rate_per_unit, crew_size
+                    FROM productivity_rates
+                    ORDER BY category, activity_type
+                """).fetchall()
             
             rates = []
             for row in rows:
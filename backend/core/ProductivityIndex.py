@@ -0,0 +1,267 @@
+"""
+ProductivityIndex - فهرس معدلات الإنتاجية في الذاكرة
+In-memory index over the productivity_rates table
+
+يُحمّل الجدول مرة واحدة ويجيب على الاستعلامات بدون اتصال SQLite:
+- قواميس للمطابقة التامة
+- فهرس ثلاثيات الأحرف (Trigrams) لمطابقة LIKE '%x%' بنفس نتائج SQL
+- فهرس كلمات مطبّعة (ArabicNormalizer) للبحث التقريبي
+- ترتيب حسب الأولوية (priority DESC) مرة واحدة عند التحميل
+
+يُعاد التحميل تلقائياً عند تغيّر قاعدة البيانات (PRAGMA data_version).
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .ArabicNormalizer import prepare
+
+RATE_FIELDS = (
+    'activity_type', 'category', 'unit', 'rate_per_unit', 'crew_size',
+    'equipment_needed', 'complexity_factor', 'weather_factor'
+)
+
+# أقل فاصل زمني بين فحصين لتغيّر قاعدة البيانات
+REFRESH_CHECK_INTERVAL = 1.0
+
+_ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+_ARTICLE = 'ال'
+
+
+def _sql_lower(text: Optional[str]) -> Optional[str]:
+    """LOWER() في SQLite (حروف ASCII فقط)"""
+    return text.translate(_ASCII_LOWER) if text is not None else None
+
+
+def _trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _fuzzy_tokens(text: str) -> set:
+    """كلمات مطبّعة بدون أداة التعريف"""
+    tokens = set()
+    for token in prepare(text).tokens:
+        if token.startswith(_ARTICLE) and len(token) > len(_ARTICLE) + 1:
+            token = token[len(_ARTICLE):]
+        tokens.add(token)
+    return tokens
+
+
+class _LikePattern:
+    """نمط LIKE '%x%' (مع دعم % و _ داخل x كما في SQLite)"""
+
+    def __init__(self, value: str):
+        self.value = _sql_lower(value.lower())
+        self.plain = '%' not in self.value and '_' not in self.value
+        if not self.plain:
+            regex = ''.join('.*' if ch == '%' else '.' if ch == '_' else re.escape(ch) for ch in self.value)
+            self._regex = re.compile(regex, re.DOTALL)
+
+    def matches(self, text: Optional[str]) -> bool:
+        if text is None:
+            return False
+        if self.plain:
+            return self.value in text
+        return self._regex.search(text) is not None
+
+
+class ProductivityIndex:
+    """فهرس معدلات الإنتاجية (مشترك لكل قاعدة بيانات داخل العملية)"""
+
+    _shared: Dict[str, 'ProductivityIndex'] = {}
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, db_path: str) -> 'ProductivityIndex':
+        """نسخة واحدة لكل مسار قاعدة بيانات"""
+        key = os.path.abspath(db_path) if db_path != ':memory:' else db_path
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(db_path)
+            return cls._shared[key]
+
+    def __init__(self, db_path: str, refresh_interval: float = REFRESH_CHECK_INTERVAL):
+        self.db_path = db_path
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._file_id: Optional[Tuple[int, int]] = None
+        self._data_version: Optional[int] = None
+        self._last_check = 0.0
+        self.loads = 0
+
+        self._load()
+
+    # ═══════════════════════════════════════════════════════════════
+    # التحميل والتحديث
+    # ═══════════════════════════════════════════════════════════════
+
+    def _current_file_id(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.db_path)
+        except OSError:
+            return None
+        return stat.st_dev, stat.st_ino
+
+    def _connect(self):
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._file_id = self._current_file_id()
+
+    def _load(self):
+        """تحميل الجدول وبناء الفهارس"""
+        with self._lock:
+            if self._conn is None or self._file_id != self._current_file_id():
+                self._connect()
+            self._data_version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+            self._last_check = time.monotonic()
+
+            try:
+                rows = self._conn.execute(f"""
+                    SELECT id, {', '.join(RATE_FIELDS)}, priority
+                    FROM productivity_rates
+                """).fetchall()
+            except sqlite3.Error as e:
+                print(f"❌ خطأ في تحميل معدلات الإنتاجية: {e}")
+                rows = []
+
+            # ترتيب الأولوية: priority DESC ثم ترتيب الإدراج
+            by_priority = sorted(rows, key=lambda row: (-(row[-1] if row[-1] is not None else -1e18), row[0]))
+            self._rates: List[Dict] = [dict(zip(RATE_FIELDS, row[1:-1])) for row in by_priority]
+            self._activity_keys = [_sql_lower(rate['activity_type']) for rate in self._rates]
+            self._category_keys = [_sql_lower(rate['category']) for rate in self._rates]
+
+            # فهرس الثلاثيات: trigram -> مواقع (تصاعدية = حسب الأولوية)
+            self._trigram_index: Dict[str, List[int]] = {}
+            for position, key in enumerate(self._activity_keys):
+                for gram in _trigrams(key or ''):
+                    self._trigram_index.setdefault(gram, []).append(position)
+
+            # مطابقة تامة: أول صف حسب الأولوية
+            self._by_activity: Dict[str, int] = {}
+            self._by_pair: Dict[Tuple[str, str], int] = {}
+            for position, (activity, category) in enumerate(zip(self._activity_keys, self._category_keys)):
+                self._by_activity.setdefault(activity, position)
+                self._by_pair.setdefault((activity, category), position)
+
+            # مطابقة تامة بترتيب الفهرس (activity_type, category) كما في "activity_type = ?"
+            self._by_exact_type: Dict[str, Dict] = {}
+            for row in sorted(rows, key=lambda row: (row[1], row[2], row[0])):
+                self._by_exact_type.setdefault(row[1], dict(zip(RATE_FIELDS, row[1:-1])))
+
+            # فهرس الكلمات المطبّعة للبحث التقريبي
+            self._token_index: Dict[str, List[int]] = {}
+            for position, rate in enumerate(self._rates):
+                for token in _fuzzy_tokens(f"{rate['activity_type'] or ''} {rate['category'] or ''}"):
+                    self._token_index.setdefault(token, []).append(position)
+
+            self._lookup_cache: Dict[Tuple[str, Optional[str]], Optional[int]] = {}
+            self.loads += 1
+
+    def _ensure_fresh(self):
+        """إعادة التحميل إذا تغيّرت قاعدة البيانات (فحص كل refresh_interval ثانية)"""
+        now = time.monotonic()
+        if now - self._last_check < self.refresh_interval:
+            return
+        with self._lock:
+            self._last_check = now
+            if self._file_id != self._current_file_id():
+                self._load()
+                return
+            version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+            if version != self._data_version:
+                self._load()
+
+    def refresh(self):
+        """إعادة تحميل فورية"""
+        self._load()
+
+    # ═══════════════════════════════════════════════════════════════
+    # الاستعلامات
+    # ═══════════════════════════════════════════════════════════════
+
+    def _candidates(self, pattern: _LikePattern) -> range:
+        """مواقع مرشحة لنمط LIKE (تقاطع قوائم الثلاثيات)"""
+        grams = _trigrams(pattern.value) if pattern.plain else set()
+        if not grams:
+            return range(len(self._rates))
+        postings = sorted((self._trigram_index.get(gram, []) for gram in grams), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return sorted(candidates)
+
+    def find(self, activity_type: str, category: Optional[str] = None) -> Optional[Dict]:
+        """
+        نفس نتيجة:
+            WHERE LOWER(activity_type) LIKE '%x%' [AND LOWER(category) LIKE '%y%']
+            ORDER BY priority DESC LIMIT 1
+        """
+        self._ensure_fresh()
+        with self._lock:
+            cache_key = (activity_type, category or None)
+            if cache_key not in self._lookup_cache:
+                self._lookup_cache[cache_key] = self._find_position(activity_type, category)
+            position = self._lookup_cache[cache_key]
+            return dict(self._rates[position]) if position is not None else None
+
+    def _find_position(self, activity_type: str, category: Optional[str]) -> Optional[int]:
+        activity_pattern = _LikePattern(activity_type)
+        category_pattern = _LikePattern(category) if category else None
+
+        # المطابقة التامة تطابق LIKE أيضاً - فالنتيجة لا تتجاوز موقعها
+        exact = None
+        if activity_pattern.plain and (category_pattern is None or category_pattern.plain):
+            exact = (self._by_pair.get((activity_pattern.value, category_pattern.value)) if category_pattern
+                     else self._by_activity.get(activity_pattern.value))
+
+        for position in self._candidates(activity_pattern):
+            if exact is not None and position >= exact:
+                return exact
+            if not activity_pattern.matches(self._activity_keys[position]):
+                continue
+            if category_pattern is None or category_pattern.matches(self._category_keys[position]):
+                return position
+        return None
+
+    def get_exact(self, activity_type: str) -> Optional[Dict]:
+        """نفس نتيجة: WHERE activity_type = ? LIMIT 1 (ترتيب فهرس activity_type, category)"""
+        self._ensure_fresh()
+        with self._lock:
+            rate = self._by_exact_type.get(activity_type)
+            return dict(rate) if rate is not None else None
+
+    def search(self, text: str, limit: int = 5) -> List[Dict]:
+        """
+        بحث تقريبي بالكلمات المطبّعة (همزات، تاء مربوطة، أداة التعريف)
+
+        Returns:
+            المعدلات مرتبة حسب عدد الكلمات المشتركة ثم الأولوية، مع 'score'
+        """
+        self._ensure_fresh()
+        with self._lock:
+            scores: Dict[int, int] = {}
+            for token in _fuzzy_tokens(text):
+                for position in self._token_index.get(token, []):
+                    scores[position] = scores.get(position, 0) + 1
+            ranked = sorted(scores.items(), key=lambda entry: (-entry[1], entry[0]))[:limit]
+            return [dict(self._rates[position], score=score) for position, score in ranked]
+
+    def get_stats(self) -> Dict:
+        """إحصائيات الفهرس"""
+        with self._lock:
+            return {
+                'rates': len(self._rates),
+                'trigrams': len(self._trigram_index),
+                'tokens': len(self._token_index),
+                'cached_lookups': len(self._lookup_cache),
+                'loads': self.loads
+            }
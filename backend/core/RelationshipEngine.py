@@ -6,6 +6,12 @@ RelationshipEngine System - محرك العلاقات والتبعيات
 - Finish-to-Finish (FF): نشاط B ينتهي عند انتهاء نشاط A
 - Start-to-Finish (SF): نشاط B ينتهي عند بدء نشاط A
 - Lead/Lag Times: تأخير أو تقديم بين الأنشطة
+
+بناء الشبكة مفهرس: نوع كل نشاط يُحدد مرة واحدة، ثم فهرس نوع -> أنشطة،
+مع منع تكرار الروابط واستراتيجية ربط قابلة للضبط (fan_out):
+- all: كل نشاط بكل الأنشطة المطابقة (حاصل ضرب كامل)
+- chain: سلسلة لكل (موقع، نوع) وربط أول/آخر نشاط بين المجموعات - روابط خطية
+- auto: all ما لم يتجاوز عدد الروابط المتوقع auto_chain_threshold
 """
 
 import sqlite3
@@ -13,14 +19,43 @@ from typing import Dict, List, Tuple, Optional, Set
 from datetime import datetime, timedelta
 import json
 
+from .ArabicNormalizer import prepare
+
+# خريطة الكلمات المفتاحية لأنواع الأنشطة
+TYPE_KEYWORDS = {
+    'excavation': ['حفر', 'حفريات'],
+    'concrete': ['خرسانة', 'صب'],
+    'formwork': ['نجارة', 'شدة', 'فرم'],
+    'reinforcement': ['تسليح', 'حديد', 'حدادة'],
+    'masonry': ['بناء', 'طوب', 'بلوك'],
+    'plastering': ['لياسة', 'محارة'],
+    'tiling': ['بلاط', 'سيراميك', 'رخام'],
+    'painting': ['دهان', 'طلاء'],
+    'waterproofing': ['عزل', 'عازل'],
+    'plumbing': ['سباكة', 'صحي'],
+    'electrical': ['كهرباء', 'كهربائي']
+}
+
+FAN_OUT_STRATEGIES = ('all', 'chain', 'auto')
+
+# أقصى عدد روابط متوقع (حاصل الضرب الكامل) قبل التحول إلى chain في وضع auto
+AUTO_CHAIN_THRESHOLD = 10_000
+
 
 class RelationshipEngine:
     """محرك العلاقات والتبعيات بين الأنشطة"""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, fan_out: str = 'auto',
+                 auto_chain_threshold: int = AUTO_CHAIN_THRESHOLD):
+        if fan_out not in FAN_OUT_STRATEGIES:
+            raise ValueError(f"استراتيجية ربط غير معروفة: {fan_out} ({', '.join(FAN_OUT_STRATEGIES)})")
+        
         self.db_path = db_path
+        self.fan_out = fan_out
+        self.auto_chain_threshold = auto_chain_threshold
         self.relationship_rules = self._load_relationship_rules()
         self.graph = {}  # Activity dependency graph
+        self._edge_keys: Set[Tuple] = set()  # منع تكرار الروابط
         
         print("✅ RelationshipEngine System Initialized")
     
@@ -155,19 +190,25 @@ class RelationshipEngine:
         
         return rules
     
-    def build_dependency_graph(self, activities: List[Dict]) -> Dict:
+    def build_dependency_graph(self, activities: List[Dict], fan_out: str = None) -> Dict:
         """
         بناء شبكة التبعيات الكاملة
         
         Args:
             activities: قائمة الأنشطة مع تصنيفاتها
+            fan_out: استراتيجية الربط (all / chain / auto) - الافتراضي self.fan_out
             
         Returns:
             شبكة التبعيات مع جميع العلاقات
         """
         
+        fan_out = fan_out or self.fan_out
+        if fan_out not in FAN_OUT_STRATEGIES:
+            raise ValueError(f"استراتيجية ربط غير معروفة: {fan_out} ({', '.join(FAN_OUT_STRATEGIES)})")
+        
         # إعادة تعيين الشبكة
         self.graph = {}
+        self._edge_keys = set()
         
         # بناء العقد (Nodes)
         for activity in activities:
@@ -180,41 +221,20 @@ class RelationshipEngine:
                 'critical': False
             }
         
-        # بناء الأضلاع (Edges) بناءً على القواعد
+        # نوع كل نشاط مرة واحدة + فهرس نوع -> معرفات (بترتيب الإدخال)
+        activity_types = {activity['id']: self._identify_activity_type(activity) for activity in activities}
+        type_index: Dict[str, List[str]] = {}
         for activity in activities:
-            activity_id = activity['id']
-            activity_type = self._identify_activity_type(activity)
-            
-            if activity_type in self.relationship_rules:
-                rules = self.relationship_rules[activity_type]
-                
-                # إضافة المتطلبات المسبقة (Prerequisites)
-                for prereq in rules.get('prerequisites', []):
-                    prereq_activities = self._find_activities_by_type(
-                        activities, prereq['activity']
-                    )
-                    
-                    for prereq_activity in prereq_activities:
-                        self._add_relationship(
-                            prereq_activity['id'],
-                            activity_id,
-                            prereq['type'],
-                            prereq['lag']
-                        )
-                
-                # إضافة الأنشطة اللاحقة (Successors)
-                for succ in rules.get('successors', []):
-                    succ_activities = self._find_activities_by_type(
-                        activities, succ['activity']
-                    )
-                    
-                    for succ_activity in succ_activities:
-                        self._add_relationship(
-                            activity_id,
-                            succ_activity['id'],
-                            succ['type'],
-                            succ['lag']
-                        )
+            type_index.setdefault(activity_types[activity['id']], []).append(activity['id'])
+        
+        if fan_out == 'auto':
+            fan_out = 'chain' if self._estimate_links(type_index) > self.auto_chain_threshold else 'all'
+        
+        # بناء الأضلاع (Edges) بناءً على القواعد
+        if fan_out == 'chain':
+            self._build_chained_edges(activities, activity_types)
+        else:
+            self._build_all_pairs_edges(activities, activity_types, type_index)
         
         # حساب المستويات (Levels) في الشبكة
         self._calculate_levels()
@@ -224,44 +244,95 @@ class RelationshipEngine:
         
         return self.graph
     
+    def _estimate_links(self, type_index: Dict[str, List[str]]) -> int:
+        """عدد الروابط في وضع all (قبل إزالة التكرار) بدون توليدها"""
+        
+        total = 0
+        for activity_type, rules in self.relationship_rules.items():
+            count = len(type_index.get(activity_type, []))
+            for rule in rules.get('prerequisites', []) + rules.get('successors', []):
+                total += count * len(type_index.get(rule['activity'], []))
+        return total
+    
+    def _build_all_pairs_edges(self, activities: List[Dict], activity_types: Dict[str, str],
+                               type_index: Dict[str, List[str]]):
+        """كل نشاط مع كل الأنشطة المطابقة لقواعده (من الفهرس بدلاً من مسح الأنشطة)"""
+        
+        for activity in activities:
+            activity_id = activity['id']
+            rules = self.relationship_rules.get(activity_types[activity_id])
+            if not rules:
+                continue
+            
+            # إضافة المتطلبات المسبقة (Prerequisites)
+            for prereq in rules.get('prerequisites', []):
+                for prereq_id in type_index.get(prereq['activity'], []):
+                    self._add_relationship(prereq_id, activity_id, prereq['type'], prereq['lag'])
+            
+            # إضافة الأنشطة اللاحقة (Successors)
+            for succ in rules.get('successors', []):
+                for succ_id in type_index.get(succ['activity'], []):
+                    self._add_relationship(activity_id, succ_id, succ['type'], succ['lag'])
+    
+    def _build_chained_edges(self, activities: List[Dict], activity_types: Dict[str, str]):
+        """
+        الربط بالسلاسل حسب الموقع:
+        - أنشطة نفس النوع في نفس الموقع تُنفذ بالتتابع (FS)
+        - العلاقة بين نوعين تُربط بين طرفي السلسلتين فقط:
+          من (FS/FF) آخر السابق، من (SS/SF) أول السابق،
+          إلى (FS/SS) أول اللاحق، إلى (FF/SF) آخر اللاحق
+        """
+        
+        rule_types = set(self.relationship_rules)
+        for rules in self.relationship_rules.values():
+            for rule in rules.get('prerequisites', []) + rules.get('successors', []):
+                rule_types.add(rule['activity'])
+        
+        # (الموقع، النوع) -> سلسلة المعرفات
+        chains: Dict[Tuple, List[str]] = {}
+        for activity in activities:
+            activity_type = activity_types[activity['id']]
+            if activity_type in rule_types:
+                chains.setdefault((self._location_key(activity), activity_type), []).append(activity['id'])
+        
+        for chain in chains.values():
+            for predecessor_id, successor_id in zip(chain, chain[1:]):
+                self._add_relationship(predecessor_id, successor_id, 'FS', 0)
+        
+        def link(pred_chain, succ_chain, rel_type, lag):
+            predecessor_id = pred_chain[-1] if rel_type[0] == 'F' else pred_chain[0]
+            successor_id = succ_chain[0] if rel_type[1] == 'S' else succ_chain[-1]
+            self._add_relationship(predecessor_id, successor_id, rel_type, lag)
+        
+        for (location, activity_type), chain in chains.items():
+            rules = self.relationship_rules.get(activity_type, {})
+            for prereq in rules.get('prerequisites', []):
+                pred_chain = chains.get((location, prereq['activity']))
+                if pred_chain:
+                    link(pred_chain, chain, prereq['type'], prereq['lag'])
+            for succ in rules.get('successors', []):
+                succ_chain = chains.get((location, succ['activity']))
+                if succ_chain:
+                    link(chain, succ_chain, succ['type'], succ['lag'])
+    
+    @staticmethod
+    def _location_key(activity: Dict) -> str:
+        """مفتاح الموقع (المبنى/المنطقة/الطابق) لتجميع السلاسل"""
+        
+        return str(activity.get('location') or activity.get('zone') or '')
+    
     def _identify_activity_type(self, activity: Dict) -> str:
         """تحديد نوع النشاط بناءً على التصنيف أو الوصف"""
         
-        description = activity.get('description', '').lower()
-        classification = activity.get('classification', {})
-        
-        # خريطة الكلمات المفتاحية لأنواع الأنشطة
-        type_keywords = {
-            'excavation': ['حفر', 'حفريات'],
-            'concrete': ['خرسانة', 'صب'],
-            'formwork': ['نجارة', 'شدة', 'فرم'],
-            'reinforcement': ['تسليح', 'حديد', 'حدادة'],
-            'masonry': ['بناء', 'طوب', 'بلوك'],
-            'plastering': ['لياسة', 'محارة'],
-            'tiling': ['بلاط', 'سيراميك', 'رخام'],
-            'painting': ['دهان', 'طلاء'],
-            'waterproofing': ['عزل', 'عازل'],
-            'plumbing': ['سباكة', 'صحي'],
-            'electrical': ['كهرباء', 'كهربائي']
-        }
+        description = prepare(activity.get('description', ''))
         
-        for activity_type, keywords in type_keywords.items():
+        for activity_type, keywords in TYPE_KEYWORDS.items():
             for keyword in keywords:
-                if keyword in description:
+                if description.contains(keyword):
                     return activity_type
         
         return 'general'
     
-    def _find_activities_by_type(self, activities: List[Dict], activity_type: str) -> List[Dict]:
-        """البحث عن أنشطة من نوع محدد"""
-        
-        matching_activities = []
-        for activity in activities:
-            if self._identify_activity_type(activity) == activity_type:
-                matching_activities.append(activity)
-        
-        return matching_activities
-    
     def _add_relationship(self, predecessor_id: str, successor_id: str, 
                          rel_type: str, lag: int):
         """إضافة علاقة بين نشاطين"""
@@ -269,6 +340,12 @@ class RelationshipEngine:
         if predecessor_id not in self.graph or successor_id not in self.graph:
             return
         
+        # نفس الرابط من قاعدتين (مثلاً سابق هذا ولاحق ذاك) يُضاف مرة واحدة
+        edge_key = (predecessor_id, successor_id, rel_type, lag)
+        if edge_key in self._edge_keys:
+            return
+        self._edge_keys.add(edge_key)
+        
         relationship = {
             'type': rel_type,  # FS, SS, FF, SF
             'lag': lag,
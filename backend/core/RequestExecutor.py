@@ -3,12 +3,12 @@ RequestExecutor System - منفذ الطلبات
 يقوم بتنفيذ الأوامر المُحللة من RequestParser باستخدام جميع الأنظمة الأخرى
 """
 
-import sqlite3
 from typing import Dict, List, Optional
 import json
 from datetime import datetime
 
 # استيراد جميع الأنظمة
+from .ConnectionPool import get_pool
 from .ExcelIntelligence import ExcelIntelligence
 from .ItemClassifier import ItemClassifier
 from .ItemAnalyzer import ItemAnalyzer
@@ -23,11 +23,11 @@ from .RequestParser import RequestParser
 class RequestExecutor:
     """منفذ الطلبات اللغوية"""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, workbook_cache=None):
         self.db_path = db_path
         
         # تهيئة جميع الأنظمة
-        self.excel_intelligence = ExcelIntelligence()
+        self.excel_intelligence = ExcelIntelligence(workbook_cache)
         self.item_classifier = ItemClassifier(db_path)
         self.item_analyzer = ItemAnalyzer(db_path)
         self.productivity_db = ProductivityDatabase(db_path)
@@ -168,10 +168,9 @@ class RequestExecutor:
         elif 'file_path' in context:
             # تحليل ملف
             file_path = context['file_path']
-            discovery = self.excel_intelligence.discover_file_type(file_path)
+            discovery, extracted_data = self.excel_intelligence.ingest(file_path)
             
             if discovery['file_type'] == 'boq':
-                extracted_data = self.excel_intelligence.extract_data(file_path, discovery)
                 items = extracted_data.get('items', [])
             else:
                 return {
@@ -375,10 +374,8 @@ class RequestExecutor:
         """فحص اتصال قاعدة البيانات"""
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1")
-            conn.close()
+            with get_pool(self.db_path).read() as conn:
+                conn.execute("SELECT 1")
             return True
         except:
             return False
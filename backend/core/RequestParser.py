@@ -8,6 +8,8 @@ import re
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 
+from .ArabicNormalizer import fold_arabic
+
 
 class RequestParser:
     """محلل الطلبات اللغوية"""
@@ -16,6 +18,12 @@ class RequestParser:
         self.intent_patterns = self._initialize_intent_patterns()
         self.entity_patterns = self._initialize_entity_patterns()
         
+        # أنماط النوايا موحدة ومترجمة مرة واحدة (بدون تشكيل/اختلاف همزات)
+        self._compiled_intents = {
+            intent_name: [re.compile(fold_arabic(pattern), re.IGNORECASE) for pattern in patterns]
+            for intent_name, patterns in self.intent_patterns.items()
+        }
+        
         print("✅ RequestParser System Initialized")
     
     def _initialize_intent_patterns(self) -> Dict:
@@ -207,10 +215,11 @@ class RequestParser:
         """اكتشاف النية من النص"""
         
         detected_intents = []
+        text = fold_arabic(text)
         
-        for intent_name, patterns in self.intent_patterns.items():
+        for intent_name, patterns in self._compiled_intents.items():
             for pattern in patterns:
-                if re.search(pattern, text, re.IGNORECASE):
+                if pattern.search(text):
                     detected_intents.append(intent_name)
                     break
         
@@ -10,6 +10,8 @@ import sqlite3
 from typing import Dict, List, Tuple, Optional
 import re
 
+from .ArabicNormalizer import NormalizedText, prepare
+
 
 class SBCComplianceChecker:
     """نظام فحص الامتثال لكود البناء السعودي"""
@@ -166,8 +168,11 @@ class SBCComplianceChecker:
             'recommendations': []
         }
         
+        # توحيد الوصف مرة واحدة لكل الفحوصات
+        text = prepare(item.get('description', ''))
+        
         # تحديد نوع البند
-        item_type = self._identify_item_type(item)
+        item_type = self._identify_item_type(item, text)
         
         if category == 'all':
             categories_to_check = self.sbc_rules.keys()
@@ -177,7 +182,7 @@ class SBCComplianceChecker:
         # تنفيذ الفحوصات
         for cat in categories_to_check:
             if cat == item_type or category == 'all':
-                checks = self._run_category_checks(item, cat)
+                checks = self._run_category_checks(item, cat, text)
                 results['checks'].extend(checks)
         
         # تجميع المخالفات والتحذيرات
@@ -195,10 +200,10 @@ class SBCComplianceChecker:
         
         return results
     
-    def _identify_item_type(self, item: Dict) -> str:
+    def _identify_item_type(self, item: Dict, text: Optional[NormalizedText] = None) -> str:
         """تحديد نوع البند"""
         
-        description = item.get('description', '').lower()
+        description = text or prepare(item.get('description', ''))
         
         type_keywords = {
             'structural': ['أساسات', 'أعمدة', 'كمرات', 'بلاطات', 'هيكل'],
@@ -210,17 +215,20 @@ class SBCComplianceChecker:
         }
         
         for item_type, keywords in type_keywords.items():
-            if any(keyword in description for keyword in keywords):
+            if description.contains_any(keywords):
                 return item_type
         
         return 'general'
     
-    def _run_category_checks(self, item: Dict, category: str) -> List[Dict]:
+    def _run_category_checks(self, item: Dict, category: str,
+                             text: Optional[NormalizedText] = None) -> List[Dict]:
         """تنفيذ فحوصات فئة محددة"""
         
         checks = []
         rules = self.sbc_rules.get(category, {})
         description = item.get('description', '').lower()
+        # للكلمات المفتاحية (الاستخراج الرقمي يبقى على النص الأصلي)
+        text = text or prepare(item.get('description', ''))
         
         if category == 'structural':
             # فحص مقاومة الخرسانة
@@ -257,7 +265,7 @@ class SBCComplianceChecker:
                     })
             
             # فحص أبعاد الأعمدة
-            if 'عمود' in description or 'أعمدة' in description:
+            if text.contains('عمود') or text.contains('أعمدة'):
                 dimensions = self._extract_dimensions(description)
                 min_dim = rules['column_min_dimension']['value']
                 
@@ -283,7 +291,7 @@ class SBCComplianceChecker:
         
         elif category == 'concrete':
             # فحص محتوى الأسمنت
-            if 'خرسانة' in description:
+            if text.contains('خرسانة'):
                 checks.append({
                     'rule': 'cement_content',
                     'sbc_code': rules['cement_content_min']['sbc_code'],
@@ -292,7 +300,7 @@ class SBCComplianceChecker:
                 })
             
             # فحص مدة المعالجة
-            if 'صب' in description or 'خرسانة' in description:
+            if text.contains('صب') or text.contains('خرسانة'):
                 checks.append({
                     'rule': 'curing_duration',
                     'sbc_code': rules['curing_duration']['sbc_code'],
@@ -303,8 +311,8 @@ class SBCComplianceChecker:
         elif category == 'masonry':
             # فحص سماكة الجدران
             thickness = self._extract_thickness(description)
-            if thickness and ('جدار' in description or 'بناء' in description):
-                if 'خارجي' in description:
+            if thickness and (text.contains('جدار') or text.contains('بناء')):
+                if text.contains('خارجي'):
                     min_thickness = rules['min_thickness']['exterior']
                 else:
                     min_thickness = rules['min_thickness']['interior']
@@ -416,24 +424,33 @@ class SBCComplianceChecker:
             ملخص نتائج الفحص
         """
         
-        results = []
+        results = [self.check_compliance(item, category) for item in items]
+        return self.summarize_batch(results)
+    
+    @staticmethod
+    def summarize_batch(results: List[Dict]) -> Dict:
+        """
+        ملخص دفعة من نتائج check_compliance (مرور واحد)
+        
+        يُستخدم أيضاً لدمج نتائج دفعات فُحصت بالتوازي
+        """
+        
         total_violations = 0
         total_warnings = 0
-        
-        for item in items:
-            result = self.check_compliance(item, category)
-            results.append(result)
+        compliant_items = 0
+        for result in results:
             total_violations += len(result['violations'])
             total_warnings += len(result['warnings'])
+            if result['compliance_status'] == 'pass':
+                compliant_items += 1
         
         # حساب نسبة الامتثال
-        compliant_items = sum(1 for r in results if r['compliance_status'] == 'pass')
-        compliance_rate = (compliant_items / len(items) * 100) if items else 0
+        compliance_rate = (compliant_items / len(results) * 100) if results else 0
         
         return {
-            'total_items': len(items),
+            'total_items': len(results),
             'compliant_items': compliant_items,
-            'non_compliant_items': len(items) - compliant_items,
+            'non_compliant_items': len(results) - compliant_items,
             'compliance_rate': round(compliance_rate, 2),
             'total_violations': total_violations,
             'total_warnings': total_warnings,
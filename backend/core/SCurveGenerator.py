@@ -13,6 +13,8 @@ from datetime import datetime, timedelta
 import json
 import math
 
+import numpy as np
+
 
 class SCurveGenerator:
     """مولد منحنى S للمشروع"""
@@ -113,12 +115,21 @@ class SCurveGenerator:
         periods = []
         current_date = start_date
         
+        if interval == 'monthly':
+            # فترات شهرية حسب التقويم: كل فترة تنتهي في أول يوم من الشهر التالي
+            while current_date < end_date:
+                period_end = min(self._next_month_start(current_date), end_date)
+                periods.append({
+                    'start': current_date,
+                    'end': period_end
+                })
+                current_date = period_end
+            return periods
+        
         if interval == 'daily':
             delta = timedelta(days=1)
         elif interval == 'weekly':
             delta = timedelta(weeks=1)
-        elif interval == 'monthly':
-            delta = timedelta(days=30)  # تقريبي
         else:
             delta = timedelta(weeks=1)  # افتراضي
         
@@ -132,6 +143,103 @@ class SCurveGenerator:
         
         return periods
     
+    def _next_month_start(self, date: datetime) -> datetime:
+        """أول يوم من الشهر التالي"""
+        
+        if date.month == 12:
+            return date.replace(year=date.year + 1, month=1, day=1)
+        return date.replace(month=date.month + 1, day=1)
+    
+    # ═══════════════════════════════════════════════════════════════
+    # محرك التوزيع الزمني (Vectorized)
+    # التواريخ تُحوّل مرة واحدة إلى أيام int64، ثم يوزع وزن كل نشاط
+    # على أيامه بمصفوفة فروقات (Difference Array) ويُجمّع لكل فترة
+    # ═══════════════════════════════════════════════════════════════
+    
+    def _to_days(self, date: datetime) -> int:
+        """تحويل تاريخ إلى عدد أيام (int64 منذ 1970-01-01)"""
+        
+        return int(np.datetime64(date.strftime('%Y-%m-%d'), 'D').astype(np.int64))
+    
+    def _period_bounds(self, time_periods: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """حدود الفترات كمصفوفات أيام"""
+        
+        starts = np.array([self._to_days(period['start']) for period in time_periods], dtype=np.int64)
+        ends = np.array([self._to_days(period['end']) for period in time_periods], dtype=np.int64)
+        return starts, ends
+    
+    def _distribute_over_periods(
+        self,
+        activities: List[Dict],
+        weights: np.ndarray,
+        time_periods: List[Dict]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        توزيع أوزان الأنشطة (المدة أو التكلفة) على الفترات
+        
+        وزن النشاط في الفترة = (أيام التداخل / مدة النشاط بالأيام) × الوزن
+        
+        Returns:
+            (مجموع الوزن لكل فترة، عدد الأنشطة المتداخلة مع كل فترة)
+        """
+        
+        period_count = len(time_periods)
+        period_sums = np.zeros(period_count, dtype=np.float64)
+        period_counts = np.zeros(period_count, dtype=np.int64)
+        if period_count == 0 or not activities:
+            return period_sums, period_counts
+        
+        period_starts, period_ends = self._period_bounds(time_periods)
+        
+        start_strings = [activity.get('start_date') for activity in activities]
+        finish_strings = [activity.get('finish_date') for activity in activities]
+        dated = np.array(
+            [st is not None and fn is not None for st, fn in zip(start_strings, finish_strings)],
+            dtype=bool
+        )
+        dated_idx = np.flatnonzero(dated)
+        
+        if dated_idx.size:
+            starts = np.array([start_strings[i] for i in dated_idx], dtype='datetime64[D]').astype(np.int64)
+            finishes = np.array([finish_strings[i] for i in dated_idx], dtype='datetime64[D]').astype(np.int64)
+            rates = weights[dated_idx] / np.maximum(1, finishes - starts)
+            
+            # الأنشطة ذات المدة الموجبة فقط تتداخل مع الفترات
+            active = finishes > starts
+            starts, finishes, rates = starts[active], finishes[active], rates[active]
+            
+            if starts.size:
+                origin = int(min(starts.min(), period_starts[0]))
+                horizon = int(max(finishes.max(), period_ends[-1])) - origin + 1
+                
+                # Difference array: +rate عند البداية، -rate عند النهاية
+                daily = np.zeros(horizon + 1, dtype=np.float64)
+                np.add.at(daily, starts - origin, rates)
+                np.add.at(daily, finishes - origin, -rates)
+                daily = np.cumsum(daily)
+                cumulative = np.concatenate(([0.0], np.cumsum(daily)))
+                period_sums += cumulative[period_ends - origin] - cumulative[period_starts - origin]
+                
+                # عدد الأنشطة المتداخلة: الكل - (تبدأ بعد الفترة) - (تنتهي قبلها)
+                sorted_starts = np.sort(starts)
+                sorted_finishes = np.sort(finishes)
+                starts_after = starts.size - np.searchsorted(sorted_starts, period_ends, side='left')
+                finished_before = np.searchsorted(sorted_finishes, period_starts, side='right')
+                period_counts += starts.size - starts_after - finished_before
+        
+        # أنشطة بدون تواريخ: تأخذ حدود الفترة نفسها (نفس السلوك السابق)
+        for i in np.flatnonzero(~dated):
+            start = period_starts if start_strings[i] is None else \
+                np.full(period_count, int(np.datetime64(start_strings[i], 'D').astype(np.int64)))
+            finish = period_ends if finish_strings[i] is None else \
+                np.full(period_count, int(np.datetime64(finish_strings[i], 'D').astype(np.int64)))
+            overlap = np.minimum(finish, period_ends) - np.maximum(start, period_starts)
+            overlap = np.where(overlap > 0, overlap, 0)
+            period_sums += overlap / np.maximum(1, finish - start) * weights[i]
+            period_counts += overlap > 0
+        
+        return period_sums, period_counts
+    
     def _calculate_planned_progress(
         self,
         activities: List[Dict],
@@ -139,48 +247,24 @@ class SCurveGenerator:
     ) -> List[Dict]:
         """حساب التقدم المخطط لكل فترة"""
         
-        total_work = sum(activity.get('duration', 1) for activity in activities)
+        durations = np.array([activity.get('duration', 1) for activity in activities], dtype=np.float64)
+        total_work = float(durations.sum())
+        period_work, activity_counts = self._distribute_over_periods(activities, durations, time_periods)
+        
         progress_data = []
         cumulative_progress = 0.0
         
-        for period in time_periods:
-            period_work = 0
-            activities_in_period = 0
-            
-            for activity in activities:
-                activity_start = datetime.strptime(
-                    activity.get('start_date', period['start'].strftime('%Y-%m-%d')),
-                    '%Y-%m-%d'
-                )
-                activity_finish = datetime.strptime(
-                    activity.get('finish_date', period['end'].strftime('%Y-%m-%d')),
-                    '%Y-%m-%d'
-                )
-                
-                # حساب التداخل بين النشاط والفترة
-                overlap = self._calculate_overlap(
-                    activity_start,
-                    activity_finish,
-                    period['start'],
-                    period['end']
-                )
-                
-                if overlap > 0:
-                    activities_in_period += 1
-                    activity_duration = activity.get('duration', 1)
-                    work_in_period = (overlap / max(1, (activity_finish - activity_start).days)) * activity_duration
-                    period_work += work_in_period
-            
+        for work, count in zip(period_work.tolist(), activity_counts.tolist()):
             # حساب النسبة المئوية
-            period_progress = (period_work / total_work * 100) if total_work > 0 else 0
+            period_progress = (work / total_work * 100) if total_work > 0 else 0
             cumulative_progress += period_progress
             cumulative_progress = min(100, cumulative_progress)  # لا تتجاوز 100%
             
             progress_data.append({
-                'period_work': round(period_work, 2),
+                'period_work': round(work, 2),
                 'period_progress': round(period_progress, 2),
                 'cumulative': round(cumulative_progress, 2),
-                'activities_count': activities_in_period
+                'activities_count': count
             })
         
         return progress_data
@@ -260,42 +344,18 @@ class SCurveGenerator:
         )
         
         # حساب التكلفة الإجمالية
-        total_cost = sum(
-            item_costs.get(activity.get('id'), 0)
-            for activity in activities
+        costs = np.array(
+            [item_costs.get(activity.get('id'), 0) for activity in activities],
+            dtype=np.float64
         )
+        total_cost = float(costs.sum())
         
         # حساب التقدم المالي
-        financial_progress = []
-        cumulative_cost = 0.0
+        period_costs, _ = self._distribute_over_periods(activities, costs, time_periods)
+        cumulative_costs = np.cumsum(period_costs)
         
-        for period in time_periods:
-            period_cost = 0
-            
-            for activity in activities:
-                activity_start = datetime.strptime(
-                    activity.get('start_date', period['start'].strftime('%Y-%m-%d')),
-                    '%Y-%m-%d'
-                )
-                activity_finish = datetime.strptime(
-                    activity.get('finish_date', period['end'].strftime('%Y-%m-%d')),
-                    '%Y-%m-%d'
-                )
-                
-                overlap = self._calculate_overlap(
-                    activity_start,
-                    activity_finish,
-                    period['start'],
-                    period['end']
-                )
-                
-                if overlap > 0:
-                    activity_cost = item_costs.get(activity.get('id'), 0)
-                    activity_duration = max(1, (activity_finish - activity_start).days)
-                    cost_in_period = (overlap / activity_duration) * activity_cost
-                    period_cost += cost_in_period
-            
-            cumulative_cost += period_cost
+        financial_progress = []
+        for period_cost, cumulative_cost in zip(period_costs.tolist(), cumulative_costs.tolist()):
             cumulative_progress = (cumulative_cost / total_cost * 100) if total_cost > 0 else 0
             
             financial_progress.append({
@@ -427,7 +487,8 @@ class SCurveGenerator:
         self,
         schedule: Dict,
         actual_progress: Dict[str, float],
-        costs: Dict[str, float]
+        costs: Dict[str, float],
+        data_date: Optional[str] = None
     ) -> Dict:
         """
         حساب القيمة المكتسبة (Earned Value Management)
@@ -436,21 +497,32 @@ class SCurveGenerator:
             schedule: الجدول الزمني
             actual_progress: التقدم الفعلي {activity_id: progress_percentage}
             costs: التكاليف {activity_id: cost}
+            data_date: تاريخ القياس (YYYY-MM-DD) - عند تحديده تُحسب PV
+                       من التوزيع الزمني للتكلفة حتى هذا التاريخ
             
         Returns:
             تحليل القيمة المكتسبة (EVM)
         """
         
         activities = schedule.get('activities', [])
+        activity_ids = [activity.get('id') for activity in activities]
+        cost_values = np.array([costs.get(aid, 0) for aid in activity_ids], dtype=np.float64)
+        progress_values = np.array([actual_progress.get(aid, 0) for aid in activity_ids], dtype=np.float64)
         
         # Planned Value (PV) - القيمة المخططة
-        pv = sum(costs.get(activity.get('id'), 0) for activity in activities)
+        if data_date and activities:
+            date_range = self._calculate_date_range(schedule)
+            period = {
+                'start': min(date_range['start'], datetime.strptime(data_date, '%Y-%m-%d')),
+                'end': datetime.strptime(data_date, '%Y-%m-%d')
+            }
+            planned, _ = self._distribute_over_periods(activities, cost_values, [period])
+            pv = float(planned[0])
+        else:
+            pv = float(cost_values.sum())
         
         # Earned Value (EV) - القيمة المكتسبة
-        ev = sum(
-            costs.get(activity.get('id'), 0) * actual_progress.get(activity.get('id'), 0) / 100
-            for activity in activities
-        )
+        ev = float(np.dot(cost_values, progress_values) / 100)
         
         # Actual Cost (AC) - التكلفة الفعلية (افتراضياً نفس القيمة المكتسبة)
         ac = ev  # في حالة عدم توفر التكاليف الفعلية
@@ -0,0 +1,322 @@
+"""
+WorkbookCache - كاش المصنفات المحللة حسب بصمة المحتوى
+يحفظ نتيجة الاكتشاف والبنود المستخرجة لكل ملف Excel تحت بصمة SHA-256
+لمحتواه، بحيث لا يُعاد تحليل نفس الملف عند رفعه مرة أخرى (بأي اسم).
+
+التخزين على القرص بصيغة npz مضغوطة:
+- بنود BOQ كأعمدة (Columnar): description, quantity, unit, rate, amount, sheet, row_number
+  - النصوص: بايتات UTF-8 متتالية + إزاحات (بدون عرض ثابت UCS-4)
+  - الأرقام: float64 مع قناع للقيم الصحيحة وقيمها int64 (تعود int كما كانت)
+- نتيجة الاكتشاف وباقي البيانات كـ JSON (التواريخ والأوقات بوسوم صريحة؛
+  البيانات التي لا تعود مطابقة من JSON لا تُخزَّن)
+
+الحجم الكلي محدود (max_bytes) مع إخلاء الأقدم استخداماً (LRU).
+"""
+
+import hashlib
+import json
+import os
+from datetime import date, datetime, time as time_of_day, timedelta
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# تغيير هذا الرقم يبطل الكاش عند تغيير طريقة الاستخراج أو صيغة التخزين
+PARSER_VERSION = 3
+
+BOQ_ITEM_FIELDS = ('row_number', 'description', 'quantity', 'unit', 'rate', 'sheet', 'amount')
+_TEXT_FIELDS = ('description', 'unit', 'sheet')
+_NUMBER_FIELDS = ('row_number', 'quantity', 'rate', 'amount')
+
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# قيم خلايا Excel غير الأصلية في JSON ← {'__type__': ..., 'value': ...}
+_JSON_TYPE = '__type__'
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, (int, np.integer)) and not isinstance(value, bool)
+
+
+def _is_number(value) -> bool:
+    if _is_int(value):
+        return _INT64_MIN <= value <= _INT64_MAX
+    return isinstance(value, (float, np.floating))
+
+
+def _json_default(value):
+    """ترميز صريح للتواريخ والأوقات - أي نوع آخر يمنع التخزين"""
+    if isinstance(value, datetime):
+        return {_JSON_TYPE: 'datetime', 'value': value.isoformat()}
+    if isinstance(value, date):
+        return {_JSON_TYPE: 'date', 'value': value.isoformat()}
+    if isinstance(value, time_of_day):
+        return {_JSON_TYPE: 'time', 'value': value.isoformat()}
+    if isinstance(value, timedelta):
+        return {_JSON_TYPE: 'timedelta', 'value': value.total_seconds()}
+    raise TypeError(f'{type(value).__name__} is not cacheable')
+
+
+def _json_object(obj: Dict):
+    if len(obj) == 2 and _JSON_TYPE in obj and 'value' in obj:
+        kind, value = obj[_JSON_TYPE], obj['value']
+        if kind == 'datetime':
+            return datetime.fromisoformat(value)
+        if kind == 'date':
+            return date.fromisoformat(value)
+        if kind == 'time':
+            return time_of_day.fromisoformat(value)
+        if kind == 'timedelta':
+            return timedelta(seconds=value)
+    return obj
+
+
+class WorkbookCache:
+    """كاش المصنفات المحللة (مفتاحه SHA-256 للمحتوى)"""
+
+    def __init__(self, cache_dir, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: مجلد الكاش
+            max_bytes: الحد الأقصى لحجم الكاش على القرص
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+
+        # digest -> (size, last_used) - يُبنى من محتوى المجلد
+        self._index: Dict[str, Tuple[int, float]] = {}
+        for path in self.cache_dir.glob(f'*.v{PARSER_VERSION}.npz'):
+            stat = path.stat()
+            self._index[path.name.split('.')[0]] = (stat.st_size, stat.st_mtime)
+
+    # ═══════════════════════════════════════════════════════════════
+    # البصمة والمسارات
+    # ═══════════════════════════════════════════════════════════════
+
+    @staticmethod
+    def hash_file(file_path) -> str:
+        """بصمة SHA-256 لمحتوى الملف (قراءة على دفعات)"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as handle:
+            for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def hash_bytes(content: bytes) -> str:
+        """بصمة SHA-256 لمحتوى في الذاكرة"""
+        return hashlib.sha256(content).hexdigest()
+
+    def _path(self, digest: str) -> Path:
+        return self.cache_dir / f'{digest}.v{PARSER_VERSION}.npz'
+
+    # ═══════════════════════════════════════════════════════════════
+    # الترميز (أعمدة npz)
+    # ═══════════════════════════════════════════════════════════════
+
+    @staticmethod
+    def _is_columnar(items: List[Dict]) -> bool:
+        return all(
+            tuple(item.keys()) == BOQ_ITEM_FIELDS
+            and all(isinstance(item[field], str) for field in _TEXT_FIELDS)
+            and all(_is_number(item[field]) for field in _NUMBER_FIELDS)
+            for item in items
+        )
+
+    @staticmethod
+    def _encode_text(arrays: Dict[str, np.ndarray], field: str, values: List[str]):
+        encoded = [value.encode('utf-8') for value in values]
+        arrays[f'{field}.bytes'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        arrays[f'{field}.offsets'] = np.cumsum([0] + [len(value) for value in encoded], dtype=np.int64)
+
+    @staticmethod
+    def _decode_text(arrays, field: str) -> List[str]:
+        content = arrays[f'{field}.bytes'].tobytes()
+        offsets = arrays[f'{field}.offsets'].tolist()
+        return [content[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+
+    @staticmethod
+    def _encode_numbers(arrays: Dict[str, np.ndarray], field: str, values: List):
+        ints = np.array([_is_int(value) for value in values], dtype=bool)
+        arrays[field] = np.array(values, dtype=np.float64)
+        arrays[f'{field}.int_mask'] = ints
+        arrays[f'{field}.ints'] = np.array([value for value in values if _is_int(value)], dtype=np.int64)
+
+    @staticmethod
+    def _decode_numbers(arrays, field: str) -> List:
+        values = arrays[field].tolist()
+        for position, value in zip(np.flatnonzero(arrays[f'{field}.int_mask']).tolist(),
+                                   arrays[f'{field}.ints'].tolist()):
+            values[position] = value
+        return values
+
+    @staticmethod
+    def _encode(discovery: Dict, data: Dict) -> Dict[str, np.ndarray]:
+        arrays = {}
+        meta_data = data
+        items = data.get('items')
+        if data.get('type') == 'boq' and isinstance(items, list) and WorkbookCache._is_columnar(items):
+            meta_data = {key: value for key, value in data.items() if key != 'items'}
+            for field in _NUMBER_FIELDS:
+                WorkbookCache._encode_numbers(arrays, field, [item[field] for item in items])
+            for field in _TEXT_FIELDS:
+                WorkbookCache._encode_text(arrays, field, [item[field] for item in items])
+
+        meta_value = {'discovery': discovery, 'data': meta_data, 'columnar': bool(arrays)}
+        meta = json.dumps(meta_value, ensure_ascii=False, default=_json_default)
+        # الإصابة يجب أن تعيد نفس الاستجابة (لا tuple ← list ولا مفاتيح رقمية ← نصية)
+        if json.loads(meta, object_hook=_json_object) != meta_value:
+            raise ValueError('payload does not round-trip through JSON')
+        arrays['meta'] = np.frombuffer(meta.encode('utf-8'), dtype=np.uint8)
+        return arrays
+
+    @staticmethod
+    def _decode(arrays) -> Tuple[Dict, Dict]:
+        meta = json.loads(arrays['meta'].tobytes().decode('utf-8'), object_hook=_json_object)
+        data = meta['data']
+        if meta['columnar']:
+            columns = {field: WorkbookCache._decode_numbers(arrays, field) for field in _NUMBER_FIELDS}
+            columns.update({field: WorkbookCache._decode_text(arrays, field) for field in _TEXT_FIELDS})
+            data['items'] = [
+                dict(zip(BOQ_ITEM_FIELDS, values))
+                for values in zip(*(columns[field] for field in BOQ_ITEM_FIELDS))
+            ]
+            # الحفاظ على ترتيب المفاتيح الأصلي في الاستجابة
+            data = {'type': data['type'], 'items': data['items'],
+                    **{key: value for key, value in data.items() if key not in ('type', 'items')}}
+        return meta['discovery'], data
+
+    # ═══════════════════════════════════════════════════════════════
+    # القراءة والكتابة
+    # ═══════════════════════════════════════════════════════════════
+
+    def get(self, digest: str) -> Optional[Tuple[Dict, Dict]]:
+        """(discovery, data) من الكاش، أو None"""
+        path = self._path(digest)
+        with self._lock:
+            if digest not in self._index:
+                self._misses += 1
+                return None
+
+        try:
+            with np.load(path, allow_pickle=False) as arrays:
+                result = self._decode(arrays)
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self._index.pop(digest, None)
+                self._misses += 1
+            return None
+
+        now = time.time()
+        with self._lock:
+            self._hits += 1
+            if digest in self._index:
+                self._index[digest] = (self._index[digest][0], now)
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        return result
+
+    def put(self, digest: str, discovery: Dict, data: Dict) -> int:
+        """حفظ نتيجة التحليل (كتابة ذرية) - يعيد الحجم بالبايت"""
+        if discovery.get('file_type') == 'error':
+            return 0
+
+        try:
+            arrays = self._encode(discovery, data)
+        except (TypeError, ValueError):
+            # قيم لا تعود كما هي من الكاش - التحليل يتكرر بدلاً من استجابة مختلفة
+            return 0
+
+        path = self._path(digest)
+        temp_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(temp_path, 'wb') as handle:
+            np.savez_compressed(handle, **arrays)
+        os.replace(temp_path, path)
+        size = path.stat().st_size
+
+        with self._lock:
+            self._index[digest] = (size, time.time())
+            self._stores += 1
+            self._evict()
+        return size
+
+    def _evict(self):
+        """إخلاء الأقدم استخداماً حتى يصبح الحجم ضمن الحد (تحت القفل)"""
+        total = sum(size for size, _ in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for digest, (size, _) in sorted(self._index.items(), key=lambda entry: entry[1][1]):
+            if total <= self.max_bytes:
+                break
+            try:
+                self._path(digest).unlink()
+            except FileNotFoundError:
+                pass
+            del self._index[digest]
+            total -= size
+            self._evictions += 1
+
+    def load(
+        self,
+        file_path: str,
+        excel_intelligence,
+        progress_callback: Optional[Callable[[Dict], None]] = None
+    ) -> Tuple[Dict, Dict]:
+        """
+        اكتشاف + استخراج مع الكاش: عند الإصابة لا يُفتح ملف Excel إطلاقاً
+
+        Returns:
+            (discovery, data) بنفس مخرجات discover_file_type و extract_data
+        """
+        digest = self.hash_file(file_path)
+        cached = self.get(digest)
+        if cached is not None:
+            discovery, data = cached
+            discovery['file_path'] = str(file_path)
+            return discovery, data
+
+        discovery = excel_intelligence.discover_file_type(file_path)
+        if discovery['file_type'] == 'error':
+            return discovery, {}
+        data = excel_intelligence.extract_data(file_path, discovery, progress_callback)
+        self.put(digest, discovery, data)
+        return discovery, data
+
+    def clear(self):
+        """حذف كل الملفات المخزنة"""
+        with self._lock:
+            for digest in list(self._index):
+                try:
+                    self._path(digest).unlink()
+                except FileNotFoundError:
+                    pass
+            self._index.clear()
+
+    def get_stats(self) -> Dict:
+        """إحصائيات الكاش"""
+        with self._lock:
+            total_requests = self._hits + self._misses
+            return {
+                'entries': len(self._index),
+                'size_bytes': sum(size for size, _ in self._index.values()),
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'stores': self._stores,
+                'evictions': self._evictions,
+                'hit_rate': round(self._hits / total_requests * 100, 2) if total_requests else 0
+            }
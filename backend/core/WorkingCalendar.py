@@ -0,0 +1,214 @@
+"""
+WorkingCalendar - تقويم أيام العمل المفهرس
+يحسب مسبقاً فهرساً ترتيبياً لأيام العمل بدلاً من التقدم يوماً بيوم:
+- مصفوفة تراكمية (Prefix Sum) لعدد أيام العمل
+- قائمة بأيام العمل مرتبة (للتحويل من إزاحة إلى تاريخ)
+- العطلات الرسمية وفترات الاستثناء (رمضان، عيد الفطر، عيد الأضحى)
+
+كل التحويلات (إزاحة ↔ تاريخ) تتم بزمن O(1) بعد بناء الفهرس،
+ويتوسع الفهرس تلقائياً عند تجاوز الأفق المحسوب.
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Union
+
+DateLike = Union[date, datetime]
+
+FRIDAY = 4
+
+
+@dataclass
+class CalendarException:
+    """فترة استثناء في التقويم (مثل رمضان أو الأعياد)"""
+    start: date
+    end: date                   # شاملة
+    name: str = ''
+    working: bool = False       # False = عطلة كاملة (العيد)
+    hours_factor: float = 1.0   # معامل ساعات العمل (رمضان مثلاً 0.75)
+
+
+def _to_date(value: Union[DateLike, str]) -> date:
+    if isinstance(value, str):
+        return datetime.strptime(value[:10], '%Y-%m-%d').date()
+    return value.date() if isinstance(value, datetime) else value
+
+
+class WorkingCalendar:
+    """تقويم أيام عمل مع فهرس ترتيبي محسوب مسبقاً"""
+
+    DEFAULT_HORIZON_DAYS = 3 * 365
+
+    def __init__(
+        self,
+        origin: Optional[DateLike] = None,
+        weekend_days: Iterable[int] = (FRIDAY,),
+        holidays: Iterable[DateLike] = (),
+        exceptions: Optional[List[CalendarException]] = None,
+        work_hours_per_day: float = 8.0,
+        horizon_days: int = DEFAULT_HORIZON_DAYS
+    ):
+        """
+        Args:
+            origin: أول يوم في الفهرس (يتوسع للخلف عند الحاجة)
+            weekend_days: أيام العطلة الأسبوعية (datetime.weekday: 0=الاثنين، 4=الجمعة)
+            holidays: العطلات الرسمية
+            exceptions: فترات الاستثناء (رمضان، الأعياد)
+            work_hours_per_day: ساعات العمل اليومية
+            horizon_days: أفق الفهرس المبدئي بالأيام
+        """
+        self.weekend_days = frozenset(weekend_days)
+        if self.weekend_days.issuperset(range(7)):
+            raise ValueError("Calendar has no working days")
+        self.holidays = {_to_date(h).toordinal() for h in holidays}
+        self.exceptions: List[CalendarException] = list(exceptions or [])
+        self.work_hours_per_day = work_hours_per_day
+
+        self._origin = _to_date(origin).toordinal() if origin is not None else None
+        self._horizon = max(int(horizon_days), 1)
+        self._cumulative: List[int] = []
+        self._working_offsets: List[int] = []
+        self._overrides: Dict[int, CalendarException] = {}
+
+        self._index_exceptions()
+        if self._origin is not None:
+            self._build(self._origin, self._horizon)
+
+    # ═══════════════════════════════════════════════════════════════
+    # بناء الفهرس
+    # ═══════════════════════════════════════════════════════════════
+
+    def _index_exceptions(self):
+        self._overrides = {}
+        for exception in self.exceptions:
+            first = _to_date(exception.start).toordinal()
+            last = _to_date(exception.end).toordinal()
+            for ordinal in range(first, last + 1):
+                self._overrides[ordinal] = exception
+
+    def _is_working_ordinal(self, ordinal: int) -> bool:
+        exception = self._overrides.get(ordinal)
+        if exception is not None and not exception.working:
+            return False
+        if ordinal in self.holidays:
+            return False
+        # date.weekday() == (ordinal + 6) % 7
+        return (ordinal + 6) % 7 not in self.weekend_days
+
+    def _build(self, origin: int, horizon: int):
+        """
+        _cumulative[i] = عدد أيام العمل في الفترة (origin, origin + i]
+        _working_offsets[c] = إزاحة يوم العمل رقم c + 1 بعد origin
+        """
+        cumulative = [0] * (horizon + 1)
+        working_offsets: List[int] = []
+        count = 0
+        for offset in range(1, horizon + 1):
+            if self._is_working_ordinal(origin + offset):
+                count += 1
+                working_offsets.append(offset)
+            cumulative[offset] = count
+
+        self._origin = origin
+        self._horizon = horizon
+        self._cumulative = cumulative
+        self._working_offsets = working_offsets
+
+    def _ensure(self, ordinal: int, working_days_after: int = 0):
+        """توسيع الفهرس ليغطي التاريخ وعدد أيام العمل المطلوبة بعده"""
+        if self._origin is None:
+            self._build(ordinal, self._horizon)
+        elif ordinal < self._origin:
+            self._build(ordinal, self._horizon + (self._origin - ordinal))
+
+        while True:
+            offset = ordinal - self._origin
+            if offset <= self._horizon and \
+                    self._cumulative[offset] + working_days_after <= len(self._working_offsets):
+                return
+            self._build(self._origin, self._horizon * 2)
+
+    def invalidate(self):
+        """إعادة بناء الفهرس بعد تعديل العطلات أو الاستثناءات"""
+        self._index_exceptions()
+        if self._origin is not None:
+            self._build(self._origin, self._horizon)
+
+    def add_holiday(self, holiday: DateLike):
+        """إضافة عطلة رسمية"""
+        self.holidays.add(_to_date(holiday).toordinal())
+        self.invalidate()
+
+    def add_exception(self, exception: CalendarException):
+        """إضافة فترة استثناء (رمضان، الأعياد)"""
+        self.exceptions.append(exception)
+        self.invalidate()
+
+    # ═══════════════════════════════════════════════════════════════
+    # الاستعلامات
+    # ═══════════════════════════════════════════════════════════════
+
+    def is_working_day(self, day: DateLike) -> bool:
+        """هل هذا اليوم يوم عمل؟"""
+        return self._is_working_ordinal(_to_date(day).toordinal())
+
+    def working_hours(self, day: DateLike) -> float:
+        """ساعات العمل في يوم معين (مع معامل رمضان)"""
+        ordinal = _to_date(day).toordinal()
+        if not self._is_working_ordinal(ordinal):
+            return 0.0
+        exception = self._overrides.get(ordinal)
+        factor = exception.hours_factor if exception is not None else 1.0
+        return self.work_hours_per_day * factor
+
+    def add_working_days(self, start: DateLike, days: int) -> DateLike:
+        """
+        إضافة أيام عمل إلى تاريخ - O(1)
+        (نفس سلوك التقدم يوماً بيوم: يوم البداية لا يُحسب)
+        """
+        if days <= 0:
+            return start
+        days = int(math.ceil(days))
+        ordinal = _to_date(start).toordinal()
+        self._ensure(ordinal, days)
+        offset = ordinal - self._origin
+        target = self._working_offsets[self._cumulative[offset] + days - 1]
+        return start + timedelta(days=target - offset)
+
+    def next_working_day(self, day: DateLike) -> DateLike:
+        """أول يوم عمل في هذا التاريخ أو بعده"""
+        if self.is_working_day(day):
+            return day
+        return self.add_working_days(day, 1)
+
+    def working_days_between(self, start: DateLike, end: DateLike) -> int:
+        """عدد أيام العمل في الفترة (start, end]"""
+        start_ordinal = _to_date(start).toordinal()
+        end_ordinal = _to_date(end).toordinal()
+        if end_ordinal <= start_ordinal:
+            return 0
+        self._ensure(start_ordinal)
+        self._ensure(end_ordinal)
+        return self._cumulative[end_ordinal - self._origin] - self._cumulative[start_ordinal - self._origin]
+
+    def offset_to_date(self, start: DateLike, offset: int) -> DateLike:
+        """تحويل إزاحة بأيام العمل من تاريخ البداية إلى تاريخ"""
+        return self.add_working_days(start, offset)
+
+    def date_to_offset(self, start: DateLike, day: DateLike) -> int:
+        """تحويل تاريخ إلى إزاحة بأيام العمل من تاريخ البداية"""
+        return self.working_days_between(start, day)
+
+    def dates_for_offsets(self, start: DateLike, count: int) -> List[DateLike]:
+        """تواريخ الإزاحات 0..count-1 دفعة واحدة (للمخططات اليومية)"""
+        if count <= 0:
+            return []
+        ordinal = _to_date(start).toordinal()
+        self._ensure(ordinal, count)
+        base = self._cumulative[ordinal - self._origin]
+        offset = ordinal - self._origin
+        dates = [start]
+        for c in range(base, base + count - 1):
+            dates.append(start + timedelta(days=self._working_offsets[c] - offset))
+        return dates
@@ -14,13 +14,51 @@ Primavera Magic Tools - نظام الأدوات السحرية لـ Primavera P6
 
 import re
 import json
-import sqlite3
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
 from pathlib import Path
 import xml.etree.ElementTree as ET
 
+import pandas as pd
+
+from .ConnectionPool import get_pool
+from .BulkLoader import Column, bulk_load, coerce_rows
+
+
+# الفهارس الثانوية - تُعاد بناؤها بعد الاستيرادات الكبيرة
+ACTIVITY_INDEXES = [
+    ('idx_primavera_activities_project',
+     'CREATE INDEX IF NOT EXISTS idx_primavera_activities_project ON primavera_activities (project_id)'),
+    ('idx_primavera_activities_wbs',
+     'CREATE INDEX IF NOT EXISTS idx_primavera_activities_wbs ON primavera_activities (wbs_id)'),
+]
+WBS_INDEXES = [
+    ('idx_primavera_wbs_project',
+     'CREATE INDEX IF NOT EXISTS idx_primavera_wbs_project ON primavera_wbs (project_id)'),
+]
+RESOURCE_INDEXES = [
+    ('idx_primavera_resources_project',
+     'CREATE INDEX IF NOT EXISTS idx_primavera_resources_project ON primavera_resources (project_id)'),
+]
+
+ACTIVITY_COLUMNS = [
+    Column('activity_id', required=True),
+    Column('project_id', default='DEFAULT_PROJECT'),
+    Column('wbs_id', default='WBS_ROOT'),
+    Column('activity_name'),
+    Column('activity_type', default='Task Dependent'),
+    Column('status', default='Not Started'),
+    Column('original_duration', kind='real', default=0.0),
+    Column('remaining_duration', kind='real', default=0.0),
+    Column('percent_complete', kind='real', default=0.0),
+    Column('planned_start'),
+    Column('planned_finish'),
+    Column('actual_start'),
+    Column('actual_finish'),
+    Column('calendar_id', default='Standard'),
+]
+
 
 # ============================================
 # Data Classes
@@ -111,209 +149,172 @@ class SDKMagicTool:
     
     def _init_database(self):
         """تهيئة قاعدة بيانات Primavera"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # جدول المشاريع
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS primavera_projects (
-                project_id TEXT PRIMARY KEY,
-                project_name TEXT,
-                project_short_name TEXT,
-                project_start_date TEXT,
-                project_finish_date TEXT,
-                status TEXT,
-                created_date TEXT,
-                last_update_date TEXT
-            )
-        """)
+        with get_pool(self.db_path).write() as conn:
+            cursor = conn.cursor()
         
-        # جدول WBS
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS primavera_wbs (
-                wbs_id TEXT PRIMARY KEY,
-                project_id TEXT,
-                wbs_name TEXT,
-                parent_wbs_id TEXT,
-                wbs_short_name TEXT,
-                seq_num INTEGER,
-                level INTEGER,
-                FOREIGN KEY (project_id) REFERENCES primavera_projects(project_id)
-            )
-        """)
-        
-        # جدول الأنشطة
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS primavera_activities (
-                activity_id TEXT PRIMARY KEY,
-                project_id TEXT,
-                wbs_id TEXT,
-                activity_name TEXT,
-                activity_type TEXT,
-                status TEXT,
-                original_duration REAL,
-                remaining_duration REAL,
-                percent_complete REAL,
-                planned_start TEXT,
-                planned_finish TEXT,
-                actual_start TEXT,
-                actual_finish TEXT,
-                calendar_id TEXT,
-                FOREIGN KEY (project_id) REFERENCES primavera_projects(project_id),
-                FOREIGN KEY (wbs_id) REFERENCES primavera_wbs(wbs_id)
-            )
-        """)
-        
-        # جدول الموارد
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS primavera_resources (
-                resource_id TEXT PRIMARY KEY,
-                project_id TEXT,
-                resource_name TEXT,
-                resource_type TEXT,
-                unit_of_measure TEXT,
-                normal_units_per_time REAL,
-                max_units_per_time REAL,
-                unit_price REAL,
-                FOREIGN KEY (project_id) REFERENCES primavera_projects(project_id)
-            )
-        """)
-        
-        # جدول تعيينات الموارد
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS primavera_resource_assignments (
-                assignment_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                activity_id TEXT,
-                resource_id TEXT,
-                budgeted_units REAL,
-                actual_units REAL,
-                remaining_units REAL,
-                budgeted_cost REAL,
-                actual_cost REAL,
-                FOREIGN KEY (activity_id) REFERENCES primavera_activities(activity_id),
-                FOREIGN KEY (resource_id) REFERENCES primavera_resources(resource_id)
-            )
-        """)
-        
-        # جدول العلاقات (Predecessors/Successors)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS primavera_relationships (
-                relationship_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                predecessor_id TEXT,
-                successor_id TEXT,
-                relationship_type TEXT,
-                lag_value REAL,
-                FOREIGN KEY (predecessor_id) REFERENCES primavera_activities(activity_id),
-                FOREIGN KEY (successor_id) REFERENCES primavera_activities(activity_id)
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
+            # جدول المشاريع
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS primavera_projects (
+                    project_id TEXT PRIMARY KEY,
+                    project_name TEXT,
+                    project_short_name TEXT,
+                    project_start_date TEXT,
+                    project_finish_date TEXT,
+                    status TEXT,
+                    created_date TEXT,
+                    last_update_date TEXT
+                )
+            """)
+        
+            # جدول WBS
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS primavera_wbs (
+                    wbs_id TEXT PRIMARY KEY,
+                    project_id TEXT,
+                    wbs_name TEXT,
+                    parent_wbs_id TEXT,
+                    wbs_short_name TEXT,
+                    seq_num INTEGER,
+                    level INTEGER,
+                    FOREIGN KEY (project_id) REFERENCES primavera_projects(project_id)
+                )
+            """)
+        
+            # جدول الأنشطة
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS primavera_activities (
+                    activity_id TEXT PRIMARY KEY,
+                    project_id TEXT,
+                    wbs_id TEXT,
+                    activity_name TEXT,
+                    activity_type TEXT,
+                    status TEXT,
+                    original_duration REAL,
+                    remaining_duration REAL,
+                    percent_complete REAL,
+                    planned_start TEXT,
+                    planned_finish TEXT,
+                    actual_start TEXT,
+                    actual_finish TEXT,
+                    calendar_id TEXT,
+                    FOREIGN KEY (project_id) REFERENCES primavera_projects(project_id),
+                    FOREIGN KEY (wbs_id) REFERENCES primavera_wbs(wbs_id)
+                )
+            """)
+        
+            # جدول الموارد
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS primavera_resources (
+                    resource_id TEXT PRIMARY KEY,
+                    project_id TEXT,
+                    resource_name TEXT,
+                    resource_type TEXT,
+                    unit_of_measure TEXT,
+                    normal_units_per_time REAL,
+                    max_units_per_time REAL,
+                    unit_price REAL,
+                    FOREIGN KEY (project_id) REFERENCES primavera_projects(project_id)
+                )
+            """)
+        
+            # جدول تعيينات الموارد
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS primavera_resource_assignments (
+                    assignment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    activity_id TEXT,
+                    resource_id TEXT,
+                    budgeted_units REAL,
+                    actual_units REAL,
+                    remaining_units REAL,
+                    budgeted_cost REAL,
+                    actual_cost REAL,
+                    FOREIGN KEY (activity_id) REFERENCES primavera_activities(activity_id),
+                    FOREIGN KEY (resource_id) REFERENCES primavera_resources(resource_id)
+                )
+            """)
+        
+            for _, create_sql in ACTIVITY_INDEXES + WBS_INDEXES + RESOURCE_INDEXES:
+                cursor.execute(create_sql)
+        
+            # جدول العلاقات (Predecessors/Successors)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS primavera_relationships (
+                    relationship_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    predecessor_id TEXT,
+                    successor_id TEXT,
+                    relationship_type TEXT,
+                    lag_value REAL,
+                    FOREIGN KEY (predecessor_id) REFERENCES primavera_activities(activity_id),
+                    FOREIGN KEY (successor_id) REFERENCES primavera_activities(activity_id)
+                )
+            """)
     
     def import_activities_from_excel(self, activities_data: List[Dict]) -> Dict:
-        """استيراد الأنشطة من Excel إلى قاعدة البيانات"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        imported_count = 0
-        errors = []
-        
-        for activity in activities_data:
-            try:
-                cursor.execute("""
-                    INSERT OR REPLACE INTO primavera_activities 
-                    (activity_id, project_id, wbs_id, activity_name, activity_type, 
-                     status, original_duration, remaining_duration, percent_complete,
-                     planned_start, planned_finish, actual_start, actual_finish, calendar_id)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    activity.get('activity_id'),
-                    activity.get('project_id', 'DEFAULT_PROJECT'),
-                    activity.get('wbs_id', 'WBS_ROOT'),
-                    activity.get('activity_name'),
-                    activity.get('activity_type', 'Task Dependent'),
-                    activity.get('status', 'Not Started'),
-                    float(activity.get('original_duration', 0)),
-                    float(activity.get('remaining_duration', 0)),
-                    float(activity.get('percent_complete', 0)),
-                    activity.get('planned_start'),
-                    activity.get('planned_finish'),
-                    activity.get('actual_start'),
-                    activity.get('actual_finish'),
-                    activity.get('calendar_id', 'Standard')
-                ))
-                imported_count += 1
-            except Exception as e:
-                errors.append({
-                    'activity_id': activity.get('activity_id'),
-                    'error': str(e)
-                })
-        
-        conn.commit()
-        conn.close()
+        """استيراد الأنشطة من Excel إلى قاعدة البيانات (استيراد مجمّع)"""
+        report = bulk_load(
+            self.db_path, 'primavera_activities', ACTIVITY_COLUMNS, activities_data,
+            indexes=ACTIVITY_INDEXES
+        )
         
         return {
             'success': True,
-            'imported_count': imported_count,
+            'imported_count': report.loaded,
             'total_count': len(activities_data),
-            'errors': errors
+            'errors': [
+                {'activity_id': activities_data[e['row']].get('activity_id'), **e}
+                for e in report.errors
+            ],
+            'rows_per_second': round(report.rows_per_second),
+            'duration_seconds': round(report.seconds, 3)
         }
     
     def export_activities_to_excel(self, project_id: str = None) -> List[Dict]:
         """تصدير الأنشطة إلى Excel"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with get_pool(self.db_path).read() as conn:
+            cursor = conn.cursor()
         
-        if project_id:
-            cursor.execute("""
-                SELECT * FROM primavera_activities WHERE project_id = ?
-            """, (project_id,))
-        else:
-            cursor.execute("SELECT * FROM primavera_activities")
+            if project_id:
+                cursor.execute("""
+                    SELECT * FROM primavera_activities WHERE project_id = ?
+                """, (project_id,))
+            else:
+                cursor.execute("SELECT * FROM primavera_activities")
         
-        columns = [desc[0] for desc in cursor.description]
-        activities = []
+            columns = [desc[0] for desc in cursor.description]
+            activities = []
         
-        for row in cursor.fetchall():
-            activity = dict(zip(columns, row))
-            activities.append(activity)
+            for row in cursor.fetchall():
+                activity = dict(zip(columns, row))
+                activities.append(activity)
         
-        conn.close()
         return activities
     
     def create_project(self, project_data: Dict) -> Dict:
         """إنشاء مشروع جديد"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute("""
-                INSERT INTO primavera_projects 
-                (project_id, project_name, project_short_name, project_start_date,
-                 project_finish_date, status, created_date, last_update_date)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                project_data['project_id'],
-                project_data['project_name'],
-                project_data.get('project_short_name', project_data['project_id']),
-                project_data.get('project_start_date'),
-                project_data.get('project_finish_date'),
-                project_data.get('status', 'Active'),
-                datetime.now().isoformat(),
-                datetime.now().isoformat()
-            ))
-            
-            conn.commit()
-            conn.close()
-            
+            with get_pool(self.db_path).write() as conn:
+                conn.execute("""
+                    INSERT INTO primavera_projects
+                    (project_id, project_name, project_short_name, project_start_date,
+                     project_finish_date, status, created_date, last_update_date)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    project_data['project_id'],
+                    project_data['project_name'],
+                    project_data.get('project_short_name', project_data['project_id']),
+                    project_data.get('project_start_date'),
+                    project_data.get('project_finish_date'),
+                    project_data.get('status', 'Active'),
+                    datetime.now().isoformat(),
+                    datetime.now().isoformat()
+                ))
+
             return {
                 'success': True,
                 'project_id': project_data['project_id'],
                 'message': 'تم إنشاء المشروع بنجاح'
             }
         except Exception as e:
-            conn.close()
             return {
                 'success': False,
                 'error': str(e)
@@ -555,23 +556,18 @@ class SQLMagicTool:
     
     def execute_query(self, query: str, params: Tuple = None) -> Dict:
         """تنفيذ استعلام SQL"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        pool = get_pool(self.db_path)
+
         try:
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            
             # Check if it's a SELECT query
             if query.strip().upper().startswith('SELECT'):
-                columns = [desc[0] for desc in cursor.description]
-                results = []
-                for row in cursor.fetchall():
-                    results.append(dict(zip(columns, row)))
-                
-                conn.close()
+                with pool.read() as conn:
+                    cursor = conn.execute(query, params or ())
+                    columns = [desc[0] for desc in cursor.description]
+                    results = []
+                    for row in cursor.fetchall():
+                        results.append(dict(zip(columns, row)))
+
                 return {
                     'success': True,
                     'query_type': 'SELECT',
@@ -581,18 +577,16 @@ class SQLMagicTool:
                 }
             else:
                 # INSERT, UPDATE, DELETE
-                conn.commit()
-                rows_affected = cursor.rowcount
-                conn.close()
-                
+                with pool.write() as conn:
+                    rows_affected = conn.execute(query, params or ()).rowcount
+
                 return {
                     'success': True,
                     'query_type': 'MODIFY',
                     'rows_affected': rows_affected
                 }
-        
+
         except Exception as e:
-            conn.close()
             return {
                 'success': False,
                 'error': str(e)
@@ -640,63 +634,55 @@ class WBSMagicTool:
         self.db_path = db_path
     
     def create_wbs_from_excel(self, wbs_data: List[Dict], project_id: str) -> Dict:
-        """إنشاء WBS من Excel"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        created_count = 0
-        errors = []
-        
-        for wbs in wbs_data:
-            try:
-                cursor.execute("""
-                    INSERT OR REPLACE INTO primavera_wbs 
-                    (wbs_id, project_id, wbs_name, parent_wbs_id, wbs_short_name, seq_num, level)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    wbs['wbs_id'],
-                    project_id,
-                    wbs['wbs_name'],
-                    wbs.get('parent_wbs_id'),
-                    wbs.get('wbs_short_name', wbs['wbs_id']),
-                    wbs.get('seq_num', created_count + 1),
-                    wbs.get('level', 1)
-                ))
-                created_count += 1
-            except Exception as e:
-                errors.append({
-                    'wbs_id': wbs.get('wbs_id'),
-                    'error': str(e)
-                })
-        
-        conn.commit()
-        conn.close()
+        """إنشاء WBS من Excel (استيراد مجمّع)"""
+        columns = [
+            Column('wbs_id', required=True),
+            Column('project_id'),
+            Column('wbs_name', required=True),
+            Column('parent_wbs_id'),
+            Column('wbs_short_name'),
+            Column('seq_num', kind='int'),
+            Column('level', kind='int', default=1),
+        ]
+        frame, errors = coerce_rows(wbs_data, columns)
+        frame['project_id'] = project_id
+        frame['wbs_short_name'] = frame['wbs_short_name'].fillna(frame['wbs_id'])
+        # الترقيم الافتراضي حسب ترتيب العناصر الصالحة
+        frame['seq_num'] = frame['seq_num'].fillna(
+            pd.Series(range(1, len(frame) + 1), index=frame.index, dtype='Int64')
+        )
+        
+        report = bulk_load(
+            self.db_path, 'primavera_wbs', columns, wbs_data,
+            indexes=WBS_INDEXES, frame=frame, errors=errors
+        )
         
         return {
             'success': True,
-            'created_count': created_count,
-            'errors': errors
+            'created_count': report.loaded,
+            'errors': [{'wbs_id': wbs_data[e['row']].get('wbs_id'), **e} for e in report.errors],
+            'rows_per_second': round(report.rows_per_second),
+            'duration_seconds': round(report.seconds, 3)
         }
     
     def get_wbs_hierarchy(self, project_id: str) -> List[Dict]:
         """الحصول على هيكل WBS الكامل"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with get_pool(self.db_path).read() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT * FROM primavera_wbs 
-            WHERE project_id = ?
-            ORDER BY level, seq_num
-        """, (project_id,))
+            cursor.execute("""
+                SELECT * FROM primavera_wbs 
+                WHERE project_id = ?
+                ORDER BY level, seq_num
+            """, (project_id,))
         
-        columns = [desc[0] for desc in cursor.description]
-        wbs_list = []
+            columns = [desc[0] for desc in cursor.description]
+            wbs_list = []
         
-        for row in cursor.fetchall():
-            wbs = dict(zip(columns, row))
-            wbs_list.append(wbs)
+            for row in cursor.fetchall():
+                wbs = dict(zip(columns, row))
+                wbs_list.append(wbs)
         
-        conn.close()
         return wbs_list
     
     def auto_number_wbs(self, project_id: str) -> Dict:
@@ -766,31 +752,29 @@ class RSCMagicTool:
     
     def get_resource_loading(self, project_id: str, start_date: str, end_date: str) -> Dict:
         """حساب تحميل الموارد"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get all resource assignments
-        cursor.execute("""
-            SELECT 
-                ra.resource_id,
-                r.resource_name,
-                r.resource_type,
-                SUM(ra.budgeted_units) as total_units,
-                SUM(ra.budgeted_cost) as total_cost,
-                COUNT(ra.activity_id) as activity_count
-            FROM primavera_resource_assignments ra
-            JOIN primavera_resources r ON ra.resource_id = r.resource_id
-            WHERE r.project_id = ?
-            GROUP BY ra.resource_id
-        """, (project_id,))
+        with get_pool(self.db_path).read() as conn:
+            cursor = conn.cursor()
         
-        columns = [desc[0] for desc in cursor.description]
-        loading_data = []
+            # Get all resource assignments
+            cursor.execute("""
+                SELECT 
+                    ra.resource_id,
+                    r.resource_name,
+                    r.resource_type,
+                    SUM(ra.budgeted_units) as total_units,
+                    SUM(ra.budgeted_cost) as total_cost,
+                    COUNT(ra.activity_id) as activity_count
+                FROM primavera_resource_assignments ra
+                JOIN primavera_resources r ON ra.resource_id = r.resource_id
+                WHERE r.project_id = ?
+                GROUP BY ra.resource_id
+            """, (project_id,))
         
-        for row in cursor.fetchall():
-            loading_data.append(dict(zip(columns, row)))
+            columns = [desc[0] for desc in cursor.description]
+            loading_data = []
         
-        conn.close()
+            for row in cursor.fetchall():
+                loading_data.append(dict(zip(columns, row)))
         
         return {
             'success': True,
@@ -800,31 +784,29 @@ class RSCMagicTool:
     
     def create_resource_histogram(self, resource_id: str) -> Dict:
         """إنشاء Histogram للمورد"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get resource assignments over time
-        cursor.execute("""
-            SELECT 
-                a.activity_id,
-                a.activity_name,
-                a.planned_start,
-                a.planned_finish,
-                ra.budgeted_units,
-                ra.budgeted_cost
-            FROM primavera_resource_assignments ra
-            JOIN primavera_activities a ON ra.activity_id = a.activity_id
-            WHERE ra.resource_id = ?
-            ORDER BY a.planned_start
-        """, (resource_id,))
-        
-        columns = [desc[0] for desc in cursor.description]
-        assignments = []
+        with get_pool(self.db_path).read() as conn:
+            cursor = conn.cursor()
         
-        for row in cursor.fetchall():
-            assignments.append(dict(zip(columns, row)))
-        
-        conn.close()
+            # Get resource assignments over time
+            cursor.execute("""
+                SELECT 
+                    a.activity_id,
+                    a.activity_name,
+                    a.planned_start,
+                    a.planned_finish,
+                    ra.budgeted_units,
+                    ra.budgeted_cost
+                FROM primavera_resource_assignments ra
+                JOIN primavera_activities a ON ra.activity_id = a.activity_id
+                WHERE ra.resource_id = ?
+                ORDER BY a.planned_start
+            """, (resource_id,))
+        
+            columns = [desc[0] for desc in cursor.description]
+            assignments = []
+        
+            for row in cursor.fetchall():
+                assignments.append(dict(zip(columns, row)))
         
         # Build histogram data
         histogram = {
@@ -859,77 +841,64 @@ class BOQMagicTool:
         self.db_path = db_path
     
     def import_boq_as_resources(self, boq_items: List[Dict], project_id: str) -> Dict:
-        """استيراد BOQ كموارد في Primavera"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        imported_count = 0
-        errors = []
-        
-        for item in boq_items:
-            try:
-                resource_id = f"BOQ_{item.get('item_id', imported_count+1)}"
-                
-                cursor.execute("""
-                    INSERT OR REPLACE INTO primavera_resources 
-                    (resource_id, project_id, resource_name, resource_type, 
-                     unit_of_measure, unit_price)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    resource_id,
-                    project_id,
-                    item.get('description', ''),
-                    'Material',
-                    item.get('unit', 'LS'),
-                    float(item.get('rate', 0))
-                ))
-                
-                imported_count += 1
-            except Exception as e:
-                errors.append({
-                    'item': item.get('description'),
-                    'error': str(e)
-                })
-        
-        conn.commit()
-        conn.close()
+        """استيراد BOQ كموارد في Primavera (استيراد مجمّع)"""
+        columns = [
+            Column('resource_id', source='item_id'),
+            Column('project_id'),
+            Column('resource_name', source='description', default=''),
+            Column('resource_type'),
+            Column('unit_of_measure', source='unit', default='LS'),
+            Column('unit_price', source='rate', kind='real', default=0.0),
+        ]
+        frame, errors = coerce_rows(boq_items, columns)
+        # البنود بدون رقم تأخذ ترتيبها بين البنود الصالحة
+        sequence = pd.Series(range(1, len(frame) + 1), index=frame.index)
+        frame['resource_id'] = 'BOQ_' + frame['resource_id'].where(
+            frame['resource_id'].notna(), sequence
+        ).astype(str)
+        frame['project_id'] = project_id
+        frame['resource_type'] = 'Material'
+        
+        report = bulk_load(
+            self.db_path, 'primavera_resources', columns, boq_items,
+            indexes=RESOURCE_INDEXES, frame=frame, errors=errors
+        )
         
         return {
             'success': True,
-            'imported_count': imported_count,
-            'errors': errors
+            'imported_count': report.loaded,
+            'errors': [{'item': boq_items[e['row']].get('description'), **e} for e in report.errors],
+            'rows_per_second': round(report.rows_per_second),
+            'duration_seconds': round(report.seconds, 3)
         }
     
     def link_boq_to_activities(self, boq_links: List[Dict]) -> Dict:
         """ربط بنود BOQ بالأنشطة"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        linked_count = 0
-        errors = []
-        
-        for link in boq_links:
-            try:
-                cursor.execute("""
-                    INSERT INTO primavera_resource_assignments 
-                    (activity_id, resource_id, budgeted_units, budgeted_cost)
-                    VALUES (?, ?, ?, ?)
-                """, (
-                    link['activity_id'],
-                    f"BOQ_{link['boq_item_id']}",
-                    float(link.get('quantity', 0)),
-                    float(link.get('cost', 0))
-                ))
+        with get_pool(self.db_path).write() as conn:
+            cursor = conn.cursor()
+        
+            linked_count = 0
+            errors = []
+        
+            for link in boq_links:
+                try:
+                    cursor.execute("""
+                        INSERT INTO primavera_resource_assignments 
+                        (activity_id, resource_id, budgeted_units, budgeted_cost)
+                        VALUES (?, ?, ?, ?)
+                    """, (
+                        link['activity_id'],
+                        f"BOQ_{link['boq_item_id']}",
+                        float(link.get('quantity', 0)),
+                        float(link.get('cost', 0))
+                    ))
                 
-                linked_count += 1
-            except Exception as e:
-                errors.append({
-                    'activity_id': link.get('activity_id'),
-                    'error': str(e)
-                })
-        
-        conn.commit()
-        conn.close()
+                    linked_count += 1
+                except Exception as e:
+                    errors.append({
+                        'activity_id': link.get('activity_id'),
+                        'error': str(e)
+                    })
         
         return {
             'success': True,
@@ -939,31 +908,29 @@ class BOQMagicTool:
     
     def generate_boq_cost_report(self, project_id: str) -> Dict:
         """توليد تقرير تكاليف BOQ"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                r.resource_id,
-                r.resource_name,
-                r.unit_price,
-                SUM(ra.budgeted_units) as total_quantity,
-                SUM(ra.budgeted_cost) as total_cost,
-                SUM(ra.actual_units) as actual_quantity,
-                SUM(ra.actual_cost) as actual_cost
-            FROM primavera_resources r
-            LEFT JOIN primavera_resource_assignments ra ON r.resource_id = ra.resource_id
-            WHERE r.project_id = ? AND r.resource_id LIKE 'BOQ_%'
-            GROUP BY r.resource_id
-        """, (project_id,))
+        with get_pool(self.db_path).read() as conn:
+            cursor = conn.cursor()
         
-        columns = [desc[0] for desc in cursor.description]
-        report_data = []
+            cursor.execute("""
+                SELECT 
+                    r.resource_id,
+                    r.resource_name,
+                    r.unit_price,
+                    SUM(ra.budgeted_units) as total_quantity,
+                    SUM(ra.budgeted_cost) as total_cost,
+                    SUM(ra.actual_units) as actual_quantity,
+                    SUM(ra.actual_cost) as actual_cost
+                FROM primavera_resources r
+                LEFT JOIN primavera_resource_assignments ra ON r.resource_id = ra.resource_id
+                WHERE r.project_id = ? AND r.resource_id LIKE 'BOQ_%'
+                GROUP BY r.resource_id
+            """, (project_id,))
         
-        for row in cursor.fetchall():
-            report_data.append(dict(zip(columns, row)))
+            columns = [desc[0] for desc in cursor.description]
+            report_data = []
         
-        conn.close()
+            for row in cursor.fetchall():
+                report_data.append(dict(zip(columns, row)))
         
         # Calculate totals
         total_budgeted = sum(item['total_cost'] for item in report_data)
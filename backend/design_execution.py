@@ -20,6 +20,8 @@ from datetime import datetime, timedelta
 from enum import Enum
 from collections import defaultdict
 
+from repository import IndexedRepository, RecordStore
+
 
 # ==================== Design Models ====================
 
@@ -69,8 +71,8 @@ class DesignPackage:
     drawings_count: int
     specifications_count: int
     created_date: datetime
-    submitted_date: Optional[datetime]
-    approved_date: Optional[datetime]
+    submitted_date: Optional[datetime] = None
+    approved_date: Optional[datetime] = None
     revision: str = "A"
     comments: List[str] = field(default_factory=list)
 
@@ -92,8 +94,8 @@ class DesignModification:
     schedule_impact_days: Optional[int]
     status: str  # proposed, approved, rejected, implemented
     created_date: datetime
-    approved_date: Optional[datetime]
-    implemented_date: Optional[datetime]
+    approved_date: Optional[datetime] = None
+    implemented_date: Optional[datetime] = None
 
 
 @dataclass
@@ -141,13 +143,27 @@ class DesignExecutionManager:
     ====================
     
     يدير دورة حياة التصميم والتنسيق مع التنفيذ
+    
+    السجلات مفهرسة حسب المشروع والحالة، ويمكن حفظها دائماً عبر RecordStore
     """
     
-    def __init__(self):
-        self.design_packages: List[DesignPackage] = []
-        self.design_modifications: List[DesignModification] = []
-        self.compliance_checks: List[ComplianceCheck] = []
-        self.ve_proposals: List[ValueEngineeringProposal] = []
+    def __init__(self, store: Optional[RecordStore] = None):
+        self.design_packages = IndexedRepository(
+            "design_packages", DesignPackage, id_field="package_id",
+            indexes=("project_id", "status", "discipline"), store=store
+        )
+        self.design_modifications = IndexedRepository(
+            "design_modifications", DesignModification, id_field="modification_id",
+            indexes=("project_id", "status"), store=store
+        )
+        self.compliance_checks = IndexedRepository(
+            "compliance_checks", ComplianceCheck, id_field="check_id",
+            indexes=("project_id", "compliance_level"), store=store
+        )
+        self.ve_proposals = IndexedRepository(
+            "ve_proposals", ValueEngineeringProposal, id_field="proposal_id",
+            indexes=("project_id", "status"), store=store
+        )
     
     # ==================== Design Package Management ====================
     
@@ -172,7 +188,7 @@ class DesignExecutionManager:
         )
         
         package = DesignPackage(
-            package_id=len(self.design_packages) + 1,
+            package_id=self.design_packages.next_id(),
             package_number=package_number,
             project_id=project_id,
             phase=DesignPhase(package_data.get("phase", "schematic")),
@@ -189,18 +205,14 @@ class DesignExecutionManager:
             created_date=datetime.now()
         )
         
-        self.design_packages.append(package)
+        self.design_packages.add(package)
         return package
     
     def _generate_package_number(self, project_id: int, discipline: str) -> str:
         """توليد رقم حزمة فريد"""
         year = datetime.now().year
         discipline_code = discipline[:3].upper()
-        project_packages = [
-            p for p in self.design_packages
-            if p.project_id == project_id and p.discipline == discipline
-        ]
-        sequence = len(project_packages) + 1
+        sequence = self.design_packages.count(project_id=project_id, discipline=discipline) + 1
         return f"DP-P{project_id:03d}-{discipline_code}-{year}-{sequence:03d}"
     
     def submit_for_review(self, package_id: int) -> Dict:
@@ -213,7 +225,7 @@ class DesignExecutionManager:
         Returns:
             تأكيد التقديم
         """
-        package = next((p for p in self.design_packages if p.package_id == package_id), None)
+        package = self.design_packages.get(package_id)
         
         if not package:
             return {"success": False, "error": "Package not found"}
@@ -223,6 +235,7 @@ class DesignExecutionManager:
         
         package.status = DesignStatus.UNDER_REVIEW
         package.submitted_date = datetime.now()
+        self.design_packages.save(package)
         
         return {
             "success": True,
@@ -248,7 +261,7 @@ class DesignExecutionManager:
         Returns:
             نتيجة المراجعة
         """
-        package = next((p for p in self.design_packages if p.package_id == package_id), None)
+        package = self.design_packages.get(package_id)
         
         if not package:
             return {"success": False, "error": "Package not found"}
@@ -259,6 +272,7 @@ class DesignExecutionManager:
         
         if status in [DesignStatus.APPROVED, DesignStatus.APPROVED_WITH_COMMENTS]:
             package.approved_date = datetime.now()
+        self.design_packages.save(package)
         
         return {
             "success": True,
@@ -287,7 +301,7 @@ class DesignExecutionManager:
         modification_number = self._generate_modification_number(project_id)
         
         modification = DesignModification(
-            modification_id=len(self.design_modifications) + 1,
+            modification_id=self.design_modifications.next_id(),
             modification_number=modification_number,
             project_id=project_id,
             package_id=modification_data["package_id"],
@@ -303,14 +317,13 @@ class DesignExecutionManager:
             created_date=datetime.now()
         )
         
-        self.design_modifications.append(modification)
+        self.design_modifications.add(modification)
         return modification
     
     def _generate_modification_number(self, project_id: int) -> str:
         """توليد رقم تعديل فريد"""
         year = datetime.now().year
-        project_mods = [m for m in self.design_modifications if m.project_id == project_id]
-        sequence = len(project_mods) + 1
+        sequence = self.design_modifications.count(project_id=project_id) + 1
         return f"DM-P{project_id:03d}-{year}-{sequence:04d}"
     
     def approve_modification(self, modification_id: int, approver_id: int) -> Dict:
@@ -324,16 +337,14 @@ class DesignExecutionManager:
         Returns:
             تأكيد الموافقة
         """
-        modification = next(
-            (m for m in self.design_modifications if m.modification_id == modification_id),
-            None
-        )
+        modification = self.design_modifications.get(modification_id)
         
         if not modification:
             return {"success": False, "error": "Modification not found"}
         
         modification.status = "approved"
         modification.approved_date = datetime.now()
+        self.design_modifications.save(modification)
         
         return {
             "success": True,
@@ -353,10 +364,7 @@ class DesignExecutionManager:
         Returns:
             تأكيد التطبيق
         """
-        modification = next(
-            (m for m in self.design_modifications if m.modification_id == modification_id),
-            None
-        )
+        modification = self.design_modifications.get(modification_id)
         
         if not modification:
             return {"success": False, "error": "Modification not found"}
@@ -366,6 +374,7 @@ class DesignExecutionManager:
         
         modification.status = "implemented"
         modification.implemented_date = datetime.now()
+        self.design_modifications.save(modification)
         
         return {
             "success": True,
@@ -392,7 +401,7 @@ class DesignExecutionManager:
             نتيجة الفحص
         """
         check = ComplianceCheck(
-            check_id=len(self.compliance_checks) + 1,
+            check_id=self.compliance_checks.next_id(),
             project_id=project_id,
             location=check_data["location"],
             drawing_reference=check_data["drawing_reference"],
@@ -407,7 +416,7 @@ class DesignExecutionManager:
             corrective_actions=check_data.get("corrective_actions", [])
         )
         
-        self.compliance_checks.append(check)
+        self.compliance_checks.add(check)
         return check
     
     def get_compliance_report(self, project_id: int) -> Dict:
@@ -417,7 +426,7 @@ class DesignExecutionManager:
         Returns:
             تقرير توافق شامل
         """
-        project_checks = [c for c in self.compliance_checks if c.project_id == project_id]
+        project_checks = self.compliance_checks.find(project_id=project_id)
         
         if not project_checks:
             return {"error": "No compliance checks found"}
@@ -474,7 +483,7 @@ class DesignExecutionManager:
             مقترح هندسة القيمة
         """
         proposal = ValueEngineeringProposal(
-            proposal_id=len(self.ve_proposals) + 1,
+            proposal_id=self.ve_proposals.next_id(),
             project_id=project_id,
             title=proposal_data["title"],
             description=proposal_data["description"],
@@ -490,7 +499,7 @@ class DesignExecutionManager:
             submitted_date=datetime.now()
         )
         
-        self.ve_proposals.append(proposal)
+        self.ve_proposals.add(proposal)
         return proposal
     
     def get_ve_summary(self, project_id: int) -> Dict:
@@ -500,7 +509,7 @@ class DesignExecutionManager:
         Returns:
             ملخص VE
         """
-        project_proposals = [p for p in self.ve_proposals if p.project_id == project_id]
+        project_proposals = self.ve_proposals.find(project_id=project_id)
         
         if not project_proposals:
             return {"error": "No VE proposals found"}
@@ -546,8 +555,8 @@ class DesignExecutionManager:
         Returns:
             لوحة تحكم شاملة
         """
-        project_packages = [p for p in self.design_packages if p.project_id == project_id]
-        project_modifications = [m for m in self.design_modifications if m.project_id == project_id]
+        project_packages = self.design_packages.find(project_id=project_id)
+        project_modifications = self.design_modifications.find(project_id=project_id)
         
         # إحصائيات الحزم
         status_counts = defaultdict(int)
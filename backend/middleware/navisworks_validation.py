@@ -6,6 +6,8 @@ from functools import wraps
 from flask import request, jsonify
 from typing import Dict, Any, List, Optional
 
+from services.navisworks_geometry import check_geometries
+
 
 def validate_bounding_box(bbox: Dict[str, Any]) -> tuple[bool, Optional[str]]:
     """Validate bounding box data"""
@@ -73,8 +75,25 @@ def validate_geometry(geometry: Dict[str, Any]) -> tuple[bool, Optional[str]]:
     return True, None
 
 
-def validate_element(element: Dict[str, Any]) -> tuple[bool, Optional[str]]:
-    """Validate single element data"""
+def validate_geometries(geometries: List[Dict[str, Any]]) -> tuple[bool, Optional[str], Optional[int]]:
+    """
+    Validate many geometries with vectorized NumPy checks
+    
+    Also checks finite vertices and index ranges.  Returns the position of
+    the first invalid geometry.
+    """
+    errors = check_geometries(geometries)
+    if errors:
+        position, error = errors[0]
+        return False, error, position
+    return True, None, None
+
+
+def _validate_element_fields(element: Dict[str, Any]) -> tuple[bool, Optional[str]]:
+    """Validate element data other than geometry"""
+    if not isinstance(element, dict):
+        return False, "Element must be an object"
+    
     # Required fields
     required_fields = ['id', 'name', 'category', 'path']
     for field in required_fields:
@@ -87,20 +106,49 @@ def validate_element(element: Dict[str, Any]) -> tuple[bool, Optional[str]]:
         if not valid:
             return False, f"Element bounding box invalid: {error}"
     
+    # Validate properties (must be dict)
+    if 'properties' in element:
+        if not isinstance(element['properties'], dict):
+            return False, "Element properties must be an object"
+    
+    return True, None
+
+
+def validate_element(element: Dict[str, Any]) -> tuple[bool, Optional[str]]:
+    """Validate single element data"""
+    valid, error = _validate_element_fields(element)
+    if not valid:
+        return False, error
+    
     # Validate geometry if present
     if 'geometry' in element and element['geometry']:
         valid, error = validate_geometry(element['geometry'])
         if not valid:
             return False, f"Element geometry invalid: {error}"
     
-    # Validate properties (must be dict)
-    if 'properties' in element:
-        if not isinstance(element['properties'], dict):
-            return False, "Element properties must be an object"
-    
     return True, None
 
 
+def validate_elements(elements: List[Dict[str, Any]]) -> tuple[bool, Optional[str], Optional[int]]:
+    """
+    Validate every element of a model
+    
+    Field checks run per element; all geometries are then validated in
+    one vectorized pass.  Returns the index of the first invalid element.
+    """
+    for i, element in enumerate(elements):
+        valid, error = _validate_element_fields(element)
+        if not valid:
+            return False, error, i
+    
+    positions = [i for i, element in enumerate(elements) if element.get('geometry')]
+    valid, error, position = validate_geometries([elements[i]['geometry'] for i in positions])
+    if not valid:
+        return False, f"Element geometry invalid: {error}", positions[position]
+    
+    return True, None, None
+
+
 def validate_model_import():
     """
     Decorator to validate model import request
@@ -153,20 +201,18 @@ def validate_model_import():
                     'code': 'EMPTY_ELEMENTS'
                 }), 400
             
-            # Validate each element (sample validation for first 10)
-            for i, element in enumerate(elements[:10]):
-                valid, error = validate_element(element)
-                if not valid:
-                    return jsonify({
-                        'success': False,
-                        'error': f'Element {i} validation failed: {error}',
-                        'code': 'INVALID_ELEMENT',
-                        'elementIndex': i
-                    }), 400
+            # Validate every element (geometry in one vectorized pass)
+            valid, error, i = validate_elements(elements)
+            if not valid:
+                return jsonify({
+                    'success': False,
+                    'error': f'Element {i} validation failed: {error}',
+                    'code': 'INVALID_ELEMENT',
+                    'elementIndex': i
+                }), 400
             
-            # Check file size (approximate)
-            import json
-            data_size = len(json.dumps(data).encode('utf-8'))
+            # Check request size (from the body already received)
+            data_size = request.content_length or len(request.get_data())
             max_size = 100 * 1024 * 1024  # 100 MB
             
             if data_size > max_size:
@@ -0,0 +1,45 @@
+"""Add stored_records for the procurement, RFI, subcontractor and design managers
+
+Revision ID: b7d41e2a9c03
+Revises: 6570c26c87be
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d41e2a9c03'
+down_revision: Union[str, None] = '6570c26c87be'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('stored_records',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('collection', sa.String(length=50), nullable=False),
+    sa.Column('record_id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('collection', 'record_id', name='uq_stored_records_collection_record')
+    )
+    op.create_index(op.f('ix_stored_records_collection'), 'stored_records', ['collection'], unique=False)
+    op.create_index(op.f('ix_stored_records_id'), 'stored_records', ['id'], unique=False)
+    op.create_index(op.f('ix_stored_records_project_id'), 'stored_records', ['project_id'], unique=False)
+    op.create_index(op.f('ix_stored_records_status'), 'stored_records', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_stored_records_status'), table_name='stored_records')
+    op.drop_index(op.f('ix_stored_records_project_id'), table_name='stored_records')
+    op.drop_index(op.f('ix_stored_records_id'), table_name='stored_records')
+    op.drop_index(op.f('ix_stored_records_collection'), table_name='stored_records')
+    op.drop_table('stored_records')
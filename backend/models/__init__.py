@@ -19,6 +19,7 @@ Models:
     - Role: User roles and permissions
     - SBCCompliance: Saudi Building Code compliance
     - AuditLog: System audit trail
+    - StoredRecord: Persistent records of the ERP managers
 
 Author: NOUFAL Engineering Team
 Date: 2025-11-06
@@ -45,6 +46,7 @@ from .user import User
 from .role import Role
 from .sbc_compliance import SBCCompliance
 from .audit import AuditLog
+from .record import StoredRecord
 
 # Export all models
 __all__ = [
@@ -63,4 +65,5 @@ __all__ = [
     'Role',
     'SBCCompliance',
     'AuditLog',
+    'StoredRecord',
 ]
@@ -0,0 +1,32 @@
+"""
+StoredRecord Model - Persistent rows for the in-memory ERP managers.
+
+Procurement, RFI, subcontractor and design records are kept as JSON
+payloads keyed by (collection, record_id), with project_id and status
+promoted to indexed columns for filtering in SQL.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, JSON, UniqueConstraint
+from sqlalchemy.sql import func
+from .base import Base
+
+
+class StoredRecord(Base):
+    __tablename__ = 'stored_records'
+    __table_args__ = (
+        UniqueConstraint('collection', 'record_id', name='uq_stored_records_collection_record'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    collection = Column(String(50), nullable=False, index=True)
+    record_id = Column(Integer, nullable=False)
+    project_id = Column(Integer, nullable=True, index=True)
+    status = Column(String(50), nullable=True, index=True)
+
+    payload = Column(JSON, nullable=False)
+
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<StoredRecord(collection='{self.collection}', record_id={self.record_id})>"
@@ -6,6 +6,7 @@ RESTful APIs for all 7 Magic Tools
 
 from flask import Blueprint, request, jsonify
 from pathlib import Path
+import os
 import sys
 
 # Add parent directory to path
@@ -26,7 +27,7 @@ from core.primavera_magic_tools import (
 primavera_magic_api = Blueprint('primavera_magic_api', __name__)
 
 # Database path
-DB_PATH = str(Path(__file__).parent / 'database' / 'primavera_magic.db')
+DB_PATH = os.getenv('PRIMAVERA_DATABASE_PATH', str(Path(__file__).parent / 'database' / 'primavera_magic.db'))
 
 # Initialize manager
 magic_tools = PrimaveraMagicToolsManager(DB_PATH)
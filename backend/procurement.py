@@ -17,6 +17,8 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import logging
 
+from repository import IndexedRepository, RecordStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -146,11 +148,11 @@ class PurchaseOrder:
     """Purchase Order - أمر شراء"""
     id: int
     po_number: str                     # PO-2025-001
-    pr_id: Optional[int] = None        # Link to Purchase Request
     project_id: int
     project_name: str
     supplier_id: int
     supplier_name: str
+    pr_id: Optional[int] = None        # Link to Purchase Request
     order_date: datetime = field(default_factory=datetime.now)
     delivery_date: datetime = field(default_factory=lambda: datetime.now() + timedelta(days=30))
     items: List[PurchaseOrderItem] = field(default_factory=list)
@@ -198,14 +200,33 @@ class ProcurementManager:
     """
     Procurement Management System
     نظام إدارة المشتريات
+    
+    Records live in indexed repositories (by id, project, status and
+    supplier), optionally persisted through a RecordStore.
     """
     
-    def __init__(self):
-        self.purchase_requests: List[PurchaseRequest] = []
-        self.purchase_orders: List[PurchaseOrder] = []
-        self.suppliers: List[Supplier] = []
-        self.delivery_notes: List[DeliveryNote] = []
-        self.materials: List[Material] = []
+    def __init__(self, store: Optional[RecordStore] = None):
+        self.purchase_requests = IndexedRepository(
+            "purchase_requests", PurchaseRequest, indexes=("project_id", "status"), store=store
+        )
+        self.purchase_orders = IndexedRepository(
+            "purchase_orders", PurchaseOrder, indexes=("project_id", "status", "supplier_id"), store=store
+        )
+        self.suppliers = IndexedRepository(
+            "suppliers", Supplier, indexes=("category", "is_active"), store=store
+        )
+        self.delivery_notes = IndexedRepository(
+            "delivery_notes", DeliveryNote, indexes=("project_id", "supplier_id", "po_id"), store=store
+        )
+        self.materials = IndexedRepository(
+            "materials", Material, indexes=("category", "supplier_id"), store=store
+        )
+        
+        # عدادات مجمعة لتقرير أداء الموردين
+        self._on_time_deliveries: Dict[int, int] = {}
+        for dn in self.delivery_notes:
+            self._count_delivery(dn)
+        
         logger.info("ProcurementManager initialized")
     
     # ========== Purchase Request Management ==========
@@ -225,7 +246,7 @@ class ProcurementManager:
         pr_number = self._generate_pr_number()
         
         pr = PurchaseRequest(
-            id=len(self.purchase_requests) + 1,
+            id=self.purchase_requests.next_id(),
             pr_number=pr_number,
             project_id=project_id,
             project_name=f"Project {project_id}",  # Get from DB
@@ -239,7 +260,7 @@ class ProcurementManager:
             total_estimated_cost=sum(item.estimated_price * item.quantity for item in items)
         )
         
-        self.purchase_requests.append(pr)
+        self.purchase_requests.add(pr)
         logger.info(f"Created Purchase Request: {pr_number}")
         
         return pr
@@ -262,6 +283,7 @@ class ProcurementManager:
         pr.approved_by_id = approved_by_id
         pr.approved_date = datetime.now()
         pr.updated_at = datetime.now()
+        self.purchase_requests.save(pr)
         
         logger.info(f"Approved Purchase Request: {pr.pr_number}")
         return True
@@ -276,6 +298,7 @@ class ProcurementManager:
         pr.status = PRStatus.REJECTED
         pr.rejection_reason = reason
         pr.updated_at = datetime.now()
+        self.purchase_requests.save(pr)
         
         logger.info(f"Rejected Purchase Request: {pr.pr_number}")
         return True
@@ -307,7 +330,7 @@ class ProcurementManager:
             item.remaining_quantity = item.quantity
         
         po = PurchaseOrder(
-            id=len(self.purchase_orders) + 1,
+            id=self.purchase_orders.next_id(),
             po_number=po_number,
             pr_id=pr_id,
             project_id=project_id,
@@ -322,7 +345,7 @@ class ProcurementManager:
             payment_terms=payment_terms
         )
         
-        self.purchase_orders.append(po)
+        self.purchase_orders.add(po)
         
         # Update PR status if linked
         if pr_id:
@@ -330,6 +353,7 @@ class ProcurementManager:
             if pr:
                 pr.status = PRStatus.CONVERTED_TO_PO
                 pr.updated_at = datetime.now()
+                self.purchase_requests.save(pr)
         
         logger.info(f"Created Purchase Order: {po_number}")
         return po
@@ -347,6 +371,7 @@ class ProcurementManager:
         po.status = POStatus.SENT_TO_SUPPLIER
         po.sent_date = datetime.now()
         po.updated_at = datetime.now()
+        self.purchase_orders.save(po)
         
         logger.info(f"Sent Purchase Order to supplier: {po.po_number}")
         return True
@@ -364,6 +389,7 @@ class ProcurementManager:
         po.status = POStatus.CONFIRMED
         po.confirmed_date = datetime.now()
         po.updated_at = datetime.now()
+        self.purchase_orders.save(po)
         
         logger.info(f"Confirmed Purchase Order: {po.po_number}")
         return True
@@ -391,15 +417,18 @@ class ProcurementManager:
         dn_number = self._generate_dn_number()
         
         # Update PO items with delivered quantities
+        po_items = {}
+        for po_item in po.items:
+            po_items.setdefault(po_item.material_id, []).append(po_item)
+        
         for delivered_item in delivered_items:
             material_id = delivered_item['material_id']
             delivered_qty = delivered_item['quantity']
             
             # Find corresponding PO item
-            for po_item in po.items:
-                if po_item.material_id == material_id:
-                    po_item.delivered_quantity += delivered_qty
-                    po_item.remaining_quantity = po_item.quantity - po_item.delivered_quantity
+            for po_item in po_items.get(material_id, []):
+                po_item.delivered_quantity += delivered_qty
+                po_item.remaining_quantity = po_item.quantity - po_item.delivered_quantity
         
         # Update PO status
         all_delivered = all(item.remaining_quantity <= 0 for item in po.items)
@@ -411,10 +440,11 @@ class ProcurementManager:
             po.status = POStatus.PARTIAL_DELIVERY
         
         po.updated_at = datetime.now()
+        self.purchase_orders.save(po)
         
         # Create delivery note
         dn = DeliveryNote(
-            id=len(self.delivery_notes) + 1,
+            id=self.delivery_notes.next_id(),
             dn_number=dn_number,
             po_id=po_id,
             po_number=po.po_number,
@@ -431,7 +461,8 @@ class ProcurementManager:
             is_complete=all_delivered
         )
         
-        self.delivery_notes.append(dn)
+        self.delivery_notes.add(dn)
+        self._count_delivery(dn)
         
         logger.info(f"Recorded Delivery: {dn_number} for PO: {po.po_number}")
         return dn
@@ -440,7 +471,7 @@ class ProcurementManager:
     
     def add_supplier(self, supplier: Supplier) -> Supplier:
         """Add new supplier"""
-        self.suppliers.append(supplier)
+        self.suppliers.add(supplier)
         logger.info(f"Added supplier: {supplier.name_en}")
         return supplier
     
@@ -452,6 +483,7 @@ class ProcurementManager:
             return False
         
         supplier.rating = min(5.0, max(0.0, rating))
+        self.suppliers.save(supplier)
         logger.info(f"Updated supplier {supplier.name_en} rating to {rating}")
         return True
     
@@ -472,6 +504,7 @@ class ProcurementManager:
         else:
             return False
         
+        self.suppliers.save(supplier)
         logger.info(f"Updated supplier {supplier.name_en} balance: {supplier.current_balance}")
         return True
     
@@ -489,11 +522,8 @@ class ProcurementManager:
             MaterialStatus.DELIVERED: [],
         }
         
-        # Collect all PRs
-        for pr in self.purchase_requests:
-            if project_id and pr.project_id != project_id:
-                continue
-            
+        # Collect the project's PRs from the project index
+        for pr in self.purchase_requests.find(project_id=project_id or None):
             for item in pr.items:
                 report[item.status].append({
                     "pr_number": pr.pr_number,
@@ -526,23 +556,21 @@ class ProcurementManager:
         report = []
         
         for supplier in self.suppliers:
-            # Count POs
-            supplier_pos = [po for po in self.purchase_orders if po.supplier_id == supplier.id]
-            
-            # Count deliveries
-            supplier_deliveries = [dn for dn in self.delivery_notes if dn.supplier_id == supplier.id]
+            # Counts come straight from the supplier indexes
+            total_orders = self.purchase_orders.count(supplier_id=supplier.id)
+            total_deliveries = self.delivery_notes.count(supplier_id=supplier.id)
             
-            # Calculate on-time delivery rate
-            on_time = sum(1 for dn in supplier_deliveries if dn.delivery_date <= dn.delivery_date)  # TODO: Compare with PO date
-            on_time_rate = (on_time / len(supplier_deliveries) * 100) if supplier_deliveries else 0
+            # On-time delivery rate (delivered no later than the PO delivery date)
+            on_time = self._on_time_deliveries.get(supplier.id, 0)
+            on_time_rate = (on_time / total_deliveries * 100) if total_deliveries else 0
             
             report.append({
                 "supplier_id": supplier.id,
                 "supplier_name": supplier.name_en,
                 "category": supplier.category,
                 "rating": supplier.rating,
-                "total_orders": len(supplier_pos),
-                "total_deliveries": len(supplier_deliveries),
+                "total_orders": total_orders,
+                "total_deliveries": total_deliveries,
                 "on_time_delivery_rate": round(on_time_rate, 2),
                 "current_balance": supplier.current_balance,
                 "is_active": supplier.is_active
@@ -557,24 +585,25 @@ class ProcurementManager:
         """
         pending = []
         
-        for po in self.purchase_orders:
-            if po.status in [POStatus.CONFIRMED, POStatus.PARTIAL_DELIVERY]:
-                if project_id and po.project_id != project_id:
-                    continue
-                
-                for item in po.items:
-                    if item.remaining_quantity > 0:
-                        pending.append({
-                            "po_number": po.po_number,
-                            "supplier": po.supplier_name,
-                            "material": item.material_name,
-                            "ordered_quantity": item.quantity,
-                            "delivered_quantity": item.delivered_quantity,
-                            "remaining_quantity": item.remaining_quantity,
-                            "unit": item.unit,
-                            "expected_delivery_date": po.delivery_date.isoformat(),
-                            "days_until_delivery": (po.delivery_date - datetime.now()).days
-                        })
+        open_orders = (
+            self.purchase_orders.find(status=POStatus.CONFIRMED, project_id=project_id or None)
+            + self.purchase_orders.find(status=POStatus.PARTIAL_DELIVERY, project_id=project_id or None)
+        )
+        
+        for po in open_orders:
+            for item in po.items:
+                if item.remaining_quantity > 0:
+                    pending.append({
+                        "po_number": po.po_number,
+                        "supplier": po.supplier_name,
+                        "material": item.material_name,
+                        "ordered_quantity": item.quantity,
+                        "delivered_quantity": item.delivered_quantity,
+                        "remaining_quantity": item.remaining_quantity,
+                        "unit": item.unit,
+                        "expected_delivery_date": po.delivery_date.isoformat(),
+                        "days_until_delivery": (po.delivery_date - datetime.now()).days
+                    })
         
         return sorted(pending, key=lambda x: x['days_until_delivery'])
     
@@ -600,15 +629,21 @@ class ProcurementManager:
     
     def _get_pr_by_id(self, pr_id: int) -> Optional[PurchaseRequest]:
         """Get purchase request by ID"""
-        return next((pr for pr in self.purchase_requests if pr.id == pr_id), None)
+        return self.purchase_requests.get(pr_id)
     
     def _get_po_by_id(self, po_id: int) -> Optional[PurchaseOrder]:
         """Get purchase order by ID"""
-        return next((po for po in self.purchase_orders if po.id == po_id), None)
+        return self.purchase_orders.get(po_id)
     
     def _get_supplier_by_id(self, supplier_id: int) -> Optional[Supplier]:
         """Get supplier by ID"""
-        return next((s for s in self.suppliers if s.id == supplier_id), None)
+        return self.suppliers.get(supplier_id)
+    
+    def _count_delivery(self, dn: DeliveryNote) -> None:
+        """Update the on-time delivery counter of the supplier"""
+        po = self._get_po_by_id(dn.po_id)
+        if po and dn.delivery_date <= po.delivery_date:
+            self._on_time_deliveries[dn.supplier_id] = self._on_time_deliveries.get(dn.supplier_id, 0) + 1
     
     def _get_supplier_name(self, supplier_id: int) -> str:
         """Get supplier name"""
@@ -617,9 +652,9 @@ class ProcurementManager:
 
 
 # Flask integration
-def init_procurement(app):
+def init_procurement(app, store: Optional[RecordStore] = None):
     """Initialize procurement module for Flask app"""
-    pm = ProcurementManager()
+    pm = ProcurementManager(store)
     app.config['PROCUREMENT_MANAGER'] = pm
     
     @app.route('/api/procurement/pr/create', methods=['POST'])
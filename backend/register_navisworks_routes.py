@@ -17,11 +17,20 @@ def register_navisworks_routes(app):
     app.register_blueprint(navisworks_bp)
     print("✅ Navisworks API routes registered")
     print("   - POST   /api/projects/:projectId/navisworks/import")
+    print("   - POST   /api/projects/:projectId/navisworks/imports")
+    print("   - GET    /api/projects/:projectId/navisworks/imports/:importId")
+    print("   - DELETE /api/projects/:projectId/navisworks/imports/:importId")
+    print("   - POST   /api/projects/:projectId/navisworks/imports/:importId/elements?sequence=N")
+    print("   - POST   /api/projects/:projectId/navisworks/imports/:importId/commit")
     print("   - GET    /api/projects/:projectId/navisworks/models")
     print("   - GET    /api/projects/:projectId/navisworks/models/:modelId")
     print("   - DELETE /api/projects/:projectId/navisworks/models/:modelId")
     print("   - GET    /api/projects/:projectId/navisworks/models/:modelId/elements")
     print("   - GET    /api/projects/:projectId/navisworks/models/:modelId/elements/:elementId")
+    print("   - GET    /api/projects/:projectId/navisworks/models/:modelId/geometry")
+    print("   - GET    /api/projects/:projectId/navisworks/models/:modelId/elements/:elementId/geometry")
+    print("   - GET    /api/projects/:projectId/navisworks/models/:modelId/spatial/range")
+    print("   - GET    /api/projects/:projectId/navisworks/models/:modelId/spatial/clashes")
     print("   - GET    /api/projects/:projectId/navisworks/models/:modelId/categories")
     print("   - GET    /api/projects/:projectId/navisworks/models/:modelId/statistics")
     print("   - GET    /api/projects/:projectId/navisworks/health")
@@ -0,0 +1,310 @@
+"""
+NOUFAL ERP - Indexed Record Repository
+مستودع السجلات المفهرسة
+
+Shared storage layer for the procurement, RFI, subcontractor and design
+managers:
+- Primary index by record id (O(1) lookups)
+- Secondary indexes (project_id, status, supplier_id, ...) with maintained counts
+- Optional persistence through the StoredRecord SQLAlchemy model (SQLite/PostgreSQL)
+"""
+
+import dataclasses
+import typing
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# ========== Serialization ==========
+
+def encode_record(value: Any) -> Any:
+    """Convert a dataclass record to JSON-compatible values - تحويل السجل إلى JSON"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {f.name: encode_record(getattr(value, f.name)) for f in dataclasses.fields(value)}
+    if isinstance(value, (list, tuple)):
+        return [encode_record(item) for item in value]
+    if isinstance(value, dict):
+        return {key: encode_record(item) for key, item in value.items()}
+    return value
+
+
+def decode_record(record_type: Any, value: Any) -> Any:
+    """Rebuild a value of the annotated type from JSON - استرجاع السجل من JSON"""
+    if value is None:
+        return None
+
+    origin = typing.get_origin(record_type)
+    if origin is typing.Union:
+        for arg in typing.get_args(record_type):
+            if arg is not type(None):
+                return decode_record(arg, value)
+        return value
+    if origin in (list, List):
+        args = typing.get_args(record_type)
+        return [decode_record(args[0], item) for item in value] if args else list(value)
+
+    if isinstance(record_type, type):
+        if issubclass(record_type, Enum):
+            return record_type(value)
+        if issubclass(record_type, datetime):
+            return datetime.fromisoformat(value)
+        if dataclasses.is_dataclass(record_type):
+            hints = typing.get_type_hints(record_type)
+            return record_type(**{
+                f.name: decode_record(hints[f.name], value[f.name])
+                for f in dataclasses.fields(record_type)
+                if f.name in value
+            })
+    return value
+
+
+# ========== Persistence ==========
+
+class RecordStore:
+    """
+    SQLAlchemy-backed persistence for repositories
+    تخزين دائم للسجلات عبر SQLAlchemy
+    """
+
+    def __init__(self, session_factory=None, database_url: Optional[str] = None):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+
+        try:
+            from backend.models.record import StoredRecord
+        except ImportError:
+            from models.record import StoredRecord
+
+        self._model = StoredRecord
+
+        if database_url:
+            engine = create_engine(database_url)
+            session_factory = sessionmaker(bind=engine)
+        elif session_factory is None:
+            try:
+                from backend.database import SessionLocal
+            except ImportError:
+                from database import SessionLocal
+            session_factory = SessionLocal
+
+        self._session_factory = session_factory
+
+        session = self._session_factory()
+        try:
+            StoredRecord.__table__.create(bind=session.get_bind(), checkfirst=True)
+        finally:
+            session.close()
+
+    def save(self, collection: str, record_id: int, record: Any,
+             project_id: Optional[int] = None, status: Optional[str] = None) -> None:
+        """Insert or update one record - حفظ سجل"""
+        session = self._session_factory()
+        try:
+            row = session.query(self._model).filter_by(
+                collection=collection, record_id=record_id
+            ).one_or_none()
+            if row is None:
+                row = self._model(collection=collection, record_id=record_id)
+                session.add(row)
+            row.project_id = project_id
+            row.status = status
+            row.payload = encode_record(record)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def load(self, collection: str, record_type: type) -> List[Any]:
+        """Load all records of a collection in id order - تحميل السجلات"""
+        session = self._session_factory()
+        try:
+            rows = (
+                session.query(self._model.payload)
+                .filter_by(collection=collection)
+                .order_by(self._model.record_id)
+                .all()
+            )
+            return [decode_record(record_type, row.payload) for row in rows]
+        finally:
+            session.close()
+
+
+# ========== Indexed Repository ==========
+
+class IndexedRepository:
+    """
+    In-memory repository with id and secondary indexes
+    مستودع مفهرس بالمعرّف والحقول الثانوية
+
+    Records are plain dataclasses.  Managers mutate them in place and call
+    save() so the secondary indexes, counts and the store stay in sync.
+    """
+
+    def __init__(
+        self,
+        collection: str,
+        record_type: type,
+        id_field: str = "id",
+        indexes: Sequence[str] = (),
+        store: Optional[RecordStore] = None
+    ):
+        self.collection = collection
+        self.record_type = record_type
+        self.id_field = id_field
+        self.index_fields = tuple(indexes)
+        self.store = store
+
+        self._records: Dict[Any, Any] = {}
+        self._order: Dict[Any, int] = {}
+        self._keys: Dict[Any, tuple] = {}
+        self._indexes: Dict[str, Dict[Any, Dict[Any, Any]]] = {name: {} for name in self.index_fields}
+        self._sequence = 0
+        self._max_id = 0
+
+        if store is not None:
+            for record in store.load(collection, record_type):
+                self._insert(record)
+            if self._records:
+                logger.info(f"Loaded {len(self._records)} {collection} records")
+
+    # ----- Write path -----
+
+    def add(self, record: Any) -> Any:
+        """Add a new record - إضافة سجل"""
+        record_id = getattr(record, self.id_field)
+        if record_id in self._records:
+            raise ValueError(f"{self.collection} record {record_id} already exists")
+        self._insert(record)
+        self._persist(record)
+        return record
+
+    def save(self, record: Any) -> Any:
+        """Re-index and persist a record changed in place - حفظ التعديلات"""
+        record_id = getattr(record, self.id_field)
+        if record_id not in self._records:
+            return self.add(record)
+
+        old_keys = self._keys[record_id]
+        new_keys = self._index_keys(record)
+        for name, old, new in zip(self.index_fields, old_keys, new_keys):
+            if old != new:
+                self._unlink(name, old, record_id)
+                self._indexes[name].setdefault(new, {})[record_id] = record
+        self._keys[record_id] = new_keys
+        self._records[record_id] = record
+        self._persist(record)
+        return record
+
+    def next_id(self) -> int:
+        """Next free integer id - المعرّف التالي"""
+        return self._max_id + 1
+
+    # ----- Read path -----
+
+    def get(self, record_id: Any) -> Optional[Any]:
+        """O(1) lookup by id - بحث بالمعرّف"""
+        return self._records.get(record_id)
+
+    def find(self, **criteria) -> List[Any]:
+        """
+        Records matching all criteria, in insertion order
+        السجلات المطابقة للشروط
+
+        None criteria are ignored.  The smallest matching index bucket is
+        scanned, so the cost follows the result size, not the collection.
+        """
+        criteria = {name: value for name, value in criteria.items() if value is not None}
+        candidates = self._candidates(criteria)
+        if candidates is None:
+            matched = list(self._records.values())
+        else:
+            matched = [
+                record for record in candidates.values()
+                if all(getattr(record, name) == value for name, value in criteria.items())
+            ]
+            matched.sort(key=lambda record: self._order[getattr(record, self.id_field)])
+        return matched
+
+    def count(self, **criteria) -> int:
+        """Number of matching records - عدد السجلات المطابقة"""
+        criteria = {name: value for name, value in criteria.items() if value is not None}
+        if not criteria:
+            return len(self._records)
+        if len(criteria) == 1:
+            (name, value), = criteria.items()
+            if name in self._indexes:
+                return len(self._indexes[name].get(value, ()))
+        return len(self.find(**criteria))
+
+    def counts(self, field_name: str) -> Dict[Any, int]:
+        """Maintained record counts per value of an indexed field - الأعداد حسب الحقل"""
+        return {key: len(bucket) for key, bucket in self._indexes[field_name].items() if bucket}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(list(self._records.values()))
+
+    def __contains__(self, record_id: Any) -> bool:
+        return record_id in self._records
+
+    # ----- Internals -----
+
+    def _insert(self, record: Any) -> None:
+        record_id = getattr(record, self.id_field)
+        keys = self._index_keys(record)
+        self._records[record_id] = record
+        self._order[record_id] = self._sequence
+        self._sequence += 1
+        self._keys[record_id] = keys
+        for name, key in zip(self.index_fields, keys):
+            self._indexes[name].setdefault(key, {})[record_id] = record
+        if isinstance(record_id, int) and record_id > self._max_id:
+            self._max_id = record_id
+
+    def _index_keys(self, record: Any) -> tuple:
+        return tuple(getattr(record, name) for name in self.index_fields)
+
+    def _unlink(self, name: str, key: Any, record_id: Any) -> None:
+        bucket = self._indexes[name].get(key)
+        if bucket is not None:
+            bucket.pop(record_id, None)
+            if not bucket:
+                del self._indexes[name][key]
+
+    def _candidates(self, criteria: Dict[str, Any]) -> Optional[Dict[Any, Any]]:
+        buckets = [
+            self._indexes[name].get(value, {})
+            for name, value in criteria.items() if name in self._indexes
+        ]
+        if buckets:
+            return min(buckets, key=len)
+        if criteria:
+            return dict(self._records)
+        return None
+
+    def _persist(self, record: Any) -> None:
+        if self.store is None:
+            return
+        status = getattr(record, "status", None)
+        if isinstance(status, Enum):
+            status = status.value
+        self.store.save(
+            self.collection,
+            getattr(record, self.id_field),
+            record,
+            project_id=getattr(record, "project_id", None),
+            status=status if isinstance(status, str) else None
+        )
+
@@ -19,6 +19,8 @@ from datetime import datetime, timedelta
 from enum import Enum
 from collections import defaultdict
 
+from repository import IndexedRepository, RecordStore
+
 
 # ==================== RFI Models ====================
 
@@ -112,11 +114,19 @@ class RFIManager:
     =============
     
     يدير دورة حياة RFI الكاملة
+    
+    السجلات مفهرسة حسب المشروع والحالة والأولوية والمسؤول،
+    ويمكن حفظها دائماً عبر RecordStore
     """
     
-    def __init__(self):
-        self.rfis: List[RFI] = []
-        self.comments: List[RFIComment] = []
+    def __init__(self, store: Optional[RecordStore] = None):
+        self.rfis = IndexedRepository(
+            "rfis", RFI, id_field="rfi_id",
+            indexes=("project_id", "status", "priority", "assigned_to"), store=store
+        )
+        self.comments = IndexedRepository(
+            "rfi_comments", RFIComment, id_field="comment_id", indexes=("rfi_id",), store=store
+        )
         self.templates: List[RFITemplate] = []
         self._initialize_templates()
     
@@ -181,7 +191,7 @@ class RFIManager:
         required_response_date = datetime.now() + timedelta(days=days_to_respond[priority])
         
         rfi = RFI(
-            rfi_id=len(self.rfis) + 1,
+            rfi_id=self.rfis.next_id(),
             rfi_number=rfi_number,
             project_id=project_id,
             submitted_by=submitted_by,
@@ -200,14 +210,13 @@ class RFIManager:
             affected_activities=rfi_data.get("affected_activities", [])
         )
         
-        self.rfis.append(rfi)
+        self.rfis.add(rfi)
         return rfi
     
     def _generate_rfi_number(self, project_id: int) -> str:
         """توليد رقم RFI فريد"""
         year = datetime.now().year
-        project_rfis = [r for r in self.rfis if r.project_id == project_id]
-        sequence = len(project_rfis) + 1
+        sequence = self.rfis.count(project_id=project_id) + 1
         return f"RFI-P{project_id:03d}-{year}-{sequence:04d}"
     
     def submit_rfi(self, rfi_id: int) -> Dict:
@@ -220,7 +229,7 @@ class RFIManager:
         Returns:
             تأكيد التقديم
         """
-        rfi = next((r for r in self.rfis if r.rfi_id == rfi_id), None)
+        rfi = self.rfis.get(rfi_id)
         
         if not rfi:
             return {"success": False, "error": "RFI not found"}
@@ -233,6 +242,7 @@ class RFIManager:
         
         # تعيين تلقائي للمكتب الفني أو المهندس المسؤول
         rfi.assigned_to = self._auto_assign_rfi(rfi)
+        self.rfis.save(rfi)
         
         return {
             "success": True,
@@ -274,7 +284,7 @@ class RFIManager:
         Returns:
             تأكيد الرد
         """
-        rfi = next((r for r in self.rfis if r.rfi_id == rfi_id), None)
+        rfi = self.rfis.get(rfi_id)
         
         if not rfi:
             return {"success": False, "error": "RFI not found"}
@@ -289,6 +299,7 @@ class RFIManager:
         rfi.response_attachments = response_data.get("attachments", [])
         rfi.requires_drawing_update = response_data.get("requires_drawing_update", False)
         rfi.status = RFIStatus.ANSWERED
+        self.rfis.save(rfi)
         
         # حساب وقت الاستجابة
         response_time = (rfi.response_date - rfi.submitted_date).days
@@ -312,7 +323,7 @@ class RFIManager:
         Returns:
             تأكيد الإغلاق
         """
-        rfi = next((r for r in self.rfis if r.rfi_id == rfi_id), None)
+        rfi = self.rfis.get(rfi_id)
         
         if not rfi:
             return {"success": False, "error": "RFI not found"}
@@ -321,6 +332,7 @@ class RFIManager:
             return {"success": False, "error": "RFI must be answered before closing"}
         
         rfi.status = RFIStatus.CLOSED
+        self.rfis.save(rfi)
         
         return {
             "success": True,
@@ -342,14 +354,14 @@ class RFIManager:
             تأكيد إضافة التعليق
         """
         rfi_comment = RFIComment(
-            comment_id=len(self.comments) + 1,
+            comment_id=self.comments.next_id(),
             rfi_id=rfi_id,
             user_id=user_id,
             user_name=user_name,
             comment=comment
         )
         
-        self.comments.append(rfi_comment)
+        self.comments.add(rfi_comment)
         
         return {
             "success": True,
@@ -364,13 +376,13 @@ class RFIManager:
         Returns:
             تفاصيل RFI الكاملة
         """
-        rfi = next((r for r in self.rfis if r.rfi_id == rfi_id), None)
+        rfi = self.rfis.get(rfi_id)
         
         if not rfi:
             return None
         
         # جلب التعليقات
-        rfi_comments = [c for c in self.comments if c.rfi_id == rfi_id]
+        rfi_comments = self.comments.find(rfi_id=rfi_id)
         
         return {
             "rfi_id": rfi.rfi_id,
@@ -420,19 +432,13 @@ class RFIManager:
         Returns:
             قائمة RFIs
         """
-        filtered = self.rfis
-        
-        if project_id:
-            filtered = [r for r in filtered if r.project_id == project_id]
-        
-        if status:
-            filtered = [r for r in filtered if r.status == status]
-        
-        if priority:
-            filtered = [r for r in filtered if r.priority == priority]
-        
-        if assigned_to:
-            filtered = [r for r in filtered if r.assigned_to == assigned_to]
+        # البحث في أصغر فهرس مطابق بدلاً من مسح كل السجلات
+        filtered = self.rfis.find(
+            project_id=project_id or None,
+            status=status,
+            priority=priority,
+            assigned_to=assigned_to or None
+        )
         
         return [
             {
@@ -457,7 +463,7 @@ class RFIManager:
         Returns:
             إحصائيات وتحليلات RFI
         """
-        project_rfis = [r for r in self.rfis if r.project_id == project_id]
+        project_rfis = self.rfis.find(project_id=project_id)
         
         if not project_rfis:
             return {"error": "No RFIs found for project"}
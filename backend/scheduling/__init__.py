@@ -6,6 +6,7 @@ Modules:
 - wbs_generator: تفكيك المقايسة
 - duration_calculator: حساب المدد
 - cpm_engine: المسار الحرج
+- array_cpm: المسار الحرج على مصفوفات NumPy (للجداول الكبيرة)
 - resource_leveling: توزيع العمالة
 - primavera_exporter: تصدير XER/Excel
 """
@@ -0,0 +1,444 @@
+"""
+محرك المسار الحرج المُصفوفي - Array-backed CPM Engine
+
+بديل لـ CPMEngine للجداول الكبيرة (50k+ نشاط):
+1. تجميع الشبكة مرة واحدة بصيغة CSR (فهارس صحيحة + مصفوفات NumPy)
+2. ترتيب طوبولوجي تكراري حسب المستويات (Kahn) بدون Recursion
+3. المسار الأمامي والخلفي على مستوى المصفوفات لكل مستوى
+4. نفس نتائج ES/EF/LS/LF/TF/FF وتحديد الأنشطة الحرجة
+
+الاستخدام:
+    engine = ArrayCPMEngine.from_cpm_engine(cpm)
+    engine.run()
+    engine.apply_to(cpm)   # كتابة النتائج في ScheduleActivity
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+import sys
+sys.path.append('/home/user/webapp')
+
+from backend.data.activity_breakdown_rules import LogicType
+from backend.scheduling.cpm_engine import CPMEngine, ScheduleActivity
+
+
+# أكواد أنواع الروابط في مصفوفة link_type
+LINK_FS = 0
+LINK_SS = 1
+LINK_FF = 2
+LINK_SF = 3
+
+LOGIC_TYPE_CODES: Dict[LogicType, int] = {
+    LogicType.FS: LINK_FS,
+    LogicType.SS: LINK_SS,
+    LogicType.FF: LINK_FF,
+    LogicType.SF: LINK_SF,
+}
+
+CRITICAL_TOLERANCE = 0.01
+
+
+class CircularDependencyError(ValueError):
+    """حلقة دائرية في الشبكة - cycle يحتوي مسار الحلقة (النشاط الأول مكرر في آخرها)"""
+
+    def __init__(self, message: str, cycle: List[str]):
+        super().__init__(message)
+        self.cycle = cycle
+
+
+@dataclass
+class CompiledNetwork:
+    """شبكة مُجمّعة بصيغة CSR (الروابط مرتبة حسب النشاط السابق)"""
+    activity_ids: List[str]
+    index: Dict[str, int]
+    durations: np.ndarray      # float64[n]
+    succ_indptr: np.ndarray    # int64[n+1]
+    edge_pred: np.ndarray      # int64[m]
+    edge_succ: np.ndarray      # int64[m]
+    edge_lag: np.ndarray       # float64[m]
+    edge_type: np.ndarray      # int8[m]
+
+    @property
+    def activity_count(self) -> int:
+        return len(self.activity_ids)
+
+    @property
+    def link_count(self) -> int:
+        return int(self.edge_pred.shape[0])
+
+
+def build_network(activity_ids: List[str], durations, links) -> CompiledNetwork:
+    """
+    بناء شبكة CSR من قوائم بسيطة (بدون ScheduleActivity)
+
+    Args:
+        activity_ids: معرفات الأنشطة بالترتيب
+        durations: مدة كل نشاط بنفس الترتيب
+        links: (predecessor_id, successor_id, link_type_code, lag) لكل رابط
+
+    Returns:
+        CompiledNetwork
+    """
+    activity_ids = list(activity_ids)
+    index = {aid: i for i, aid in enumerate(activity_ids)}
+    n = len(activity_ids)
+
+    preds: List[int] = []
+    succs: List[int] = []
+    lags: List[float] = []
+    types: List[int] = []
+    for pred_id, succ_id, link_type, lag in links:
+        preds.append(index[pred_id])
+        succs.append(index[succ_id])
+        lags.append(lag)
+        types.append(link_type)
+
+    # CSR: الروابط مرتبة حسب النشاط السابق (مع الحفاظ على ترتيب الإدخال)
+    edge_pred = np.asarray(preds, dtype=np.int64)
+    order = np.argsort(edge_pred, kind='stable')
+    edge_pred = edge_pred[order]
+    counts = np.bincount(edge_pred, minlength=n)
+    succ_indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=succ_indptr[1:])
+
+    return CompiledNetwork(
+        activity_ids=activity_ids,
+        index=index,
+        durations=np.asarray(durations, dtype=np.float64).reshape(n),
+        succ_indptr=succ_indptr,
+        edge_pred=edge_pred,
+        edge_succ=np.asarray(succs, dtype=np.int64)[order],
+        edge_lag=np.asarray(lags, dtype=np.float64)[order],
+        edge_type=np.asarray(types, dtype=np.int8)[order],
+    )
+
+
+def compile_network(activities: Dict[str, ScheduleActivity]) -> CompiledNetwork:
+    """
+    تجميع أنشطة CPMEngine إلى شبكة CSR
+
+    Args:
+        activities: قاموس الأنشطة (activity_id -> ScheduleActivity)
+
+    Returns:
+        CompiledNetwork
+    """
+    return build_network(
+        activities.keys(),
+        [activity.duration for activity in activities.values()],
+        (
+            (aid, succ_id, LOGIC_TYPE_CODES[logic_type], lag)
+            for aid, activity in activities.items()
+            for succ_id, logic_type, lag in activity.successors
+        )
+    )
+
+
+def _gather_csr(indptr: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+    """فهارس الروابط الخارجة من مجموعة أنشطة (بدون حلقات Python)"""
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return offsets + np.arange(total, dtype=np.int64)
+
+
+def find_cycle(network: CompiledNetwork) -> List[str]:
+    """
+    إيجاد حلقة دائرية واحدة بالبحث بالعمق (تكراري، O(V+E))
+
+    Returns:
+        معرفات الحلقة [A, B, ..., A] أو [] إذا كانت الشبكة بلا حلقات
+    """
+    n = network.activity_count
+    indptr = network.succ_indptr.tolist()
+    successors = network.edge_succ.tolist()
+    state = [0] * n  # 0 لم يُزر، 1 في المكدس، 2 انتهى
+
+    for root in range(n):
+        if state[root]:
+            continue
+        state[root] = 1
+        stack = [[root, indptr[root]]]
+        while stack:
+            frame = stack[-1]
+            node, position = frame
+            if position == indptr[node + 1]:
+                state[node] = 2
+                stack.pop()
+                continue
+            frame[1] += 1
+            nxt = successors[position]
+            if state[nxt] == 0:
+                state[nxt] = 1
+                stack.append([nxt, indptr[nxt]])
+            elif state[nxt] == 1:
+                path = [entry[0] for entry in stack]
+                cycle = path[path.index(nxt):] + [nxt]
+                return [network.activity_ids[i] for i in cycle]
+    return []
+
+
+def topological_levels(network: CompiledNetwork) -> np.ndarray:
+    """
+    حساب مستوى كل نشاط (أطول عدد روابط من نشاط بداية) بخوارزمية Kahn
+
+    Raises:
+        CircularDependencyError: عند وجود حلقة دائرية (مع مسار الحلقة)
+    """
+    n = network.activity_count
+    indegree = np.bincount(network.edge_succ, minlength=n).astype(np.int64)
+    level = np.full(n, -1, dtype=np.int64)
+
+    frontier = np.flatnonzero(indegree == 0)
+    if n and frontier.size == 0:
+        cycle = find_cycle(network)
+        raise CircularDependencyError(
+            "No start activities found (all activities have predecessors - circular dependency: "
+            f"{' -> '.join(cycle)})", cycle
+        )
+
+    current = 0
+    processed = 0
+    while frontier.size:
+        level[frontier] = current
+        processed += frontier.size
+        edges = _gather_csr(network.succ_indptr, frontier)
+        targets = network.edge_succ[edges]
+        np.subtract.at(indegree, targets, 1)
+        targets = np.unique(targets)
+        frontier = targets[indegree[targets] == 0]
+        current += 1
+
+    if processed != n:
+        cycle = find_cycle(network)
+        raise CircularDependencyError(f"Circular dependency detected: {' -> '.join(cycle)}", cycle)
+
+    return level
+
+
+class ArrayCPMEngine:
+    """محرك CPM على مصفوفات NumPy (نفس نتائج CPMEngine)"""
+
+    def __init__(self, network: CompiledNetwork, min_early_start: Union[float, np.ndarray, None] = None):
+        """
+        تهيئة المحرك
+
+        Args:
+            network: الشبكة المُجمّعة من compile_network
+            min_early_start: أدنى بداية مبكرة (مثلاً 0 = لا يبدأ نشاط قبل بداية المشروع
+                             مع روابط SS/FF أو فترات سبق سالبة)؛ رقم واحد للكل
+                             أو مصفوفة بحد لكل نشاط (بترتيب network.activity_ids)
+        """
+        self.network = network
+        self.min_early_start = min_early_start
+        n = network.activity_count
+
+        self.early_start = np.zeros(n, dtype=np.float64)
+        self.early_finish = np.zeros(n, dtype=np.float64)
+        self.late_start = np.zeros(n, dtype=np.float64)
+        self.late_finish = np.zeros(n, dtype=np.float64)
+        self.total_float = np.zeros(n, dtype=np.float64)
+        self.free_float = np.zeros(n, dtype=np.float64)
+        self.is_critical = np.zeros(n, dtype=bool)
+        self.project_duration: float = 0.0
+        self.critical_path: List[str] = []
+
+        self._levels: Optional[np.ndarray] = None
+        self._forward_order: Optional[np.ndarray] = None
+        self._forward_bounds: Optional[np.ndarray] = None
+        self._backward_order: Optional[np.ndarray] = None
+        self._backward_bounds: Optional[np.ndarray] = None
+        self._node_order: Optional[np.ndarray] = None
+        self._node_bounds: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_cpm_engine(cls, cpm: CPMEngine) -> "ArrayCPMEngine":
+        """إنشاء المحرك من CPMEngine قائم"""
+        return cls(compile_network(cpm.activities))
+
+    def _prepare_levels(self):
+        """ترتيب الأنشطة والروابط حسب المستوى (مرة واحدة لكل شبكة)"""
+        if self._levels is not None:
+            return
+
+        net = self.network
+        levels = topological_levels(net)
+        level_count = int(levels.max()) + 1 if levels.size else 0
+        boundaries = np.arange(level_count + 1)
+
+        self._node_order = np.argsort(levels, kind='stable')
+        self._node_bounds = np.searchsorted(levels[self._node_order], boundaries)
+
+        succ_levels = levels[net.edge_succ]
+        self._forward_order = np.argsort(succ_levels, kind='stable')
+        self._forward_bounds = np.searchsorted(succ_levels[self._forward_order], boundaries)
+
+        pred_levels = levels[net.edge_pred]
+        self._backward_order = np.argsort(pred_levels, kind='stable')
+        self._backward_bounds = np.searchsorted(pred_levels[self._backward_order], boundaries)
+
+        self._levels = levels
+
+    def forward_pass(self):
+        """
+        المسار الأمامي (Forward Pass)
+        يحسب Early Start و Early Finish لكل مستوى دفعة واحدة
+        """
+        self._prepare_levels()
+        net = self.network
+        dur = net.durations
+        es = self.early_start
+        ef = self.early_finish
+
+        has_preds = np.bincount(net.edge_succ, minlength=net.activity_count) > 0
+        es[:] = np.where(has_preds, -np.inf, 0.0)
+
+        level_count = len(self._node_bounds) - 1
+        for lvl in range(level_count):
+            e_lo, e_hi = self._forward_bounds[lvl], self._forward_bounds[lvl + 1]
+            if e_hi > e_lo:
+                edges = self._forward_order[e_lo:e_hi]
+                pred = net.edge_pred[edges]
+                succ = net.edge_succ[edges]
+                ltype = net.edge_type[edges]
+
+                from_finish = (ltype == LINK_FS) | (ltype == LINK_FF)
+                to_finish = (ltype == LINK_FF) | (ltype == LINK_SF)
+                candidate = np.where(from_finish, ef[pred], es[pred]) + net.edge_lag[edges]
+                candidate = candidate - np.where(to_finish, dur[succ], 0.0)
+                np.maximum.at(es, succ, candidate)
+
+            nodes = self._node_order[self._node_bounds[lvl]:self._node_bounds[lvl + 1]]
+            if self.min_early_start is not None:
+                floor = self.min_early_start
+                es[nodes] = np.maximum(es[nodes], floor[nodes] if np.ndim(floor) else floor)
+            ef[nodes] = es[nodes] + dur[nodes]
+
+        self.project_duration = float(ef.max()) if ef.size else 0.0
+
+    def backward_pass(self):
+        """
+        المسار الخلفي (Backward Pass)
+        يحسب Late Start و Late Finish بترتيب المستويات العكسي
+        """
+        self._prepare_levels()
+        net = self.network
+        dur = net.durations
+        ls = self.late_start
+        lf = self.late_finish
+
+        has_succs = np.diff(net.succ_indptr) > 0
+        lf[:] = np.where(has_succs, np.inf, self.project_duration)
+
+        level_count = len(self._node_bounds) - 1
+        for lvl in range(level_count - 1, -1, -1):
+            e_lo, e_hi = self._backward_bounds[lvl], self._backward_bounds[lvl + 1]
+            if e_hi > e_lo:
+                edges = self._backward_order[e_lo:e_hi]
+                pred = net.edge_pred[edges]
+                succ = net.edge_succ[edges]
+                ltype = net.edge_type[edges]
+
+                to_finish = (ltype == LINK_FF) | (ltype == LINK_SF)
+                from_start = (ltype == LINK_SS) | (ltype == LINK_SF)
+                candidate = np.where(to_finish, lf[succ], ls[succ]) - net.edge_lag[edges]
+                candidate = candidate + np.where(from_start, dur[pred], 0.0)
+                np.minimum.at(lf, pred, candidate)
+
+            nodes = self._node_order[self._node_bounds[lvl]:self._node_bounds[lvl + 1]]
+            ls[nodes] = lf[nodes] - dur[nodes]
+
+    def calculate_float(self):
+        """حساب الفائض الكلي والحر"""
+        net = self.network
+        self.total_float = self.late_start - self.early_start
+
+        min_successor_es = np.full(net.activity_count, np.inf)
+        np.minimum.at(min_successor_es, net.edge_pred, self.early_start[net.edge_succ])
+        has_succs = np.diff(net.succ_indptr) > 0
+        self.free_float = np.where(
+            has_succs, min_successor_es - self.early_finish, self.total_float
+        )
+
+        self.is_critical = np.abs(self.total_float) < CRITICAL_TOLERANCE
+
+    def find_critical_path(self) -> List[str]:
+        """الأنشطة الحرجة مرتبة حسب Early Start"""
+        critical = np.flatnonzero(self.is_critical)
+        critical = critical[np.argsort(self.early_start[critical], kind='stable')]
+        self.critical_path = [self.network.activity_ids[i] for i in critical]
+        return self.critical_path
+
+    def run(self) -> "ArrayCPMEngine":
+        """تشغيل CPM الكامل (بدون التواريخ الميلادية)"""
+        self.forward_pass()
+        self.backward_pass()
+        self.calculate_float()
+        self.find_critical_path()
+        return self
+
+    def apply_to(self, cpm: CPMEngine, calendar_dates: bool = True):
+        """
+        كتابة النتائج في أنشطة CPMEngine
+
+        Args:
+            cpm: المحرك الأصلي الذي جُمّعت منه الشبكة
+            calendar_dates: حساب التواريخ الميلادية أيضاً
+        """
+        es = self.early_start.tolist()
+        ef = self.early_finish.tolist()
+        ls = self.late_start.tolist()
+        lf = self.late_finish.tolist()
+        tf = self.total_float.tolist()
+        ff = self.free_float.tolist()
+        critical = self.is_critical.tolist()
+
+        for i, aid in enumerate(self.network.activity_ids):
+            activity = cpm.activities[aid]
+            activity.early_start = es[i]
+            activity.early_finish = ef[i]
+            activity.late_start = ls[i]
+            activity.late_finish = lf[i]
+            activity.total_float = tf[i]
+            activity.free_float = ff[i]
+            activity.is_critical = critical[i]
+
+        cpm.project_duration = self.project_duration
+        cpm.critical_path = list(self.critical_path)
+        cpm.is_calculated = True
+
+        if calendar_dates:
+            cpm.calculate_calendar_dates()
+
+    def to_dict(self) -> Dict[str, Dict]:
+        """النتائج كقاموس activity_id -> قيم CPM"""
+        columns = {
+            'early_start': self.early_start.tolist(),
+            'early_finish': self.early_finish.tolist(),
+            'late_start': self.late_start.tolist(),
+            'late_finish': self.late_finish.tolist(),
+            'total_float': self.total_float.tolist(),
+            'free_float': self.free_float.tolist(),
+            'is_critical': self.is_critical.tolist(),
+        }
+        return {
+            aid: {name: values[i] for name, values in columns.items()}
+            for i, aid in enumerate(self.network.activity_ids)
+        }
+
+
+def run_array_cpm(cpm: CPMEngine) -> CPMEngine:
+    """
+    تشغيل CPM على المحرك المُصفوفي وكتابة النتائج في CPMEngine
+
+    Returns:
+        نفس CPMEngine بعد الحساب
+    """
+    ArrayCPMEngine.from_cpm_engine(cpm).run().apply_to(cpm)
+    return cpm
@@ -19,14 +19,16 @@
 
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Set, Tuple
-from datetime import datetime, timedelta
+from datetime import datetime
 from enum import Enum
+from collections import deque
 import sys
 sys.path.append('/home/user/webapp')
 
 from backend.data.activity_breakdown_rules import (
     LogicType, SubActivity, BOQBreakdown, LogicLink
 )
+from backend.core.WorkingCalendar import WorkingCalendar, FRIDAY
 
 
 @dataclass
@@ -68,26 +70,33 @@ class ScheduleActivity:
 class CPMEngine:
     """محرك المسار الحرج"""
     
-    def __init__(self, project_start_date: datetime, working_days_per_week: int = 6):
+    def __init__(self, project_start_date: datetime, working_days_per_week: int = 6,
+                 calendar: Optional[WorkingCalendar] = None):
         """
         تهيئة المحرك
         
         Args:
             project_start_date: تاريخ بداية المشروع
             working_days_per_week: أيام العمل في الأسبوع (الافتراضي 6)
+            calendar: تقويم مخصص بالعطلات وفترات رمضان/العيد (اختياري)
         """
         self.project_start_date = project_start_date
         self.working_days_per_week = working_days_per_week
+        self._custom_calendar = calendar
+        self._calendar: Optional[WorkingCalendar] = None
+        self._calendar_key: Optional[int] = None
         self.activities: Dict[str, ScheduleActivity] = {}
         self.critical_path: List[str] = []
         self.project_duration: float = 0.0
+        self.is_calculated: bool = False
+        self.last_changes: Dict[str, Dict] = {}
     
     def add_activity(self, activity: ScheduleActivity):
         """إضافة نشاط للجدول"""
         self.activities[activity.activity_id] = activity
     
     def add_relationship(self, predecessor_id: str, successor_id: str, 
-                        logic_type: LogicType, lag: float = 0.0):
+                        logic_type: LogicType, lag: float = 0.0) -> Optional[Dict[str, Dict]]:
         """
         إضافة علاقة منطقية بين نشاطين
         
@@ -96,15 +105,78 @@ class CPMEngine:
             successor_id: النشاط اللاحق
             logic_type: نوع العلاقة (FS, SS, FF, SF)
             lag: التأخير/التقديم بالأيام
+        
+        Returns:
+            الأنشطة المتغيرة (إذا كان CPM محسوباً)، وإلا None
         """
         if predecessor_id not in self.activities or successor_id not in self.activities:
             raise ValueError(f"Activity not found: {predecessor_id} or {successor_id}")
         
+        if self.is_calculated and self._reaches(successor_id, predecessor_id):
+            raise ValueError(f"Relationship {predecessor_id} -> {successor_id} creates a circular dependency")
+        
         # Add to predecessor's successors
         self.activities[predecessor_id].successors.append((successor_id, logic_type, lag))
         
         # Add to successor's predecessors
         self.activities[successor_id].predecessors.append((predecessor_id, logic_type, lag))
+        
+        # بعد تشغيل CPM: إعادة حساب الجزء المتأثر فقط
+        if self.is_calculated:
+            return self._recalculate([successor_id], [predecessor_id])
+        return None
+    
+    def remove_relationship(self, predecessor_id: str, successor_id: str,
+                            logic_type: Optional[LogicType] = None) -> Optional[Dict[str, Dict]]:
+        """
+        حذف علاقة منطقية بين نشاطين
+        
+        Args:
+            predecessor_id: النشاط السابق
+            successor_id: النشاط اللاحق
+            logic_type: نوع العلاقة (None = كل العلاقات بين النشاطين)
+        
+        Returns:
+            الأنشطة المتغيرة (إذا كان CPM محسوباً)
+        """
+        if predecessor_id not in self.activities or successor_id not in self.activities:
+            raise ValueError(f"Activity not found: {predecessor_id} or {successor_id}")
+        
+        def keep(link_id: str, link_type: LogicType, target_id: str) -> bool:
+            return not (link_id == target_id and (logic_type is None or link_type == logic_type))
+        
+        predecessor = self.activities[predecessor_id]
+        successor = self.activities[successor_id]
+        before = len(predecessor.successors)
+        predecessor.successors = [link for link in predecessor.successors if keep(link[0], link[1], successor_id)]
+        successor.predecessors = [link for link in successor.predecessors if keep(link[0], link[1], predecessor_id)]
+        
+        if len(predecessor.successors) == before:
+            raise ValueError(f"Relationship not found: {predecessor_id} -> {successor_id}")
+        
+        if self.is_calculated:
+            return self._recalculate([successor_id], [predecessor_id])
+        return None
+    
+    def update_duration(self, activity_id: str, duration: float) -> Optional[Dict[str, Dict]]:
+        """
+        تعديل مدة نشاط
+        
+        Args:
+            activity_id: رمز النشاط
+            duration: المدة الجديدة بالأيام
+        
+        Returns:
+            الأنشطة المتغيرة (إذا كان CPM محسوباً)
+        """
+        if activity_id not in self.activities:
+            raise ValueError(f"Activity not found: {activity_id}")
+        
+        self.activities[activity_id].duration = duration
+        
+        if self.is_calculated:
+            return self._recalculate([activity_id], [activity_id])
+        return None
     
     def forward_pass(self):
         """
@@ -235,22 +307,26 @@ class CPMEngine:
     
     def calculate_float(self):
         """حساب الفائض الكلي والحر"""
-        for activity_id, activity in self.activities.items():
-            # Total Float = LS - ES (أو LF - EF)
-            activity.total_float = activity.late_start - activity.early_start
-            
-            # Free Float = أقل ES للأنشطة التالية - EF الحالي
-            if activity.successors:
-                min_successor_es = min(
-                    self.activities[succ_id].early_start 
-                    for succ_id, _, _ in activity.successors
-                )
-                activity.free_float = min_successor_es - activity.early_finish
-            else:
-                activity.free_float = activity.total_float
-            
-            # Critical if Total Float ≈ 0
-            activity.is_critical = abs(activity.total_float) < 0.01
+        for activity in self.activities.values():
+            self._calculate_activity_float(activity)
+    
+    def _calculate_activity_float(self, activity: ScheduleActivity):
+        """حساب الفائض لنشاط واحد"""
+        # Total Float = LS - ES (أو LF - EF)
+        activity.total_float = activity.late_start - activity.early_start
+        
+        # Free Float = أقل ES للأنشطة التالية - EF الحالي
+        if activity.successors:
+            min_successor_es = min(
+                self.activities[succ_id].early_start 
+                for succ_id, _, _ in activity.successors
+            )
+            activity.free_float = min_successor_es - activity.early_finish
+        else:
+            activity.free_float = activity.total_float
+        
+        # Critical if Total Float ≈ 0
+        activity.is_critical = abs(activity.total_float) < 0.01
     
     def find_critical_path(self) -> List[str]:
         """
@@ -280,19 +356,220 @@ class CPMEngine:
                 int(activity.early_finish)
             )
     
+    @property
+    def calendar(self) -> WorkingCalendar:
+        """تقويم أيام العمل المفهرس (يُعاد بناؤه إذا تغير working_days_per_week)"""
+        if self._custom_calendar is not None:
+            return self._custom_calendar
+        if self._calendar is None or self._calendar_key != self.working_days_per_week:
+            # Skip Friday if working 6 days/week
+            weekend = (FRIDAY,) if self.working_days_per_week == 6 else ()
+            self._calendar = WorkingCalendar(self.project_start_date, weekend_days=weekend)
+            self._calendar_key = self.working_days_per_week
+        return self._calendar
+    
     def _add_working_days(self, start_date: datetime, days: int) -> datetime:
         """إضافة أيام عمل (تخطي الجمعة إذا كان 6 أيام عمل)"""
-        current_date = start_date
-        days_added = 0
+        return self.calendar.add_working_days(start_date, days)
+    
+    # ═══════════════════════════════════════════════════════════════
+    # إعادة الحساب الجزئية (Incremental CPM)
+    # ═══════════════════════════════════════════════════════════════
+    
+    def _reaches(self, source_id: str, target_id: str) -> bool:
+        """هل يمكن الوصول من source إلى target عبر اللاحقين؟"""
+        stack = [source_id]
+        seen = {source_id}
+        while stack:
+            current = stack.pop()
+            if current == target_id:
+                return True
+            for succ_id, _, _ in self.activities[current].successors:
+                if succ_id not in seen:
+                    seen.add(succ_id)
+                    stack.append(succ_id)
+        return False
+    
+    def _cone_order(self, seeds: List[str], forward: bool) -> List[str]:
+        """
+        ترتيب طوبولوجي للأنشطة المتأثرة فقط
+        (اللاحقون في المسار الأمامي، السابقون في المسار الخلفي)
+        """
+        def neighbours(activity_id: str):
+            activity = self.activities[activity_id]
+            links = activity.successors if forward else activity.predecessors
+            return [link_id for link_id, _, _ in links]
         
-        while days_added < days:
-            current_date += timedelta(days=1)
-            # Skip Friday if working 6 days/week
-            if self.working_days_per_week == 6 and current_date.weekday() == 4:  # Friday
+        def upstream(activity_id: str):
+            activity = self.activities[activity_id]
+            links = activity.predecessors if forward else activity.successors
+            return [link_id for link_id, _, _ in links]
+        
+        cone: Set[str] = set(seeds)
+        stack = list(seeds)
+        while stack:
+            for next_id in neighbours(stack.pop()):
+                if next_id not in cone:
+                    cone.add(next_id)
+                    stack.append(next_id)
+        
+        # Kahn داخل المخروط فقط
+        pending = {aid: sum(1 for up_id in upstream(aid) if up_id in cone) for aid in cone}
+        queue = deque(aid for aid, count in pending.items() if count == 0)
+        order = []
+        while queue:
+            current = queue.popleft()
+            order.append(current)
+            for next_id in neighbours(current):
+                pending[next_id] -= 1
+                if pending[next_id] == 0:
+                    queue.append(next_id)
+        
+        if len(order) != len(cone):
+            raise ValueError("Circular dependency detected in affected activities")
+        return order
+    
+    def _compute_early_start(self, activity: ScheduleActivity) -> float:
+        """Early Start لنشاط واحد من سابقيه (نفس قواعد forward_pass)"""
+        if not activity.predecessors:
+            return 0.0
+        
+        candidates = []
+        for pred_id, logic_type, lag in activity.predecessors:
+            pred = self.activities[pred_id]
+            if logic_type == LogicType.FS:
+                candidates.append(pred.early_finish + lag)
+            elif logic_type == LogicType.SS:
+                candidates.append(pred.early_start + lag)
+            elif logic_type == LogicType.FF:
+                candidates.append(pred.early_finish + lag - activity.duration)
+            elif logic_type == LogicType.SF:
+                candidates.append(pred.early_start + lag - activity.duration)
+            else:
+                candidates.append(0.0)
+        return max(candidates)
+    
+    def _compute_late_finish(self, activity: ScheduleActivity) -> float:
+        """Late Finish لنشاط واحد من لاحقيه (نفس قواعد backward_pass)"""
+        if not activity.successors:
+            return self.project_duration
+        
+        candidates = []
+        for succ_id, logic_type, lag in activity.successors:
+            succ = self.activities[succ_id]
+            if logic_type == LogicType.FS:
+                candidates.append(succ.late_start - lag)
+            elif logic_type == LogicType.SS:
+                candidates.append(succ.late_start - lag + activity.duration)
+            elif logic_type == LogicType.FF:
+                candidates.append(succ.late_finish - lag)
+            elif logic_type == LogicType.SF:
+                candidates.append(succ.late_finish - lag + activity.duration)
+            else:
+                candidates.append(self.project_duration)
+        return min(candidates)
+    
+    def _activity_snapshot(self, activity: ScheduleActivity) -> Dict:
+        """قيم النشاط التي يعرضها Gantt"""
+        return {
+            'early_start': activity.early_start,
+            'early_finish': activity.early_finish,
+            'late_start': activity.late_start,
+            'late_finish': activity.late_finish,
+            'total_float': activity.total_float,
+            'free_float': activity.free_float,
+            'is_critical': activity.is_critical,
+            'duration': activity.duration,
+        }
+    
+    def _recalculate(self, forward_seeds: List[str], backward_seeds: List[str]) -> Dict[str, Dict]:
+        """
+        إعادة حساب المخروط المتأثر فقط
+        
+        - المسار الأمامي: الأنشطة اللاحقة للبذور (يتوقف الانتشار عند عدم التغير)
+        - المسار الخلفي: الأنشطة السابقة للبذور (كامل فقط إذا تغيرت مدة المشروع)
+        
+        Returns:
+            {activity_id: القيم الجديدة} للأنشطة التي تغيرت تواريخها أو حالتها الحرجة
+        """
+        forward_order = self._cone_order(forward_seeds, forward=True)
+        before: Dict[str, Dict] = {
+            aid: self._activity_snapshot(self.activities[aid]) for aid in forward_order
+        }
+        
+        # Forward pass على المخروط
+        dirty: Set[str] = set(forward_seeds)
+        es_changed: Set[str] = set()
+        for activity_id in forward_order:
+            if activity_id not in dirty:
                 continue
-            days_added += 1
+            activity = self.activities[activity_id]
+            early_start = self._compute_early_start(activity)
+            early_finish = early_start + activity.duration
+            if early_start != activity.early_start or early_finish != activity.early_finish:
+                if early_start != activity.early_start:
+                    es_changed.add(activity_id)
+                activity.early_start = early_start
+                activity.early_finish = early_finish
+                dirty.update(succ_id for succ_id, _, _ in activity.successors)
+        
+        old_duration = self.project_duration
+        self.project_duration = max(act.early_finish for act in self.activities.values())
         
-        return current_date
+        # Backward pass: كامل إذا تغيرت مدة المشروع، وإلا مخروط السابقين فقط
+        if self.project_duration != old_duration:
+            end_activities = [aid for aid, act in self.activities.items() if not act.successors]
+            backward_seeds = list(dict.fromkeys(list(backward_seeds) + end_activities))
+        backward_order = self._cone_order(backward_seeds, forward=False)
+        for aid in backward_order:
+            if aid not in before:
+                before[aid] = self._activity_snapshot(self.activities[aid])
+        
+        dirty = set(backward_seeds)
+        for activity_id in backward_order:
+            if activity_id not in dirty:
+                continue
+            activity = self.activities[activity_id]
+            late_finish = self._compute_late_finish(activity)
+            late_start = late_finish - activity.duration
+            if late_finish != activity.late_finish or late_start != activity.late_start:
+                activity.late_finish = late_finish
+                activity.late_start = late_start
+                dirty.update(pred_id for pred_id, _, _ in activity.predecessors)
+        
+        # Free float يعتمد على ES للاحقين: أضف سابقي الأنشطة التي تغير ES لها
+        float_targets = set(before)
+        for activity_id in es_changed:
+            for pred_id, _, _ in self.activities[activity_id].predecessors:
+                float_targets.add(pred_id)
+                if pred_id not in before:
+                    before[pred_id] = self._activity_snapshot(self.activities[pred_id])
+        
+        for activity_id in float_targets:
+            self._calculate_activity_float(self.activities[activity_id])
+        
+        changes: Dict[str, Dict] = {}
+        critical_changed = False
+        for activity_id, old in before.items():
+            activity = self.activities[activity_id]
+            new = self._activity_snapshot(activity)
+            if new == old:
+                continue
+            if new['is_critical'] != old['is_critical'] or (
+                    activity.is_critical and new['early_start'] != old['early_start']):
+                critical_changed = True
+            if new['early_start'] != old['early_start'] or new['early_finish'] != old['early_finish']:
+                activity.calendar_start = self._add_working_days(self.project_start_date, int(activity.early_start))
+                activity.calendar_finish = self._add_working_days(self.project_start_date, int(activity.early_finish))
+            new['calendar_start'] = activity.calendar_start.strftime('%Y-%m-%d') if activity.calendar_start else None
+            new['calendar_finish'] = activity.calendar_finish.strftime('%Y-%m-%d') if activity.calendar_finish else None
+            changes[activity_id] = new
+        
+        if critical_changed:
+            self.find_critical_path()
+        
+        self.last_changes = changes
+        return changes
     
     def run_cpm(self):
         """تشغيل CPM الكامل"""
@@ -311,6 +588,8 @@ class CPMEngine:
         print("🔄 Calculating Calendar Dates...")
         self.calculate_calendar_dates()
         
+        self.is_calculated = True
+        
         print(f"✅ CPM Complete! Project Duration: {self.project_duration:.1f} days")
         print(f"✅ Critical Activities: {len(self.critical_path)}/{len(self.activities)}")
     
@@ -19,14 +19,26 @@
 from dataclasses import dataclass, field
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime, timedelta
+import heapq
 import math
 
+import numpy as np
+
 import sys
 sys.path.append('/home/user/webapp')
 
+from backend.data.activity_breakdown_rules import LogicType
 from backend.scheduling.cpm_engine import CPMEngine, ScheduleActivity
 
 
+# قواعد الأولوية في الموازنة (Serial SGS)
+PRIORITY_RULES = {
+    'min_float': lambda act: (act.total_float, act.late_start, -act.crew_size),  # أقل فائض أولاً
+    'lst': lambda act: (act.late_start, act.total_float, -act.crew_size),        # أبكر Late Start
+    'max_crew': lambda act: (-act.crew_size, act.total_float, act.late_start),   # أكبر طاقم أولاً
+}
+
+
 @dataclass
 class DailyResource:
     """الموارد اليومية"""
@@ -97,6 +109,7 @@ class ResourceLeveler:
         self.site_capacity = site_capacity
         self.original_histogram: Optional[ResourceHistogram] = None
         self.leveled_histogram: Optional[ResourceHistogram] = None
+        self.leveled_starts: Dict[str, float] = {}
     
     def calculate_histogram(self, use_late_start: bool = False) -> ResourceHistogram:
         """
@@ -108,18 +121,27 @@ class ResourceLeveler:
         Returns:
             ResourceHistogram
         """
+        starts = {
+            activity_id: activity.late_start if use_late_start else activity.early_start
+            for activity_id, activity in self.cpm.activities.items()
+        }
+        return self._build_histogram(starts)
+    
+    def _build_histogram(self, starts: Dict[str, float]) -> ResourceHistogram:
+        """بناء المخطط من تواريخ بداية الأنشطة (أيام من بداية المشروع)"""
         # Initialize daily resources
         max_day = int(math.ceil(self.cpm.project_duration)) + 1
         daily_resources: Dict[int, DailyResource] = {}
         
-        for day in range(max_day):
-            date = self.cpm._add_working_days(self.cpm.project_start_date, day)
+        dates = self.cpm.calendar.dates_for_offsets(self.cpm.project_start_date, max_day)
+        for day, date in enumerate(dates):
             daily_resources[day] = DailyResource(day=day, date=date)
         
         # Calculate resources for each activity
         for activity_id, activity in self.cpm.activities.items():
-            start_day = int(activity.late_start if use_late_start else activity.early_start)
-            end_day = int(math.ceil(activity.late_finish if use_late_start else activity.early_finish))
+            start = starts[activity_id]
+            start_day = int(start)
+            end_day = int(math.ceil(start + activity.duration))
             
             for day in range(start_day, end_day):
                 if day in daily_resources:
@@ -154,32 +176,127 @@ class ResourceLeveler:
         self.original_histogram = self.calculate_histogram(use_late_start=False)
         return self.original_histogram
     
-    def level_resources(self, target_peak_ratio: float = 1.20) -> ResourceHistogram:
+    def level_resources(self, target_peak_ratio: float = 1.20,
+                        priority_rule: str = 'min_float',
+                        max_workers: Optional[int] = None) -> ResourceHistogram:
         """
-        موازنة الموارد
+        موازنة الموارد - Serial Schedule Generation Scheme
         
         الاستراتيجية:
-        1. تأخير الأنشطة غير الحرجة (استخدام Float)
-        2. تقسيم الأنشطة الكبيرة
-        3. التوصية بزيادة الورديات
+        1. ترتيب الأنشطة حسب قاعدة الأولوية (مع احترام التبعيات)
+        2. وضع كل نشاط في أبكر يوم ضمن فائضه لا يتجاوز فيه الحد الأقصى للعمال
+        3. إذا لم يوجد يوم مناسب: اختيار الموضع ذي أقل ذروة ضمن الفائض
+        
+        الأنشطة لا تتجاوز Late Start، لذلك مدة المشروع لا تتغير.
         
         Args:
-            target_peak_ratio: النسبة المستهدفة (Peak / Average)
+            target_peak_ratio: النسبة المستهدفة (Peak / Average) - تحدد الحد
+                               الأقصى للعمال إذا لم تُحدد طاقة الموقع
+            priority_rule: min_float | lst | max_crew
+            max_workers: الحد الأقصى للعمال يومياً (الافتراضي: طاقة الموقع)
         
         Returns:
             ResourceHistogram بعد الموازنة
         """
-        # Start with Late Start schedule (maximizes float usage)
-        self.leveled_histogram = self.calculate_histogram(use_late_start=True)
+        if priority_rule not in PRIORITY_RULES:
+            raise ValueError(f"Unknown priority rule: {priority_rule} (use one of {', '.join(PRIORITY_RULES)})")
         
-        # Check if already balanced
-        if self.leveled_histogram.is_balanced(target_peak_ratio):
-            return self.leveled_histogram
+        if max_workers is None and self.site_capacity:
+            max_workers = self.site_capacity.max_workers
+        if max_workers is None:
+            original = self.original_histogram or self.analyze_original()
+            max_workers = int(math.ceil(original.average_workers * target_peak_ratio))
         
-        # TODO: Advanced leveling strategies
-        # For now, return Late Start schedule
+        self.leveled_starts = self._serial_sgs(PRIORITY_RULES[priority_rule], max_workers)
+        self.leveled_histogram = self._build_histogram(self.leveled_starts)
         return self.leveled_histogram
     
+    def _serial_sgs(self, priority_key, max_workers: int) -> Dict[str, float]:
+        """
+        Serial SGS: جدولة الأنشطة واحداً تلو الآخر على ملف موارد يومي (NumPy)
+        
+        Returns:
+            {activity_id: start} بالأيام من بداية المشروع
+        """
+        activities = self.cpm.activities
+        horizon = int(math.ceil(self.cpm.project_duration)) + 2
+        profile = np.zeros(horizon, dtype=np.int64)
+        
+        remaining = {aid: len(act.predecessors) for aid, act in activities.items()}
+        eligible = [(priority_key(act), aid) for aid, act in activities.items() if remaining[aid] == 0]
+        heapq.heapify(eligible)
+        
+        starts: Dict[str, float] = {}
+        while eligible:
+            _, activity_id = heapq.heappop(eligible)
+            activity = activities[activity_id]
+            
+            earliest = self._earliest_start(activity, starts)
+            start = self._place(profile, activity, earliest, max_workers)
+            starts[activity_id] = start
+            
+            first_day = int(start)
+            last_day = min(int(math.ceil(start + activity.duration)), horizon)
+            profile[first_day:last_day] += activity.crew_size
+            
+            for succ_id, _, _ in activity.successors:
+                remaining[succ_id] -= 1
+                if remaining[succ_id] == 0:
+                    heapq.heappush(eligible, (priority_key(activities[succ_id]), succ_id))
+        
+        if len(starts) != len(activities):
+            raise ValueError("Circular dependency detected - cannot level resources")
+        
+        return starts
+    
+    def _earliest_start(self, activity: ScheduleActivity, starts: Dict[str, float]) -> float:
+        """أبكر بداية ممكنة بعد وضع الأنشطة السابقة (نفس قواعد الروابط في CPM)"""
+        if not activity.predecessors:
+            return activity.early_start
+        
+        candidates = []
+        for pred_id, logic_type, lag in activity.predecessors:
+            pred_start = starts[pred_id]
+            pred_finish = pred_start + self.cpm.activities[pred_id].duration
+            if logic_type == LogicType.FS:
+                candidates.append(pred_finish + lag)
+            elif logic_type == LogicType.SS:
+                candidates.append(pred_start + lag)
+            elif logic_type == LogicType.FF:
+                candidates.append(pred_finish + lag - activity.duration)
+            elif logic_type == LogicType.SF:
+                candidates.append(pred_start + lag - activity.duration)
+        return max(max(candidates), activity.early_start)
+    
+    def _place(self, profile: np.ndarray, activity: ScheduleActivity,
+               earliest: float, max_workers: int) -> float:
+        """
+        اختيار يوم البداية ضمن الفائض [earliest, late_start]
+        فحص كل المواضع المرشحة دفعة واحدة على ملف الموارد
+        """
+        max_shift = int(math.floor(activity.late_start - earliest + 1e-9))
+        if activity.crew_size <= 0 or max_shift <= 0:
+            return earliest
+        
+        first_day = int(earliest)
+        length = max(int(math.ceil(earliest + activity.duration)) - first_day, 1)
+        window = profile[first_day:first_day + max_shift + length]
+        if window.shape[0] < max_shift + length:
+            window = np.pad(window, (0, max_shift + length - window.shape[0]))
+        
+        # عدد الأيام المتجاوزة للحد في كل موضع مرشح (مجموع تراكمي)
+        over = (window + activity.crew_size > max_workers).astype(np.int64)
+        over_cumulative = np.concatenate(([0], np.cumsum(over)))
+        violations = over_cumulative[length:] - over_cumulative[:-length]
+        feasible = np.flatnonzero(violations == 0)
+        if feasible.size:
+            return earliest + int(feasible[0])
+        
+        # لا يوجد موضع ضمن الحد: أقل ذروة ثم أقل تجاوزات
+        peaks = np.lib.stride_tricks.sliding_window_view(window, length).max(axis=1)
+        best = np.lexsort((violations, peaks))[0]
+        return earliest + int(best)
+    
     def check_capacity_violations(self) -> List[Tuple[int, int, int]]:
         """
         فحص تجاوزات الطاقة الاستيعابية
@@ -0,0 +1,291 @@
+"""
+Navisworks Element Store - In-memory indexed element storage
+مخزن عناصر نافيسووركس المفهرس
+
+One ModelElementStore per imported model:
+- elements kept once, in import order (row ids)
+- elementId → row hash index
+- category → row ids index with cached counts
+- lower-cased trigram index over name/path for substring search, built on
+  the first search and extended for rows added afterwards
+- geometry packed into NumPy buffers (see navisworks_geometry); element
+  dicts keep every other field
+- packed R-tree over the element bounding boxes for zone and clash
+  queries (see navisworks_spatial), rebuilt after new rows are added
+"""
+
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from services.navisworks_geometry import GeometryBuffer, check_geometries
+    from services.navisworks_spatial import PackedRTree
+except ImportError:
+    from .navisworks_geometry import GeometryBuffer, check_geometries
+    from .navisworks_spatial import PackedRTree
+
+BOX_FIELDS = ('minX', 'minY', 'minZ', 'maxX', 'maxY', 'maxZ')
+
+
+TRIGRAM_SIZE = 3
+
+
+def _trigrams(text: str) -> set:
+    """Set of trigrams of a lower-cased string"""
+    return {text[i:i + TRIGRAM_SIZE] for i in range(len(text) - TRIGRAM_SIZE + 1)}
+
+
+class ModelElementStore:
+    """
+    Indexed elements of one Navisworks model
+    عناصر نموذج واحد مع الفهارس
+    """
+
+    def __init__(self, model_id: str, project_id: str, quantize: bool = False):
+        self.model_id = model_id
+        self.project_id = project_id
+        self.geometry = GeometryBuffer(quantize=quantize)
+
+        self.elements: List[Dict[str, Any]] = []
+        self._row_by_id: Dict[str, int] = {}
+        self._category_rows: Dict[str, array] = {}
+        self._categories: List[str] = []
+        self._names: List[str] = []
+        self._paths: List[str] = []
+        self._trigram_rows: Dict[str, array] = {}
+        self._trigram_indexed = 0
+        self._spatial: Optional[PackedRTree] = None
+
+        self.elements_with_geometry = 0
+        self.elements_with_properties = 0
+
+    # ========== Import ==========
+
+    def add_elements(self, elements: Iterable[Dict[str, Any]]) -> int:
+        """
+        Append elements and update every index in a single pass
+        إضافة عناصر وتحديث الفهارس في مرور واحد
+
+        Geometry of the whole batch is validated before anything is added,
+        so an invalid element raises ValueError and leaves the store as it
+        was.
+        """
+        batch: List[Dict[str, Any]] = []
+        batch_ids = set()
+        for element in elements:
+            element_id = str(element['id'])
+            if element_id in self._row_by_id or element_id in batch_ids:
+                continue
+            batch_ids.add(element_id)
+            batch.append(element)
+
+        with_geometry = [element for element in batch if element.get('geometry')]
+        geometries = [element['geometry'] for element in with_geometry]
+        errors = check_geometries(geometries)
+        if errors:
+            position, message = errors[0]
+            raise ValueError(f"Element {with_geometry[position]['id']}: {message}")
+
+        for element in batch:
+            row = len(self.elements)
+            category = element.get('category', 'Unknown')
+            name = (element.get('name') or '').lower()
+            path = (element.get('path') or '').lower()
+
+            if element.get('geometry'):
+                self.elements_with_geometry += 1
+                element = {key: value for key, value in element.items() if key != 'geometry'}
+            if element.get('properties'):
+                self.elements_with_properties += 1
+
+            self.elements.append(element)
+            self._row_by_id[str(element['id'])] = row
+            self._categories.append(category)
+            self._names.append(name)
+            self._paths.append(path)
+
+            rows = self._category_rows.get(category)
+            if rows is None:
+                rows = self._category_rows[category] = array('I')
+            rows.append(row)
+
+        self.geometry.append([str(element['id']) for element in with_geometry], geometries)
+        if batch:
+            self._spatial = None
+        return len(batch)
+
+    # ========== Queries ==========
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def get(self, element_id: str) -> Optional[Dict[str, Any]]:
+        """O(1) element lookup by id (without geometry)"""
+        row = self._row_by_id.get(str(element_id))
+        return self.elements[row] if row is not None else None
+
+    def to_json(self, element: Dict[str, Any], geometry: str = 'json') -> Dict[str, Any]:
+        """
+        Element with its geometry for JSON responses
+        العنصر مع الهندسة للاستجابة
+
+        geometry='json' rebuilds the original number arrays, 'summary'
+        returns counts and bounding box only, 'none' leaves it out.
+        """
+        element_id = str(element['id'])
+        if geometry == 'none' or element_id not in self.geometry:
+            return element
+        if geometry == 'summary':
+            return {**element, 'geometry': self.geometry.summary(element_id)}
+        return {**element, 'geometry': self.geometry.to_dict(element_id)}
+
+    def category_counts(self) -> Dict[str, int]:
+        """Element count per category (from the category index)"""
+        return {category: len(rows) for category, rows in self._category_rows.items()}
+
+    def statistics(self) -> Dict[str, Any]:
+        """Import statistics maintained while adding elements"""
+        return {
+            'totalElements': len(self.elements),
+            'elementsWithGeometry': self.elements_with_geometry,
+            'elementsWithProperties': self.elements_with_properties,
+            'elementsByCategory': self.category_counts()
+        }
+
+    def query(
+        self,
+        category: Optional[str] = None,
+        search: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 100
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Filtered page of elements and the total match count
+        صفحة من العناصر المطابقة مع العدد الكلي
+
+        Without a search term the page is sliced straight from the row or
+        category index.  A search scans only the shortest trigram posting
+        list of the term and verifies each candidate.
+        """
+        start = max(page - 1, 0) * page_size
+        end = start + page_size
+
+        if not search:
+            if category:
+                rows = self._category_rows.get(category, ())
+                return [self.elements[row] for row in rows[start:end]], len(rows)
+            return self.elements[start:end], len(self.elements)
+
+        rows = self._search_rows(search.lower(), category)
+        return [self.elements[row] for row in rows[start:end]], len(rows)
+
+    def _index_trigrams(self) -> None:
+        """Index name/path trigrams of rows not indexed yet"""
+        trigram_rows = self._trigram_rows
+        # مسارات العناصر تتكرر كثيراً في نفس النموذج
+        path_trigrams: Dict[str, set] = {}
+        for row in range(self._trigram_indexed, len(self.elements)):
+            path = self._paths[row]
+            trigrams = path_trigrams.get(path)
+            if trigrams is None:
+                trigrams = path_trigrams[path] = _trigrams(path)
+            for trigram in _trigrams(self._names[row]) | trigrams:
+                postings = trigram_rows.get(trigram)
+                if postings is None:
+                    postings = trigram_rows[trigram] = array('I')
+                postings.append(row)
+        self._trigram_indexed = len(self.elements)
+
+    def _search_rows(self, term: str, category: Optional[str]) -> List[int]:
+        if len(term) >= TRIGRAM_SIZE:
+            self._index_trigrams()
+            postings = [self._trigram_rows.get(trigram) for trigram in _trigrams(term)]
+            if any(p is None for p in postings):
+                return []
+            candidates: Iterable[int] = min(postings, key=len)
+        elif category:
+            candidates = self._category_rows.get(category, ())
+        else:
+            candidates = range(len(self.elements))
+
+        return [
+            row for row in candidates
+            if (not category or self._categories[row] == category)
+            and (term in self._names[row] or term in self._paths[row])
+        ]
+
+    # ========== Spatial queries ==========
+
+    def element_boxes(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        World bounding boxes of all elements that have one
+        صناديق العناصر في إحداثيات النموذج
+
+        The element boundingBox is used when present; otherwise the box of
+        the packed geometry is transformed by its (column-major) matrix.
+        Returns (rows, boxes) with boxes as an (n, 6) float64 array.
+        """
+        boxes = np.full((len(self.elements), 6), np.nan)
+        for row, element in enumerate(self.elements):
+            box = element.get('boundingBox')
+            if isinstance(box, dict) and all(field in box for field in BOX_FIELDS):
+                boxes[row] = [box[field] for field in BOX_FIELDS]
+
+        missing = np.isnan(boxes[:, 0])
+        if missing.any() and len(self.geometry):
+            packed = self.geometry.packed
+            rows = np.array([self._row_by_id[element_id] for element_id in self.geometry.element_ids])
+            use = missing[rows]
+            local = packed['bboxes'][use].astype(np.float64)
+            matrices = packed['transforms'][use].astype(np.float64).reshape(-1, 4, 4).transpose(0, 2, 1)
+
+            # الزوايا الثمانية لكل صندوق بعد التحويل
+            corners = np.stack([
+                local[:, [3 * (corner & 1), 1 + 3 * (corner >> 1 & 1), 2 + 3 * (corner >> 2 & 1)]]
+                for corner in range(8)
+            ], axis=1)
+            world = np.einsum('nij,nkj->nki', matrices[:, :3, :3], corners) + matrices[:, None, :3, 3]
+            boxes[rows[use]] = np.hstack([world.min(axis=1), world.max(axis=1)])
+
+        rows = np.flatnonzero(~np.isnan(boxes[:, 0]))
+        return rows, boxes[rows]
+
+    def spatial_index(self) -> PackedRTree:
+        """Packed R-tree over the element boxes (built once per import)"""
+        if self._spatial is None:
+            rows, boxes = self.element_boxes()
+            self._spatial = PackedRTree(boxes, rows)
+        return self._spatial
+
+    def query_box(self, box: Dict[str, float], category: Optional[str] = None) -> List[int]:
+        """
+        Rows of the elements whose box intersects a zone
+        العناصر داخل منطقة أو متقاطعة معها
+        """
+        rows = self.spatial_index().query([box[field] for field in BOX_FIELDS]).tolist()
+        if category:
+            rows = [row for row in rows if self._categories[row] == category]
+        return rows
+
+    def clash_candidates(
+        self,
+        tolerance: float = 0.0,
+        category_a: Optional[str] = None,
+        category_b: Optional[str] = None
+    ) -> List[Tuple[int, int]]:
+        """
+        Broad-phase clash pairs (row_a, row_b) from the spatial index
+        أزواج التعارض المرشحة بين العناصر
+        """
+        masks = []
+        for category in (category_a, category_b):
+            if category:
+                mask = np.zeros(len(self.elements), dtype=bool)
+                mask[np.frombuffer(self._category_rows.get(category, array('I')), dtype=np.uint32)] = True
+                masks.append(mask)
+            else:
+                masks.append(None)
+        first, second = self.spatial_index().clash_candidates(tolerance, masks[0], masks[1])
+        return list(zip(first.tolist(), second.tolist()))
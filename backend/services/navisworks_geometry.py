@@ -0,0 +1,401 @@
+"""
+Navisworks Geometry Buffers - Packed binary geometry storage
+تخزين هندسة عناصر نافيسووركس بصيغة ثنائية مضغوطة
+
+Element geometry arrives as JSON lists of numbers.  Kept as Python lists
+every number costs 24-32 bytes; here all elements of a model share packed
+NumPy buffers:
+- vertices: float32 (or uint16 quantized against the element bounding box)
+- indices: uint32, normals/uvs: float32, transforms: float32 (16 per element)
+- per-element offsets table and float32 bounding boxes
+
+Batches are validated and packed with vectorized NumPy passes, and the
+whole model (or one element) is served as a binary blob built from
+memoryviews of the buffers.
+"""
+
+import json
+import struct
+from itertools import chain
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+BLOB_MAGIC = b'NWGB'
+BLOB_VERSION = 1
+QUANTIZATION_LEVELS = 65535
+IDENTITY_TRANSFORM = [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+
+# أعلام الحقول الاختيارية لكل عنصر (لإرجاع نفس شكل JSON الأصلي)
+HAS_NORMALS = 1
+HAS_UVS = 2
+HAS_TRANSFORM = 4
+HAS_COUNTS = 8
+
+# أعمدة جدول الإزاحات: (إزاحة، طول) لكل مصفوفة بعدد الأرقام
+TABLE_COLUMNS = (
+    'vertexOffset', 'vertexLength', 'indexOffset', 'indexLength',
+    'normalOffset', 'normalLength', 'uvOffset', 'uvLength'
+)
+
+
+# ========== Vectorized validation ==========
+
+def _flatten(geometries: Sequence[Dict[str, Any]], key: str, dtype) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenate one list field of all geometries into a single array"""
+    lengths = np.fromiter(
+        (len(g.get(key) or ()) for g in geometries), dtype=np.int64, count=len(geometries)
+    )
+    values = np.fromiter(
+        chain.from_iterable(g.get(key) or () for g in geometries),
+        dtype=dtype,
+        count=int(lengths.sum())
+    )
+    return values, lengths
+
+
+def _segment_ids(lengths: np.ndarray) -> np.ndarray:
+    return np.repeat(np.arange(len(lengths)), lengths)
+
+
+def _flatten_numbers(batch: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, ...]:
+    vertices, vertex_lengths = _flatten(batch, 'vertices', np.float64)
+    indices, index_lengths = _flatten(batch, 'indices', np.float64)
+    normals, normal_lengths = _flatten(batch, 'normals', np.float64)
+    return vertices, vertex_lengths, indices, index_lengths, normals, normal_lengths
+
+
+def check_geometries(geometries: Sequence[Dict[str, Any]]) -> List[Tuple[int, str]]:
+    """
+    Validate all geometries at once
+    التحقق من هندسة جميع العناصر دفعة واحدة
+
+    Returns (position, error) for every invalid geometry.  Only the
+    structural checks loop in Python (once per element); lengths, finite
+    coordinates and index ranges are checked with NumPy over the
+    concatenated buffers.
+    """
+    errors: Dict[int, str] = {}
+
+    for position, geometry in enumerate(geometries):
+        if not isinstance(geometry, dict):
+            errors[position] = "Geometry must be an object"
+        elif 'vertices' not in geometry:
+            errors[position] = "Geometry missing vertices"
+        elif not isinstance(geometry['vertices'], list):
+            errors[position] = "Vertices must be an array"
+        elif 'indices' not in geometry:
+            errors[position] = "Geometry missing indices"
+        elif not isinstance(geometry['indices'], list):
+            errors[position] = "Indices must be an array"
+        elif not isinstance(geometry.get('normals') or [], list):
+            errors[position] = "Normals must be an array"
+        elif not isinstance(geometry.get('uvs') or [], list):
+            errors[position] = "UVs must be an array"
+        elif 'transform' in geometry and (
+            not isinstance(geometry['transform'], list) or len(geometry['transform']) != 16
+        ):
+            errors[position] = "Transform matrix must be an array of 16 numbers"
+
+    valid = [position for position in range(len(geometries)) if position not in errors]
+    try:
+        vertices, vertex_lengths, indices, index_lengths, normals, normal_lengths = _flatten_numbers(
+            [geometries[position] for position in valid]
+        )
+    except (TypeError, ValueError):
+        # رقم غير صالح في أحد العناصر - تحديده ثم فحص الباقي دفعة واحدة
+        for position in valid:
+            try:
+                _flatten_numbers([geometries[position]])
+            except (TypeError, ValueError):
+                errors[position] = "Geometry arrays must contain only numbers"
+        valid = [position for position in valid if position not in errors]
+        vertices, vertex_lengths, indices, index_lengths, normals, normal_lengths = _flatten_numbers(
+            [geometries[position] for position in valid]
+        )
+    batch_size = len(valid)
+
+    bad_vertices = np.bincount(
+        _segment_ids(vertex_lengths), weights=~np.isfinite(vertices), minlength=batch_size
+    )
+    bad_indices = np.bincount(
+        _segment_ids(index_lengths),
+        weights=(indices < 0) | (indices != np.floor(indices)),
+        minlength=batch_size
+    )
+    max_index = np.full(batch_size, -1.0)
+    nonempty = index_lengths > 0
+    if nonempty.any():
+        starts = (np.cumsum(index_lengths) - index_lengths)[nonempty]
+        max_index[nonempty] = np.maximum.reduceat(indices, starts)
+
+    checks = (
+        (vertex_lengths % 3 != 0, "Vertices length must be divisible by 3"),
+        (index_lengths % 3 != 0, "Indices length must be divisible by 3"),
+        (normal_lengths % 3 != 0, "Normals length must be divisible by 3"),
+        (bad_vertices > 0, "Vertices must be finite numbers"),
+        (bad_indices > 0, "Indices must be non-negative integers"),
+        (max_index >= vertex_lengths // 3, "Index out of range of the vertices"),
+    )
+    for failed, message in checks:
+        for batch_position in np.flatnonzero(failed):
+            errors.setdefault(valid[batch_position], message)
+
+    return sorted(errors.items())
+
+
+# ========== Packed storage ==========
+
+class GeometryBuffer:
+    """
+    Packed geometry of one model
+    الهندسة المضغوطة لنموذج واحد
+
+    Appends are kept as chunks and concatenated on the first read after a
+    change, so chunked imports do not copy the buffers batch by batch.
+    """
+
+    def __init__(self, quantize: bool = False):
+        self.quantize = quantize
+        self.element_ids: List[str] = []
+        self._slot_by_id: Dict[str, int] = {}
+        self._chunks: Dict[str, List[np.ndarray]] = {
+            'vertices': [], 'indices': [], 'normals': [], 'uvs': [],
+            'table': [], 'bboxes': [], 'transforms': [], 'flags': []
+        }
+        self._totals = {'vertices': 0, 'indices': 0, 'normals': 0, 'uvs': 0}
+        self._packed: Optional[Dict[str, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.element_ids)
+
+    def __contains__(self, element_id: str) -> bool:
+        return element_id in self._slot_by_id
+
+    # ----- Write path -----
+
+    def append(self, element_ids: Sequence[str], geometries: Sequence[Dict[str, Any]]) -> None:
+        """Pack a validated batch of geometries (see check_geometries)"""
+        if not geometries:
+            return
+
+        vertices, vertex_lengths = _flatten(geometries, 'vertices', np.float32)
+        indices, index_lengths = _flatten(geometries, 'indices', np.uint32)
+        normals, normal_lengths = _flatten(geometries, 'normals', np.float32)
+        uvs, uv_lengths = _flatten(geometries, 'uvs', np.float32)
+
+        count = len(geometries)
+        points = vertices.reshape(-1, 3)
+        point_counts = vertex_lengths // 3
+
+        bboxes = np.zeros((count, 6), dtype=np.float32)
+        nonempty = point_counts > 0
+        if nonempty.any():
+            starts = (np.cumsum(point_counts) - point_counts)[nonempty]
+            bboxes[nonempty, :3] = np.minimum.reduceat(points, starts, axis=0)
+            bboxes[nonempty, 3:] = np.maximum.reduceat(points, starts, axis=0)
+
+        if self.quantize:
+            segment = _segment_ids(point_counts)
+            low = bboxes[segment, :3]
+            extent = bboxes[segment, 3:] - low
+            extent[extent == 0] = 1.0
+            vertices = np.rint((points - low) / extent * QUANTIZATION_LEVELS).astype(np.uint16).ravel()
+
+        transforms = np.array(
+            [g.get('transform') or IDENTITY_TRANSFORM for g in geometries], dtype=np.float32
+        )
+        flags = np.array([
+            (HAS_NORMALS if 'normals' in g else 0)
+            | (HAS_UVS if 'uvs' in g else 0)
+            | (HAS_TRANSFORM if 'transform' in g else 0)
+            | (HAS_COUNTS if 'vertexCount' in g or 'triangleCount' in g else 0)
+            for g in geometries
+        ], dtype=np.uint8)
+
+        table = np.empty((count, len(TABLE_COLUMNS)), dtype=np.uint32)
+        for column, (name, lengths) in enumerate((
+            ('vertices', vertex_lengths), ('indices', index_lengths),
+            ('normals', normal_lengths), ('uvs', uv_lengths)
+        )):
+            table[:, 2 * column] = self._totals[name] + np.cumsum(lengths) - lengths
+            table[:, 2 * column + 1] = lengths
+            self._totals[name] += int(lengths.sum())
+
+        for name, values in (
+            ('vertices', vertices), ('indices', indices), ('normals', normals), ('uvs', uvs),
+            ('table', table), ('bboxes', bboxes), ('transforms', transforms), ('flags', flags)
+        ):
+            self._chunks[name].append(values)
+
+        for element_id in element_ids:
+            self._slot_by_id[element_id] = len(self.element_ids)
+            self.element_ids.append(element_id)
+        self._packed = None
+
+    # ----- Read path -----
+
+    @property
+    def packed(self) -> Dict[str, np.ndarray]:
+        """Concatenated buffers (cached until the next append)"""
+        if self._packed is None:
+            empty = {
+                'vertices': np.empty(0, np.uint16 if self.quantize else np.float32),
+                'indices': np.empty(0, np.uint32),
+                'normals': np.empty(0, np.float32),
+                'uvs': np.empty(0, np.float32),
+                'table': np.empty((0, len(TABLE_COLUMNS)), np.uint32),
+                'bboxes': np.empty((0, 6), np.float32),
+                'transforms': np.empty((0, 16), np.float32),
+                'flags': np.empty(0, np.uint8),
+            }
+            self._packed = {
+                name: np.concatenate(chunks) if chunks else empty[name]
+                for name, chunks in self._chunks.items()
+            }
+            # الاحتفاظ بنسخة واحدة فقط من البيانات
+            for name, values in self._packed.items():
+                self._chunks[name] = [values] if len(values) else []
+        return self._packed
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the packed buffers"""
+        return sum(values.nbytes for values in self.packed.values())
+
+    def bounding_box(self, element_id: str) -> Optional[Dict[str, float]]:
+        """Bounding box computed from the element vertices"""
+        slot = self._slot_by_id.get(element_id)
+        if slot is None:
+            return None
+        box = self.packed['bboxes'][slot].tolist()
+        return dict(zip(('minX', 'minY', 'minZ', 'maxX', 'maxY', 'maxZ'), box))
+
+    def summary(self, element_id: str) -> Optional[Dict[str, Any]]:
+        """Geometry description without the number arrays"""
+        slot = self._slot_by_id.get(element_id)
+        if slot is None:
+            return None
+        row = self.packed['table'][slot]
+        return {
+            'vertexCount': int(row[1]) // 3,
+            'triangleCount': int(row[3]) // 3,
+            'boundingBox': self.bounding_box(element_id),
+            'encoding': 'uint16-quantized' if self.quantize else 'float32'
+        }
+
+    def to_dict(self, element_id: str) -> Optional[Dict[str, Any]]:
+        """Geometry as the original JSON shape (float32 precision)"""
+        slot = self._slot_by_id.get(element_id)
+        if slot is None:
+            return None
+        packed = self.packed
+        row = packed['table'][slot]
+        flags = int(packed['flags'][slot])
+
+        geometry = {
+            'vertices': self._vertices(slot).tolist(),
+            'indices': packed['indices'][row[2]:row[2] + row[3]].tolist(),
+        }
+        if flags & HAS_NORMALS:
+            geometry['normals'] = packed['normals'][row[4]:row[4] + row[5]].tolist()
+        if flags & HAS_UVS:
+            geometry['uvs'] = packed['uvs'][row[6]:row[6] + row[7]].tolist()
+        if flags & HAS_TRANSFORM:
+            geometry['transform'] = packed['transforms'][slot].tolist()
+        if flags & HAS_COUNTS:
+            geometry['triangleCount'] = int(row[3]) // 3
+            geometry['vertexCount'] = int(row[1]) // 3
+        return geometry
+
+    def _vertices(self, slot: int) -> np.ndarray:
+        packed = self.packed
+        row = packed['table'][slot]
+        values = packed['vertices'][row[0]:row[0] + row[1]]
+        if not self.quantize:
+            return values
+        box = packed['bboxes'][slot]
+        extent = box[3:] - box[:3]
+        extent[extent == 0] = 1.0
+        points = values.reshape(-1, 3).astype(np.float32) / QUANTIZATION_LEVELS * extent + box[:3]
+        return points.ravel()
+
+    # ----- Binary blob -----
+
+    def iter_blob(self, element_id: Optional[str] = None) -> Iterator[memoryview]:
+        """
+        Binary blob of the model (or one element)
+        الهندسة كملف ثنائي بدون نسخ البيانات
+
+        Layout: b'NWGB', uint32 version, uint32 header length, JSON header
+        (padded to 4 bytes), then the sections listed in the header.  Each
+        section is a little-endian array; offsets in the table count numbers
+        (not bytes) from the start of the matching section.
+        """
+        packed = self.packed
+        if element_id is None:
+            element_ids = self.element_ids
+            sections = dict(packed)
+        else:
+            slot = self._slot_by_id[element_id]
+            row = packed['table'][slot]
+            element_ids = [element_id]
+            sections = {
+                'vertices': packed['vertices'][row[0]:row[0] + row[1]],
+                'indices': packed['indices'][row[2]:row[2] + row[3]],
+                'normals': packed['normals'][row[4]:row[4] + row[5]],
+                'uvs': packed['uvs'][row[6]:row[6] + row[7]],
+                'table': np.array([[0, row[1], 0, row[3], 0, row[5], 0, row[7]]], dtype=np.uint32),
+                'bboxes': packed['bboxes'][slot:slot + 1],
+                'transforms': packed['transforms'][slot:slot + 1],
+                'flags': packed['flags'][slot:slot + 1],
+            }
+
+        layout = []
+        offset = 0
+        for name, values in sections.items():
+            layout.append({
+                'name': name,
+                'dtype': values.dtype.str,
+                'shape': list(values.shape),
+                'offset': offset,
+                'byteLength': values.nbytes
+            })
+            offset += values.nbytes + (-values.nbytes) % 4
+
+        header = json.dumps({
+            'encoding': 'uint16-quantized' if self.quantize else 'float32',
+            'quantizationLevels': QUANTIZATION_LEVELS if self.quantize else None,
+            'tableColumns': list(TABLE_COLUMNS),
+            'elementIds': element_ids,
+            'sections': layout
+        }).encode('utf-8')
+        header += b' ' * ((-len(header)) % 4)
+
+        yield memoryview(BLOB_MAGIC + struct.pack('<II', BLOB_VERSION, len(header)) + header)
+        for values in sections.values():
+            if values.nbytes:
+                yield memoryview(np.ascontiguousarray(values)).cast('B')
+            padding = (-values.nbytes) % 4
+            if padding:
+                yield memoryview(b'\0' * padding)
+
+    def blob_size(self, element_id: Optional[str] = None) -> int:
+        return sum(len(part) for part in self.iter_blob(element_id))
+
+
+def read_blob(blob: bytes) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """Parse a geometry blob back into its header and NumPy arrays"""
+    if blob[:4] != BLOB_MAGIC:
+        raise ValueError('Not a Navisworks geometry blob')
+    _, header_length = struct.unpack_from('<II', blob, 4)
+    body_start = 12 + header_length
+    header = json.loads(blob[12:body_start])
+    arrays = {}
+    for section in header['sections']:
+        start = body_start + section['offset']
+        arrays[section['name']] = np.frombuffer(
+            blob, dtype=np.dtype(section['dtype']), count=int(np.prod(section['shape'])), offset=start
+        ).reshape(section['shape'])
+    return header, arrays
@@ -4,7 +4,7 @@ Navisworks Service - Business Logic
 
 from datetime import datetime
 from typing import List, Dict, Optional, Any
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument
 from bson import ObjectId
 import json
 import time
@@ -22,9 +22,24 @@ from models.navisworks_model import (
 )
 
 
+def _category_field(category: str) -> str:
+    """Category name usable as a MongoDB field name ('.' and leading '$' escaped)"""
+    category = category.replace('.', '\uff0e')
+    return '\uff04' + category[1:] if category.startswith('$') else category
+
+
+def _category_name(field: str) -> str:
+    """Inverse of _category_field"""
+    field = field.replace('\uff0e', '.')
+    return '$' + field[1:] if field.startswith('\uff04') else field
+
+
 class NavisworksService:
     """Service for Navisworks Model Operations"""
     
+    # Elements per insert_many call
+    INSERT_BATCH_SIZE = 1000
+    
     def __init__(self, mongo_uri: str = "mongodb://localhost:27017/", db_name: str = "noufal"):
         """Initialize service with MongoDB connection"""
         self.client = MongoClient(mongo_uri)
@@ -98,91 +113,136 @@ class NavisworksService:
         if not validation.isValid:
             raise ValueError(f"Validation failed: {validation.errors}")
         
-        # Generate model ID
-        model_id = str(ObjectId())
-        
-        # Process elements
-        elements = model_data.get('elements', [])
-        warnings = []
-        
-        # Calculate statistics
-        elements_with_geometry = sum(1 for el in elements if el.get('geometry'))
-        elements_with_properties = sum(1 for el in elements if el.get('properties'))
+        model_id = self.begin_import(project_id, model_data)
+        self.append_elements(model_id, model_data.get('elements', []))
+        return self.commit_import(model_id, start_time=start_time)
+    
+    def begin_import(self, project_id: str, header: Dict[str, Any]) -> str:
+        """
+        Begin a chunked import: store the model header without elements
         
-        elements_by_category = {}
-        for el in elements:
-            cat = el.get('category', 'Unknown')
-            elements_by_category[cat] = elements_by_category.get(cat, 0) + 1
+        The model stays in 'importing' state until commit_import().
+        """
+        model_id = str(ObjectId())
         
-        # Create model document
-        model_doc = {
+        self.models_collection.insert_one({
             '_id': ObjectId(model_id),
             'modelId': model_id,
             'projectId': project_id,
-            'fileName': model_data['fileName'],
-            'modelData': model_data,
+            'fileName': header['fileName'],
+            'modelData': {key: value for key, value in header.items() if key != 'elements'},
+            'status': 'importing',
+            'importStats': {
+                'totalElements': 0,
+                'elementsWithGeometry': 0,
+                'elementsWithProperties': 0,
+                'elementsByCategory': {},
+                'dataSizeBytes': 0
+            },
             'importedAt': datetime.utcnow(),
             'viewerUrl': f"/projects/{project_id}/navisworks/{model_id}"
-        }
+        })
+        
+        return model_id
+    
+    def append_elements(self, model_id: str, elements) -> int:
+        """
+        Append elements (any iterable, e.g. a parsed NDJSON stream)
+        
+        Elements are written with unordered insert_many in batches of
+        INSERT_BATCH_SIZE, and the model statistics are updated in the same
+        single pass, so memory stays bounded by one batch.
+        """
+        model = self.models_collection.find_one({'modelId': model_id}, {'projectId': 1})
+        if not model:
+            raise ValueError(f"Model {model_id} not found")
+        project_id = model['projectId']
+        
+        added = 0
+        increments: Dict[str, int] = {}
+        batch = []
         
-        # Insert model
-        self.models_collection.insert_one(model_doc)
-        
-        # Insert elements separately for better querying
-        if elements:
-            element_docs = []
-            for el in elements:
-                element_docs.append({
-                    '_id': ObjectId(),
-                    'modelId': model_id,
-                    'projectId': project_id,
-                    'elementId': el['id'],
-                    'name': el.get('name', ''),
-                    'category': el.get('category', 'Unknown'),
-                    'path': el.get('path', ''),
-                    'elementData': el
-                })
+        for el in elements:
+            category = el.get('category', 'Unknown')
+            counters = {
+                'importStats.totalElements': 1,
+                'importStats.elementsWithGeometry': 1 if el.get('geometry') else 0,
+                'importStats.elementsWithProperties': 1 if el.get('properties') else 0,
+                f'importStats.elementsByCategory.{_category_field(category)}': 1,
+                'importStats.dataSizeBytes': len(json.dumps(el).encode('utf-8'))
+            }
+            for key, value in counters.items():
+                increments[key] = increments.get(key, 0) + value
+            
+            batch.append({
+                '_id': ObjectId(),
+                'modelId': model_id,
+                'projectId': project_id,
+                'elementId': el['id'],
+                'name': el.get('name', ''),
+                'category': category,
+                'path': el.get('path', ''),
+                'elementData': el
+            })
             
-            if element_docs:
-                self.elements_collection.insert_many(element_docs)
+            if len(batch) >= self.INSERT_BATCH_SIZE:
+                self.elements_collection.insert_many(batch, ordered=False)
+                added += len(batch)
+                batch = []
+        
+        if batch:
+            self.elements_collection.insert_many(batch, ordered=False)
+            added += len(batch)
         
-        # Calculate processing time
-        processing_time = time.time() - start_time
+        if increments:
+            self.models_collection.update_one({'modelId': model_id}, {'$inc': increments})
+        
+        return added
+    
+    def commit_import(self, model_id: str, start_time: Optional[float] = None) -> ModelImportResponse:
+        """Mark a chunked import as complete and build the import response"""
+        model = self.models_collection.find_one_and_update(
+            {'modelId': model_id},
+            {'$set': {'status': 'ready', 'importedAt': datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not model:
+            raise ValueError(f"Model {model_id} not found")
         
-        # Calculate data size (approximate)
-        data_size = len(json.dumps(model_data).encode('utf-8'))
+        stats = model['importStats']
+        processing_time = time.time() - start_time if start_time else 0.0
         
-        # Create response
-        response = ModelImportResponse(
+        return ModelImportResponse(
             modelId=model_id,
-            projectId=project_id,
-            fileName=model_data['fileName'],
-            elementsImported=len(elements),
-            fileSizeBytes=data_size,
-            importedAt=datetime.utcnow(),
+            projectId=model['projectId'],
+            fileName=model['fileName'],
+            elementsImported=stats['totalElements'],
+            fileSizeBytes=stats['dataSizeBytes'],
+            importedAt=model['importedAt'],
             statistics=ImportStatistics(
-                totalElements=len(elements),
-                elementsWithGeometry=elements_with_geometry,
-                elementsWithProperties=elements_with_properties,
-                elementsByCategory=elements_by_category,
+                totalElements=stats['totalElements'],
+                elementsWithGeometry=stats['elementsWithGeometry'],
+                elementsWithProperties=stats['elementsWithProperties'],
+                elementsByCategory={
+                    _category_name(field): count for field, count in stats['elementsByCategory'].items()
+                },
                 processingTime=processing_time,
-                dataSizeBytes=data_size
+                dataSizeBytes=stats['dataSizeBytes']
             ),
-            viewerUrl=f"/projects/{project_id}/navisworks/{model_id}",
-            warnings=warnings
+            viewerUrl=model['viewerUrl'],
+            warnings=[]
         )
-        
-        return response
     
     def get_models_by_project(self, project_id: str, page: int = 1, page_size: int = 20) -> Dict[str, Any]:
         """Get all models for a project"""
         skip = (page - 1) * page_size
         
-        cursor = self.models_collection.find(
-            {'projectId': project_id}
-        ).sort('importedAt', -1).skip(skip).limit(page_size)
+        # Chunked imports that were not committed yet are hidden
+        query = {'projectId': project_id, 'status': {'$ne': 'importing'}}
+        
+        cursor = self.models_collection.find(query).sort('importedAt', -1).skip(skip).limit(page_size)
         
-        total_count = self.models_collection.count_documents({'projectId': project_id})
+        total_count = self.models_collection.count_documents(query)
         
         models = []
         for doc in cursor:
@@ -192,7 +252,7 @@ class NavisworksService:
                 'fileName': doc['fileName'],
                 'importedAt': doc['importedAt'].isoformat(),
                 'viewerUrl': doc.get('viewerUrl'),
-                'elementsCount': len(doc.get('modelData', {}).get('elements', []))
+                'elementsCount': doc.get('importStats', {}).get('totalElements', 0)
             })
         
         return {
@@ -203,22 +263,37 @@ class NavisworksService:
             'totalPages': (total_count + page_size - 1) // page_size
         }
     
-    def get_model_by_id(self, model_id: str) -> Optional[Dict[str, Any]]:
-        """Get model by ID"""
+    def get_model_by_id(self, model_id: str, include_elements: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Get model by ID
+        
+        Elements are stored in the elements collection; they are read back
+        in import order into modelData['elements'] unless include_elements
+        is False (header only).
+        """
         doc = self.models_collection.find_one({'modelId': model_id})
         
         if not doc:
             return None
         
+        model_data = dict(doc['modelData'])
+        if include_elements:
+            model_data['elements'] = self.get_all_elements(model_id)
+        
         return {
             'modelId': doc['modelId'],
             'projectId': doc['projectId'],
             'fileName': doc['fileName'],
-            'modelData': doc['modelData'],
+            'modelData': model_data,
             'importedAt': doc['importedAt'].isoformat(),
             'viewerUrl': doc.get('viewerUrl')
         }
     
+    def get_all_elements(self, model_id: str) -> List[Dict[str, Any]]:
+        """All elements of a model in import order (ObjectIds are increasing)"""
+        cursor = self.elements_collection.find({'modelId': model_id}, {'elementData': 1}).sort('_id', 1)
+        return [doc['elementData'] for doc in cursor]
+    
     def get_elements(
         self, 
         model_id: str, 
@@ -290,16 +365,22 @@ class NavisworksService:
     
     def get_model_statistics(self, model_id: str) -> Dict[str, Any]:
         """Get model statistics"""
-        model = self.get_model_by_id(model_id)
+        model = self.models_collection.find_one(
+            {'modelId': model_id}, {'importStats': 1, 'modelData.statistics': 1}
+        )
         if not model:
             return None
         
-        stats = model.get('modelData', {}).get('statistics', {})
+        # Counted by append_elements - the client-supplied statistics only add the export duration
+        stats = model.get('importStats', {})
+        client_stats = model.get('modelData', {}).get('statistics', {})
         
         return {
             'totalElements': stats.get('totalElements', 0),
             'elementsWithGeometry': stats.get('elementsWithGeometry', 0),
             'elementsWithProperties': stats.get('elementsWithProperties', 0),
-            'elementsByCategory': stats.get('elementsByCategory', {}),
-            'duration': stats.get('duration')
+            'elementsByCategory': {
+                _category_name(field): count for field, count in stats.get('elementsByCategory', {}).items()
+            },
+            'duration': client_stats.get('duration')
         }
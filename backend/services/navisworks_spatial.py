@@ -0,0 +1,177 @@
+"""
+Navisworks Spatial Index - Packed R-tree over element bounding boxes
+فهرس مكاني لصناديق عناصر نافيسووركس
+
+A static R-tree built in one go from a NumPy array of boxes:
+- boxes sorted along a 3D Morton (Z-order) curve of their centres
+- every NODE_SIZE consecutive boxes form a node; parent boxes come from
+  np.minimum/maximum.reduceat, level by level up to the root
+- queries walk the tree level by level with vectorized overlap tests, so
+  a zone query touches O(log n + k) nodes and a broad-phase clash run
+  costs O(n log n + k) instead of comparing all pairs
+"""
+
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+NODE_SIZE = 4
+MORTON_BITS = 10
+CLASH_CHUNK = 8192
+
+
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    """Insert two zero bits between the low 10 bits of each value"""
+    values = values.astype(np.uint32) & 0x3FF
+    values = (values | (values << 16)) & 0x030000FF
+    values = (values | (values << 8)) & 0x0300F00F
+    values = (values | (values << 4)) & 0x030C30C3
+    values = (values | (values << 2)) & 0x09249249
+    return values
+
+
+def morton_order(boxes: np.ndarray) -> np.ndarray:
+    """Order of boxes along the Z-order curve of their centres"""
+    centres = (boxes[:, :3] + boxes[:, 3:]) / 2
+    low = centres.min(axis=0)
+    extent = centres.max(axis=0) - low
+    extent[extent == 0] = 1.0
+    cells = ((centres - low) / extent * ((1 << MORTON_BITS) - 1)).astype(np.uint32)
+    codes = _spread_bits(cells[:, 0]) | (_spread_bits(cells[:, 1]) << 1) | (_spread_bits(cells[:, 2]) << 2)
+    return np.argsort(codes, kind='stable')
+
+
+def _overlaps(boxes: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Row-wise inclusive overlap of boxes (n, 6) with query boxes (n, 6) or (6,)"""
+    return np.all(boxes[..., :3] <= query[..., 3:], axis=-1) & np.all(boxes[..., 3:] >= query[..., :3], axis=-1)
+
+
+class PackedRTree:
+    """
+    Static packed R-tree
+    شجرة R مضغوطة ثابتة
+
+    boxes: (n, 6) array of minX, minY, minZ, maxX, maxY, maxZ
+    ids: row id reported for each box (defaults to 0..n-1)
+    """
+
+    def __init__(self, boxes: np.ndarray, ids: Optional[np.ndarray] = None, node_size: int = NODE_SIZE):
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 6)
+        ids = np.arange(len(boxes)) if ids is None else np.asarray(ids)
+        self.node_size = node_size
+
+        order = morton_order(boxes) if len(boxes) else np.empty(0, dtype=np.int64)
+        self.ids = ids[order]
+        self.levels: List[np.ndarray] = [boxes[order]]
+        while len(self.levels[-1]) > 1:
+            level = self.levels[-1]
+            starts = np.arange(0, len(level), node_size)
+            self.levels.append(np.hstack([
+                np.minimum.reduceat(level[:, :3], starts, axis=0),
+                np.maximum.reduceat(level[:, 3:], starts, axis=0)
+            ]))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def boxes(self) -> np.ndarray:
+        """Leaf boxes in tree order (aligned with self.ids)"""
+        return self.levels[0]
+
+    def _children(self, nodes: np.ndarray, level: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Child positions of nodes at `level` and the index of their parent"""
+        children = (nodes[:, None] * self.node_size + np.arange(self.node_size)).ravel()
+        parents = np.repeat(np.arange(len(nodes)), self.node_size)
+        valid = children < len(self.levels[level - 1])
+        return children[valid], parents[valid]
+
+    def query(self, box: Iterable[float]) -> np.ndarray:
+        """
+        Ids of the boxes overlapping a query box (touching counts)
+        العناصر المتقاطعة مع صندوق البحث
+        """
+        query = np.asarray(box, dtype=np.float64)
+        if not len(self.ids):
+            return self.ids[:0]
+
+        nodes = np.zeros(1, dtype=np.int64)
+        for level in range(len(self.levels) - 1, -1, -1):
+            nodes = nodes[_overlaps(self.levels[level][nodes], query)]
+            if level:
+                nodes, _ = self._children(nodes, level)
+        return np.sort(self.ids[nodes])
+
+    def _node_pairs(self, tolerance: float) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Overlapping leaf position pairs (a < b) from a dual traversal
+        مسح مزدوج للشجرة مع نفسها
+
+        Pairs of nodes are tested level by level and only overlapping pairs
+        are expanded into their children, so the work follows the number of
+        nearby nodes instead of n².  Batches are split before expanding to
+        bound memory.
+        """
+        grow = np.array([-tolerance] * 3 + [tolerance] * 3)
+        top = len(self.levels) - 1
+        stack = [(top, np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64))]
+        while stack:
+            level, first, second = stack.pop()
+            boxes = self.levels[level]
+            keep = _overlaps(boxes[first] + grow, boxes[second])
+            first, second = first[keep], second[keep]
+            if not level:
+                keep = first < second
+                yield first[keep], second[keep]
+                continue
+
+            for start in range(0, len(first), CLASH_CHUNK):
+                a = first[start:start + CLASH_CHUNK]
+                b = second[start:start + CLASH_CHUNK]
+                offsets = np.arange(self.node_size)
+                child_a = (a[:, None, None] * self.node_size + offsets[:, None]).repeat(self.node_size, axis=2)
+                child_b = (b[:, None, None] * self.node_size + offsets[None, :]).repeat(self.node_size, axis=1)
+                child_a, child_b = child_a.ravel(), child_b.ravel()
+                size = len(self.levels[level - 1])
+                # عقدة مع نفسها: يكفي نصف الأزواج
+                valid = (child_a < size) & (child_b < size) & (child_a <= child_b)
+                stack.append((level - 1, child_a[valid], child_b[valid]))
+
+    def clash_candidates(
+        self,
+        tolerance: float = 0.0,
+        query_mask: Optional[np.ndarray] = None,
+        target_mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Broad-phase clash pairs (id_a, id_b) whose boxes overlap
+        أزواج التعارض المرشحة
+
+        Boxes are grown by `tolerance`.  The optional boolean masks (indexed
+        by id) restrict the first and second element of each pair, e.g. to
+        ducts against beams.  Each unordered pair is reported once.
+        """
+        if not len(self.ids):
+            empty = self.ids[:0]
+            return empty, empty
+
+        firsts, seconds = [self.ids[:0]], [self.ids[:0]]
+        for a, b in self._node_pairs(tolerance):
+            first, second = self.ids[a], self.ids[b]
+            if query_mask is not None or target_mask is not None:
+                in_query_a = np.ones(len(a), bool) if query_mask is None else query_mask[first]
+                in_query_b = np.ones(len(a), bool) if query_mask is None else query_mask[second]
+                in_target_a = np.ones(len(a), bool) if target_mask is None else target_mask[first]
+                in_target_b = np.ones(len(a), bool) if target_mask is None else target_mask[second]
+                forward = in_query_a & in_target_b
+                swap = ~forward & in_query_b & in_target_a
+                first, second = np.where(swap, second, first), np.where(swap, first, second)
+                keep = forward | swap
+                first, second = first[keep], second[keep]
+            firsts.append(first)
+            seconds.append(second)
+
+        first, second = np.concatenate(firsts), np.concatenate(seconds)
+        order = np.lexsort((second, first))
+        return first[order], second[order]
@@ -16,6 +16,8 @@ from datetime import datetime
 from typing import List, Dict, Optional
 import logging
 
+from repository import IndexedRepository, RecordStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -106,40 +108,50 @@ class Payment:
 class SubcontractorManager:
     """Subcontractor management system"""
     
-    def __init__(self):
-        self.subcontractors: List[Subcontractor] = []
-        self.contracts: List[SubcontractorContract] = []
-        self.work_progress: List[WorkProgress] = []
-        self.payments: List[Payment] = []
+    def __init__(self, store: Optional[RecordStore] = None):
+        self.subcontractors = IndexedRepository(
+            "subcontractors", Subcontractor, indexes=("specialty", "is_active"), store=store
+        )
+        self.contracts = IndexedRepository(
+            "subcontractor_contracts", SubcontractorContract,
+            indexes=("subcontractor_id", "project_id", "status"), store=store
+        )
+        self.work_progress = IndexedRepository(
+            "work_progress", WorkProgress, indexes=("contract_id",), store=store
+        )
+        self.payments = IndexedRepository(
+            "subcontractor_payments", Payment, indexes=("contract_id", "status"), store=store
+        )
         logger.info("SubcontractorManager initialized")
     
     def add_subcontractor(self, subcontractor: Subcontractor) -> Subcontractor:
         """Add new subcontractor"""
-        self.subcontractors.append(subcontractor)
+        self.subcontractors.add(subcontractor)
         logger.info(f"Added subcontractor: {subcontractor.name_en}")
         return subcontractor
     
     def create_contract(self, contract: SubcontractorContract) -> SubcontractorContract:
         """Create new contract"""
-        self.contracts.append(contract)
+        self.contracts.add(contract)
         logger.info(f"Created contract: {contract.contract_number}")
         return contract
     
     def record_progress(self, progress: WorkProgress) -> WorkProgress:
         """Record work progress"""
-        self.work_progress.append(progress)
+        self.work_progress.add(progress)
         
         # Update contract progress
-        contract = next((c for c in self.contracts if c.id == progress.contract_id), None)
+        contract = self.contracts.get(progress.contract_id)
         if contract:
             contract.progress_percentage = progress.progress_percentage
+            self.contracts.save(contract)
         
         logger.info(f"Recorded progress for contract ID: {progress.contract_id}")
         return progress
     
     def create_payment(self, contract_id: int, amount: float) -> Payment:
         """Create payment"""
-        contract = next((c for c in self.contracts if c.id == contract_id), None)
+        contract = self.contracts.get(contract_id)
         if not contract:
             raise ValueError(f"Contract {contract_id} not found")
         
@@ -147,7 +159,7 @@ class SubcontractorManager:
         net = amount - retention
         
         payment = Payment(
-            id=len(self.payments) + 1,
+            id=self.payments.next_id(),
             payment_number=f"PAY-{datetime.now().year}-{len(self.payments) + 1:04d}",
             contract_id=contract_id,
             amount=amount,
@@ -155,30 +167,31 @@ class SubcontractorManager:
             net_amount=net
         )
         
-        self.payments.append(payment)
+        self.payments.add(payment)
         contract.total_paid += net
+        self.contracts.save(contract)
         
         logger.info(f"Created payment: {payment.payment_number}")
         return payment
     
     def get_performance_report(self, subcontractor_id: int) -> Dict:
         """Get subcontractor performance report"""
-        contracts = [c for c in self.contracts if c.subcontractor_id == subcontractor_id]
+        contracts = self.contracts.find(subcontractor_id=subcontractor_id)
         
         return {
             "subcontractor_id": subcontractor_id,
             "total_contracts": len(contracts),
-            "active_contracts": len([c for c in contracts if c.status == ContractStatus.ACTIVE]),
-            "completed_contracts": len([c for c in contracts if c.status == ContractStatus.COMPLETED]),
+            "active_contracts": self.contracts.count(subcontractor_id=subcontractor_id, status=ContractStatus.ACTIVE),
+            "completed_contracts": self.contracts.count(subcontractor_id=subcontractor_id, status=ContractStatus.COMPLETED),
             "total_value": sum(c.contract_value for c in contracts),
             "average_progress": sum(c.progress_percentage for c in contracts) / len(contracts) if contracts else 0
         }
 
 
 # Flask integration
-def init_subcontractors(app):
+def init_subcontractors(app, store: Optional[RecordStore] = None):
     """Initialize subcontractors module"""
-    sm = SubcontractorManager()
+    sm = SubcontractorManager(store)
     app.config['SUBCONTRACTOR_MANAGER'] = sm
     
     @app.route('/api/subcontractors/list')
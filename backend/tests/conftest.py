@@ -3,14 +3,30 @@ Pytest Configuration and Fixtures
 Common test fixtures for all tests
 """
 
-import pytest
+import atexit
+import os
+import shutil
 import sys
+import tempfile
 from pathlib import Path
 
+import pytest
+
 # Add backend to path
 backend_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_dir))
 
+# الاختبارات تعمل على نسخة مؤقتة من قاعدة البيانات - لا تُعدَّل الملفات المحفوظة في المستودع
+TEST_ROOT = Path(tempfile.mkdtemp(prefix='noufal-tests-'))
+atexit.register(shutil.rmtree, TEST_ROOT, ignore_errors=True)
+TEST_DATABASE = TEST_ROOT / 'noufal.db'
+shutil.copyfile(backend_dir / 'database' / 'noufal.db', TEST_DATABASE)
+os.environ['DATABASE_PATH'] = str(TEST_DATABASE)
+os.environ['PRIMAVERA_DATABASE_PATH'] = str(TEST_ROOT / 'primavera_magic.db')
+os.environ['CACHE_DIR'] = str(TEST_ROOT / 'cache')
+os.environ['UPLOAD_FOLDER'] = str(TEST_ROOT / 'uploads')
+os.environ['DATABASE_URL'] = f"sqlite:///{TEST_ROOT / 'erp.db'}"
+
 from app import app as flask_app
 from config import TestingConfig
 
@@ -24,6 +40,12 @@ def app():
     yield flask_app
 
 
+@pytest.fixture
+def noufal_db():
+    """مسار النسخة المؤقتة من قاعدة بيانات نوفل"""
+    return str(TEST_DATABASE)
+
+
 @pytest.fixture
 def client(app):
     """Create a test client for the Flask app"""
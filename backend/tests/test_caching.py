@@ -0,0 +1,289 @@
+"""
+Test the bounded in-memory cache and the cached decorator
+"""
+
+import fnmatch
+import threading
+import time
+
+import pytest
+
+from caching import CacheManager, InMemoryCache, RedisCache, cached
+
+
+def test_lru_evicts_least_recently_used():
+    cache = InMemoryCache(max_entries=3)
+    for key in 'abc':
+        cache.set(key, key)
+    cache.get('a')
+    cache.set('d', 'd')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 'a' and cache.get('d') == 'd'
+    stats = cache.get_stats()
+    assert stats['total_keys'] == 3
+    assert stats['evictions'] == 1
+
+
+def test_lfu_evicts_least_frequently_used():
+    cache = InMemoryCache(max_entries=3, eviction_policy='lfu')
+    for key in 'abc':
+        cache.set(key, key)
+    for _ in range(3):
+        cache.get('a')
+    cache.get('b')
+    cache.set('d', 'd')
+
+    assert cache.get('c') is None
+    assert cache.get('a') == 'a' and cache.get('b') == 'b'
+
+
+def test_lfu_set_never_evicts_the_new_key():
+    cache = InMemoryCache(max_bytes=1200, eviction_policy='lfu')
+    cache.set('a', 'x' * 300)
+    cache.set('b', 'x' * 300)
+    for _ in range(3):
+        cache.get('a')
+        cache.get('b')
+
+    # 'new' is the only key with frequency 1 - the victim must come from a higher bucket
+    assert cache.set('new', 'x' * 500) is True
+    assert cache.get('new') == 'x' * 500
+    assert cache.get_stats()['memory_bytes'] <= 1200
+    assert (cache.get('a') is None) != (cache.get('b') is None)
+
+    assert InMemoryCache(max_entries=0).set('k', 1) is False
+
+
+def test_max_bytes_and_memory_accounting():
+    cache = InMemoryCache(max_bytes=2000)
+    for index in range(20):
+        cache.set(f'k{index}', 'x' * 300)
+
+    stats = cache.get_stats()
+    assert 0 < stats['memory_bytes'] <= 2000
+    assert stats['evictions'] > 0
+    assert cache.get('k19') is not None
+    assert cache.set('huge', 'x' * 5000) is False
+
+    cache.clear()
+    assert cache.get_stats()['memory_bytes'] == 0
+
+
+def test_expired_entries_are_purged_from_the_heap():
+    cache = InMemoryCache()
+    cache.set('short', 1, ttl=0.05)
+    cache.set('long', 2, ttl=60)
+    cache.set('forever', 3)
+    time.sleep(0.1)
+
+    cache.cleanup_expired()
+    stats = cache.get_stats()
+    assert stats['total_keys'] == 2
+    assert stats['expirations'] == 1
+    assert cache.get('long') == 2
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        InMemoryCache(eviction_policy='fifo')
+
+
+def test_cached_decorator_uses_dedicated_cache_manager():
+    manager = CacheManager(use_redis=False, memory_config={'max_entries': 2, 'eviction_policy': 'lfu'})
+    calls = []
+
+    @cached(ttl=60, key_prefix='square', cache_manager=manager)
+    def square(value):
+        calls.append(value)
+        return value * value
+
+    assert square(3) == 9 and square(3) == 9
+    assert calls == [3]
+    for value in range(5):
+        square(value)
+    assert manager.get_stats()['total_keys'] == 2
+
+
+def test_namespace_invalidation_keeps_other_namespaces():
+    manager = CacheManager(use_redis=False)
+    calls = []
+
+    @cached(ttl=60, key_prefix='boq_analysis', cache_manager=manager,
+            namespace=lambda project_id, item: f'project-{project_id}')
+    def analyze(project_id, item):
+        calls.append((project_id, item))
+        return f'{project_id}:{item}'
+
+    analyze(1, 'a'), analyze(2, 'a'), analyze(1, 'a'), analyze(2, 'a')
+    assert len(calls) == 2
+    assert analyze.cache_key(1, 'a').startswith('boq_analysis:v0:project-1:v0:')
+
+    assert manager.invalidate_namespace('boq_analysis:project-1') == 1
+    analyze(1, 'a'), analyze(2, 'a')
+    assert calls[-1] == (1, 'a') and len(calls) == 3
+
+    manager.invalidate_namespace('boq_analysis')
+    analyze(2, 'a')
+    assert len(calls) == 4
+
+
+def test_namespace_prefix_reuses_generations_and_indexes_keys(monkeypatch):
+    manager = CacheManager(use_redis=False)
+    lookups = []
+    get_generations = manager.cache.get_generations
+    monkeypatch.setattr(manager.cache, 'get_generations',
+                        lambda levels: lookups.append(levels) or get_generations(levels))
+
+    for index in range(50):
+        manager.set(manager.namespaced_key('reports:tenant-1', f'k{index}'), index)
+    manager.set(manager.namespaced_key('reports:tenant-2', 'k0'), 0)
+    manager.set('reports-summary', 'kept')
+    assert len(lookups) == 2
+
+    # الإبطال من نفس العملية يظهر فوراً رغم الحفظ المحلي للأجيال
+    assert manager.invalidate_namespace('reports:tenant-1') == 50
+    assert manager.namespace_prefix('reports:tenant-1') == 'reports:v0:tenant-1:v1:'
+    assert manager.get(manager.namespaced_key('reports:tenant-2', 'k0')) == 0
+
+    assert manager.invalidate_namespace('reports') == 1
+    assert manager.get('reports-summary') == 'kept'
+    assert manager.cache._prefix_keys == {}
+
+
+class _FakeRedis:
+    """Minimal Redis stand-in (string commands + SCAN); KEYS is deliberately missing"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+    def setex(self, key, ttl, value):
+        return self.set(key, value)
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+    def scan_iter(self, match, count):
+        return [key for key in list(self.data) if fnmatch.fnmatchcase(key, match)]
+
+    def unlink(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+
+def test_redis_namespace_invalidation_uses_scan():
+    manager = CacheManager(use_redis=False)
+    manager.cache = RedisCache.__new__(RedisCache)
+    manager.cache.redis_client = _FakeRedis()
+
+    manager.set(manager.namespaced_key('reports:tenant-1', 'x'), 1)
+    manager.set(manager.namespaced_key('reports:tenant-2', 'x'), 2)
+
+    assert manager.invalidate_namespace('reports:tenant-1') == 1
+    assert manager.get(manager.namespaced_key('reports:tenant-1', 'x')) is None
+    assert manager.get(manager.namespaced_key('reports:tenant-2', 'x')) == 2
+
+
+def test_single_flight_coalesces_concurrent_misses():
+    manager = CacheManager(use_redis=False)
+    calls = []
+    barrier = threading.Barrier(8)
+
+    @cached(ttl=60, key_prefix='stats', cache_manager=manager)
+    def expensive():
+        calls.append(1)
+        time.sleep(0.2)
+        return 42
+
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(expensive())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [42] * 8
+    assert len(calls) == 1
+
+
+def test_stale_while_revalidate_serves_old_value_and_refreshes_once():
+    manager = CacheManager(use_redis=False)
+    version = {'value': 1, 'calls': 0}
+
+    @cached(ttl=0.3, key_prefix='dashboard', cache_manager=manager, stale_ttl=60)
+    def dashboard():
+        version['calls'] += 1
+        time.sleep(0.05)
+        return version['value']
+
+    assert dashboard() == 1
+    version['value'] = 2
+    time.sleep(0.35)
+
+    assert [dashboard() for _ in range(5)] == [1] * 5
+    time.sleep(0.15)
+    assert dashboard() == 2
+    assert version['calls'] == 2
+
+
+def test_redis_lock_is_exclusive_and_token_checked():
+    manager = CacheManager(use_redis=False)
+    manager.cache = RedisCache.__new__(RedisCache)
+    manager.cache.redis_client = _FakeRedis()
+
+    token = manager.acquire_lock('report', timeout=5)
+    assert token is not None
+    assert manager.acquire_lock('report', timeout=5) is None
+    assert manager.release_lock('report', 'someone-else') is False
+    assert manager.release_lock('report', token) is True
+    assert manager.acquire_lock('report', timeout=5) is not None
+
+
+def test_memory_lock_has_a_single_winner(monkeypatch):
+    manager = CacheManager(use_redis=False)
+    barrier = threading.Barrier(16)
+    tokens = []
+    set_entry = manager.cache._set
+
+    def slow_set(*args):
+        time.sleep(0.01)  # widen the window between the expiry check and the insert
+        return set_entry(*args)
+
+    monkeypatch.setattr(manager.cache, '_set', slow_set)
+
+    def contend():
+        barrier.wait()
+        tokens.append(manager.acquire_lock('report', timeout=5))
+
+    threads = [threading.Thread(target=contend) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    winners = [token for token in tokens if token is not None]
+    assert len(winners) == 1
+    assert manager.release_lock('report', winners[0]) is True
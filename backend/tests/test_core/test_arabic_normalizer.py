@@ -0,0 +1,43 @@
+"""
+Tests for the shared Arabic normalization layer and the matchers using it
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from core.ArabicNormalizer import fold_arabic, normalize, prepare
+from core.RelationshipEngine import RelationshipEngine
+from core.SBCComplianceChecker import SBCComplianceChecker
+from core.RequestParser import RequestParser
+
+
+def test_normalize_folds_diacritics_hamza_and_taa_marbuta():
+    assert normalize('خَرَسـانَة') == normalize('خرسانه')
+    assert normalize('أعمدة') == normalize('اعمده')
+    assert normalize('إنشاء  مبنى') == 'انشاء مبني'
+    assert normalize('  Concrete   C30 ') == 'concrete c30'
+    assert normalize('٢٥٠') == '250'
+    assert fold_arabic('Abc إ') == 'Abc ا'
+
+
+def test_prepare_is_cached_and_indexes_tokens():
+    first = prepare('بلاط سيراميك')
+    assert prepare('بلاط سيراميك') is first
+    assert prepare(first) is first
+    assert first.contains('بلاط') and first.contains('سيراميك')
+    assert first.tokens == {'بلاط', 'سيراميك'}
+    assert prepare(None).text == ''
+
+
+def test_matchers_accept_spelling_variants():
+    engine = RelationshipEngine.__new__(RelationshipEngine)
+    assert engine._identify_activity_type({'description': 'صَبّ خرسانه للأساسات'}) == 'concrete'
+    assert engine._identify_activity_type({'description': 'أعمال الدهانات'}) == 'painting'
+
+    checker = SBCComplianceChecker.__new__(SBCComplianceChecker)
+    assert checker._identify_item_type({'description': 'اساسات خرسانية'}) == 'structural'
+
+    parser = RequestParser()
+    assert parser.parse('انشئ جدول زمني للمشروع')['intent']['name'] == 'create_schedule'
@@ -0,0 +1,61 @@
+"""
+Tests for the staged comprehensive BOQ analysis pipeline
+"""
+
+import pytest
+
+from backend.core.BOQAnalysisPipeline import BOQAnalysisPipeline
+from backend.benchmarks.boq_pipeline_benchmark import (
+    build_synthetic_items, build_systems, legacy_comprehensive_analysis, strip_timestamps
+)
+
+
+def _items_with_failures():
+    items = build_synthetic_items(120)
+    items[5]['quantity'] = 'n/a'
+    items[17]['rate'] = 'غير محدد'
+    items.append({'description': items[3]['description'], 'quantity': 4, 'unit': 'م3'})
+    return items
+
+
+def test_pipeline_matches_sequential_loop(noufal_db):
+    items = _items_with_failures()
+    expected = legacy_comprehensive_analysis(items, *build_systems(noufal_db))
+    actual = BOQAnalysisPipeline(*build_systems(noufal_db)).run(items)
+
+    assert 'timestamp' in actual
+    assert strip_timestamps(actual) == strip_timestamps(expected)
+    assert actual['summary']['failed_items'] == 2
+
+
+def test_process_pool_matches_inline(noufal_db):
+    items = _items_with_failures()
+    expected = BOQAnalysisPipeline(*build_systems(noufal_db)).run(items)
+
+    pipeline = BOQAnalysisPipeline(*build_systems(noufal_db), max_workers=2, chunk_size=16, parallel_threshold=1)
+    try:
+        actual = pipeline.run(items)
+    finally:
+        pipeline.shutdown()
+
+    assert strip_timestamps(actual) == strip_timestamps(expected)
+    # نتائج العمليات الفرعية تملأ كاش ItemAnalyzer في العملية الأم
+    assert len(pipeline.item_analyzer.analysis_cache) > 0
+
+
+def test_invalid_amount_propagates_like_the_endpoint(noufal_db):
+    items = build_synthetic_items(10)
+    items[4]['amount'] = 'abc'
+    with pytest.raises(ValueError):
+        BOQAnalysisPipeline(*build_systems(noufal_db)).run(items)
+
+
+def test_null_description_fails_only_that_item(noufal_db):
+    items = build_synthetic_items(10)
+    items[2]['description'] = None
+    del items[6]['description']
+    expected = legacy_comprehensive_analysis(items, *build_systems(noufal_db))
+    actual = BOQAnalysisPipeline(*build_systems(noufal_db)).run(items)
+
+    assert strip_timestamps(actual) == strip_timestamps(expected)
+    assert actual['summary']['failed_items'] == 1
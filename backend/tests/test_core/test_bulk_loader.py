@@ -0,0 +1,92 @@
+"""
+Tests for the bulk import engine behind the Primavera magic tools
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from core import BulkLoader
+from core.ConnectionPool import get_pool
+from core.primavera_magic_tools import ACTIVITY_COLUMNS, ACTIVITY_INDEXES, PrimaveraMagicToolsManager
+
+
+def _rows(db_path, sql):
+    with get_pool(db_path).read() as conn:
+        return conn.execute(sql).fetchall()
+
+
+def test_activities_are_coerced_and_errors_reported_per_row(tmp_path):
+    db_path = str(tmp_path / 'p6.db')
+    tools = PrimaveraMagicToolsManager(db_path)
+    activities = [
+        {'activity_id': 'A1', 'activity_name': 'Excavation', 'original_duration': '10',
+         'remaining_duration': 4, 'percent_complete': '60.5', 'project_id': 'P1'},
+        {'activity_id': 'A2', 'activity_name': 'Footings', 'original_duration': 'ten'},
+        {'activity_name': 'No id'},
+        {'activity_id': 'A3', 'activity_name': {'bad': 'type'}},
+        {'activity_id': 'A4', 'activity_name': 'Columns', 'original_duration': None, 'wbs_id': 'W2'},
+    ]
+    result = tools.sdk_tool.import_activities_from_excel(activities)
+
+    assert result['imported_count'] == 2 and result['total_count'] == 5
+    assert [(e['row'], e['activity_id']) for e in result['errors']] == [(1, 'A2'), (2, None), (3, 'A3')]
+    assert 'must be a number' in result['errors'][0]['error']
+    assert _rows(db_path, """
+        SELECT activity_id, project_id, wbs_id, original_duration, remaining_duration,
+               percent_complete, calendar_id
+        FROM primavera_activities ORDER BY activity_id
+    """) == [
+        ('A1', 'P1', 'WBS_ROOT', 10.0, 4.0, 60.5, 'Standard'),
+        ('A4', 'DEFAULT_PROJECT', 'W2', 0.0, 0.0, 0.0, 'Standard'),
+    ]
+
+
+def test_wbs_and_boq_defaults_follow_valid_row_order(tmp_path):
+    db_path = str(tmp_path / 'p6.db')
+    tools = PrimaveraMagicToolsManager(db_path)
+
+    wbs = tools.wbs_tool.create_wbs_from_excel([
+        {'wbs_id': 'W1', 'wbs_name': 'Site'},
+        {'wbs_name': 'Missing id'},
+        {'wbs_id': 'W2', 'wbs_name': 'Building', 'parent_wbs_id': 'W1', 'seq_num': '7', 'level': 2},
+        {'wbs_id': 'W3', 'wbs_name': 'Roof', 'wbs_short_name': 'RF'},
+    ], 'P1')
+    assert wbs['created_count'] == 3 and [e['row'] for e in wbs['errors']] == [1]
+    assert _rows(db_path, 'SELECT wbs_id, project_id, wbs_short_name, seq_num, level FROM primavera_wbs ORDER BY wbs_id') == [
+        ('W1', 'P1', 'W1', 1, 1), ('W2', 'P1', 'W2', 7, 2), ('W3', 'P1', 'RF', 3, 1),
+    ]
+
+    boq = tools.boq_tool.import_boq_as_resources([
+        {'item_id': 7, 'description': 'Concrete', 'unit': 'm3', 'rate': '450'},
+        {'description': 'Rebar', 'rate': 'n/a'},
+        {'description': 'Blockwork', 'rate': 85},
+    ], 'P1')
+    assert boq['imported_count'] == 2 and boq['errors'][0]['item'] == 'Rebar'
+    assert _rows(db_path, 'SELECT resource_id, resource_type, unit_of_measure, unit_price FROM primavera_resources ORDER BY resource_id') == [
+        ('BOQ_2', 'Material', 'LS', 85.0), ('BOQ_7', 'Material', 'm3', 450.0),
+    ]
+
+
+def test_large_loads_use_batches_and_rebuild_indexes(tmp_path, monkeypatch):
+    monkeypatch.setattr(BulkLoader, 'INDEX_REBUILD_THRESHOLD', 500)
+    db_path = str(tmp_path / 'p6.db')
+    tools = PrimaveraMagicToolsManager(db_path)
+    activities = [
+        {'activity_id': f'A{i:05d}', 'activity_name': f'Activity {i}', 'project_id': f'P{i % 3}',
+         'original_duration': str(i % 20)}
+        for i in range(1200)
+    ]
+
+    report = BulkLoader.bulk_load(db_path, 'primavera_activities', ACTIVITY_COLUMNS, activities,
+                                  indexes=ACTIVITY_INDEXES, batch_size=250)
+    assert (report.loaded, report.batches, report.indexes_rebuilt) == (1200, 5, True)
+    assert report.rows_per_second > 0
+
+    indexes = {row[0] for row in _rows(db_path, "SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'idx_primavera_activities_project', 'idx_primavera_activities_wbs'} <= indexes
+    assert _rows(db_path, "SELECT COUNT(*) FROM primavera_activities WHERE project_id = 'P1'") == [(400,)]
+
+    result = tools.sdk_tool.import_activities_from_excel(activities[:10])
+    assert result['imported_count'] == 10 and result['rows_per_second'] > 0
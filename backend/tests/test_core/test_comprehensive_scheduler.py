@@ -0,0 +1,144 @@
+"""
+Tests for the ComprehensiveScheduler network core
+"""
+
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from core.ComprehensiveScheduler import ComprehensiveScheduler, CircularDependencyError
+
+
+@pytest.fixture
+def scheduler(noufal_db):
+    return ComprehensiveScheduler(noufal_db)
+
+
+def _legacy_dates(scheduler, activities, start_date):
+    """الحساب الأصلي: FS بدون تأخير بترتيب طوبولوجي"""
+    known = {activity['id'] for activity in activities}
+    done = {}
+    pending = list(activities)
+    while pending:
+        for activity in list(pending):
+            predecessors = activity.get('predecessors', [])
+            if all(pred in done for pred in predecessors if pred in known):
+                if not predecessors:
+                    early_start = start_date
+                else:
+                    max_finish = max([start_date] + [done[pred][1] for pred in predecessors if pred in done])
+                    early_start = scheduler._get_next_work_day(max_finish)
+                done[activity['id']] = (early_start, scheduler._add_work_days(early_start, activity['duration']))
+                pending.remove(activity)
+    return {
+        aid: (start.strftime('%Y-%m-%d'), finish.strftime('%Y-%m-%d'))
+        for aid, (start, finish) in done.items()
+    }
+
+
+def _random_network(count, seed, durations=None):
+    rng = random.Random(seed)
+    activities = []
+    for i in range(count):
+        earlier = [act['id'] for act in activities[max(0, i - 8):i]]
+        activities.append({
+            'id': f'A{i}',
+            'duration': rng.choice(durations) if durations else rng.randint(1, 12),
+            'predecessors': rng.sample(earlier, rng.randint(0, min(3, len(earlier))))
+        })
+    rng.shuffle(activities)
+    return activities
+
+
+def test_fs_dates_match_legacy_calculation(scheduler):
+    activities = _random_network(300, seed=11)
+    expected = _legacy_dates(scheduler, activities, datetime(2025, 1, 2))
+
+    schedule = scheduler.generate_schedule([dict(a) for a in activities], '2025-01-02')
+    actual = {a['id']: (a['start_date'], a['finish_date']) for a in schedule['activities']}
+    assert actual == expected
+
+    position = {a['id']: i for i, a in enumerate(schedule['activities'])}
+    for activity in schedule['activities']:
+        assert all(position[pred] < position[activity['id']] for pred in activity['predecessors'])
+
+
+@pytest.mark.parametrize('durations', [(0.5, 1.5, 2.5, 3.25), (0, 1, 2)])
+@pytest.mark.parametrize('start', ['2025-01-02', '2025-01-05'])  # 5 يناير ليس يوم عمل في التقويم
+def test_fractional_and_zero_durations_match_legacy(scheduler, durations, start):
+    start_date = datetime.strptime(start, '%Y-%m-%d')
+    for seed in range(20):
+        activities = _random_network(60, seed, durations)
+        activities[7]['predecessors'] = activities[7]['predecessors'] + ['GHOST']
+        expected = _legacy_dates(scheduler, activities, start_date)
+
+        network, _ = scheduler._build_network(activities)
+        ordered = scheduler._topological_sort(activities, network)
+        scheduled = scheduler._calculate_dates([dict(a) for a in ordered], start_date, {}, network)
+        actual = {a['id']: (a['start_date'], a['finish_date']) for a in scheduled}
+        assert actual == expected, f'seed {seed}'
+
+
+def test_link_types_and_lags(scheduler):
+    activities = [
+        {'id': 'A', 'duration': 5},
+        {'id': 'B', 'duration': 4, 'predecessors': [{'id': 'A', 'type': 'SS', 'lag': 2}]},
+        {'id': 'C', 'duration': 3, 'predecessors': [{'id': 'A', 'type': 'FF', 'lag': 1}]},
+        {'id': 'D', 'duration': 2, 'predecessors': [{'id': 'B', 'type': 'FS', 'lag': 3}]},
+        {'id': 'E', 'duration': 10, 'predecessors': [{'id': 'A', 'type': 'FF'}]},
+    ]
+    start = datetime(2025, 1, 4)
+    schedule = scheduler.generate_schedule(activities, start.strftime('%Y-%m-%d'))
+    dates = {a['id']: (a['start_date'], a['finish_date']) for a in schedule['activities']}
+
+    def offsets(early_start, early_finish):
+        return tuple(scheduler._add_work_days(start, o).strftime('%Y-%m-%d') for o in (early_start, early_finish))
+
+    assert dates['A'] == offsets(0, 5)
+    assert dates['B'] == offsets(2, 6)      # SS+2
+    assert dates['C'] == offsets(3, 6)      # FF+1
+    assert dates['D'] == offsets(9, 11)     # FS+3 بعد B
+    assert dates['E'] == offsets(0, 10)     # FF: لا يبدأ قبل بداية المشروع
+    assert {a['id'] for a in schedule['activities'] if a['is_critical']} == {'A', 'B', 'D'}
+
+
+def test_missing_predecessors_are_reported_not_dropped(scheduler):
+    activities = [
+        {'id': 'A', 'duration': 2},
+        {'id': 'B', 'duration': 3, 'predecessors': ['A', 'GHOST']},
+        {'id': 'C', 'duration': 1, 'predecessors': ['B']},
+    ]
+    schedule = scheduler.generate_schedule(activities, '2025-01-04')
+
+    assert [a['id'] for a in schedule['activities']] == ['A', 'B', 'C']
+    assert schedule['missing_predecessors'] == [{'activity_id': 'B', 'predecessor_id': 'GHOST'}]
+
+
+def test_cycle_is_reported_with_its_path(scheduler, client):
+    activities = [
+        {'id': 'A', 'duration': 2},
+        {'id': 'B', 'duration': 2, 'predecessors': ['A', 'D']},
+        {'id': 'C', 'duration': 2, 'predecessors': ['B']},
+        {'id': 'D', 'duration': 2, 'predecessors': ['C']},
+    ]
+    with pytest.raises(CircularDependencyError) as error:
+        scheduler.generate_schedule([dict(a) for a in activities], '2025-01-04')
+    assert error.value.cycle == ['B', 'C', 'D', 'B']
+
+    response = client.post('/api/generate-schedule', json={'activities': activities})
+    assert response.status_code == 400
+    assert response.get_json()['cycle'] == ['B', 'C', 'D', 'B']
+
+
+def test_large_network_is_fast(scheduler):
+    activities = _random_network(20_000, seed=3)
+    started = time.perf_counter()
+    schedule = scheduler.generate_schedule(activities, '2025-01-04')
+    assert time.perf_counter() - started < 5
+    assert len(schedule['activities']) == 20_000
@@ -0,0 +1,115 @@
+"""
+Tests for the shared SQLite connection pool
+"""
+
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from core import ConnectionPool
+from core.ConnectionPool import SQLitePool, get_pool
+from core.primavera_magic_tools import SQLMagicTool
+
+
+def _pool(tmp_path):
+    pool = SQLitePool(str(tmp_path / 'pool.db'))
+    with pool.write() as conn:
+        conn.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)')
+    return pool
+
+
+def test_write_commits_and_rolls_back(tmp_path):
+    pool = _pool(tmp_path)
+    with pool.write() as conn:
+        conn.execute("INSERT INTO items (name) VALUES ('a')")
+        with pool.write() as inner:
+            inner.execute("INSERT INTO items (name) VALUES ('b')")
+        assert conn.in_transaction
+
+    with pytest.raises(ValueError):
+        with pool.write() as conn:
+            conn.execute("INSERT INTO items (name) VALUES ('c')")
+            raise ValueError('rollback')
+
+    with pool.read() as conn:
+        assert [row[0] for row in conn.execute('SELECT name FROM items ORDER BY id')] == ['a', 'b']
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO items (name) VALUES ('d')")
+    pool.close()
+
+
+def test_readers_are_reused_and_see_writes(tmp_path):
+    pool = _pool(tmp_path)
+    for _ in range(20):
+        with pool.read() as conn:
+            conn.row_factory = sqlite3.Row
+            with pool.read() as nested:
+                assert nested is conn
+    with pool.read() as conn:
+        assert conn.row_factory is None
+
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(25):
+                with pool.write() as conn:
+                    conn.execute('INSERT INTO items (name) VALUES (?)', (f'{n}-{i}',))
+                with pool.read() as conn:
+                    conn.execute('SELECT COUNT(*) FROM items').fetchone()
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with pool.read() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 100
+    stats = pool.get_stats()
+    assert stats['connections_opened'] <= 1 + 4
+    assert stats['writes'] == 101
+    pool.close()
+
+
+def test_sql_magic_tool_uses_shared_pool(tmp_path):
+    db_path = str(tmp_path / 'primavera.db')
+    tool = SQLMagicTool(db_path)
+    with get_pool(db_path).write() as conn:
+        conn.execute('CREATE TABLE notes (body TEXT)')
+
+    assert tool.execute_query('INSERT INTO notes VALUES (?)', ('x',))['rows_affected'] == 1
+    result = tool.execute_query('SELECT body FROM notes')
+    assert result['results'] == [{'body': 'x'}]
+    assert tool.execute_query('SELECT missing FROM notes')['success'] is False
+    assert get_pool(db_path) is get_pool(str(tmp_path / '.' / 'primavera.db'))
+
+
+def _journal_mode(pool):
+    with pool.write() as conn:
+        return conn.execute('PRAGMA journal_mode').fetchone()[0]
+
+
+@pytest.mark.parametrize('setting, existing, new', [
+    ('', 'delete', 'wal'),     # الافتراضي: الملفات الجديدة فقط
+    ('1', 'wal', 'wal'),       # النشر: يشمل noufal.db الموجودة
+    ('0', 'delete', 'delete'),
+])
+def test_wal_setting(tmp_path, monkeypatch, setting, existing, new):
+    monkeypatch.setattr(ConnectionPool, 'SQLITE_WAL', setting)
+    existing_path = tmp_path / 'existing.db'
+    sqlite3.connect(existing_path).close()
+
+    pools = [SQLitePool(str(existing_path)), SQLitePool(str(tmp_path / 'new.db'))]
+    assert [_journal_mode(pool) for pool in pools] == [existing, new]
+    assert [pool.get_stats()['wal'] for pool in pools] == [existing == 'wal', new == 'wal']
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,71 @@
+"""
+Tests for single-pass streaming Excel ingestion
+"""
+
+import sys
+from pathlib import Path
+
+import openpyxl
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from core.ExcelIntelligence import ExcelIntelligence
+
+
+def _build_workbook(path, rows=250):
+    workbook = openpyxl.Workbook()
+    boq = workbook.active
+    boq.title = 'BOQ'
+    boq.append([None])
+    boq.append(['مشروع تجريبي'])
+    boq.append(['No', 'Description', 'Unit', 'Quantity', 'Rate', 'Amount'])
+    for index in range(rows):
+        if index % 50 == 7:
+            boq.append([None] * 6)
+        elif index % 50 == 9:
+            boq.append([index, 'Bad quantity row', 'm', 'n/a', 1, 1])
+        else:
+            boq.append([index, f'خرسانة مسلحة {index}', 'م3', index % 13 + 1, '150', None])
+
+    schedule = workbook.create_sheet('Schedule')
+    schedule.append(['Activity', 'Duration', 'Start', 'Finish', 'Predecessor'])
+    schedule.append(['Excavation', 5, None, None, None])
+    workbook.save(path)
+
+
+def test_streaming_matches_pandas_ingestion(tmp_path):
+    path = str(tmp_path / 'boq.xlsx')
+    _build_workbook(path)
+    intel = ExcelIntelligence()
+
+    legacy_discovery = intel._discover_with_pandas(path)
+    legacy_data = intel._extract_boq_data_pandas(path, legacy_discovery)
+
+    discovery = intel.discover_file_type(path)
+    data = intel._extract_boq_data(path, discovery)
+
+    for sheet in discovery['detected_sheets']:
+        assert sheet.pop('header_row') >= 0
+    assert discovery == legacy_discovery
+    assert data == legacy_data
+    assert data['total_items'] > 200
+
+
+def test_iter_boq_items_is_a_generator_with_progress(tmp_path, monkeypatch):
+    import core.ExcelIntelligence as module
+    monkeypatch.setattr(module, 'PROGRESS_EVERY', 100)
+
+    path = str(tmp_path / 'boq.xlsx')
+    _build_workbook(path, rows=500)
+    intel = ExcelIntelligence()
+    progress = []
+
+    items = intel.iter_boq_items(path, progress_callback=progress.append)
+    first = next(items)
+    assert first['sheet'] == 'BOQ'
+    assert first['amount'] == first['quantity'] * first['rate']
+
+    remaining = list(items)
+    assert len(remaining) + 1 == 480
+    assert [p['rows_read'] for p in progress[:-1]] == [100, 200, 300, 400, 500]
+    assert progress[-1]['items'] == 480
@@ -0,0 +1,144 @@
+"""
+Tests for the SQLite-backed background job queue
+"""
+
+import sys
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from core.JobQueue import JobQueue, JobStore, _execute_job
+from core.AnalysisJobs import JOB_HANDLERS, init_worker
+
+
+def _claimed(store, job_type='test'):
+    job_id = store.enqueue(job_type, {'value': 21})
+    job = store.claim_next('localhost:1')
+    assert job['job_id'] == job_id and job['payload'] == {'value': 21}
+    return job_id
+
+
+def test_job_lifecycle_and_progress(tmp_path):
+    store = JobStore(tmp_path / 'jobs.db')
+    job_id = _claimed(store)
+    seen = []
+
+    def handler(payload, progress):
+        progress(0.5, 'نصف الطريق', force=True)
+        seen.append(store.get(job_id)['progress'])
+        return {'answer': payload['value'] * 2}
+
+    _execute_job(store.db_path, job_id, handler, {'value': 21})
+
+    job = store.get(job_id, include_result=True)
+    assert seen == [0.5]
+    assert job['status'] == 'completed' and job['progress'] == 1
+    assert job['result'] == {'answer': 42}
+    assert store.claim_next('localhost:1') is None
+
+
+def test_cancel_queued_and_running_jobs(tmp_path):
+    store = JobStore(tmp_path / 'jobs.db')
+
+    queued = store.enqueue('test', {})
+    assert store.request_cancel(queued) == 'cancelled'
+    assert store.claim_next('localhost:1') is None
+
+    running = _claimed(store)
+
+    def handler(payload, progress):
+        store.request_cancel(running)
+        progress(0.2, force=True)
+        pytest.fail('progress should raise JobCancelled')
+
+    _execute_job(store.db_path, running, handler, {})
+    assert store.get(running)['status'] == 'cancelled'
+    assert store.request_cancel('missing') is None
+
+
+def test_failed_job_keeps_error(tmp_path):
+    store = JobStore(tmp_path / 'jobs.db')
+    job_id = _claimed(store)
+
+    def handler(payload, progress):
+        raise ValueError('bad input')
+
+    _execute_job(store.db_path, job_id, handler, {})
+    job = store.get(job_id)
+    assert job['status'] == 'failed'
+    assert job['error'].startswith('ValueError: bad input')
+
+
+def _double(payload, progress):
+    return {'answer': payload['value'] * 2}
+
+
+class _FlakyExecutor:
+    """Runs jobs inline; the first submit fails (e.g. a handler that cannot be sent)"""
+
+    def __init__(self):
+        self.submits = 0
+
+    def submit(self, fn, *args):
+        self.submits += 1
+        if self.submits == 1:
+            raise TypeError('cannot pickle handler')
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_dispatcher_survives_submit_errors(tmp_path, monkeypatch):
+    queue = JobQueue(tmp_path / 'jobs.db', {'double': _double}, max_workers=1, poll_interval=0.05)
+    monkeypatch.setattr(queue, '_new_executor', _FlakyExecutor)
+    try:
+        first = queue.submit('double', {'value': 1})
+        second = queue.submit('double', {'value': 21})
+
+        assert queue.wait(second, timeout=10)['status'] == 'completed'
+        assert queue.get_result(second)['result'] == {'answer': 42}
+        failed = queue.get(first)
+        assert failed['status'] == 'failed' and failed['error'].startswith('TypeError')
+        assert queue._dispatcher.is_alive()
+    finally:
+        queue.shutdown()
+
+
+def test_async_endpoint_matches_sync_response(client, tmp_path, monkeypatch):
+    import app as app_module
+    queue = JobQueue(
+        str(tmp_path / 'jobs.db'), JOB_HANDLERS, max_workers=1,
+        initializer=init_worker, initargs=({'db_path': app_module.db_path},)
+    )
+    monkeypatch.setattr(app_module, 'job_queue', queue)
+
+    body = {'items': [
+        {'description': 'خرسانة مسلحة للأعمدة', 'quantity': 12, 'unit': 'م3', 'amount': 1200, 'rate': 100},
+        {'description': 'حفر أساسات', 'quantity': 80, 'unit': 'م3', 'amount': 2400, 'rate': 30},
+    ]}
+    try:
+        response = client.post('/api/comprehensive-boq-analysis?async=1', json=body)
+        assert response.status_code == 202
+        job_id = response.get_json()['job_id']
+
+        assert queue.wait(job_id, timeout=120)['status'] == 'completed'
+        events = client.get(f'/api/jobs/{job_id}/events').get_data(as_text=True)
+        assert 'event: done' in events
+
+        result = client.get(f'/api/jobs/{job_id}/result').get_json()
+        expected = client.post('/api/comprehensive-boq-analysis', json=body).get_json()
+    finally:
+        queue.shutdown()
+
+    for payload in (result, expected):
+        payload.pop('timestamp')
+        for item in payload['analyzed_items']:
+            item['item_analysis'].pop('analysis_timestamp')
+    assert result == expected
+    assert client.get('/api/jobs/unknown').status_code == 404
@@ -0,0 +1,51 @@
+"""
+Tests for the Aho–Corasick keyword automaton
+"""
+
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from core.KeywordAutomaton import KeywordAutomaton
+
+
+PATTERNS = [('خرسانة', 9.5), ('خرسانة مسلحة', 9.5), ('سانة', 3.0), ('concrete', 8.0),
+            ('he', 1.0), ('she', 2.0), ('hers', 2.0), ('his', 1.5), ('بلاط', 8.0), ('بلاطات', 9.0)]
+
+
+def _naive_best(text):
+    matches = [(score, -rank, rank) for rank, (pattern, score) in enumerate(PATTERNS) if pattern in text]
+    return max(matches)[2] if matches else None
+
+
+def test_best_match_equals_naive_scan():
+    automaton = KeywordAutomaton()
+    for pattern, score in PATTERNS:
+        automaton.add(pattern, score=score)
+    automaton.build()
+
+    rng = random.Random(2)
+    alphabet = ['خرسانة', ' مسلحة', 'سانة', 'concrete', 'she', 'hers', 'his', 'بلاطات', 'ب', 'x', ' ']
+    for _ in range(2000):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 8)))
+        assert automaton.best_match(text) == _naive_best(text), text
+
+
+def test_find_all_reports_overlapping_patterns():
+    automaton = KeywordAutomaton()
+    for pattern, score in PATTERNS:
+        automaton.add(pattern, score=score)
+
+    found = [automaton.patterns[i] for i in automaton.find_all('ushers')]
+    assert found == ['he', 'she', 'hers']
+
+
+def test_empty_pattern_matches_any_text():
+    automaton = KeywordAutomaton()
+    automaton.add('', payload='always', score=1.0)
+    automaton.add('slab', payload='slab', score=5.0)
+
+    assert automaton.payloads[automaton.best_match('wall')] == 'always'
+    assert automaton.payloads[automaton.best_match('slab 20cm')] == 'slab'
@@ -0,0 +1,127 @@
+"""
+Tests for the in-memory productivity-rate index
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from core.ProductivityDatabase import ProductivityDatabase
+from core.ProductivityIndex import ProductivityIndex, RATE_FIELDS
+
+ROWS = [
+    ('صب الخرسانة', 'خرسانة', 10),
+    ('صب الخرسانة المسلحة', 'خرسانة مسلحة', 10),
+    ('حفر أساسات', 'أعمال ترابية', 9),
+    ('حفر خنادق', 'أعمال ترابية', 9),
+    ('Concrete_Pour', 'Concrete', 7),
+    ('concrete pour', 'CONCRETE', 8),
+    ('دهانات داخلية', 'تشطيبات', None),
+    ('لياسة', 'تشطيبات', 5),
+    ('لياسة', 'أعمال', 5),
+]
+
+QUERIES = [
+    ('خرسانة', None), ('خرسانة', 'مسلحة'), ('صب', 'خرسانة'), ('حفر', None), ('حفر', 'ترابية'),
+    ('concrete', None), ('CONCRETE', 'concrete'), ('concrete_pour', None), ('e%p', None), ('', None),
+    ('دهان', None), ('لياسة', None), ('لياسة', 'أعمال'), ('غير موجود', None), ('حفر', 'تشطيبات'), ('ة', ''),
+]
+
+
+def _create_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE productivity_rates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            activity_type VARCHAR(100) NOT NULL,
+            category VARCHAR(50) NOT NULL,
+            unit VARCHAR(20) NOT NULL,
+            rate_per_unit REAL NOT NULL,
+            crew_size INTEGER,
+            equipment_needed TEXT,
+            complexity_factor REAL DEFAULT 1.0,
+            weather_factor REAL DEFAULT 1.0,
+            priority INTEGER DEFAULT 5
+        )
+    ''')
+    conn.execute('CREATE INDEX idx_productivity_activity ON productivity_rates(activity_type, category)')
+    for index, (activity, category, priority) in enumerate(ROWS):
+        conn.execute(
+            'INSERT INTO productivity_rates (activity_type, category, unit, rate_per_unit, crew_size, '
+            'equipment_needed, complexity_factor, weather_factor, priority) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (activity, category, 'م3', 0.1 * (index + 1), index + 2, 'خلاطة', 1.1, 1.0, priority)
+        )
+    conn.commit()
+    conn.close()
+
+
+def _sql_rate(path, activity_type, category):
+    """الاستعلام الأصلي في get_rate"""
+    conn = sqlite3.connect(path)
+    if category:
+        row = conn.execute(f"""
+            SELECT {', '.join(RATE_FIELDS)} FROM productivity_rates
+            WHERE LOWER(activity_type) LIKE ? AND LOWER(category) LIKE ?
+            ORDER BY priority DESC LIMIT 1
+        """, (f'%{activity_type.lower()}%', f'%{category.lower()}%')).fetchone()
+    else:
+        row = conn.execute(f"""
+            SELECT {', '.join(RATE_FIELDS)} FROM productivity_rates
+            WHERE LOWER(activity_type) LIKE ?
+            ORDER BY priority DESC LIMIT 1
+        """, (f'%{activity_type.lower()}%',)).fetchone()
+    conn.close()
+    return dict(zip(RATE_FIELDS, row)) if row else None
+
+
+def test_find_matches_sql_like_queries(tmp_path):
+    path = str(tmp_path / 'rates.db')
+    _create_db(path)
+    index = ProductivityIndex(path)
+
+    for activity_type, category in QUERIES:
+        assert index.find(activity_type, category) == _sql_rate(path, activity_type, category), (activity_type, category)
+
+    conn = sqlite3.connect(path)
+    for activity_type in {row[0] for row in ROWS} | {'missing'}:
+        row = conn.execute(
+            f'SELECT {", ".join(RATE_FIELDS)} FROM productivity_rates WHERE activity_type = ? LIMIT 1',
+            (activity_type,)
+        ).fetchone()
+        assert index.get_exact(activity_type) == (dict(zip(RATE_FIELDS, row)) if row else None)
+    conn.close()
+
+    assert index.search('الخرسانه المسلحه')[0]['activity_type'] == 'صب الخرسانة المسلحة'
+
+
+def test_index_refreshes_when_table_changes(tmp_path):
+    path = str(tmp_path / 'rates.db')
+    _create_db(path)
+    index = ProductivityIndex(path, refresh_interval=0)
+    assert index.find('تركيب بلاط') is None
+
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO productivity_rates (activity_type, category, unit, rate_per_unit, crew_size, priority) "
+        "VALUES ('تركيب بلاط', 'تشطيبات', 'م2', 0.05, 3, 6)"
+    )
+    conn.commit()
+    conn.close()
+
+    assert index.find('تركيب بلاط')['rate_per_unit'] == 0.05
+    assert index.get_stats()['loads'] == 2
+
+
+def test_calculate_duration_batch_matches_single_calls(tmp_path):
+    path = str(tmp_path / 'rates.db')
+    _create_db(path)
+    db = ProductivityDatabase(path)
+    activities = [
+        {'activity_type': activity, 'quantity': quantity, 'unit': 'م3', 'category': category}
+        for quantity, (activity, category) in enumerate(QUERIES * 3, start=5)
+    ]
+
+    expected = [db.calculate_duration(a['activity_type'], a['quantity'], a['unit'], a['category']) for a in activities]
+    assert db.calculate_duration_batch(activities) == expected
@@ -0,0 +1,95 @@
+"""
+Tests for indexed rule matching in RelationshipEngine
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from core.RelationshipEngine import RelationshipEngine
+
+DESCRIPTIONS = [
+    'حفر أساسات', 'نجارة شدة القواعد', 'تسليح القواعد', 'صب خرسانة القواعد',
+    'عزل الأساسات', 'بناء بلوك', 'تمديدات سباكة', 'تمديدات كهرباء',
+    'لياسة داخلية', 'بلاط سيراميك', 'دهان الجدران', 'أعمال متنوعة',
+]
+
+
+def _activities(per_location, locations):
+    activities = []
+    for location in range(locations):
+        for i in range(per_location):
+            activities.append({
+                'id': f'L{location}-{i}',
+                'description': DESCRIPTIONS[i % len(DESCRIPTIONS)],
+                'duration': 1 + i % 4,
+                'location': f'Block {location}',
+            })
+    return activities
+
+
+def _legacy_edges(engine, activities):
+    """الروابط كما يولدها المسح الأصلي لكل نشاط وكل قاعدة"""
+    edges = []
+    for activity in activities:
+        rules = engine.relationship_rules.get(engine._identify_activity_type(activity), {})
+        for prereq in rules.get('prerequisites', []):
+            for other in activities:
+                if engine._identify_activity_type(other) == prereq['activity']:
+                    edges.append((other['id'], activity['id'], prereq['type'], prereq['lag']))
+        for succ in rules.get('successors', []):
+            for other in activities:
+                if engine._identify_activity_type(other) == succ['activity']:
+                    edges.append((activity['id'], other['id'], succ['type'], succ['lag']))
+    return edges
+
+
+def _edges(graph):
+    return [
+        (rel['from'], rel['to'], rel['type'], rel['lag'])
+        for node in graph.values() for rel in node['successors']
+    ]
+
+
+def test_all_pairs_matches_legacy_without_duplicates(tmp_path):
+    engine = RelationshipEngine(str(tmp_path / 'rel.db'), fan_out='all')
+    activities = _activities(24, 2)
+
+    legacy = _legacy_edges(engine, activities)
+    graph = engine.build_dependency_graph(activities)
+    edges = _edges(graph)
+
+    assert len(legacy) > len(set(legacy))
+    assert sorted(edges) == sorted(set(legacy))
+    for activity_id, node in graph.items():
+        assert len({(r['from'], r['type'], r['lag']) for r in node['predecessors']}) == len(node['predecessors'])
+
+
+def test_chain_strategy_links_within_location(tmp_path):
+    engine = RelationshipEngine(str(tmp_path / 'rel.db'), fan_out='chain')
+    activities = _activities(36, 3)
+    graph = engine.build_dependency_graph(activities)
+    edges = _edges(graph)
+
+    location = {a['id']: a['location'] for a in activities}
+    assert all(location[source] == location[target] for source, target, _, _ in edges)
+    # سلسلة الحفر في كل موقع، ثم أول نشاط نجارة بعد آخر حفر
+    assert ('L0-0', 'L0-12', 'FS', 0) in edges
+    assert ('L0-24', 'L0-1', 'FS', 0) in edges
+    assert len(edges) < len(_legacy_edges(engine, activities)) // 5
+    assert engine.detect_cycles() == []
+
+
+def test_auto_switches_to_chain_for_large_boqs(tmp_path):
+    engine = RelationshipEngine(str(tmp_path / 'rel.db'), auto_chain_threshold=5_000)
+    small = engine.build_dependency_graph(_activities(12, 2))
+    assert len(_edges(small)) == len(set(_legacy_edges(engine, _activities(12, 2))))
+
+    activities = _activities(200, 10)
+    started = time.perf_counter()
+    graph = engine.build_dependency_graph(activities)
+    assert time.perf_counter() - started < 5
+    assert len(graph) == 2000
+    assert len(_edges(graph)) < 4 * len(activities)
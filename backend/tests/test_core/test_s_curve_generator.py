@@ -0,0 +1,85 @@
+"""
+Tests for the vectorized S-curve engine
+"""
+
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from core.SCurveGenerator import SCurveGenerator
+
+
+def _reference_period_work(generator, activities, time_periods):
+    """The previous per-period × per-activity loop"""
+    results = []
+    for period in time_periods:
+        work, count = 0.0, 0
+        for activity in activities:
+            start = datetime.strptime(activity.get('start_date', period['start'].strftime('%Y-%m-%d')), '%Y-%m-%d')
+            finish = datetime.strptime(activity.get('finish_date', period['end'].strftime('%Y-%m-%d')), '%Y-%m-%d')
+            overlap = generator._calculate_overlap(start, finish, period['start'], period['end'])
+            if overlap > 0:
+                count += 1
+                work += (overlap / max(1, (finish - start).days)) * activity.get('duration', 1)
+        results.append((work, count))
+    return results
+
+
+@pytest.fixture
+def generator():
+    return SCurveGenerator(':memory:')
+
+
+@pytest.fixture
+def schedule():
+    rng = random.Random(4)
+    project_start = datetime(2025, 1, 1)
+    activities = []
+    for i in range(300):
+        start = project_start + timedelta(days=rng.randint(-5, 400))
+        finish = start + timedelta(days=rng.randint(0, 60))
+        activity = {'id': f'ACT-{i:03d}', 'duration': rng.randint(1, 60),
+                    'start_date': start.strftime('%Y-%m-%d'), 'finish_date': finish.strftime('%Y-%m-%d')}
+        activities.append(activity)
+    activities.append({'id': 'ACT-NODATE', 'duration': 5})
+    activities.append({'id': 'ACT-NOSTART', 'duration': 3, 'finish_date': '2025-03-10'})
+    return {'project_start': '2025-01-01', 'project_finish': '2026-02-15', 'activities': activities}
+
+
+@pytest.mark.parametrize('interval', ['daily', 'weekly', 'monthly'])
+def test_matches_reference_loop(generator, schedule, interval):
+    periods = generator._generate_time_periods(datetime(2025, 1, 1), datetime(2026, 2, 15), interval)
+    durations = [a.get('duration', 1) for a in schedule['activities']]
+
+    import numpy as np
+    work, counts = generator._distribute_over_periods(schedule['activities'], np.array(durations, dtype=float), periods)
+    reference = _reference_period_work(generator, schedule['activities'], periods)
+
+    assert counts.tolist() == [count for _, count in reference]
+    assert work.tolist() == pytest.approx([w for w, _ in reference])
+
+
+def test_monthly_periods_follow_calendar_months(generator):
+    periods = generator._generate_time_periods(datetime(2025, 1, 15), datetime(2025, 4, 10), 'monthly')
+
+    assert [(p['start'].strftime('%m-%d'), p['end'].strftime('%m-%d')) for p in periods] == [
+        ('01-15', '02-01'), ('02-01', '03-01'), ('03-01', '04-01'), ('04-01', '04-10')
+    ]
+
+
+def test_financial_curve_and_earned_value(generator, schedule):
+    schedule['activities'] = [a for a in schedule['activities'] if 'start_date' in a and 'finish_date' in a]
+    costs = {a['id']: 1000.0 for a in schedule['activities']}
+    curve = generator.generate_financial_s_curve(schedule, costs, 'monthly')
+
+    assert curve['project_info']['total_cost'] == 1000.0 * len(schedule['activities'])
+    assert curve['time_periods'][-1]['cumulative_cost'] <= curve['project_info']['total_cost'] + 0.01
+
+    evm = generator.calculate_earned_value(schedule, {'ACT-000': 50}, costs, data_date='2025-06-30')
+    assert evm['earned_value'] == 500.0
+    assert 0 < evm['planned_value'] < curve['project_info']['total_cost']
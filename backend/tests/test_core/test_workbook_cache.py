@@ -0,0 +1,111 @@
+"""
+Tests for the content-addressed parsed-workbook cache
+"""
+
+import shutil
+import sys
+from datetime import date, datetime, time
+from pathlib import Path
+
+import numpy as np
+import openpyxl
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from core.ExcelIntelligence import ExcelIntelligence
+from core.WorkbookCache import WorkbookCache
+
+
+def _build_boq(path, rows=120, label='خرسانة'):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = 'BOQ'
+    sheet.append(['Item', 'Description', 'Unit', 'Quantity', 'Rate', 'Amount'])
+    for index in range(rows):
+        sheet.append([index, f'{label} {index}', 'م3', index + 0.5, 120, None])
+    workbook.save(path)
+
+
+def test_hit_returns_identical_result_without_parsing(tmp_path, monkeypatch):
+    path = tmp_path / 'boq.xlsx'
+    _build_boq(path)
+    intel = ExcelIntelligence(WorkbookCache(tmp_path / 'cache'))
+
+    discovery, data = intel.ingest(str(path))
+    assert data['total_items'] == 120
+
+    # نفس المحتوى باسم مختلف - لا يُفتح ملف Excel
+    copy = tmp_path / 'renamed.xlsx'
+    shutil.copy(path, copy)
+    monkeypatch.setattr(intel, 'discover_file_type', lambda *_: pytest.fail('workbook was parsed again'))
+    cached_discovery, cached_data = intel.ingest(str(copy))
+
+    assert cached_data == data
+    assert list(cached_data) == list(data)
+    assert cached_discovery['file_path'] == str(copy)
+    cached_discovery['file_path'] = discovery['file_path']
+    assert cached_discovery == discovery
+
+    stats = intel.workbook_cache.get_stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['entries'] == 1
+
+
+def test_cache_survives_restart_and_evicts_lru(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    intel = ExcelIntelligence(WorkbookCache(cache_dir))
+    paths = []
+    for index in range(3):
+        path = tmp_path / f'boq{index}.xlsx'
+        _build_boq(path, rows=400, label=f'بند {index}')
+        intel.ingest(str(path))
+        paths.append(path)
+
+    entry_size = max(p.stat().st_size for p in cache_dir.glob('*.npz'))
+    restarted = WorkbookCache(cache_dir, max_bytes=entry_size * 2)
+    assert restarted.get_stats()['entries'] == 3
+
+    assert restarted.get(WorkbookCache.hash_file(paths[0])) is not None
+    restarted.put('f' * 64, {'file_type': 'unknown'}, {'type': 'generic', 'sheets': []})
+
+    stats = restarted.get_stats()
+    assert stats['evictions'] >= 1
+    assert stats['size_bytes'] <= entry_size * 2
+    assert restarted.get(WorkbookCache.hash_file(paths[0])) is not None
+    assert restarted.get(WorkbookCache.hash_file(paths[1])) is None
+
+
+def test_columns_round_trip_text_and_number_types(tmp_path):
+    cache = WorkbookCache(tmp_path / 'cache')
+    items = [
+        {'row_number': 2, 'description': 'حفر' * 500, 'quantity': 3, 'unit': 'م3', 'rate': 12.5,
+         'sheet': 'BOQ', 'amount': 37.5},
+        {'row_number': 3, 'description': 'x', 'quantity': 0, 'unit': '', 'rate': 0,
+         'sheet': 'Sheet 2', 'amount': 0},
+        {'row_number': 4, 'description': 'Concrete 🏗️ C35', 'quantity': 2.25, 'unit': 'm3',
+         'rate': 2 ** 60, 'sheet': 'BOQ', 'amount': 1e300},
+    ]
+    data = {'type': 'boq', 'items': items, 'total_items': 3, 'total_amount': 37.5}
+    cache.put('a' * 64, {'file_type': 'boq'}, data)
+
+    _, cached = cache.get('a' * 64)
+    assert cached == data
+    for cached_item, item in zip(cached['items'], items):
+        assert {k: type(v) for k, v in cached_item.items()} == {k: type(v) for k, v in item.items()}
+
+    # النص الطويل لا يضخم باقي الصفوف (العرض الثابت UCS-4 كان 3 × 1500 × 4 بايت)
+    with np.load(cache._path('a' * 64)) as arrays:
+        assert arrays['description.bytes'].nbytes == len(''.join(i['description'] for i in items).encode())
+
+
+def test_dates_round_trip_and_lossy_payloads_are_not_cached(tmp_path):
+    cache = WorkbookCache(tmp_path / 'cache')
+    data = {'type': 'generic', 'sheets': [{'name': 'Schedule', 'rows': [
+        ['Start', datetime(2025, 3, 1, 8, 30), date(2025, 3, 2), time(7, 15)],
+    ]}]}
+    cache.put('b' * 64, {'file_type': 'schedule'}, data)
+    assert cache.get('b' * 64) == ({'file_type': 'schedule'}, data)
+
+    assert cache.put('c' * 64, {'file_type': 'generic'}, {'type': 'generic', 'sheets': [(1, 2)]}) == 0
+    assert cache.put('d' * 64, {'file_type': 'generic'}, {'type': 'generic', 'cells': {1: 'A'}}) == 0
+    assert cache.get('c' * 64) is None and cache.get('d' * 64) is None
@@ -0,0 +1,164 @@
+"""
+Tests for the indexed, persistent repository behind the ERP managers
+"""
+
+import random
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from repository import RecordStore
+from procurement import (
+    ProcurementManager, PurchaseOrderItem, PurchaseRequestItem, Supplier, POStatus, PRStatus
+)
+from rfi_system import RFIManager, RFIPriority, RFIStatus
+from subcontractors import SubcontractorManager, SubcontractorContract, ContractStatus
+from design_execution import DesignExecutionManager
+
+
+def _store(tmp_path):
+    return RecordStore(database_url=f"sqlite:///{tmp_path / 'erp.db'}")
+
+
+def _supplier(supplier_id):
+    return Supplier(
+        id=supplier_id, code=f"SUP-{supplier_id:03d}", name_ar="مورد", name_en=f"Supplier {supplier_id}",
+        category="Steel", contact_person="", phone="", email="", address="", tax_number="",
+        payment_terms="Net 30", rating=float(supplier_id % 5)
+    )
+
+
+def _order(pm, supplier_id, project_id, quantity=10.0):
+    return pm.create_purchase_order(
+        pr_id=None, project_id=project_id, supplier_id=supplier_id,
+        items=[PurchaseOrderItem(material_id=1, material_name="Steel", quantity=quantity,
+                                 unit="Ton", unit_price=100.0, total_price=quantity * 100.0)],
+        delivery_date=datetime(2025, 3, 1)
+    )
+
+
+def test_indexes_follow_in_place_updates():
+    manager = RFIManager()
+    repo = manager.rfis
+    for i in range(6):
+        manager.create_rfi(1 + i % 2, 3, "Engineer", {"subject": f"Q{i}", "description": "?"})
+
+    assert repo.count(project_id=1) == 3
+    assert repo.counts("status") == {RFIStatus.DRAFT: 6}
+
+    manager.submit_rfi(3)
+    manager.respond_to_rfi(3, 10, "TO", {"response": "ok"})
+    assert [r.rfi_id for r in repo.find(project_id=1, status=RFIStatus.DRAFT)] == [1, 5]
+    assert repo.counts("status") == {RFIStatus.DRAFT: 5, RFIStatus.ANSWERED: 1}
+    assert repo.get(3).status is RFIStatus.ANSWERED
+    assert repo.next_id() == 7
+
+
+def test_rfi_list_filters_match_full_scan():
+    rng = random.Random(4)
+    manager = RFIManager()
+    for i in range(300):
+        rfi = manager.create_rfi(rng.randint(1, 5), 3, "Engineer", {
+            "subject": f"RFI {i}", "description": "clarify",
+            "priority": rng.choice([p.value for p in RFIPriority]),
+            "category": rng.choice(["design_conflict", "general_query", "material_substitution"]),
+        })
+        if rng.random() < 0.6:
+            manager.submit_rfi(rfi.rfi_id)
+
+    everything = list(manager.rfis)
+    for project_id in (None, 2):
+        for status in (None, RFIStatus.SUBMITTED):
+            for assigned_to in (None, 10):
+                expected = [
+                    r.rfi_id for r in everything
+                    if (not project_id or r.project_id == project_id)
+                    and (not status or r.status == status)
+                    and (not assigned_to or r.assigned_to == assigned_to)
+                ]
+                listed = manager.get_rfi_list(project_id=project_id, status=status, assigned_to=assigned_to)
+                assert [r["rfi_id"] for r in listed] == expected
+
+    assert manager.rfis.get(120).rfi_number.startswith(f"RFI-P{manager.rfis.get(120).project_id:03d}")
+
+
+def test_supplier_report_uses_maintained_counters():
+    pm = ProcurementManager()
+    for supplier_id in range(1, 4):
+        pm.add_supplier(_supplier(supplier_id))
+
+    orders = [_order(pm, supplier_id, project_id=1) for supplier_id in (1, 1, 2)]
+    for po in orders:
+        pm.confirm_purchase_order(po.id)
+    pm.record_delivery(orders[0].id, [{"material_id": 1, "quantity": 4}], 7, datetime(2025, 2, 20))
+    pm.record_delivery(orders[0].id, [{"material_id": 1, "quantity": 6}], 7, datetime(2025, 3, 9))
+    pm.record_delivery(orders[2].id, [{"material_id": 1, "quantity": 2}], 7, datetime(2025, 2, 1))
+
+    report = {row["supplier_id"]: row for row in pm.get_supplier_performance_report()}
+    assert (report[1]["total_orders"], report[1]["total_deliveries"]) == (2, 2)
+    assert report[1]["on_time_delivery_rate"] == 50.0
+    assert report[2]["on_time_delivery_rate"] == 100.0
+    assert report[3]["total_orders"] == 0
+
+    assert pm.purchase_orders.get(orders[0].id).status is POStatus.FULLY_DELIVERED
+    pending = pm.get_pending_deliveries(project_id=1)
+    assert [(p["po_number"], p["remaining_quantity"]) for p in pending] == [
+        (orders[1].po_number, 10.0), (orders[2].po_number, 8.0)
+    ]
+
+
+def test_managers_reload_from_store(tmp_path):
+    pm = ProcurementManager(_store(tmp_path))
+    pm.add_supplier(_supplier(1))
+    pr = pm.create_purchase_request(
+        project_id=7, requested_by_id=2, required_date=datetime(2025, 2, 1),
+        items=[PurchaseRequestItem(material_id=1, material_name="Cement", quantity=5, unit="Ton",
+                                   required_date=datetime(2025, 2, 1), project_id=7, estimated_price=300)]
+    )
+    po = _order(pm, 1, project_id=7)
+    pm.confirm_purchase_order(po.id)
+    pm.record_delivery(po.id, [{"material_id": 1, "quantity": 3}], 4, datetime(2025, 2, 2))
+
+    reloaded = ProcurementManager(_store(tmp_path))
+    assert reloaded.purchase_requests.get(pr.id) == pm.purchase_requests.get(pr.id)
+    restored = reloaded.purchase_orders.get(po.id)
+    assert restored.status is POStatus.PARTIAL_DELIVERY
+    assert restored.items[0].remaining_quantity == 7.0
+    assert reloaded.purchase_requests.find(project_id=7, status=PRStatus.DRAFT) == [pr]
+    assert reloaded.get_supplier_performance_report()[0]["on_time_delivery_rate"] == 100.0
+    assert reloaded.create_purchase_request(7, 2, [], datetime(2025, 2, 1)).id == pr.id + 1
+
+    sm = SubcontractorManager(_store(tmp_path))
+    sm.create_contract(SubcontractorContract(
+        id=1, contract_number="SC-1", subcontractor_id=5, subcontractor_name="MEP Co", project_id=7,
+        scope_of_work="MEP", contract_value=1000.0, start_date=datetime(2025, 1, 1),
+        end_date=datetime(2025, 6, 1), status=ContractStatus.ACTIVE
+    ))
+    sm.create_payment(1, 500.0)
+    assert SubcontractorManager(_store(tmp_path)).get_performance_report(5)["active_contracts"] == 1
+    assert SubcontractorManager(_store(tmp_path)).contracts.get(1).total_paid == 450.0
+
+    dm = DesignExecutionManager(_store(tmp_path))
+    package = dm.create_design_package(7, {
+        "discipline": "Structural", "title": "Foundations", "designer": 1, "designer_name": "Eng",
+    })
+    dm.submit_for_review(package.package_id)
+    dashboard = DesignExecutionManager(_store(tmp_path)).get_design_dashboard(7)
+    assert dashboard["design_packages"]["by_status"] == {"under_review": 1}
+
+
+def test_app_wiring_persists_records(app, client):
+    response = client.post('/api/rfi/create', json={
+        "project_id": 7, "submitted_by": 3, "submitted_by_name": "Engineer",
+        "rfi_data": {"subject": "Rebar spacing", "description": "?", "priority": "high"}
+    })
+    assert response.status_code == 200
+    rfi_number = response.get_json()["rfi"]["rfi_number"]
+    app.config['PROCUREMENT_MANAGER'].add_supplier(_supplier(41))
+
+    # مدراء جدد على نفس DATABASE_URL يرون ما حفظه التطبيق
+    store = RecordStore()
+    assert [r["rfi_number"] for r in RFIManager(store).get_rfi_list(project_id=7)] == [rfi_number]
+    assert ProcurementManager(store).suppliers.get(41).name_en == "Supplier 41"
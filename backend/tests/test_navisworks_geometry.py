@@ -0,0 +1,186 @@
+"""
+Tests for packed Navisworks geometry and vectorized validation
+"""
+
+import json
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+from flask import Flask, jsonify
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from middleware.navisworks_validation import validate_geometry, validate_model_import
+from services.navisworks_element_store import ModelElementStore
+from services.navisworks_geometry import GeometryBuffer, check_geometries, read_blob
+
+
+def _box_geometry(rng, with_extras=False):
+    x, y, z = (float(np.float32(rng.uniform(-500, 500))) for _ in range(3))
+    size = rng.uniform(0.5, 20)
+    vertices = []
+    for corner in range(8):
+        vertices += [x + size * (corner & 1), y + size * (corner >> 1 & 1), z + size * (corner >> 2 & 1)]
+    geometry = {
+        'vertices': [float(np.float32(v)) for v in vertices],
+        'indices': [0, 1, 2, 1, 3, 2, 4, 5, 6, 5, 7, 6],
+    }
+    if with_extras:
+        geometry['normals'] = [0.0, 0.0, 1.0] * 8
+        geometry['transform'] = [1.0, 0, 0, 0, 0, 1.0, 0, 0, 0, 0, 1.0, 0, x, 0, 0, 1.0]
+        geometry['vertexCount'] = 8
+        geometry['triangleCount'] = 4
+    return geometry
+
+
+def _elements(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {'id': f'g-{i}', 'name': f'Beam {i}', 'category': 'Beam', 'path': 'Level 1 / Beam',
+         'geometry': _box_geometry(rng, with_extras=i % 2 == 0)}
+        for i in range(count)
+    ]
+
+
+def test_vectorized_checks_match_single_validation():
+    good = _box_geometry(random.Random(1))
+    cases = [
+        good,
+        {'vertices': [0, 0], 'indices': []},
+        {'vertices': [0, 0, 0], 'indices': [0, 0]},
+        {'vertices': 'abc', 'indices': []},
+        {'indices': []},
+        {'vertices': [0, 0, 0], 'indices': [0, 0, 0], 'normals': [1, 0]},
+        {'vertices': [0, 0, 0], 'indices': [0, 0, 0], 'transform': [1, 0]},
+        {**good, 'indices': []},
+    ]
+    errors = dict(check_geometries(cases))
+    for position, geometry in enumerate(cases):
+        valid, error = validate_geometry(geometry)
+        assert errors.get(position) == error, position
+
+    # عمليات فحص إضافية لا يقوم بها الفحص الفردي
+    assert check_geometries([
+        good,
+        {'vertices': [0, 0, float('nan')], 'indices': [0, 0, 0]},
+        {'vertices': [0, 0, 0, 1, 1, 1], 'indices': [0, 1, 2]},
+        {'vertices': [0, 0, 0], 'indices': [0, -1, 0]},
+        {'vertices': [0, 0, 0], 'indices': [0, 'x', 0]},
+    ]) == [
+        (1, 'Vertices must be finite numbers'),
+        (2, 'Index out of range of the vertices'),
+        (3, 'Indices must be non-negative integers'),
+        (4, 'Geometry arrays must contain only numbers'),
+    ]
+
+
+def test_packed_geometry_round_trips_and_is_compact():
+    elements = _elements(400)
+    store = ModelElementStore('m1', 'p1')
+    store.add_elements(elements[:150])
+    store.add_elements(elements[150:])
+
+    for element in elements:
+        assert store.to_json(store.get(element['id'])) == element
+
+    summary = store.geometry.summary('g-3')
+    vertices = np.array(elements[3]['geometry']['vertices']).reshape(-1, 3)
+    assert summary['vertexCount'] == 8 and summary['triangleCount'] == 4
+    assert list(summary['boundingBox'].values()) == pytest_approx(list(vertices.min(0)) + list(vertices.max(0)))
+
+    list_bytes = sum(
+        sys.getsizeof(values) + 24 * len(values)
+        for element in elements for values in element['geometry'].values() if isinstance(values, list)
+    )
+    assert store.geometry.nbytes * 5 < list_bytes
+
+
+def pytest_approx(values):
+    import pytest
+    return pytest.approx(values, rel=1e-6)
+
+
+def test_quantized_vertices_stay_within_one_step():
+    elements = _elements(50, seed=3)
+    buffer = GeometryBuffer(quantize=True)
+    buffer.append([e['id'] for e in elements], [e['geometry'] for e in elements])
+
+    assert buffer.packed['vertices'].dtype == np.uint16
+    for element in elements:
+        original = np.array(element['geometry']['vertices']).reshape(-1, 3)
+        decoded = np.array(buffer.to_dict(element['id'])['vertices']).reshape(-1, 3)
+        step = (original.max(0) - original.min(0)) / 65535
+        assert np.all(np.abs(decoded - original) <= step + 1e-4)
+
+
+def test_invalid_batch_leaves_store_unchanged():
+    elements = _elements(10)
+    store = ModelElementStore('m1', 'p1')
+    broken = dict(elements[6], geometry={'vertices': [0, 0, 0], 'indices': [0, 1, 2]})
+    try:
+        store.add_elements(elements[:6] + [broken])
+    except ValueError as e:
+        assert 'g-6' in str(e)
+    else:
+        raise AssertionError('invalid geometry accepted')
+    assert len(store) == 0 and len(store.geometry) == 0
+
+
+def test_binary_geometry_endpoints(client):
+    elements = _elements(300)
+    response = client.post('/api/projects/p7/navisworks/import',
+                           json={'fileName': 'Frame.nwd', 'elements': elements})
+    model_id = response.get_json()['data']['modelId']
+    base = f'/api/projects/p7/navisworks/models/{model_id}'
+
+    blob = client.get(f'{base}/geometry')
+    assert blob.mimetype == 'application/octet-stream'
+    header, arrays = read_blob(blob.data)
+    assert header['elementIds'] == [e['id'] for e in elements]
+    assert arrays['vertices'].dtype == np.float32 and arrays['indices'].dtype == np.uint32
+    row = arrays['table'][4]
+    assert arrays['vertices'][row[0]:row[0] + row[1]].tolist() == elements[4]['geometry']['vertices']
+
+    json_size = len(client.get(base).data)
+    assert len(blob.data) * 3 < json_size
+    summary = client.get(f'{base}/elements/g-5?geometry=summary').get_json()['data']['geometry']
+    assert summary['vertexCount'] == 8 and 'vertices' not in summary
+
+    single_header, single = read_blob(client.get(f'{base}/elements/g-5/geometry').data)
+    assert single_header['elementIds'] == ['g-5']
+    assert single['vertices'].tolist() == elements[5]['geometry']['vertices']
+    assert client.get(f'{base}/elements/missing/geometry').status_code == 404
+
+    bad = dict(elements[0], id='bad', geometry={'vertices': [0, 0, 0], 'indices': [3, 0, 0]})
+    response = client.post('/api/projects/p7/navisworks/import?quantize=true',
+                           json={'fileName': 'Frame.nwd', 'elements': elements + [bad]})
+    assert response.status_code == 400
+
+    quantized = client.post('/api/projects/p7/navisworks/import?quantize=true',
+                            json={'fileName': 'Frame.nwd', 'elements': elements}).get_json()['data']
+    header, arrays = read_blob(client.get(f"/api/projects/p7/navisworks/models/{quantized['modelId']}/geometry").data)
+    assert header['encoding'] == 'uint16-quantized' and arrays['vertices'].dtype == np.uint16
+
+
+def test_import_decorator_validates_every_element():
+    app = Flask(__name__)
+
+    @app.route('/import', methods=['POST'])
+    @validate_model_import()
+    def import_route():
+        return jsonify({'success': True})
+
+    model = {
+        'fileName': 'A.nwd', 'title': 'A', 'units': 'Meters',
+        'boundingBox': {'minX': 0, 'minY': 0, 'minZ': 0, 'maxX': 1, 'maxY': 1, 'maxZ': 1},
+        'elements': _elements(40),
+    }
+    with app.test_client() as client:
+        assert client.post('/import', json=model).status_code == 200
+
+        model['elements'][35]['geometry']['indices'][0] = 99
+        response = client.post('/import', data=json.dumps(model), content_type='application/json')
+        assert response.status_code == 400
+        assert response.get_json()['elementIndex'] == 35
@@ -0,0 +1,120 @@
+"""
+Tests for the packed R-tree over Navisworks bounding boxes
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.navisworks_element_store import ModelElementStore
+from services.navisworks_spatial import PackedRTree
+
+FIELDS = ('minX', 'minY', 'minZ', 'maxX', 'maxY', 'maxZ')
+
+
+def _boxes(count, seed=11):
+    rng = np.random.default_rng(seed)
+    low = rng.uniform(0, 200, (count, 3))
+    size = rng.exponential(2.0, (count, 3))
+    return np.hstack([low, low + size])
+
+
+def _brute_overlaps(boxes, query):
+    return np.flatnonzero(np.all(boxes[:, :3] <= query[3:], axis=1) & np.all(boxes[:, 3:] >= query[:3], axis=1))
+
+
+def _brute_pairs(boxes, tolerance=0.0, first=None, second=None):
+    grown = boxes + np.array([-tolerance] * 3 + [tolerance] * 3)
+    hit = np.all(grown[:, None, :3] <= boxes[None, :, 3:], axis=2) & np.all(grown[:, None, 3:] >= boxes[None, :, :3], axis=2)
+    pairs = set()
+    for a, b in zip(*np.nonzero(hit)):
+        if a == b or (first is not None and a not in first) or (second is not None and b not in second):
+            continue
+        if (b, a) in pairs:
+            continue
+        pairs.add((int(a), int(b)))
+    return pairs
+
+
+def test_range_queries_match_brute_force():
+    boxes = _boxes(5000)
+    tree = PackedRTree(boxes)
+    rng = np.random.default_rng(2)
+    for _ in range(50):
+        low = rng.uniform(-10, 200, 3)
+        query = np.concatenate([low, low + rng.uniform(0, 40, 3)])
+        assert tree.query(query).tolist() == _brute_overlaps(boxes, query).tolist()
+
+    assert PackedRTree(np.empty((0, 6))).query([0, 0, 0, 1, 1, 1]).tolist() == []
+    assert PackedRTree(boxes[:1]).query(boxes[0]).tolist() == [0]
+
+
+def test_clash_candidates_match_brute_force():
+    boxes = _boxes(1500, seed=4)
+    tree = PackedRTree(boxes)
+    for tolerance in (0.0, 0.5):
+        first, second = tree.clash_candidates(tolerance)
+        found = {tuple(sorted(pair)) for pair in zip(first.tolist(), second.tolist())}
+        assert len(found) == len(first)
+        assert found == {tuple(sorted(pair)) for pair in _brute_pairs(boxes, tolerance)}
+
+    ducts = np.zeros(len(boxes), bool)
+    ducts[::3] = True
+    beams = np.zeros(len(boxes), bool)
+    beams[::2] = True
+    first, second = tree.clash_candidates(0.0, ducts, beams)
+    found = set(zip(first.tolist(), second.tolist()))
+    expected = _brute_pairs(boxes, 0.0, set(np.flatnonzero(ducts)), set(np.flatnonzero(beams)))
+    assert {frozenset(p) for p in found} == {frozenset(p) for p in expected}
+    assert all(ducts[a] and beams[b] for a, b in found)
+
+
+def test_store_boxes_fall_back_to_transformed_geometry(client):
+    rng = random.Random(8)
+    elements = []
+    for i, box in enumerate(_boxes(400, seed=9)):
+        element = {'id': f's-{i}', 'name': f'Part {i}', 'category': ('Duct', 'Beam')[i % 2], 'path': 'L1'}
+        if i % 4:
+            element['boundingBox'] = dict(zip(FIELDS, box.tolist()))
+        else:
+            # صندوق محلي حول الأصل مع مصفوفة إزاحة (column-major)
+            half = (box[3:] - box[:3]) / 2
+            centre = (box[3:] + box[:3]) / 2
+            corners = [[sx * half[0], sy * half[1], sz * half[2]] for sx in (-1, 1) for sy in (-1, 1) for sz in (-1, 1)]
+            element['geometry'] = {
+                'vertices': [float(v) for corner in corners for v in corner],
+                'indices': [0, 1, 2],
+                'transform': [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, *centre.tolist(), 1],
+            }
+        elements.append(element)
+    rng.shuffle(elements)
+
+    store = ModelElementStore('m1', 'p1')
+    store.add_elements(elements)
+    rows, boxes = store.element_boxes()
+    assert len(rows) == 400
+    expected = {e['id']: _boxes(400, seed=9)[int(e['id'][2:])] for e in elements}
+    for row, box in zip(rows, boxes):
+        assert np.allclose(box, expected[store.elements[row]['id']], atol=1e-3)
+
+    response = client.post('/api/projects/p3/navisworks/import', json={'fileName': 'Plant.nwd', 'elements': elements})
+    base = f"/api/projects/p3/navisworks/models/{response.get_json()['data']['modelId']}/spatial"
+
+    zone = dict(minX=20, minY=20, minZ=20, maxX=80, maxY=80, maxZ=80)
+    page = client.get(f'{base}/range', query_string={**zone, 'category': 'Duct', 'pageSize': 1000,
+                                                       'geometry': 'none'}).get_json()['data']
+    query = np.array([zone[field] for field in FIELDS], dtype=float)
+    in_zone = {f's-{i}' for i in _brute_overlaps(_boxes(400, seed=9), query) if i % 2 == 0}
+    assert {e['id'] for e in page['elements']} == in_zone and page['totalCount'] == len(in_zone)
+    assert client.get(f'{base}/range?minX=0').status_code == 400
+
+    clashes = client.get(f'{base}/clashes?categoryA=Duct&categoryB=Beam&limit=100000').get_json()['data']
+    pairs = {(p['elementA'], p['elementB']) for p in clashes['pairs']}
+    ducts = set(range(0, 400, 2))
+    beams = set(range(1, 400, 2))
+    expected_pairs = {(f's-{a}', f's-{b}') for a, b in _brute_pairs(_boxes(400, seed=9), 0.0, ducts, beams)}
+    assert pairs == expected_pairs and clashes['totalCount'] == len(expected_pairs)
@@ -0,0 +1,165 @@
+"""
+Tests for the indexed Navisworks element store
+"""
+
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.navisworks_element_store import ModelElementStore
+
+CATEGORIES = ['Wall', 'Door', 'Window', 'Slab', 'Column', 'Beam']
+LEVELS = ['Level 1', 'Level 2', 'Roof']
+
+
+def _elements(count, seed=1):
+    rng = random.Random(seed)
+    elements = []
+    for i in range(count):
+        category = rng.choice(CATEGORIES)
+        element = {
+            'id': f'el-{i}',
+            'name': f'{category} {rng.choice(["Basic", "Curtain", "Steel", "Timber"])} {i}',
+            'category': category,
+            'path': f'Project / {rng.choice(LEVELS)} / {category}',
+        }
+        if i % 3 == 0:
+            element['geometry'] = {'vertices': [0, 0, 0], 'indices': [0, 0, 0]}
+        if i % 2 == 0:
+            element['properties'] = {'Mark': str(i)}
+        elements.append(element)
+    return elements
+
+
+def _legacy_filter(elements, category=None, search=None):
+    if category:
+        elements = [e for e in elements if e.get('category') == category]
+    if search:
+        search_lower = search.lower()
+        elements = [
+            e for e in elements
+            if search_lower in e.get('name', '').lower() or search_lower in e.get('path', '').lower()
+        ]
+    return elements
+
+
+def test_queries_match_full_scan():
+    elements = _elements(3000)
+    store = ModelElementStore('m1', 'p1')
+    assert store.add_elements(elements) == 3000
+
+    for category in (None, 'Door', 'Missing'):
+        for search in (None, 'steel', 'LEVEL 2 / w', 'ro', '1', 'no-such-text'):
+            expected = _legacy_filter(elements, category, search)
+            for page in (1, 3):
+                rows, total = store.query(category=category, search=search, page=page, page_size=50)
+                assert total == len(expected), (category, search)
+                rows = [store.to_json(row) for row in rows]
+                assert rows == expected[(page - 1) * 50:page * 50], (category, search, page)
+
+
+def test_statistics_and_lookup_come_from_indexes():
+    elements = _elements(90)
+    store = ModelElementStore('m1', 'p1')
+    store.add_elements(elements[:40])
+    store.add_elements(elements[40:] + elements[:5])
+
+    counts = {}
+    for element in elements:
+        counts[element['category']] = counts.get(element['category'], 0) + 1
+    assert store.statistics() == {
+        'totalElements': 90,
+        'elementsWithGeometry': 30,
+        'elementsWithProperties': 45,
+        'elementsByCategory': counts,
+    }
+    assert store.get('el-17') is elements[17]
+    assert store.get('missing') is None
+
+
+def test_page_and_search_cost_do_not_scale_with_model_size():
+    elements = _elements(60_000, seed=5)
+    store = ModelElementStore('big', 'p1')
+    store.add_elements(elements)
+    store.query(search='warm-up')
+
+    started = time.perf_counter()
+    for page in range(1, 200):
+        rows, _ = store.query(category='Beam', page=page, page_size=100)
+    rows, total = store.query(search='timber 5999', page=1)
+    assert time.perf_counter() - started < 0.5
+    expected = _legacy_filter(elements, search='timber 5999')
+    assert [store.to_json(row) for row in rows] == expected and total == len(expected)
+
+
+def test_api_routes_use_the_store(client):
+    model = {'fileName': 'Tower.nwd', 'elements': _elements(250)}
+    response = client.post('/api/projects/p9/navisworks/import', json=model)
+    assert response.status_code == 201
+    data = response.get_json()['data']
+    model_id = data['modelId']
+    assert data['statistics']['elementsWithGeometry'] == 84
+
+    base = f'/api/projects/p9/navisworks/models/{model_id}'
+    page = client.get(f'{base}/elements?category=Wall&search=basic&page=2&pageSize=5').get_json()['data']
+    expected = _legacy_filter(model['elements'], 'Wall', 'basic')
+    assert page['totalCount'] == len(expected)
+    assert page['elements'] == expected[5:10]
+
+    categories = client.get(f'{base}/categories').get_json()['data']
+    assert categories['categories'] == sorted(categories['counts'])
+    assert sum(categories['counts'].values()) == 250
+
+    assert client.get(f'{base}/elements/el-7').get_json()['data']['id'] == 'el-7'
+    assert client.delete(base).status_code == 200
+    assert client.get(f'{base}/elements/el-7').status_code == 404
+
+
+def _ndjson(elements):
+    return '\n'.join(json.dumps(element) for element in elements) + '\n'
+
+
+def test_chunked_import_is_resumable(client):
+    elements = _elements(120, seed=3)
+    base = '/api/projects/p5/navisworks/imports'
+    started = client.post(base, json={'fileName': 'Site.nwd', 'units': 'Meters'}).get_json()['data']
+    import_url = f"{base}/{started['importId']}"
+
+    for sequence, batch in enumerate((elements[:50], elements[50:100])):
+        response = client.post(f'{import_url}/elements?sequence={sequence}', data=_ndjson(batch),
+                               content_type='application/x-ndjson')
+        assert response.get_json()['data']['elementsAdded'] == 50
+
+    # إعادة إرسال دفعة مطبقة لا تكررها، والدفعة الخاطئة لا تغير الحالة
+    retry = client.post(f'{import_url}/elements?sequence=1', data=_ndjson(elements[50:100]),
+                        content_type='application/x-ndjson').get_json()['data']
+    assert retry['duplicate'] and retry['elementsReceived'] == 100
+    assert client.post(f'{import_url}/elements?sequence=5', data='').status_code == 409
+    bad = client.post(f'{import_url}/elements?sequence=2', data=_ndjson(elements[100:]) + '{broken\n',
+                      content_type='application/x-ndjson')
+    assert bad.status_code == 400
+    assert client.get(import_url).get_json()['data'] == {
+        'importId': started['importId'], 'modelId': started['modelId'],
+        'nextSequence': 2, 'elementsReceived': 100,
+    }
+
+    client.post(f'{import_url}/elements?sequence=2', data=_ndjson(elements[100:]),
+                content_type='application/x-ndjson')
+    committed = client.post(f'{import_url}/commit')
+    assert committed.status_code == 201
+    data = committed.get_json()['data']
+    assert data['modelId'] == started['modelId'] and data['elementsImported'] == 120
+
+    single = client.post('/api/projects/p5/navisworks/import',
+                         json={'fileName': 'Site.nwd', 'elements': elements}).get_json()['data']
+    assert data['statistics'] == single['statistics']
+
+    model = client.get(f"/api/projects/p5/navisworks/models/{data['modelId']}").get_json()['data']
+    assert model['units'] == 'Meters' and model['elements'] == elements
+    assert client.get(import_url).status_code == 404
+    listed = client.get('/api/projects/p5/navisworks/models').get_json()['data']['models']
+    assert {m['elementsCount'] for m in listed} == {120}
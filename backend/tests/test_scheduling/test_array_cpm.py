@@ -0,0 +1,70 @@
+"""
+Tests for the array-backed CPM engine
+"""
+
+from datetime import datetime
+
+import pytest
+
+from backend.data.activity_breakdown_rules import LogicType
+from backend.scheduling.cpm_engine import CPMEngine, ScheduleActivity
+from backend.scheduling.array_cpm import ArrayCPMEngine
+from backend.benchmarks.cpm_benchmark import build_synthetic_network, compare_results
+
+
+def _small_network() -> CPMEngine:
+    cpm = CPMEngine(datetime(2025, 1, 1))
+    for aid, duration in [('A', 5), ('B', 3), ('C', 4), ('D', 2), ('E', 6)]:
+        cpm.add_activity(ScheduleActivity(activity_id=aid, name=aid, duration=duration))
+    cpm.add_relationship('A', 'B', LogicType.FS, 0)
+    cpm.add_relationship('A', 'C', LogicType.SS, 2)
+    cpm.add_relationship('B', 'D', LogicType.FF, 1)
+    cpm.add_relationship('C', 'D', LogicType.FS, 0)
+    cpm.add_relationship('C', 'E', LogicType.SF, 3)
+    return cpm
+
+
+def _run_reference(cpm: CPMEngine) -> CPMEngine:
+    cpm.forward_pass()
+    cpm.backward_pass()
+    cpm.calculate_float()
+    cpm.find_critical_path()
+    return cpm
+
+
+def test_matches_reference_engine_all_link_types():
+    reference = _run_reference(_small_network())
+    engine = ArrayCPMEngine.from_cpm_engine(_small_network()).run()
+
+    assert engine.project_duration == reference.project_duration
+    assert compare_results(reference, engine) == []
+
+
+def test_matches_reference_engine_synthetic_network():
+    reference = _run_reference(build_synthetic_network(2_000, seed=7, layer_width=50))
+    engine = ArrayCPMEngine.from_cpm_engine(reference).run()
+
+    assert compare_results(reference, engine) == []
+
+
+def test_long_chain_does_not_recurse():
+    cpm = CPMEngine(datetime(2025, 1, 1))
+    chain_length = 20_000
+    for i in range(chain_length):
+        cpm.add_activity(ScheduleActivity(activity_id=f"A{i}", name=f"A{i}", duration=1.0))
+    for i in range(1, chain_length):
+        cpm.add_relationship(f"A{i - 1}", f"A{i}", LogicType.FS, 0.0)
+
+    ArrayCPMEngine.from_cpm_engine(cpm).run().apply_to(cpm, calendar_dates=False)
+
+    assert cpm.project_duration == chain_length
+    assert len(cpm.critical_path) == chain_length
+    assert cpm.activities[f"A{chain_length - 1}"].early_start == chain_length - 1
+
+
+def test_cycle_raises_value_error():
+    cpm = _small_network()
+    cpm.add_relationship('D', 'B', LogicType.FS, 0)
+
+    with pytest.raises(ValueError):
+        ArrayCPMEngine.from_cpm_engine(cpm).run()
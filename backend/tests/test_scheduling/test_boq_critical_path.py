@@ -0,0 +1,89 @@
+"""
+Tests for the CPM-based critical path of the BOQ-to-schedule converter
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+
+from boq_to_schedule import BOQToScheduleConverter
+
+
+def _legacy_critical_path(activities):
+    """المسار الأصلي: DFS يختار المسار الأكثر أنشطة"""
+    start_activities = [act['id'] for act in activities if not act['dependencies']]
+
+    def dfs(activity_id, path, visited):
+        visited.add(activity_id)
+        path.append(activity_id)
+        next_activities = [
+            act['id'] for act in activities
+            if activity_id in act['dependencies'] and act['id'] not in visited
+        ]
+        if not next_activities:
+            return path.copy()
+        longest_path = path.copy()
+        for next_act in next_activities:
+            current_path = dfs(next_act, path.copy(), visited.copy())
+            if len(current_path) > len(longest_path):
+                longest_path = current_path
+        return longest_path
+
+    critical_path = []
+    for start in start_activities:
+        path = dfs(start, [], set())
+        if len(path) > len(critical_path):
+            critical_path = path
+    return critical_path
+
+
+def _random_activities(count, seed, duration=None):
+    rng = random.Random(seed)
+    activities = []
+    for i in range(count):
+        earlier = [act['id'] for act in activities[max(0, i - 6):i]]
+        activities.append({
+            'id': f'ACT-{i}',
+            'duration': duration if duration is not None else rng.randint(1, 20),
+            'dependencies': rng.sample(earlier, rng.randint(0, min(2, len(earlier))))
+        })
+    return activities
+
+
+def test_matches_legacy_path_when_durations_are_equal():
+    converter = BOQToScheduleConverter()
+    for seed in range(20):
+        activities = _random_activities(14, seed, duration=3)
+        assert converter.find_critical_path(activities) == _legacy_critical_path(activities), seed
+
+
+def test_critical_path_follows_duration_and_matches_dates():
+    converter = BOQToScheduleConverter()
+    activities = [
+        {'id': 'A', 'duration': 30, 'dependencies': []},
+        {'id': 'B', 'duration': 2, 'dependencies': []},
+        {'id': 'C', 'duration': 2, 'dependencies': ['B']},
+        {'id': 'D', 'duration': 2, 'dependencies': ['C']},
+        {'id': 'E', 'duration': 5, 'dependencies': ['A', 'D']},
+        {'id': 'F', 'duration': 1, 'dependencies': ['A']},
+        {'id': 'G', 'duration': 5, 'dependencies': ['A']},
+    ]
+    # المسار القديم يختار الأكثر أنشطة رغم أنه الأقصر مدة
+    assert _legacy_critical_path(activities) == ['B', 'C', 'D', 'E']
+
+    analysis = converter.analyze_critical_paths(activities, near_critical_threshold=4)
+    assert analysis['critical_paths'] == [['A', 'E'], ['A', 'G']]
+    assert analysis['near_critical_activities'] == ['F']
+    assert analysis['total_float']['B'] == 22
+
+    start = datetime(2025, 1, 1)
+    dated = converter.calculate_dates([dict(act) for act in activities], start)
+    assert max(act['end_date'] for act in dated) == start + timedelta(days=analysis['project_duration'])
+
+
+def test_large_schedule_is_linear():
+    activities = _random_activities(2000, seed=7)
+    started = time.perf_counter()
+    analysis = BOQToScheduleConverter().analyze_critical_paths(activities)
+    assert time.perf_counter() - started < 2
+    assert analysis['critical_paths'] and len(analysis['critical_paths']) <= 10
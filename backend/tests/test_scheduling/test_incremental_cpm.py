@@ -0,0 +1,65 @@
+"""
+Tests for incremental CPM recalculation
+"""
+
+import random
+
+import pytest
+
+from backend.data.activity_breakdown_rules import LogicType
+from backend.scheduling.array_cpm import ArrayCPMEngine
+from backend.benchmarks.cpm_benchmark import FIELDS, build_synthetic_network
+
+
+def _calculated_network(seed: int = 3):
+    cpm = build_synthetic_network(400, seed=seed, layer_width=20)
+    ArrayCPMEngine.from_cpm_engine(cpm).run().apply_to(cpm)
+    return cpm
+
+
+def _assert_matches_full_run(cpm):
+    reference = ArrayCPMEngine.from_cpm_engine(cpm).run().to_dict()
+    for aid, activity in cpm.activities.items():
+        for name in FIELDS + ['is_critical']:
+            assert getattr(activity, name) == pytest.approx(reference[aid][name]), f"{aid}.{name}"
+
+
+def test_update_duration_matches_full_recalculation():
+    cpm = _calculated_network()
+    rng = random.Random(11)
+    ids = list(cpm.activities)
+
+    for _ in range(25):
+        aid = rng.choice(ids)
+        old = {a: (act.early_start, act.late_start, act.is_critical) for a, act in cpm.activities.items()}
+        changes = cpm.update_duration(aid, float(rng.randint(1, 30)))
+        _assert_matches_full_run(cpm)
+
+        for a, act in cpm.activities.items():
+            if (act.early_start, act.late_start, act.is_critical) != old[a]:
+                assert a in changes
+
+
+def test_add_and_remove_relationship():
+    cpm = _calculated_network()
+    changes = cpm.add_relationship('A000010', 'A000390', LogicType.FS, 2000.0)
+    _assert_matches_full_run(cpm)
+    assert 'A000390' in changes
+    assert changes['A000390']['calendar_start'] is not None
+
+    cpm.remove_relationship('A000010', 'A000390')
+    _assert_matches_full_run(cpm)
+
+
+def test_add_relationship_rejects_cycle():
+    cpm = _calculated_network()
+    first = next(iter(cpm.activities['A000000'].successors))[0]
+
+    with pytest.raises(ValueError):
+        cpm.add_relationship(first, 'A000000', LogicType.FS, 0.0)
+
+
+def test_edits_before_run_do_not_recalculate():
+    cpm = build_synthetic_network(50, layer_width=10)
+    assert cpm.update_duration('A000001', 4.0) is None
+    assert cpm.activities['A000001'].early_finish == 0.0
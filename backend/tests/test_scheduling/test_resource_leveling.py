@@ -0,0 +1,57 @@
+"""
+Tests for serial-SGS resource leveling
+"""
+
+import pytest
+
+from backend.data.activity_breakdown_rules import LogicType
+from backend.scheduling.resource_leveling import ResourceLeveler, SiteCapacity, PRIORITY_RULES
+from backend.benchmarks.leveling_benchmark import build_leveling_network
+
+
+def _assert_precedence(cpm, starts):
+    for aid, activity in cpm.activities.items():
+        start = starts[aid]
+        finish = start + activity.duration
+        assert start <= activity.late_start + 1e-9
+        for pred_id, logic_type, lag in activity.predecessors:
+            pred_start = starts[pred_id]
+            pred_finish = pred_start + cpm.activities[pred_id].duration
+            if logic_type == LogicType.FS:
+                assert start >= pred_finish + lag - 1e-9
+            elif logic_type == LogicType.SS:
+                assert start >= pred_start + lag - 1e-9
+            elif logic_type == LogicType.FF:
+                assert finish >= pred_finish + lag - 1e-9
+            elif logic_type == LogicType.SF:
+                assert finish >= pred_start + lag - 1e-9
+
+
+@pytest.mark.parametrize('rule', list(PRIORITY_RULES))
+def test_leveling_respects_logic_float_and_lowers_peak(rule):
+    cpm = build_leveling_network(1_000, seed=5)
+    leveler = ResourceLeveler(cpm)
+    original = leveler.analyze_original()
+
+    leveled = leveler.level_resources(priority_rule=rule)
+
+    _assert_precedence(cpm, leveler.leveled_starts)
+    assert leveled.peak_workers <= original.peak_workers
+
+
+def test_site_capacity_is_used_as_limit():
+    cpm = build_leveling_network(500, seed=9)
+    capacity = SiteCapacity(max_workers=10_000, max_beds=10_000, max_meals=10_000,
+                            max_buses=500, workspace_area_m2=1.0)
+    leveler = ResourceLeveler(cpm, capacity)
+
+    leveler.level_resources()
+
+    # A generous cap leaves every activity at its early start
+    assert all(leveler.leveled_starts[aid] == act.early_start for aid, act in cpm.activities.items())
+
+
+def test_unknown_priority_rule():
+    leveler = ResourceLeveler(build_leveling_network(50))
+    with pytest.raises(ValueError):
+        leveler.level_resources(priority_rule='random')
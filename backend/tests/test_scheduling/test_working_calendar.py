@@ -0,0 +1,52 @@
+"""
+Tests for the indexed working-day calendar
+"""
+
+from datetime import date, datetime, timedelta
+
+from backend.core.WorkingCalendar import WorkingCalendar, CalendarException
+
+
+def _step_working_days(calendar, start, days):
+    """Reference day-by-day stepping (the previous implementation)"""
+    current = start
+    added = 0
+    while added < days:
+        current += timedelta(days=1)
+        if calendar.is_working_day(current):
+            added += 1
+    return current
+
+
+def test_add_working_days_matches_day_stepping():
+    calendar = WorkingCalendar(
+        datetime(2025, 1, 1),
+        holidays=[date(2025, 2, 22), '2025-09-23'],
+        exceptions=[CalendarException(date(2025, 3, 30), date(2025, 4, 2), 'Eid al-Fitr')],
+        horizon_days=30,
+    )
+    start = datetime(2025, 1, 1, 7, 30)
+
+    for days in [0, 1, 5, 6, 7, 45, 90, 400, 1500]:
+        assert calendar.add_working_days(start, days) == _step_working_days(calendar, start, days)
+
+
+def test_queries_before_origin_extend_index():
+    calendar = WorkingCalendar(datetime(2025, 6, 1))
+    start = datetime(2024, 12, 25)
+    assert calendar.add_working_days(start, 20) == _step_working_days(calendar, start, 20)
+
+
+def test_offset_round_trip_and_exceptions():
+    ramadan = CalendarException(date(2025, 3, 1), date(2025, 3, 29), 'Ramadan', working=True, hours_factor=0.75)
+    eid = CalendarException(date(2025, 3, 30), date(2025, 4, 2), 'Eid al-Fitr')
+    calendar = WorkingCalendar(datetime(2025, 1, 1), exceptions=[ramadan, eid])
+    start = datetime(2025, 1, 1)
+
+    for offset in [1, 10, 100, 300]:
+        assert calendar.date_to_offset(start, calendar.offset_to_date(start, offset)) == offset
+
+    assert not calendar.is_working_day(date(2025, 3, 31))
+    assert not calendar.is_working_day(date(2025, 1, 3))  # Friday
+    assert calendar.working_hours(date(2025, 3, 10)) == 6.0
+    assert calendar.working_hours(date(2025, 5, 5)) == 8.0
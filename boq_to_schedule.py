@@ -12,6 +12,16 @@ from datetime import datetime, timedelta
 import re
 from typing import List, Dict, Tuple
 
+import numpy as np
+
+from backend.scheduling.array_cpm import ArrayCPMEngine, CRITICAL_TOLERANCE, LINK_FS, build_network
+
+# calculate_dates يبدأ النشاط في اليوم التالي لانتهاء آخر تبعية (FS + يوم)
+DEPENDENCY_LAG_DAYS = 1
+
+# الأنشطة التي فائضها الكلي لا يتجاوز هذا الحد (بالأيام) تُعد شبه حرجة
+NEAR_CRITICAL_THRESHOLD = 5
+
 class BOQToScheduleConverter:
     """محول المقايسة إلى جدول زمني"""
     
@@ -225,8 +235,10 @@ class BOQToScheduleConverter:
         
         # تحديد المسار الحرج (أطول مسار)
         print("\n🎯 جاري تحديد المسار الحرج...")
-        critical_path = self.find_critical_path(activities)
+        critical_analysis = self.analyze_critical_paths(activities)
+        critical_path = critical_analysis['critical_paths'][0] if critical_analysis['critical_paths'] else []
         print(f"✅ المسار الحرج يحتوي على {len(critical_path)} نشاط")
+        print(f"✅ الأنشطة شبه الحرجة: {len(critical_analysis['near_critical_activities'])} نشاط")
         
         # إحصائيات
         work_types_count = {}
@@ -259,63 +271,110 @@ class BOQToScheduleConverter:
                 for act in activities
             ],
             'critical_path': critical_path,
+            'critical_paths': critical_analysis['critical_paths'],
+            'near_critical_activities': critical_analysis['near_critical_activities'],
             'statistics': {
                 'total_activities': len(activities),
                 'total_duration': total_duration,
                 'total_dependencies': total_dependencies,
                 'work_types': work_types_count,
-                'critical_path_length': len(critical_path)
+                'critical_path_length': len(critical_path),
+                'critical_paths_count': len(critical_analysis['critical_paths']),
+                'near_critical_count': len(critical_analysis['near_critical_activities'])
             }
         }
         
         return result
     
+    def analyze_critical_paths(self, activities: List[Dict],
+                               near_critical_threshold: float = NEAR_CRITICAL_THRESHOLD,
+                               max_paths: int = 10) -> Dict:
+        """
+        تحليل المسار الحرج بمحرك CPM المُصفوفي - O(V+E)
+        
+        الوزن = مدة النشاط + فاصل التبعية (نفس calculate_dates)
+        
+        Returns:
+            - critical_paths: المسارات الحرجة (حتى max_paths) من البداية للنهاية
+            - critical_activities: كل الأنشطة ذات الفائض الصفري
+            - near_critical_activities: أنشطة فائضها 0 < TF <= near_critical_threshold
+            - total_float: الفائض الكلي لكل نشاط
+            - project_duration: طول أطول مسار بالأيام
+        """
+        
+        activity_ids = [act['id'] for act in activities]
+        known = set(activity_ids)
+        network = build_network(
+            activity_ids,
+            [act['duration'] for act in activities],
+            (
+                (dep_id, act['id'], LINK_FS, DEPENDENCY_LAG_DAYS)
+                for act in activities
+                for dep_id in act['dependencies']
+                if dep_id in known
+            )
+        )
+        engine = ArrayCPMEngine(network).run()
+        
+        total_float = engine.total_float
+        near_critical = np.flatnonzero(
+            ~engine.is_critical & (total_float <= near_critical_threshold + CRITICAL_TOLERANCE)
+        )
+        
+        return {
+            'project_duration': engine.project_duration,
+            'critical_paths': self._critical_chains(engine, max_paths),
+            'critical_activities': list(engine.critical_path),
+            'near_critical_activities': [activity_ids[i] for i in near_critical],
+            'total_float': dict(zip(activity_ids, total_float.tolist()))
+        }
+    
+    @staticmethod
+    def _critical_chains(engine: ArrayCPMEngine, max_paths: int) -> List[List[str]]:
+        """
+        المسارات الحرجة: سلاسل الروابط المُقيِّدة (EF + lag = ES) بين الأنشطة الحرجة
+        
+        البحث بالعمق على الروابط المُقيِّدة فقط، والتوقف بعد max_paths مسار
+        """
+        
+        net = engine.network
+        critical = engine.is_critical
+        driving = (
+            critical[net.edge_pred] & critical[net.edge_succ] &
+            (np.abs(engine.early_finish[net.edge_pred] + net.edge_lag - engine.early_start[net.edge_succ])
+             < CRITICAL_TOLERANCE)
+        )
+        
+        # قائمة التجاور للروابط المُقيِّدة (ترتيب CSR = ترتيب الأنشطة)
+        driving_successors: Dict[int, List[int]] = {}
+        has_driving_predecessor = np.zeros(net.activity_count, dtype=bool)
+        for pred, succ in zip(net.edge_pred[driving].tolist(), net.edge_succ[driving].tolist()):
+            driving_successors.setdefault(pred, []).append(succ)
+            has_driving_predecessor[succ] = True
+        
+        starts = np.flatnonzero(critical & ~has_driving_predecessor & (engine.early_start < CRITICAL_TOLERANCE))
+        
+        paths: List[List[str]] = []
+        for start in starts.tolist():
+            stack = [(start, [start])]
+            while stack and len(paths) < max_paths:
+                node, path = stack.pop()
+                successors = driving_successors.get(node)
+                if not successors:
+                    paths.append([net.activity_ids[i] for i in path])
+                    continue
+                for succ in reversed(successors):
+                    stack.append((succ, path + [succ]))
+            if len(paths) >= max_paths:
+                break
+        
+        return paths
+    
     def find_critical_path(self, activities: List[Dict]) -> List[str]:
-        """إيجاد المسار الحرج (أطول مسار من البداية للنهاية)"""
-        
-        # بناء شجرة التبعيات
-        graph = {act['id']: act['dependencies'] for act in activities}
-        
-        # إيجاد الأنشطة التي لا تعتمد على أي شيء (نقاط البداية)
-        start_activities = [act['id'] for act in activities if not act['dependencies']]
-        
-        # إيجاد الأنشطة التي لا يعتمد عليها أي شيء (نقاط النهاية)
-        all_dependencies = set()
-        for deps in graph.values():
-            all_dependencies.update(deps)
-        
-        end_activities = [act_id for act_id in graph.keys() if act_id not in all_dependencies]
-        
-        # DFS للبحث عن أطول مسار
-        def dfs(activity_id, path, visited):
-            visited.add(activity_id)
-            path.append(activity_id)
-            
-            # البحث في الأنشطة التي تعتمد على هذا النشاط
-            next_activities = [
-                act['id'] for act in activities 
-                if activity_id in act['dependencies'] and act['id'] not in visited
-            ]
-            
-            if not next_activities:
-                return path.copy()
-            
-            longest_path = path.copy()
-            for next_act in next_activities:
-                current_path = dfs(next_act, path.copy(), visited.copy())
-                if len(current_path) > len(longest_path):
-                    longest_path = current_path
-            
-            return longest_path
-        
-        # إيجاد أطول مسار من كل نقطة بداية
-        critical_path = []
-        for start in start_activities:
-            path = dfs(start, [], set())
-            if len(path) > len(critical_path):
-                critical_path = path
+        """إيجاد المسار الحرج (أطول مسار بالمدة من البداية للنهاية)"""
         
-        return critical_path
+        paths = self.analyze_critical_paths(activities, max_paths=1)['critical_paths']
+        return paths[0] if paths else []
 
 
 def main():